@@ -0,0 +1,182 @@
+"""Compare the ORM entity list path with the Core row list path.
+
+Seeds a temporary SQLite database and measures, per 100-row page, the time and the
+peak Python memory (tracemalloc) of list + domain mapping for both paths.
+
+Usage:
+    uv run python scripts/bench_list_paths.py [--pets 10000] [--size 100] [--rounds 50]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import statistics
+import tempfile
+import time
+import tracemalloc
+import uuid
+from collections.abc import Awaitable, Callable
+from pathlib import Path
+
+import click
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
+
+from python_toy.server.petstore.category_repository import CategoryRepository
+from python_toy.server.petstore.db_models import (
+    Base,
+    CategoryEntity,
+    PetEntity,
+    PetTagAssociation,
+    StatusEnum,
+    TagEntity,
+    UserEntity,
+)
+from python_toy.server.petstore.mappers import CategoryMapper, PetMapper, UserMapper
+from python_toy.server.petstore.pet_repository import PetRepository
+from python_toy.server.petstore.query_options import PetQueryOptions
+from python_toy.server.petstore.user_repository import UserRepository
+
+
+async def _seed(session: AsyncSession, pets: int) -> None:
+    categories = [{"id": str(uuid.uuid4()), "name": f"category-{i}"} for i in range(20)]
+    users = [
+        {
+            "id": str(uuid.uuid4()),
+            "username": f"user-{i}",
+            "first_name": "First",
+            "last_name": "Last",
+            "email": f"user-{i}@example.com",
+            "password": "password123",
+            "phone": None,
+        }
+        for i in range(200)
+    ]
+    tags = [{"id": str(uuid.uuid4()), "name": f"tag-{i}"} for i in range(50)]
+    pet_rows = [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"pet-{i}",
+            "category_id": categories[i % len(categories)]["id"],
+            "status": StatusEnum.available,
+            "photo_urls": json.dumps([f"http://example.com/{i}.jpg"]),
+            "owner_id": users[i % len(users)]["id"],
+        }
+        for i in range(pets)
+    ]
+    links = [
+        {"pet_id": pet["id"], "tag_id": tags[(i + k) % len(tags)]["id"]}
+        for i, pet in enumerate(pet_rows)
+        for k in range(3)
+    ]
+    await session.execute(insert(CategoryEntity), categories)
+    await session.execute(insert(UserEntity), users)
+    await session.execute(insert(TagEntity), tags)
+    await session.execute(insert(PetEntity), pet_rows)
+    await session.execute(insert(PetTagAssociation), links)
+    await session.commit()
+
+
+async def _measure(rounds: int, pages: int, run: Callable[[int], Awaitable[int]]) -> tuple[float, float, float]:
+    """Return (median ms/page, rows/s, median peak KiB/page)."""
+    durations: list[float] = []
+    peaks: list[float] = []
+    rows = 0
+    for i in range(rounds):
+        page = i % pages + 1
+        tracemalloc.start()
+        started = time.perf_counter()
+        rows += await run(page)
+        durations.append(time.perf_counter() - started)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024)
+        tracemalloc.stop()
+    return statistics.median(durations) * 1000, rows / sum(durations), statistics.median(peaks)
+
+
+async def _bench(pets: int, size: int, rounds: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{Path(tmp) / 'bench.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        async with factory() as session:
+            await _seed(session, pets)
+
+        pages = max(1, pets // size)
+        results: dict[str, tuple[float, float, float]] = {}
+
+        async def orm_pets(page: int) -> int:
+            async with factory() as session:
+                repo = PetRepository(lambda: session)
+                entities, _ = await repo.list_with_options(page=page, size=size, options=PetQueryOptions.all())
+                return len([PetMapper.to_domain(entity) for entity in entities])
+
+        async def row_pets(page: int) -> int:
+            async with factory() as session:
+                repo = PetRepository(lambda: session)
+                result = await repo.list_rows_with_options(page=page, size=size, options=PetQueryOptions.all())
+                items = [
+                    PetMapper.row_to_domain(
+                        row,
+                        category=result.categories.get(row.category_id),
+                        owner=result.owners.get(row.owner_id),
+                        tags=result.tags.get(row.id),
+                    )
+                    for row in result.rows
+                ]
+                return len(items)
+
+        async def orm_users(page: int) -> int:
+            async with factory() as session:
+                await UserRepository(lambda: session).count()  # parity with the row path
+                q = select(UserEntity).order_by(UserEntity.username).offset((page - 1) * size).limit(size)
+                entities = (await session.execute(q)).scalars().all()
+                return len([UserMapper.to_domain(entity) for entity in entities])
+
+        async def row_users(page: int) -> int:
+            async with factory() as session:
+                rows, _ = await UserRepository(lambda: session).list(page=page, size=size)
+                return len([UserMapper.row_to_domain(row) for row in rows])
+
+        async def orm_categories(page: int) -> int:
+            async with factory() as session:
+                await CategoryRepository(lambda: session).count()  # parity with the row path
+                q = select(CategoryEntity).order_by(CategoryEntity.name).offset((page - 1) * size).limit(size)
+                entities = (await session.execute(q)).scalars().all()
+                return len([CategoryMapper.to_domain(entity) for entity in entities])
+
+        async def row_categories(page: int) -> int:
+            async with factory() as session:
+                rows, _ = await CategoryRepository(lambda: session).list(page=page, size=size)
+                return len([CategoryMapper.row_to_domain(row) for row in rows])
+
+        user_pages = max(1, 200 // size)
+        for name, run, n_pages in [
+            ("pets/orm", orm_pets, pages),
+            ("pets/rows", row_pets, pages),
+            ("users/orm", orm_users, user_pages),
+            ("users/rows", row_users, user_pages),
+            ("categories/orm", orm_categories, 1),
+            ("categories/rows", row_categories, 1),
+        ]:
+            await run(1)  # warm up statement caches
+            results[name] = await _measure(rounds, n_pages, run)
+
+        await engine.dispose()
+
+    click.echo(f"{'path':<18}{'ms/page':>10}{'rows/s':>12}{'peak KiB':>11}")
+    for name, (ms, rows_per_s, peak) in results.items():
+        click.echo(f"{name:<18}{ms:>10.2f}{rows_per_s:>12.0f}{peak:>11.0f}")
+
+
+@click.command()
+@click.option("--pets", default=10_000, type=int)
+@click.option("--size", default=100, type=int)
+@click.option("--rounds", default=50, type=int)
+def main(pets: int, size: int, rounds: int) -> None:
+    asyncio.run(_bench(pets, size, rounds))
+
+
+if __name__ == "__main__":
+    main()
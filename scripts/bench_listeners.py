@@ -0,0 +1,123 @@
+"""Compare request latency over TCP loopback and a Unix domain socket.
+
+Starts the server once per transport (`server --port` and `server --uds`) against a temporary
+database and times sequential GET /.internal/healthz/liveness requests from a raw HTTP/1.1
+client, both on one keep-alive connection and with a new connection per request.
+
+Usage:
+    uv run python scripts/bench_listeners.py [--requests 5000] [--workers 1]
+"""
+
+from __future__ import annotations
+
+import os
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Callable
+from pathlib import Path
+
+import click
+
+_REQUEST = b"GET /.internal/healthz/liveness HTTP/1.1\r\nHost: bench\r\n\r\n"
+
+
+def _percentiles(durations: list[float]) -> str:
+    quantiles = statistics.quantiles(durations, n=100)
+    return f"p50 {quantiles[49] * 1e6:7.1f} us  p99 {quantiles[98] * 1e6:7.1f} us  mean {statistics.mean(durations) * 1e6:7.1f} us"
+
+
+def _read_response(sock: socket.socket) -> None:
+    data = b""
+    while b"\r\n\r\n" not in data:
+        data += sock.recv(65536)
+    head, _, body = data.partition(b"\r\n\r\n")
+    length = next(
+        int(line.split(b":", 1)[1]) for line in head.split(b"\r\n") if line.lower().startswith(b"content-length:")
+    )
+    while len(body) < length:
+        body += sock.recv(65536)
+
+
+def _keep_alive(connect: Callable[[], socket.socket], requests: int) -> list[float]:
+    durations = []
+    with connect() as sock:
+        for _ in range(requests):
+            started = time.perf_counter()
+            sock.sendall(_REQUEST)
+            _read_response(sock)
+            durations.append(time.perf_counter() - started)
+    return durations
+
+
+def _new_connections(connect: Callable[[], socket.socket], requests: int) -> list[float]:
+    durations = []
+    for _ in range(requests):
+        started = time.perf_counter()
+        with connect() as sock:
+            sock.sendall(_REQUEST)
+            _read_response(sock)
+        durations.append(time.perf_counter() - started)
+    return durations
+
+
+def _tcp_connect(port: int) -> socket.socket:
+    sock = socket.create_connection(("127.0.0.1", port))
+    sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return sock
+
+
+def _uds_connect(path: Path) -> socket.socket:
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.connect(str(path))
+    return sock
+
+
+def _wait_until_serving(connect: Callable[[], socket.socket]) -> None:
+    deadline = time.monotonic() + 30
+    while True:
+        try:
+            with connect() as sock:
+                sock.sendall(_REQUEST)
+                _read_response(sock)
+                return
+        except OSError:
+            if time.monotonic() > deadline:
+                raise
+            time.sleep(0.1)
+
+
+@click.command()
+@click.option("--requests", default=5000, show_default=True)
+@click.option("--workers", default=1, show_default=True)
+def main(requests: int, workers: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "APP_DATABASE_URL": f"sqlite+aiosqlite:///{tmp}/bench.db", "APP_LOGGING.LEVEL": "WARNING"}
+        uds = Path(tmp) / "server.sock"
+        transports: list[tuple[str, list[str], Callable[[], socket.socket]]] = [
+            ("tcp loopback", ["--host", "127.0.0.1", "--port", "18080"], lambda: _tcp_connect(18080)),
+            ("unix socket", ["--uds", str(uds)], lambda: _uds_connect(uds)),
+        ]
+        for name, args, connect in transports:
+            server = subprocess.Popen(
+                [sys.executable, "-m", "python_toy.server.main", *args, "--workers", str(workers)],
+                env=env,
+                stdout=subprocess.DEVNULL,
+                stderr=subprocess.DEVNULL,
+            )
+            try:
+                _wait_until_serving(connect)
+                _keep_alive(connect, min(requests, 500))  # warm up
+                print(f"{name:13} keep-alive      {_percentiles(_keep_alive(connect, requests))}")
+                print(f"{name:13} new connection  {_percentiles(_new_connections(connect, requests))}")
+            finally:
+                server.send_signal(signal.SIGTERM)
+                server.wait()
+
+
+if __name__ == "__main__":
+    main()
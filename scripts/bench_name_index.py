@@ -0,0 +1,63 @@
+"""Measure NameIndex load time, memory and suggest/add/remove latency percentiles.
+
+Usage:
+    uv run python scripts/bench_name_index.py [--names 1000000] [--lookups 100000]
+"""
+
+from __future__ import annotations
+
+import random
+import statistics
+import string
+import time
+import tracemalloc
+import uuid
+
+import click
+
+from python_toy.server.infra.name_index import NameIndex
+
+
+def _percentiles(durations: list[float]) -> str:
+    quantiles = statistics.quantiles(durations, n=100)
+    return f"p50 {quantiles[49] * 1e6:7.1f} us  p99 {quantiles[98] * 1e6:7.1f} us  max {max(durations) * 1e6:7.1f} us"
+
+
+@click.command()
+@click.option("--names", default=1_000_000, type=int)
+@click.option("--lookups", default=100_000, type=int)
+@click.option("--limit", default=10, type=int)
+def main(names: int, lookups: int, limit: int) -> None:
+    rnd = random.Random(42)
+    alphabet = string.ascii_lowercase
+    entries = [(str(uuid.uuid4()), "".join(rnd.choices(alphabet, k=rnd.randint(4, 16)))) for _ in range(names)]
+
+    index = NameIndex()
+    tracemalloc.start()
+    started = time.perf_counter()
+    index.load(entries)
+    load_s = time.perf_counter() - started
+    peak_mib = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    click.echo(f"load {names} names: {load_s:.2f}s, peak {peak_mib:.0f} MiB")
+
+    prefixes = [name[: rnd.randint(1, 4)] for _, name in rnd.sample(entries, min(lookups, names))]
+    durations = []
+    for prefix in prefixes:
+        started = time.perf_counter()
+        index.suggest(prefix, limit)
+        durations.append(time.perf_counter() - started)
+    click.echo(f"suggest  {_percentiles(durations)}")
+
+    added = [(str(uuid.uuid4()), "".join(rnd.choices(alphabet, k=8))) for _ in range(1_000)]
+    for label, op in (("add", index.add), ("remove", index.remove)):
+        durations = []
+        for entity_id, name in added:
+            started = time.perf_counter()
+            op(entity_id, name)
+            durations.append(time.perf_counter() - started)
+        click.echo(f"{label:<8} {_percentiles(durations)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""Show index use and timing of pet list filters on a large SQLite dataset.
+
+Builds (or reuses) a SQLite file with N pets, then prints EXPLAIN QUERY PLAN and the median
+time of the page and count queries that PetRepository issues for each filter combination.
+
+Usage:
+    uv run python scripts/bench_pet_filters.py [--pets 1000000] [--db /tmp/pets-bench.db]
+"""
+
+from __future__ import annotations
+
+import random
+import sqlite3
+import statistics
+import time
+import uuid
+from pathlib import Path
+
+import click
+from sqlalchemy import ClauseElement, create_engine, func, select
+from sqlalchemy.dialects import sqlite
+
+from python_toy.server.petstore.db_models import Base, PetEntity
+from python_toy.server.petstore.pet_repository import PetRepository
+from python_toy.server.petstore.query_options import PetFilter
+
+_STATUSES = ("available", "pending", "sold")
+
+
+def _seed(path: Path, pets: int) -> tuple[str, str, str]:
+    """Create the schema and N pets; return a (category_id, owner_id, tag name) to filter on."""
+    engine = create_engine(f"sqlite:///{path}")
+    Base.metadata.create_all(engine)
+    engine.dispose()
+
+    rnd = random.Random(42)
+    categories = [(str(uuid.uuid4()), f"category-{i}") for i in range(100)]
+    users = [
+        (str(uuid.uuid4()), f"user-{i}", "First", "Last", f"user-{i}@example.com", "password123") for i in range(10_000)
+    ]
+    tags = [(str(uuid.uuid4()), f"tag-{i}") for i in range(1_000)]
+
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    with conn:
+        conn.executemany("INSERT INTO categories (id, name) VALUES (?, ?)", categories)
+        conn.executemany(
+            "INSERT INTO users (id, username, first_name, last_name, email, password) VALUES (?, ?, ?, ?, ?, ?)",
+            users,
+        )
+        conn.executemany("INSERT INTO tags (id, name) VALUES (?, ?)", tags)
+        batch = 100_000
+        for start in range(0, pets, batch):
+            rows = []
+            links = []
+            for _ in range(start, min(start + batch, pets)):
+                pet_id = str(uuid.uuid4())
+                rows.append(
+                    (
+                        pet_id,
+                        "pet",
+                        rnd.choice(categories)[0],
+                        rnd.choice(_STATUSES),
+                        "[]",
+                        rnd.choice(users)[0],
+                    )
+                )
+                links.extend((pet_id, tag[0]) for tag in rnd.sample(tags, 2))
+            conn.executemany(
+                "INSERT INTO pets (id, name, category_id, status, photo_urls, owner_id) VALUES (?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            conn.executemany("INSERT INTO pet_tags (pet_id, tag_id) VALUES (?, ?)", links)
+    conn.execute("ANALYZE")
+    conn.close()
+    return categories[0][0], users[0][0], tags[0][1]
+
+
+def _sample_values(path: Path) -> tuple[str, str, str]:
+    conn = sqlite3.connect(path)
+    category_id = conn.execute("SELECT id FROM categories ORDER BY name LIMIT 1").fetchone()[0]
+    owner_id = conn.execute("SELECT owner_id FROM pets LIMIT 1").fetchone()[0]
+    tag = conn.execute("SELECT name FROM tags ORDER BY name LIMIT 1").fetchone()[0]
+    conn.close()
+    return category_id, owner_id, tag
+
+
+def _compile(stmt: ClauseElement) -> str:
+    return str(stmt.compile(dialect=sqlite.dialect(), compile_kwargs={"literal_binds": True}))
+
+
+def _time(conn: sqlite3.Connection, sql: str, rounds: int) -> float:
+    durations = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        conn.execute(sql).fetchall()
+        durations.append(time.perf_counter() - started)
+    return statistics.median(durations) * 1000
+
+
+@click.command()
+@click.option("--pets", default=1_000_000, type=int)
+@click.option("--db", "db_path", default="/tmp/pets-bench.db", type=click.Path(path_type=Path))
+@click.option("--rounds", default=20, type=int)
+def main(pets: int, db_path: Path, rounds: int) -> None:
+    if db_path.exists():
+        category_id, owner_id, tag = _sample_values(db_path)
+    else:
+        started = time.perf_counter()
+        category_id, owner_id, tag = _seed(db_path, pets)
+        click.echo(f"seeded {pets} pets in {time.perf_counter() - started:.1f}s")
+
+    scenarios = {
+        "status": PetFilter(status="sold"),
+        "category": PetFilter(category_id=category_id),
+        "owner": PetFilter(owner_id=owner_id),
+        "tag": PetFilter(tag=tag),
+        "status+category": PetFilter(status="sold", category_id=category_id),
+        "status+tag": PetFilter(status="available", tag=tag),
+    }
+
+    conn = sqlite3.connect(db_path)
+    for name, pet_filter in scenarios.items():
+        where = PetRepository.filter_clauses(pet_filter)
+        page_sql = _compile(select(*PetRepository.ROW_COLUMNS).where(*where).order_by(PetEntity.id).limit(100))
+        count_sql = _compile(select(func.count()).select_from(PetEntity).where(*where))
+
+        click.echo(f"== {name}")
+        for label, sql in (("page", page_sql), ("count", count_sql)):
+            plan = [row[3] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}")]
+            click.echo(f"  {label:<5} {_time(conn, sql, rounds):8.2f} ms  plan: {' | '.join(plan)}")
+    conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Load test the order purchase path: N concurrent buyers race for one pet.
+
+Creates one pet and N users, then sends N concurrent POST /v1/orders for that pet and checks
+that exactly one order wins (201) and every other buyer gets 409. By default the app runs
+in-process against a temporary SQLite file; pass --url to test a running server instead.
+
+Usage:
+    uv run python scripts/load_test_orders.py [--buyers 1000] [--url http://127.0.0.1:8000]
+"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import statistics
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from contextlib import AsyncExitStack
+from pathlib import Path
+
+import click
+import httpx
+
+_CREATE_CONCURRENCY = 50
+
+
+async def _create_users(client: httpx.AsyncClient, count: int) -> list[str]:
+    run = uuid.uuid4().hex[:8]
+    user_ids: list[str] = []
+    for start in range(0, count, _CREATE_CONCURRENCY):
+        responses = await asyncio.gather(
+            *(
+                client.post(
+                    "/v1/users",
+                    json={
+                        "username": f"buyer-{run}-{n}",
+                        "first_name": "Load",
+                        "last_name": "Test",
+                        "email": f"buyer-{run}-{n}@example.com",
+                        "password": "password123",
+                    },
+                )
+                for n in range(start, min(start + _CREATE_CONCURRENCY, count))
+            )
+        )
+        user_ids.extend(response.raise_for_status().json()["id"] for response in responses)
+    return user_ids
+
+
+async def _buy(client: httpx.AsyncClient, pet_id: str, user_id: str) -> tuple[int, float]:
+    started = time.perf_counter()
+    response = await client.post("/v1/orders", json={"pet_id": pet_id, "user_id": user_id})
+    return response.status_code, time.perf_counter() - started
+
+
+async def _run(buyers: int, url: str | None) -> bool:
+    async with AsyncExitStack() as stack:
+        if url is None:
+            tmp = stack.enter_context(tempfile.TemporaryDirectory())
+            os.environ["APP_DATABASE_URL"] = f"sqlite+aiosqlite:///{Path(tmp) / 'orders.db'}"
+            from python_toy.server.app import create_app
+
+            app = create_app()
+            await stack.enter_async_context(app.router.lifespan_context(app))
+            # The engine echoes every statement; logging 1000s of them would dominate the timings
+            app.state.container.db_engine().echo = False
+            # Unhandled app errors come back as 500s and are counted, like with a real server
+            transport: httpx.AsyncBaseTransport = httpx.ASGITransport(app=app, raise_app_exceptions=False)
+            base_url = "http://load-test"
+        else:
+            transport = httpx.AsyncHTTPTransport(limits=httpx.Limits(max_connections=buyers))
+            base_url = url
+        client = await stack.enter_async_context(httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60))
+
+        pet_id = (await client.post("/v1/pets", json={"name": "Contested"})).raise_for_status().json()["id"]
+        user_ids = await _create_users(client, buyers)
+
+        started = time.perf_counter()
+        results = await asyncio.gather(*(_buy(client, pet_id, user_id) for user_id in user_ids))
+        elapsed = time.perf_counter() - started
+
+    statuses = Counter(status for status, _ in results)
+    latencies = sorted(latency * 1000 for _, latency in results)
+    click.echo(f"{buyers} buyers in {elapsed:.2f}s ({buyers / elapsed:.0f} orders/s)")
+    click.echo(f"statuses: {dict(sorted(statuses.items()))}")
+    click.echo(
+        f"latency ms: p50 {statistics.median(latencies):.1f}  "
+        f"p99 {latencies[int(len(latencies) * 0.99) - 1]:.1f}  max {latencies[-1]:.1f}"
+    )
+    return statuses == Counter({201: 1, 409: buyers - 1})
+
+
+@click.command()
+@click.option("--buyers", default=1_000, type=int)
+@click.option("--url", default=None, help="Base URL of a running server; default runs the app in-process")
+def main(buyers: int, url: str | None) -> None:
+    if asyncio.run(_run(buyers, url)):
+        click.echo("OK: exactly one winner")
+        return
+    click.echo("FAIL: expected one 201 and only 409s otherwise", err=True)
+    sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
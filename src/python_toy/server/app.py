@@ -1,21 +1,44 @@
 from contextlib import asynccontextmanager
 import contextlib
-from typing import AsyncIterator
+from typing import Any, AsyncIterator
 
 from fastapi import FastAPI
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from python_toy.server.infra.admission import AdmissionMiddleware
 from python_toy.server.infra import health as health_module
+from python_toy.server.infra import metrics as metrics_module
 from python_toy.server.infra.error import middleware as error_middleware
+from python_toy.server.infra.http_cache import HttpCacheMiddleware
+from python_toy.server.infra.idempotency import IdempotencyMiddleware
 from python_toy.server.infra import logging as logging_module
 from python_toy.server.infra.middleware import SessionMiddleware
+from python_toy.server.infra.request_deadline import DeadlineMiddleware
+from python_toy.server.infra.db_circuit import CircuitBreakerMiddleware
+from python_toy.server.infra.route_match import RouteMatchMiddleware
 from python_toy.server.petstore.pet_api import router as pet_router
 from python_toy.server.petstore.category_api import router as category_router
 from python_toy.server.petstore.tag_api import router as tag_router
 from python_toy.server.petstore.user_api import router as user_router
+from python_toy.server.petstore.order_api import router as order_router
+from python_toy.server.petstore.store_api import router as store_router
+from python_toy.server.petstore.change_api import CHANGE_TABLES, router as change_router
+from python_toy.server.petstore.batch_api import router as batch_router
 from python_toy.server.infra import container as container_module
+from python_toy.server.infra.change_feed import ChangeFeed
 from python_toy.server.infra.database import create_tables
+from python_toy.server.infra.invalidation_bus import ChangeHandler, InvalidationBus
+from python_toy.server.infra.versions import VersionRegistry
+from python_toy.server.infra.session_context import session_scope
+from python_toy.server.petstore.base_repository import BaseRepository
+
 
+def create_app(*, create_schema: bool = True) -> FastAPI:
+    """Build the application.
 
-def create_app() -> FastAPI:
+    Pass `create_schema=False` in worker processes whose supervisor has already created the
+    tables, so that concurrently starting workers do not race on DDL.
+    """
     # Build DI container early and obtain settings from it
     container = container_module.Container()
     settings = container.settings()
@@ -31,23 +54,44 @@ async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
 
         # Create tables using engine from container
         engine = container.db_engine()
-        await create_tables(engine)
+        if create_schema:
+            await create_tables(engine)
+
+        # Apply other workers' committed writes; started before the loads below so none are missed
+        invalidation_bus = container.invalidation_bus()
+        if invalidation_bus is not None:
+            invalidation_bus.start()
+            _subscribe_to_external_changes(invalidation_bus, container)
+
+        # Load the in-memory name indexes behind the :suggest endpoints
+        async with session_scope(container.db_session_factory()):
+            tag_count = await container.tag_service().load_name_index()
+            category_count = await container.category_service().load_name_index()
+        logger.info("lifecycle.name_index.loaded", tags=tag_count, categories=category_count)
 
         health_module.set_started()
+        _follow_database_health(container, follow=True)
         logger.info("lifecycle.started")
 
         yield
 
-        # Stop accepting traffic on shutdown
+        # Stop accepting traffic on shutdown, even if the database recovers meanwhile
+        _follow_database_health(container, follow=False)
         health_module.set_readiness_state(False)
         logger.info("lifecycle.shutdown.start")
 
+        if invalidation_bus is not None:
+            invalidation_bus.close()
+        container.change_feed().close()
+
         # cleanup DI resources/wiring
         with contextlib.suppress(Exception):
             container.shutdown_resources()
         # dispose SQLAlchemy engine to ensure all pooled connections are closed
         with contextlib.suppress(Exception):
             await engine.dispose()
+            for class_engine in container.db_traffic_class_engines().values():
+                await class_engine.dispose()
 
     app = FastAPI(
         title="python-toy server",
@@ -58,15 +102,18 @@ async def _lifespan(app: FastAPI) -> AsyncIterator[None]:
 
     error_middleware.setup(app)
 
-    # Add session middleware with session factory from container
-    session_factory = container.db_session_factory()
-    app.add_middleware(SessionMiddleware, session_factory=session_factory)
+    _add_middleware(app, container)
 
     app.include_router(health_module.router)
+    app.include_router(metrics_module.router)
     app.include_router(pet_router)
     app.include_router(category_router)
     app.include_router(tag_router)
     app.include_router(user_router)
+    app.include_router(order_router)
+    app.include_router(store_router)
+    app.include_router(change_router)
+    app.include_router(batch_router)
 
     @app.get("/", tags=["meta"])
     async def root() -> dict[str, str]:
@@ -75,4 +122,97 @@ async def root() -> dict[str, str]:
     return app
 
 
+def _add_middleware(app: FastAPI, container: container_module.Container) -> None:
+    """Install the middleware stack; the last one added is the outermost."""
+    settings = container.settings()
+    # Inside the session middleware, so stored responses commit with the request's writes
+    if settings.idempotency.enabled:
+        app.add_middleware(IdempotencyMiddleware, store=container.idempotency_store(), config=settings.idempotency)
+
+    # Add session middleware with session factory from container
+    session_factory = container.db_session_factory()
+    app.add_middleware(
+        SessionMiddleware,
+        session_factory=session_factory,
+        invalidation_bus=container.invalidation_bus(),
+        versions=container.versions(),
+        traffic_class_session_factories=container.db_traffic_class_session_factories(),
+    )
+    # Sheds load before a session is opened, and picks the traffic class whose pool the session
+    # comes from; cached responses below are served regardless
+    app.add_middleware(
+        AdmissionMiddleware,
+        routes=app.router.routes,
+        limiter=container.admission_limiter(),
+        bulkheads=container.bulkheads(),
+        classes=settings.traffic_classes,
+        config=settings.admission,
+    )
+    # Around admission, so that time spent waiting for a slot counts against the deadline
+    if settings.deadline.enabled:
+        app.add_middleware(DeadlineMiddleware, config=settings.deadline)
+    # Before deadlines and admission: while the database fails, requests need neither
+    circuit_breaker = container.db_circuit_breaker()
+    if circuit_breaker is not None:
+        app.add_middleware(CircuitBreakerMiddleware, breaker=circuit_breaker)
+    # Outermost, so that 304s and cached bodies are served without opening a session
+    if settings.http_cache.enabled:
+        app.add_middleware(HttpCacheMiddleware, versions=container.versions(), config=settings.http_cache)
+    # Outside all of them: matches the request's route once, for those that act on what it declares
+    app.add_middleware(RouteMatchMiddleware, routes=app.router.routes)
+
+
+def _follow_database_health(container: container_module.Container, *, follow: bool) -> None:
+    """Let the circuit breaker report readiness DOWN while the database keeps failing, or stop it.
+
+    While it follows, the probe runs the breaker's trials, as a drained instance gets no requests to.
+    """
+    circuit_breaker = container.db_circuit_breaker()
+    if circuit_breaker is not None:
+        circuit_breaker.set_listener(health_module.set_readiness_state if follow else None)
+    probe = container.db_probe()
+    if probe is not None:
+        if follow:
+            probe.start()
+        else:
+            probe.close()
+
+
+def _subscribe_to_external_changes(invalidation_bus: InvalidationBus, container: container_module.Container) -> None:
+    for table, repository in (
+        ("categories", container.category_repository()),
+        ("tags", container.tag_repository()),
+        ("users", container.user_repository()),
+    ):
+        invalidation_bus.subscribe(table, _external_change_handler(repository, container.db_session_factory()))
+    for table in ("pets", "categories", "tags", "users", "orders"):
+        invalidation_bus.subscribe(table, _version_bump_handler(container.versions(), table))
+    for table in CHANGE_TABLES:
+        invalidation_bus.subscribe(table, _change_feed_handler(container.change_feed()))
+
+
+def _external_change_handler(
+    repository: BaseRepository[Any], session_factory: async_sessionmaker[AsyncSession]
+) -> ChangeHandler:
+    async def handle(entity_ids: list[str]) -> None:
+        async with session_scope(session_factory):
+            await repository.apply_external_changes(entity_ids)
+
+    return handle
+
+
+def _version_bump_handler(versions: VersionRegistry, table: str) -> ChangeHandler:
+    async def handle(entity_ids: list[str]) -> None:
+        versions.bump_all((table, entity_id) for entity_id in entity_ids)
+
+    return handle
+
+
+def _change_feed_handler(feed: ChangeFeed) -> ChangeHandler:
+    async def handle(entity_ids: list[str]) -> None:
+        feed.notify()
+
+    return handle
+
+
 __all__ = ("create_app",)
@@ -0,0 +1,148 @@
+"""Admission control: shed load before it queues on the database connection pool.
+
+Once the pool is exhausted, further requests wait up to the pool timeout for a connection, so
+latency grows for everyone while throughput stays flat. The middleware admits requests up to an
+adaptive concurrency limit, lets a few more wait briefly for a slot, and answers the rest at once
+with 503 and Retry-After, which clients and load balancers can act on.
+
+Each request is served as a traffic class (see traffic_class). Classes wait for the shared limit
+in priority order, so reads queued behind writes go first; a class with its own max_concurrent is
+a bulkhead, limited only by its own fixed budget, so a few exports cannot take the slots of
+interactive requests.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Mapping, Sequence
+
+from starlette.routing import BaseRoute
+from starlette.status import HTTP_500_INTERNAL_SERVER_ERROR, HTTP_503_SERVICE_UNAVAILABLE
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.concurrency_limit import AdaptiveLimiter
+from python_toy.server.infra.config import AdmissionConfig, TrafficClassConfig
+from python_toy.server.infra.error.problem import problem_response
+from python_toy.server.infra.route_match import INTERNAL_PREFIX
+from python_toy.server.infra.traffic_class import (
+    READ,
+    WRITE,
+    resolve_traffic_class,
+    route_traffic_class,
+    traffic_class_scope,
+)
+
+
+class AdmissionMiddleware:
+    """Limit concurrent requests per traffic class; reject with 503 when the wait queue is full or too slow.
+
+    A request's latency is measured up to the start of its response, so streamed bodies do not
+    count as slowness. Its slot is held until the response is complete.
+    """
+
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        routes: Sequence[BaseRoute],
+        limiter: AdaptiveLimiter | None,
+        bulkheads: Mapping[str, AdaptiveLimiter],
+        classes: Mapping[str, TrafficClassConfig],
+        config: AdmissionConfig,
+    ) -> None:
+        used = {READ, WRITE} | {name for route in routes if (name := route_traffic_class(route)) is not None}
+        if missing := used - classes.keys():
+            msg = f"Traffic classes used by routes are not configured: {sorted(missing)}"
+            raise ValueError(msg)
+        self.app = app
+        # Bulkhead classes use their own limiter, the others the shared one (None when disabled)
+        self._limiters = {name: bulkheads.get(name, limiter) for name in classes}
+        self._priorities = {name: traffic.priority for name, traffic in classes.items()}
+        self._queue_timeout = config.queue_timeout_ms / 1000
+        self._retry_after = str(config.retry_after_seconds)
+        self._exempt = (INTERNAL_PREFIX, *config.exempt_paths)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(self._exempt):
+            await self.app(scope, receive, send)
+            return
+        name = resolve_traffic_class(scope)
+        with traffic_class_scope(name):
+            limiter = self._limiters[name]
+            if limiter is None:
+                await self.app(scope, receive, send)
+            else:
+                await self._limited(limiter, self._priorities[name], scope, receive, send)
+
+    async def _limited(
+        self, limiter: AdaptiveLimiter, priority: int, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if not await limiter.acquire(self._queue_timeout, priority=priority):
+            response = problem_response(
+                status=HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The server is at its concurrency limit; retry later",
+                instance=scope["path"],
+            )
+            response.headers["Retry-After"] = self._retry_after
+            await response(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
+        started = loop.time()
+        latency: float | None = None
+        status = HTTP_500_INTERNAL_SERVER_ERROR
+
+        async def send_and_time(message: Message) -> None:
+            nonlocal latency, status
+            if message["type"] == "http.response.start":
+                latency = loop.time() - started
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_and_time)
+        finally:
+            limiter.release(
+                loop.time() - started if latency is None else latency,
+                dropped=status >= HTTP_500_INTERNAL_SERVER_ERROR,
+            )
+
+
+def create_admission_limiter(config: AdmissionConfig) -> AdaptiveLimiter | None:
+    """Create the limiter from settings and publish its state; None when admission control is disabled."""
+    if not config.enabled:
+        return None
+    limiter = AdaptiveLimiter(
+        initial_limit=config.initial_limit,
+        min_limit=config.min_limit,
+        max_limit=config.max_limit,
+        target_latency=config.target_latency_ms / 1000,
+        backoff_ratio=config.backoff_ratio,
+        queue_size=config.queue_size,
+    )
+    metrics.register("admission", limiter.stats)
+    return limiter
+
+
+def create_bulkheads(classes: Mapping[str, TrafficClassConfig]) -> dict[str, AdaptiveLimiter]:
+    """Create a fixed limiter for each traffic class with its own max_concurrent, and publish their state."""
+    bulkheads = {}
+    for name, traffic in classes.items():
+        if traffic.max_concurrent is None:
+            continue
+        # Equal bounds and no target latency: a fixed budget that never adapts
+        bulkhead = AdaptiveLimiter(
+            initial_limit=traffic.max_concurrent,
+            min_limit=traffic.max_concurrent,
+            max_limit=traffic.max_concurrent,
+            target_latency=float("inf"),
+            backoff_ratio=1.0,
+            queue_size=traffic.queue_size,
+        )
+        metrics.register(f"bulkhead.{name}", bulkhead.stats)
+        bulkheads[name] = bulkhead
+    return bulkheads
+
+
+__all__ = ("AdmissionMiddleware", "create_admission_limiter", "create_bulkheads")
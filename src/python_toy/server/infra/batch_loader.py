@@ -0,0 +1,119 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.config import BatchLoaderConfig
+from python_toy.server.infra.tasks import spawn_detached
+from python_toy.server.infra.versions import VersionRegistry
+
+
+class BatchLoader[V]:
+    """DataLoader-style batching of lookups by key across concurrent callers.
+
+    Keys requested within one batching window (one event loop tick by default) are loaded with a
+    single call of the batch function, in chunks of at most `max_batch` keys, and each caller
+    gets the values of its own keys. Callers asking for a key that is already queued or being
+    loaded share that load. The batch function must not depend on any caller's session.
+
+    With `versions`, a caller only shares loads queued after the last committed write, as with
+    SingleFlight, so that a client never gets relations older than its own write.
+    """
+
+    def __init__(
+        self,
+        batch_function: Callable[[list[str]], Awaitable[Mapping[str, V]]],
+        *,
+        window_seconds: float = 0.0,
+        max_batch: int = 500,
+        versions: VersionRegistry | None = None,
+    ) -> None:
+        self._batch_function = batch_function
+        self._window = window_seconds
+        self._max_batch = max_batch
+        self._versions = versions
+        self._futures: dict[tuple[str, int], asyncio.Future[V | None]] = {}
+        self._queue: list[tuple[str, int]] = []
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.stats = {"requested": 0, "shared": 0, "batches": 0, "loaded": 0}
+
+    async def load_many(self, keys: Iterable[str]) -> dict[str, V]:
+        """Return the values of the keys that exist."""
+        loop = asyncio.get_running_loop()
+        generation = 0 if self._versions is None else self._versions.generation
+        futures: dict[str, asyncio.Future[V | None]] = {}
+        for key in set(keys):
+            self.stats["requested"] += 1
+            future = self._futures.get((key, generation))
+            if future is None:
+                future = loop.create_future()
+                future.add_done_callback(_retrieve)
+                self._futures[key, generation] = future
+                if not self._queue:
+                    self._schedule(loop)
+                self._queue.append((key, generation))
+            else:
+                self.stats["shared"] += 1
+            futures[key] = future
+
+        # Shielded: a cancelled caller must not cancel loads other callers share
+        values = await asyncio.gather(*(asyncio.shield(future) for future in futures.values()))
+        return {key: value for key, value in zip(futures, values, strict=True) if value is not None}
+
+    def _schedule(self, loop: asyncio.AbstractEventLoop) -> None:
+        if self._window > 0:
+            loop.call_later(self._window, self._dispatch)
+        else:
+            loop.call_soon(self._dispatch)
+
+    def _dispatch(self) -> None:
+        queue, self._queue = self._queue, []
+        for start in range(0, len(queue), self._max_batch):
+            task = spawn_detached(self._load(queue[start : start + self._max_batch]))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _load(self, entries: list[tuple[str, int]]) -> None:
+        self.stats["batches"] += 1
+        try:
+            # A key queued under two generations is loaded once for both
+            values = await self._batch_function(list(dict.fromkeys(key for key, _ in entries)))
+        except BaseException as exc:
+            for entry in entries:
+                future = self._futures.pop(entry)
+                if not future.done():
+                    future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+            return
+        self.stats["loaded"] += len(entries)
+        for entry in entries:
+            future = self._futures.pop(entry)
+            if not future.done():
+                future.set_result(values.get(entry[0]))
+
+
+def _retrieve(future: asyncio.Future[Any]) -> None:
+    # Mark exceptions as retrieved when every caller of a load has given up
+    if not future.cancelled():
+        future.exception()
+
+
+def create_batch_loader[V](
+    name: str,
+    batch_function: Callable[[list[str]], Awaitable[Mapping[str, V]]],
+    config: BatchLoaderConfig,
+    versions: VersionRegistry | None = None,
+) -> BatchLoader[V] | None:
+    """Create a loader from settings and publish its counters as `batch_loader.<name>`; None when disabled."""
+    if not config.enabled:
+        return None
+    loader = BatchLoader(
+        batch_function, window_seconds=config.window_ms / 1000, max_batch=config.max_batch, versions=versions
+    )
+    metrics.register(f"batch_loader.{name}", lambda: dict(loader.stats))
+    return loader
+
+
+__all__ = ("BatchLoader", "create_batch_loader")
@@ -0,0 +1,235 @@
+"""In-process fan-out of change log entries to waiting subscribers.
+
+Each worker keeps the newest entries in memory. Subscribers (long-polls, SSE streams) wait on one
+shared event instead of querying the database: a commit in this worker, or a bus message about a
+commit in another worker, triggers a single refresh query whose entries then wake every
+subscriber. While anyone waits, a fallback refresh runs once per poll interval, so the database
+sees at most one change log query per worker per interval however many subscribers are idle.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import weakref
+from bisect import bisect_right
+from dataclasses import dataclass
+from itertools import islice
+from operator import attrgetter
+from typing import Collection, Protocol
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from python_toy.server.infra import logging as logging_module
+from python_toy.server.infra import metrics
+from python_toy.server.infra.config import ChangeFeedConfig
+from python_toy.server.infra.session_context import session_scope
+from python_toy.server.infra.tasks import spawn_detached
+
+logger = logging_module.get_logger(__name__)
+
+# Entries fetched per refresh query; a refresh that fills it fetches again
+_FETCH_SIZE = 1000
+
+_feeds: weakref.WeakSet[ChangeFeed] = weakref.WeakSet()
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeEntry:
+    seq: int
+    table: str
+    entity_id: str
+    op: str
+    at: float  # Unix time of the write
+
+
+@dataclass(frozen=True, slots=True)
+class ChangeBatch:
+    entries: list[ChangeEntry]
+    # Resume from here: every entry up to it has been returned or filtered out
+    cursor: int
+
+
+class ChangeSource(Protocol):
+    """Reads the change log through the current session."""
+
+    async def after(self, seq: int, limit: int) -> list[ChangeEntry]:
+        """Up to `limit` entries with a sequence number above `seq`, oldest first."""
+        ...
+
+    async def latest(self, limit: int) -> list[ChangeEntry]:
+        """Return the newest `limit` entries, oldest first."""
+        ...
+
+
+def notify_committed() -> None:
+    """Tell every feed in this process that change log entries have committed."""
+    for feed in _feeds:
+        feed.notify()
+
+
+_seq = attrgetter("seq")
+
+
+class ChangeFeed:
+    """The newest change log entries of this worker, refreshed once for all of its subscribers."""
+
+    def __init__(
+        self,
+        source: ChangeSource,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        buffer_size: int,
+        poll_interval: float,
+    ) -> None:
+        self._source = source
+        self._session_factory = session_factory
+        self._buffer_size = buffer_size
+        self._poll_interval = poll_interval
+        self._entries: list[ChangeEntry] = []
+        # The buffer holds every entry above `_floor`, up to `_last_seq`; None until the first refresh
+        self._floor = 0
+        self._last_seq: int | None = None
+        # Set when entries may have committed since the last refresh
+        self._stale = True
+        self._advanced = asyncio.Event()
+        self._refreshing: asyncio.Task[None] | None = None
+        self._poller: asyncio.Task[None] | None = None
+        self._waiters = 0
+        self.stats = {"refreshes": 0, "fetched": 0, "buffered": 0, "waiters": 0, "wakeups": 0}
+        _feeds.add(self)
+
+    def notify(self) -> None:
+        """Entries have committed: refresh now if anyone waits for them, otherwise on the next read."""
+        self._stale = True
+        if self._waiters and self._refreshing is None:
+            self._start_refresh()
+
+    async def read(self, since: int, *, limit: int, tables: Collection[str] = ()) -> ChangeBatch | None:
+        """Buffered entries after `since`, restricted to `tables` when given.
+
+        Returns None when the buffer no longer reaches back to `since`: read the database instead.
+        """
+        if self._stale or self._last_seq is None:
+            await self.refresh()
+        assert self._last_seq is not None
+        if since < self._floor:
+            return None
+        entries: list[ChangeEntry] = []
+        cursor = since
+        for entry in islice(self._entries, bisect_right(self._entries, since, key=_seq), None):
+            cursor = entry.seq
+            if not tables or entry.table in tables:
+                entries.append(entry)
+                if len(entries) == limit:
+                    break
+        else:
+            cursor = max(since, self._last_seq)
+        return ChangeBatch(entries, cursor)
+
+    async def wait(self, since: int, max_wait: float) -> bool:
+        """Wait up to `max_wait` seconds for entries after `since`; return whether any have committed."""
+        self._waiters += 1
+        self.stats["waiters"] = self._waiters
+        try:
+            if self._poller is None:
+                self._poller = spawn_detached(self._poll())
+            if self._stale or self._last_seq is None:
+                await self.refresh()
+            try:
+                async with asyncio.timeout(max_wait):
+                    while self._last_seq is None or self._last_seq <= since:
+                        await self._advanced.wait()
+            except TimeoutError:
+                return False
+            return True
+        finally:
+            self._waiters -= 1
+            self.stats["waiters"] = self._waiters
+
+    async def refresh(self) -> None:
+        """Fetch the entries committed since the last refresh; concurrent callers share one fetch."""
+        task = self._refreshing or self._start_refresh()
+        await asyncio.shield(task)
+
+    def close(self) -> None:
+        for task in (self._poller, self._refreshing):
+            if task is not None:
+                task.cancel()
+        _feeds.discard(self)
+
+    def _start_refresh(self) -> asyncio.Task[None]:
+        task = self._refreshing = spawn_detached(self._fetch())
+        task.add_done_callback(self._refresh_done)
+        return task
+
+    def _refresh_done(self, task: asyncio.Task[None]) -> None:
+        self._refreshing = None
+        if not task.cancelled() and task.exception() is not None:
+            self._stale = True
+
+    async def _fetch(self) -> None:
+        while True:
+            # Commits notified from here on need another round
+            self._stale = False
+            async with session_scope(self._session_factory):
+                if self._last_seq is None:
+                    entries = await self._source.latest(self._buffer_size)
+                    self._floor = entries[0].seq - 1 if entries else 0
+                else:
+                    entries = await self._source.after(self._last_seq, _FETCH_SIZE)
+            self.stats["refreshes"] += 1
+            self.stats["fetched"] += len(entries)
+            self._append(entries)
+            if not self._stale and len(entries) < _FETCH_SIZE:
+                return
+
+    def _append(self, entries: list[ChangeEntry]) -> None:
+        if self._last_seq is None:
+            self._last_seq = self._floor
+        if not entries:
+            return
+        self._entries.extend(entries)
+        self._last_seq = entries[-1].seq
+        # Trim in batches of buffer_size, so appends stay amortized O(1)
+        if len(self._entries) >= 2 * self._buffer_size:
+            trimmed = len(self._entries) - self._buffer_size
+            self._floor = self._entries[trimmed - 1].seq
+            del self._entries[:trimmed]
+        self.stats["buffered"] = len(self._entries)
+        self.stats["wakeups"] += 1
+        self._advanced.set()
+        self._advanced = asyncio.Event()
+
+    async def _poll(self) -> None:
+        try:
+            while self._waiters:
+                await asyncio.sleep(self._poll_interval)
+                try:
+                    await self.refresh()
+                except Exception:
+                    logger.exception("change_feed.refresh_failed")
+        finally:
+            self._poller = None
+            # Unwatched, commits in other workers go unnoticed until the next refresh
+            self._stale = True
+
+
+def create_change_feed(
+    source: ChangeSource, session_factory: async_sessionmaker[AsyncSession], config: ChangeFeedConfig
+) -> ChangeFeed:
+    """Create the feed from settings and publish its counters."""
+    feed = ChangeFeed(
+        source, session_factory, buffer_size=config.buffer_size, poll_interval=config.poll_interval_seconds
+    )
+    metrics.register("change_feed", lambda: dict(feed.stats))
+    return feed
+
+
+__all__ = (
+    "ChangeBatch",
+    "ChangeEntry",
+    "ChangeFeed",
+    "ChangeSource",
+    "create_change_feed",
+    "notify_committed",
+)
@@ -0,0 +1,150 @@
+"""Circuit breaker around the database.
+
+After enough consecutive failures the breaker opens and statements are refused before they reach
+SQLite. Once open_seconds have passed it is half-open: a few trial requests are let through, and
+the first statement that succeeds closes it, while a failure opens it again.
+
+Outcomes are taken from the engines' statement events, so they count wherever the database is
+used, and from pool checkout timeouts seen by the middleware. Errors of the database itself count,
+as do statements stopped by their request's deadline; constraint violations are the request's
+fault, and statements stopped because their client went away say nothing about the database.
+"""
+
+from __future__ import annotations
+
+import math
+import sqlite3
+import time
+from collections.abc import Callable
+from enum import StrEnum
+
+from sqlalchemy import event
+from sqlalchemy.engine import ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from python_toy.server.infra.deadline import current_deadline
+from python_toy.server.infra.error import DatabaseUnavailableException
+from python_toy.server.infra.logging import get_logger
+
+_logger = get_logger(__name__)
+
+
+class CircuitState(StrEnum):
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+
+class CircuitBreaker:
+    def __init__(self, *, failure_threshold: int, open_seconds: float, half_open_requests: int) -> None:
+        self._failure_threshold = failure_threshold
+        self._open_seconds = open_seconds
+        self._half_open_requests = half_open_requests
+        self._state = CircuitState.CLOSED
+        self._changed_at = -math.inf
+        self._failures = 0
+        self._trials = 0
+        # Told whether the database is usable whenever the breaker opens or closes
+        self._listener: Callable[[bool], None] | None = None
+        self.stats = {"opened": 0, "failures": 0, "trials": 0, "rejected": 0}
+
+    @property
+    def state(self) -> CircuitState:
+        return self._state
+
+    def set_listener(self, listener: Callable[[bool], None] | None) -> None:
+        self._listener = listener
+
+    def admit(self) -> bool:
+        """Whether a request may use the database; while half-open, only the first few may."""
+        if self._state is CircuitState.CLOSED:
+            return True
+        # Trials that never reached the database would otherwise keep it half-open forever
+        if time.monotonic() - self._changed_at >= self._open_seconds:
+            self._change(CircuitState.HALF_OPEN)
+        if self._state is CircuitState.HALF_OPEN and self._trials < self._half_open_requests:
+            self._trials += 1
+            self.stats["trials"] += 1
+            return True
+        self.stats["rejected"] += 1
+        return False
+
+    def check(self) -> None:
+        """Raise DatabaseUnavailableException while open; called before each statement."""
+        if self._state is CircuitState.OPEN and time.monotonic() - self._changed_at < self._open_seconds:
+            msg = "The database is failing; retry later"
+            raise DatabaseUnavailableException(msg, retry_after=self.retry_after())
+
+    def retry_after(self) -> int:
+        """Whole seconds until trial requests are let through."""
+        return max(1, math.ceil(self.trial_in()))
+
+    def trial_in(self) -> float:
+        """Seconds until trial requests are let through; 0 once they are, or while closed."""
+        if self._state is CircuitState.CLOSED:
+            return 0.0
+        return max(0.0, self._changed_at + self._open_seconds - time.monotonic())
+
+    def record_success(self) -> None:
+        self._failures = 0
+        # Statements admitted before it opened may still finish; they prove nothing now
+        if self._state is CircuitState.HALF_OPEN:
+            self._change(CircuitState.CLOSED)
+
+    def record_failure(self) -> None:
+        self.stats["failures"] += 1
+        if self._state is CircuitState.HALF_OPEN:
+            self._change(CircuitState.OPEN)
+        elif self._state is CircuitState.CLOSED:
+            self._failures += 1
+            if self._failures >= self._failure_threshold:
+                self._change(CircuitState.OPEN)
+
+    def watch(self, engine: AsyncEngine) -> None:
+        """Refuse `engine`'s statements while open, and record their outcomes."""
+
+        @event.listens_for(engine.sync_engine, "before_cursor_execute")
+        def _before(*_: object) -> None:
+            self.check()
+
+        @event.listens_for(engine.sync_engine, "after_cursor_execute")
+        def _after(*_: object) -> None:
+            self.record_success()
+
+        @event.listens_for(engine.sync_engine, "handle_error")
+        def _error(context: ExceptionContext) -> None:
+            if _is_database_failure(context.original_exception):
+                self.record_failure()
+
+    def _change(self, state: CircuitState) -> None:
+        previous, self._state = self._state, state
+        self._changed_at = time.monotonic()
+        self._trials = 0
+        self._failures = 0
+        if state is CircuitState.OPEN:
+            self.stats["opened"] += 1
+            _logger.warning("db.circuit.opened", previous=previous.value)
+        elif state is CircuitState.CLOSED:
+            _logger.info("db.circuit.closed")
+        if self._listener is not None and (state is CircuitState.CLOSED or previous is CircuitState.CLOSED):
+            self._listener(state is CircuitState.CLOSED)
+
+    def snapshot(self) -> dict[str, int]:
+        return {
+            "open": int(self._state is not CircuitState.CLOSED),
+            "consecutive_failures": self._failures,
+            **self.stats,
+        }
+
+
+def _is_database_failure(exc: BaseException) -> bool:
+    deadline = current_deadline()
+    if deadline is not None and deadline.expired:
+        # Cancelled or interrupted when its deadline passed: a timeout, unless the client went away
+        return not deadline.abandoned
+    return isinstance(exc, sqlite3.DatabaseError) and not isinstance(
+        exc, sqlite3.IntegrityError | sqlite3.ProgrammingError
+    )
+
+
+__all__ = ("CircuitBreaker", "CircuitState")
@@ -0,0 +1,117 @@
+"""Adaptive concurrency limit (AIMD) with a small bounded wait queue.
+
+The limit follows how the server copes: while requests complete within the target latency and
+the limit is actually in use, it grows by one per limit's worth of completions (additive
+increase); when a request is slower than the target or fails with a server error, it shrinks by a
+constant factor (multiplicative decrease). Decreases are spaced at least one target latency
+apart, so the completions of one slow burst cut the limit once rather than once each.
+
+Waiting requests are admitted by priority, then in arrival order, so interactive requests queued
+behind a burst of lower priority ones get the next free slots.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import heapq
+import itertools
+
+
+class AdaptiveLimiter:
+    def __init__(
+        self,
+        *,
+        initial_limit: int,
+        min_limit: int,
+        max_limit: int,
+        target_latency: float,
+        backoff_ratio: float,
+        queue_size: int,
+    ) -> None:
+        self._limit = float(initial_limit)
+        self._min_limit = min_limit
+        self._max_limit = max_limit
+        self._target_latency = target_latency
+        self._backoff_ratio = backoff_ratio
+        self._queue_size = queue_size
+        self._in_flight = 0
+        # (priority, arrival, future): a heap, so the lowest priority value is woken first
+        self._waiters: list[tuple[int, int, asyncio.Future[None]]] = []
+        self._arrivals = itertools.count()
+        self._last_decrease = float("-inf")
+        self._counters = {"admitted": 0, "queued": 0, "rejected": 0, "timed_out": 0, "decreases": 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    async def acquire(self, max_wait: float, *, priority: int = 0) -> bool:
+        """Take a slot, waiting up to `max_wait` seconds in the queue; False when rejected or timed out.
+
+        :param priority: Order among waiting requests; lower values are admitted first
+        """
+        if self._in_flight < self.limit and not self._waiters:
+            self._in_flight += 1
+            self._counters["admitted"] += 1
+            return True
+        if len(self._waiters) >= self._queue_size:
+            self._counters["rejected"] += 1
+            return False
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (priority, next(self._arrivals), waiter)
+        heapq.heappush(self._waiters, entry)
+        self._counters["queued"] += 1
+        try:
+            async with asyncio.timeout(max_wait):
+                await waiter
+        except BaseException as e:
+            if waiter.done() and not waiter.cancelled():
+                # Handed a slot just as the wait ended: pass it on
+                self._in_flight -= 1
+                self._wake()
+            elif entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            if not isinstance(e, TimeoutError):
+                raise
+            self._counters["timed_out"] += 1
+            return False
+        self._counters["admitted"] += 1
+        return True
+
+    def release(self, latency: float, *, dropped: bool) -> None:
+        """Return a slot, reporting how long its request took and whether it failed from overload."""
+        self._in_flight -= 1
+        if dropped or latency > self._target_latency:
+            now = asyncio.get_running_loop().time()
+            if now - self._last_decrease >= self._target_latency:
+                self._last_decrease = now
+                self._limit = max(self._min_limit, self._limit * self._backoff_ratio)
+                self._counters["decreases"] += 1
+        elif self._in_flight * 2 >= self._limit:
+            # Only a limit that is being used has shown it can be raised
+            self._limit = min(self._max_limit, self._limit + 1 / self._limit)
+        self._wake()
+
+    def _wake(self) -> None:
+        while self._waiters and self._in_flight < self.limit:
+            _, _, waiter = heapq.heappop(self._waiters)
+            if not waiter.done():
+                self._in_flight += 1
+                waiter.set_result(None)
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "limit": self.limit,
+            "in_flight": self._in_flight,
+            "waiting": len(self._waiters),
+            **self._counters,
+        }
+
+
+__all__ = ("AdaptiveLimiter",)
@@ -3,7 +3,7 @@
 import functools
 from typing import Literal
 
-from pydantic import BaseModel
+from pydantic import BaseModel, field_validator
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -12,6 +12,154 @@ class LoggingConfig(BaseModel):
     level: Literal["CRITICAL", "ERROR", "WARNING", "INFO", "DEBUG", "NOTSET"] = "INFO"
 
 
+class CacheConfig(BaseModel):
+    """In-process entity cache for categories, tags and users."""
+
+    enabled: bool = True
+    max_size: int = 10_000  # entries per entity type
+    ttl_seconds: float = 60.0
+    negative_ttl_seconds: float = 5.0  # for IDs that were not found
+
+
+class InvalidationConfig(BaseModel):
+    """Cross-worker cache invalidation; enabled when a socket directory is set."""
+
+    socket_dir: str | None = None  # shared by the workers of one host, e.g. /run/python-toy/bus
+
+
+class HttpCacheConfig(BaseModel):
+    """ETag/304 handling and response body caching for routes marked with @cache_policy."""
+
+    enabled: bool = True
+    max_entries: int = 1_000  # cached response bodies; 0 keeps only ETag/304 handling
+    max_body_bytes: int = 256 * 1024
+    # Cache-Control overrides by route path, e.g. {"/v1/tags": "max-age=60"}
+    cache_control: dict[str, str] = {}
+
+
+class BatchLoaderConfig(BaseModel):
+    """Batching of pet relation lookups (categories, owners, tags) across concurrent requests."""
+
+    enabled: bool = True
+    # Lookups arriving within this window share a batch; 0 batches only one event loop tick.
+    # aiosqlite completes each query in its own tick, so concurrent requests rarely meet in one
+    window_ms: float = 0.2
+    max_batch: int = 500  # keys per IN query
+
+
+class IdempotencyConfig(BaseModel):
+    """Idempotency-Key handling for POST requests."""
+
+    enabled: bool = True
+    ttl_seconds: float = 24 * 60 * 60  # how long a key's response is replayed
+    max_body_bytes: int = 1024 * 1024  # larger responses are not stored, so retries run again
+
+
+class PetImportConfig(BaseModel):
+    """Streaming NDJSON pet import."""
+
+    chunk_lines: int = 500  # lines per committed transaction; a chunk holds the SQLite write lock
+    max_line_bytes: int = 64 * 1024  # longer lines are reported as errors without being buffered
+
+
+class SqliteConfig(BaseModel):
+    """PRAGMAs set on every new SQLite connection; None keeps the SQLite default."""
+
+    journal_mode: Literal["delete", "truncate", "persist", "wal"] | None = None
+    synchronous: Literal["off", "normal", "full", "extra"] | None = None
+    busy_timeout_ms: int | None = None
+
+
+class GroupCommitConfig(BaseModel):
+    """Group commit of create requests: concurrent writes share one transaction and one fsync."""
+
+    enabled: bool = False
+    # A group closes this long after its first write, or once it holds max_batch writes
+    max_delay_ms: float = 1.0
+    max_batch: int = 64
+
+
+class AdmissionConfig(BaseModel):
+    """Adaptive concurrency limit in front of the routers, so that overload fails fast instead of queueing."""
+
+    enabled: bool = True
+    # AIMD: the limit grows by one per limit's worth of fast requests while it is in use, and is
+    # multiplied by backoff_ratio (at most once per target latency) when requests are slower than
+    # the target or fail with a 5xx
+    initial_limit: int = 20
+    min_limit: int = 2
+    max_limit: int = 200
+    target_latency_ms: float = 500.0
+    backoff_ratio: float = 0.9
+    queue_size: int = 50  # requests waiting for a slot; more are rejected at once
+    queue_timeout_ms: float = 1_000.0  # longer waits are rejected as well
+    retry_after_seconds: int = 1  # Retry-After of 503 responses
+    # Path prefixes never limited, besides /.internal/. Long polls and event streams wait on the
+    # in-memory change feed without holding a database connection
+    exempt_paths: list[str] = ["/v1/changes"]
+
+
+class CircuitBreakerConfig(BaseModel):
+    """Fail fast while the database keeps failing, instead of every request waiting for it."""
+
+    enabled: bool = True
+    # Consecutive failed statements, pool checkout timeouts or deadline interrupts that open it
+    failure_threshold: int = 5
+    # While open, requests get 503 at once; afterwards up to half_open_requests trial requests
+    # are let through, and the first statement to succeed closes it again
+    open_seconds: float = 5.0
+    half_open_requests: int = 1
+    # Without traffic, e.g. while readiness is DOWN, the server runs the trial itself with a probe
+    # query; a probe that takes longer than this fails
+    probe_timeout_seconds: float = 5.0
+
+
+class DeadlineConfig(BaseModel):
+    """Request deadlines from X-Request-Timeout or the route's default, and cancellation of abandoned requests."""
+
+    enabled: bool = True
+    # Deadline of routes without @request_timeout; a client's X-Request-Timeout can only shorten
+    # it. None leaves such routes without a deadline unless the client sets one
+    default_timeout_seconds: float | None = 30.0
+    # Cancel a request whose client has disconnected, interrupting its running statements
+    cancel_on_disconnect: bool = True
+
+
+class TrafficClassConfig(BaseModel):
+    """Budget of one class of routes, as assigned with @traffic_class or by HTTP method."""
+
+    # Order among requests waiting for the shared admission limit; lower is admitted first
+    priority: int = 0
+    # A bulkhead: requests of the class are limited to this many in flight by themselves, outside
+    # the shared adaptive limit, so they neither take its slots nor wait for them. None shares it
+    max_concurrent: int | None = None
+    queue_size: int = 50  # requests waiting for the bulkhead; more are rejected at once
+    # Sessions of the class use their own connection pool of this size (file databases only, as
+    # each pool opens its own connections). None uses the shared pool
+    pool_size: int | None = None
+
+
+# Reads ("read", GET and HEAD routes by default) are admitted before writes ("write", the other
+# methods); exports and imports ("bulk") run in a bulkhead with their own connections
+DEFAULT_TRAFFIC_CLASSES = {
+    "read": TrafficClassConfig(priority=0),
+    "write": TrafficClassConfig(priority=1),
+    # Two connections per bulk request: its request session and the session of its current batch
+    "bulk": TrafficClassConfig(priority=2, max_concurrent=2, queue_size=4, pool_size=4),
+}
+
+
+class ChangeFeedConfig(BaseModel):
+    """Change log retention and the in-process fan-out behind GET /v1/changes."""
+
+    retention_seconds: float = 7 * 24 * 60 * 60  # entries older than this are deleted by compaction
+    buffer_size: int = 10_000  # newest entries kept in memory for waiting subscribers
+    # While subscribers wait, one query per worker per interval picks up entries whose commit
+    # notification was missed (other workers without an invalidation bus)
+    poll_interval_seconds: float = 1.0
+    heartbeat_seconds: float = 15.0  # SSE comment sent after this long without entries
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         extra="ignore",
@@ -23,6 +171,37 @@ class Settings(BaseSettings):
     env: Literal["local", "dev", "prod"] = "local"
     logging: LoggingConfig = LoggingConfig()
     database_url: str = "sqlite+aiosqlite:///./petstore.db"
+    sqlite: SqliteConfig = SqliteConfig()
+    group_commit: GroupCommitConfig = GroupCommitConfig()
+    cache: CacheConfig = CacheConfig()
+    invalidation: InvalidationConfig = InvalidationConfig()
+    http_cache: HttpCacheConfig = HttpCacheConfig()
+    relation_loader: BatchLoaderConfig = BatchLoaderConfig()
+    idempotency: IdempotencyConfig = IdempotencyConfig()
+    pet_import: PetImportConfig = PetImportConfig()
+    change_feed: ChangeFeedConfig = ChangeFeedConfig()
+    admission: AdmissionConfig = AdmissionConfig()
+    deadline: DeadlineConfig = DeadlineConfig()
+    circuit_breaker: CircuitBreakerConfig = CircuitBreakerConfig()
+    traffic_classes: dict[str, TrafficClassConfig] = DEFAULT_TRAFFIC_CLASSES
+    # Share one execution between identical concurrent service reads
+    coalesce_reads: bool = True
+
+    @field_validator("traffic_classes", mode="before")
+    @classmethod
+    def _merge_default_traffic_classes(cls, value: dict[str, object]) -> dict[str, object]:
+        # Overriding one setting of a class, e.g. APP_TRAFFIC_CLASSES.BULK.MAX_CONCURRENT=4, keeps
+        # the other classes and the class's other defaults
+        merged: dict[str, object] = dict(DEFAULT_TRAFFIC_CLASSES)
+        for name, overrides in value.items():
+            default = DEFAULT_TRAFFIC_CLASSES.get(name)
+            if isinstance(overrides, dict) and default is not None:
+                merged[name] = default.model_copy(
+                    update=TrafficClassConfig.model_validate(overrides).model_dump(exclude_unset=True)
+                )
+            else:
+                merged[name] = overrides
+        return merged
 
 
 @functools.cache
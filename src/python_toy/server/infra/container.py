@@ -1,13 +1,34 @@
 from __future__ import annotations
 
+from typing import Any
+
 from dependency_injector.containers import DeclarativeContainer
 from dependency_injector.providers import Singleton, Factory
+from sqlalchemy import Row
 
 from python_toy.server.infra import config as config_module
 from python_toy.server.infra import database
+from python_toy.server.infra.admission import create_admission_limiter, create_bulkheads
+from python_toy.server.infra.change_feed import create_change_feed
+from python_toy.server.infra.db_circuit import create_circuit_breaker
+from python_toy.server.infra.db_probe import create_database_probe
+from python_toy.server.infra.entity_cache import EntityCache, create_entity_cache
+from python_toy.server.infra.group_commit import create_group_committer
+from python_toy.server.infra.idempotency_store import IdempotencyStore
+from python_toy.server.infra.invalidation_bus import create_invalidation_bus
 from python_toy.server.infra.session_context import get_current_session
+from python_toy.server.infra.single_flight import create_single_flight
+from python_toy.server.infra.traffic_class import BULK
+from python_toy.server.infra.versions import VersionRegistry
+from python_toy.server.petstore.change_log import ChangeLog
+from python_toy.server.petstore.change_service import ChangeService
+from python_toy.server.petstore.order_repository import OrderRepository
+from python_toy.server.petstore.order_service import OrderService
 from python_toy.server.petstore.pet_repository import PetRepository
+from python_toy.server.petstore.pet_import_service import PetImportService
 from python_toy.server.petstore.pet_service import PetService
+from python_toy.server.petstore.relation_loaders import create_relation_loaders
+from python_toy.server.petstore.store_service import StoreService
 from python_toy.server.petstore.category_repository import CategoryRepository
 from python_toy.server.petstore.tag_repository import TagRepository
 from python_toy.server.petstore.user_repository import UserRepository
@@ -20,18 +41,109 @@ class Container(DeclarativeContainer):
     # Settings are created once and reused
     settings = Singleton(config_module.get_settings)
 
+    # Shared by every engine: fails fast while the database keeps failing; None when disabled
+    db_circuit_breaker = Singleton(create_circuit_breaker, config=settings.provided.circuit_breaker)
+
     # Database infrastructure
-    db_engine = Singleton(database.create_database_engine, settings=settings)
+    db_engine = Singleton(database.create_database_engine, settings=settings, circuit_breaker=db_circuit_breaker)
     db_session_factory = Singleton(database.create_session_factory, engine=db_engine)
+    # Runs the breaker's trial while no request arrives to; None without a breaker
+    db_probe = Singleton(
+        create_database_probe, breaker=db_circuit_breaker, engine=db_engine, config=settings.provided.circuit_breaker
+    )
+    # Separate pools of the traffic classes that configure one, by class name
+    db_traffic_class_engines = Singleton(
+        database.create_traffic_class_engines, settings=settings, circuit_breaker=db_circuit_breaker
+    )
+    db_traffic_class_session_factories = Singleton(
+        database.create_traffic_class_session_factories, engines=db_traffic_class_engines
+    )
+    # Sessions of exports and imports, opened outside the request's session
+    db_bulk_session_factory = Singleton(
+        database.traffic_class_session_factory,
+        factories=db_traffic_class_session_factories,
+        default=db_session_factory,
+        name=BULK,
+    )
+
+    # Cross-worker cache invalidation; None unless a socket directory is configured
+    invalidation_bus = Singleton(create_invalidation_bus, config=settings.provided.invalidation)
+
+    # Table/entity versions behind HTTP ETags, bumped by committed writes
+    versions = Singleton(VersionRegistry)
+
+    # Adaptive concurrency limit applied by AdmissionMiddleware; None when disabled in settings
+    admission_limiter = Singleton(create_admission_limiter, config=settings.provided.admission)
+    # Fixed limiters of the traffic classes with their own max_concurrent, by class name
+    bulkheads = Singleton(create_bulkheads, classes=settings.provided.traffic_classes)
+
+    # Stored responses of POST requests sent with an Idempotency-Key
+    idempotency_store = Singleton(IdempotencyStore, ttl_seconds=settings.provided.idempotency.ttl_seconds)
 
     # Session supplier factory that returns get_current_session
     session_supplier = Factory(lambda: get_current_session)
 
+    # Read-through caches of category, tag and user rows; None when disabled in settings
+    category_cache: Singleton[EntityCache[Row[Any]] | None] = Singleton(
+        create_entity_cache, name="categories", config=settings.provided.cache
+    )
+    tag_cache: Singleton[EntityCache[Row[Any]] | None] = Singleton(
+        create_entity_cache, name="tags", config=settings.provided.cache
+    )
+    user_cache: Singleton[EntityCache[Row[Any]] | None] = Singleton(
+        create_entity_cache, name="users", config=settings.provided.cache
+    )
+
     # Repository providers as singletons with session supplier
-    pet_repository = Singleton(PetRepository, session_supplier=session_supplier)
-    category_repository = Singleton(CategoryRepository, session_supplier=session_supplier)
-    tag_repository = Singleton(TagRepository, session_supplier=session_supplier)
-    user_repository = Singleton(UserRepository, session_supplier=session_supplier)
+    category_repository = Singleton(CategoryRepository, session_supplier=session_supplier, cache=category_cache)
+    tag_repository = Singleton(TagRepository, session_supplier=session_supplier, cache=tag_cache)
+    user_repository = Singleton(UserRepository, session_supplier=session_supplier, cache=user_cache)
+
+    # Batches pet relation lookups across concurrent requests; None when disabled in settings
+    relation_loaders = Singleton(
+        create_relation_loaders,
+        session_factory=db_session_factory,
+        category_repo=category_repository,
+        user_repo=user_repository,
+        tag_repo=tag_repository,
+        config=settings.provided.relation_loader,
+        versions=versions,
+    )
+    pet_repository = Singleton(
+        PetRepository,
+        session_supplier=session_supplier,
+        category_repo=category_repository,
+        user_repo=user_repository,
+        tag_repo=tag_repository,
+        relation_loaders=relation_loaders,
+    )
+    order_repository = Singleton(OrderRepository, session_supplier=session_supplier)
+    change_log = Singleton(ChangeLog, session_supplier=session_supplier)
+
+    # Fans committed change log entries out to the long-polls and streams waiting in this worker
+    change_feed = Singleton(
+        create_change_feed,
+        source=change_log,
+        session_factory=db_session_factory,
+        config=settings.provided.change_feed,
+    )
+
+    # Coalesces identical concurrent service reads; None when disabled in settings
+    single_flight = Singleton(
+        create_single_flight,
+        session_factory=db_session_factory,
+        versions=versions,
+        enabled=settings.provided.coalesce_reads,
+    )
+
+    # Shares one transaction and commit among concurrent create requests; None when disabled in settings
+    group_committer = Singleton(
+        create_group_committer,
+        session_factory=db_session_factory,
+        config=settings.provided.group_commit,
+        versions=versions,
+        invalidation_bus=invalidation_bus,
+    )
 
     # Service providers as singletons with proper dependency injection
     pet_service = Singleton(
@@ -40,11 +152,41 @@ class Container(DeclarativeContainer):
         tag_repo=tag_repository,
         category_repo=category_repository,
         user_repo=user_repository,
+        single_flight=single_flight,
+        session_factory=db_bulk_session_factory,
+        group_committer=group_committer,
     )
 
-    category_service = Singleton(CategoryService, repo=category_repository)
-    tag_service = Singleton(TagService, repo=tag_repository)
-    user_service = Singleton(UserService, repo=user_repository)
+    pet_import_service = Singleton(
+        PetImportService,
+        repo=pet_repository,
+        tag_repo=tag_repository,
+        category_repo=category_repository,
+        user_repo=user_repository,
+        session_factory=db_bulk_session_factory,
+        config=settings.provided.pet_import,
+        versions=versions,
+        invalidation_bus=invalidation_bus,
+    )
+
+    category_service = Singleton(
+        CategoryService, repo=category_repository, single_flight=single_flight, group_committer=group_committer
+    )
+    tag_service = Singleton(
+        TagService, repo=tag_repository, single_flight=single_flight, group_committer=group_committer
+    )
+    user_service = Singleton(
+        UserService, repo=user_repository, single_flight=single_flight, group_committer=group_committer
+    )
+    order_service = Singleton(OrderService, repo=order_repository, pet_repo=pet_repository, single_flight=single_flight)
+    store_service = Singleton(StoreService, pet_repo=pet_repository, single_flight=single_flight)
+    change_service = Singleton(
+        ChangeService,
+        change_log=change_log,
+        feed=change_feed,
+        session_factory=db_session_factory,
+        config=settings.provided.change_feed,
+    )
 
 
 __all__ = ("Container",)
@@ -1,40 +1,67 @@
 from __future__ import annotations
 
+from collections.abc import Mapping
+from dataclasses import dataclass
+import time
 from typing import AsyncGenerator
 
-from sqlalchemy import event
+from sqlalchemy import Connection, event, text
 from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine, AsyncEngine
 from sqlalchemy.pool import AsyncAdaptedQueuePool
 import sqlite3
+from python_toy.server.infra.circuit_breaker import CircuitBreaker
 from python_toy.server.infra.config import Settings
+from python_toy.server.infra.deadline import watch_statements
+from python_toy.server.infra.logging import get_logger
 from python_toy.server.petstore.db_models import Base
 
+_logger = get_logger(__name__)
 
-def create_database_engine(settings: Settings) -> AsyncEngine:
+
+def create_database_engine(
+    settings: Settings,
+    *,
+    pool_size: int = 10,
+    max_overflow: int = 20,
+    circuit_breaker: CircuitBreaker | None = None,
+) -> AsyncEngine:
     """Create SQLAlchemy async engine with proper configuration."""
     engine = create_async_engine(
         settings.database_url,
         echo=True,
         poolclass=AsyncAdaptedQueuePool,
-        pool_size=10,  # Core connection pool size
-        max_overflow=20,  # Additional connections allowed beyond pool_size
+        pool_size=pool_size,  # Core connection pool size
+        max_overflow=max_overflow,  # Additional connections allowed beyond pool_size
         pool_timeout=30,  # Time to wait for connection (seconds)
         pool_recycle=3600,  # Recycle connections after 1 hour
         pool_pre_ping=True,  # Validate connections before use
     )
 
-    # Setup SQLite FK constraints
+    # Setup SQLite FK constraints and the configured PRAGMAs
+    pragmas = ["PRAGMA foreign_keys=ON"]
+    if settings.sqlite.journal_mode is not None:
+        pragmas.append(f"PRAGMA journal_mode={settings.sqlite.journal_mode}")
+    if settings.sqlite.synchronous is not None:
+        pragmas.append(f"PRAGMA synchronous={settings.sqlite.synchronous}")
+    if settings.sqlite.busy_timeout_ms is not None:
+        pragmas.append(f"PRAGMA busy_timeout={settings.sqlite.busy_timeout_ms:d}")
+
     @event.listens_for(engine.sync_engine, "connect")
     def _enable_sqlite_fk(
         dbapi_connection: sqlite3.Connection, connection_record: object
     ) -> None:  # pragma: no cover - sqlite specific setup
         try:
             cursor = dbapi_connection.cursor()
-            cursor.execute("PRAGMA foreign_keys=ON")
+            for pragma in pragmas:
+                cursor.execute(pragma)
             cursor.close()
         except Exception:  # noqa: BLE001
             pass
 
+    # Statements of a request whose deadline has passed fail, or are interrupted if running
+    watch_statements(engine)
+    if circuit_breaker is not None:
+        circuit_breaker.watch(engine)
     return engine
 
 
@@ -43,6 +70,34 @@ def create_session_factory(engine: AsyncEngine) -> async_sessionmaker[AsyncSessi
     return async_sessionmaker(engine, expire_on_commit=False)
 
 
+def create_traffic_class_engines(
+    settings: Settings, circuit_breaker: CircuitBreaker | None = None
+) -> dict[str, AsyncEngine]:
+    """Create an engine with a pool of its own for each traffic class that sets pool_size."""
+    return {
+        name: create_database_engine(
+            settings, pool_size=traffic.pool_size, max_overflow=0, circuit_breaker=circuit_breaker
+        )
+        for name, traffic in settings.traffic_classes.items()
+        if traffic.pool_size is not None
+    }
+
+
+def create_traffic_class_session_factories(
+    engines: Mapping[str, AsyncEngine],
+) -> dict[str, async_sessionmaker[AsyncSession]]:
+    return {name: create_session_factory(engine) for name, engine in engines.items()}
+
+
+def traffic_class_session_factory(
+    factories: Mapping[str, async_sessionmaker[AsyncSession]],
+    default: async_sessionmaker[AsyncSession],
+    name: str,
+) -> async_sessionmaker[AsyncSession]:
+    """Session factory of a traffic class: from its own pool if it has one, otherwise `default`."""
+    return factories.get(name, default)
+
+
 async def get_db_session_factory(
     session_factory: async_sessionmaker[AsyncSession],
 ) -> AsyncGenerator[AsyncSession, None]:
@@ -55,7 +110,56 @@ async def get_db_session_factory(
         await session.close()
 
 
+@dataclass(frozen=True, slots=True)
+class _AddedColumn:
+    table: str
+    column: str
+    definition: str  # Type and constraints; NOT NULL needs a DEFAULT for the rows already there
+    backfill: str | None = None  # UPDATE run once the column is added, with :now bound to the Unix time
+
+
+# Columns added to tables since their first release. create_all creates missing tables only, so
+# databases created before are upgraded with ALTER TABLE ADD COLUMN.
+_ADDED_COLUMNS = (
+    *(
+        _AddedColumn(table, "version", "INTEGER NOT NULL DEFAULT 1")
+        for table in ("pets", "categories", "tags", "users", "orders")
+    ),
+    # Rows written before count as written now, so that the next `since` export includes them
+    _AddedColumn("pets", "updated_at", "FLOAT NOT NULL DEFAULT 0", backfill="UPDATE pets SET updated_at = :now"),
+)
+
+
+def upgrade_schema(conn: Connection) -> list[str]:
+    """Add the columns and indexes that existing tables lack; returns the columns as `table.column`.
+
+    Idempotent: columns and indexes that are already there are left alone.
+    """
+    now = time.time()
+    added: list[str] = []
+    existing: dict[str, set[str]] = {}
+    for change in _ADDED_COLUMNS:
+        if change.table not in existing:
+            rows = conn.execute(text(f"PRAGMA table_info({change.table})"))
+            existing[change.table] = {row.name for row in rows}
+        if change.column in existing[change.table]:
+            continue
+        conn.execute(text(f"ALTER TABLE {change.table} ADD COLUMN {change.column} {change.definition}"))
+        if change.backfill is not None:
+            conn.execute(text(change.backfill), {"now": now})
+        existing[change.table].add(change.column)
+        added.append(f"{change.table}.{change.column}")
+    # create_all skips the indexes of tables that exist
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(conn, checkfirst=True)
+    return added
+
+
 async def create_tables(engine: AsyncEngine) -> None:
-    """Create database tables using the provided engine."""
+    """Create missing database tables, and upgrade existing ones, using the provided engine."""
     async with engine.begin() as conn:
         await conn.run_sync(Base.metadata.create_all)
+        added = await conn.run_sync(upgrade_schema)
+    if added:
+        _logger.info("db.schema.upgraded", added_columns=added)
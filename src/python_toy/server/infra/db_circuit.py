@@ -0,0 +1,65 @@
+"""Fail fast while the database keeps failing.
+
+When the SQLite file sits on a stalled or failing volume, every request would wait the full pool
+timeout for a connection, and then for its statements. While the circuit breaker is open, the
+middleware answers 503 with Retry-After at once instead, and readiness reports DOWN, so that load
+balancers move traffic elsewhere until trial requests find the database working again.
+"""
+
+from __future__ import annotations
+
+import sqlalchemy.exc
+from starlette.status import HTTP_503_SERVICE_UNAVAILABLE
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.circuit_breaker import CircuitBreaker
+from python_toy.server.infra.config import CircuitBreakerConfig
+from python_toy.server.infra.error.problem import problem_response
+from python_toy.server.infra.route_match import INTERNAL_PREFIX
+
+
+class CircuitBreakerMiddleware:
+    """Answer 503 with Retry-After while the breaker is open, and record pool checkout timeouts."""
+
+    def __init__(self, app: ASGIApp, *, breaker: CircuitBreaker) -> None:
+        self.app = app
+        self._breaker = breaker
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(INTERNAL_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        if not self._breaker.admit():
+            response = problem_response(
+                type="//localhost/error/database-unavailable",
+                title="Database Unavailable",
+                status=HTTP_503_SERVICE_UNAVAILABLE,
+                detail="The database is failing; retry later",
+                instance=scope["path"],
+            )
+            response.headers["Retry-After"] = str(self._breaker.retry_after())
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        except sqlalchemy.exc.TimeoutError:
+            # No connection within pool_timeout: every pooled connection is stuck
+            self._breaker.record_failure()
+            raise
+
+
+def create_circuit_breaker(config: CircuitBreakerConfig) -> CircuitBreaker | None:
+    """Create the breaker from settings and publish its state as `db_circuit`; None when disabled."""
+    if not config.enabled:
+        return None
+    breaker = CircuitBreaker(
+        failure_threshold=config.failure_threshold,
+        open_seconds=config.open_seconds,
+        half_open_requests=config.half_open_requests,
+    )
+    metrics.register("db_circuit", breaker.snapshot)
+    return breaker
+
+
+__all__ = ("CircuitBreakerMiddleware", "create_circuit_breaker")
@@ -0,0 +1,83 @@
+"""Trial queries run by the server itself while the circuit breaker is open.
+
+The breaker closes only when a trial finds the database working. Trials are ordinary requests,
+but an instance whose readiness is DOWN gets drained by its load balancer and would then never
+see one; so once open_seconds pass, the probe takes the trial with a query of its own.
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from python_toy.server.infra.circuit_breaker import CircuitBreaker, CircuitState
+from python_toy.server.infra.config import CircuitBreakerConfig
+from python_toy.server.infra.deadline import Deadline, deadline_scope
+from python_toy.server.infra.logging import get_logger
+from python_toy.server.infra.tasks import spawn_detached
+
+# Reads the schema, so it fails on a file that is unreadable or not a database
+_PROBE_QUERY = text("SELECT count(*) FROM sqlite_master")
+
+_logger = get_logger(__name__)
+
+
+class DatabaseProbe:
+    def __init__(self, breaker: CircuitBreaker, engine: AsyncEngine, *, interval: float, timeout: float) -> None:
+        self._breaker = breaker
+        self._engine = engine
+        # How often to look at the breaker while it is closed
+        self._interval = interval
+        self._timeout = timeout
+        self._task: asyncio.Task[None] | None = None
+
+    def start(self) -> None:
+        self._task = spawn_detached(self._run())
+
+    def close(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+
+    async def _run(self) -> None:
+        while True:
+            if self._breaker.state is CircuitState.CLOSED:
+                await asyncio.sleep(self._interval)
+                continue
+            await asyncio.sleep(self._breaker.trial_in())
+            # Requests may have taken the trials meanwhile
+            if self._breaker.admit():
+                await self.probe()
+
+    async def probe(self) -> None:
+        """Run the probe query; its outcome reaches the breaker through the engine's statement events."""
+        loop = asyncio.get_running_loop()
+        when = loop.time() + self._timeout
+        # Interrupts a query stuck on a stalled volume, which then counts as a failure like any deadline interrupt
+        deadline = Deadline(when)
+        expiry = loop.call_at(when, deadline.expire)
+        try:
+            with deadline_scope(deadline):
+                async with asyncio.timeout_at(when), self._engine.connect() as conn:
+                    await conn.execute(_PROBE_QUERY)
+        except TimeoutError:
+            # No connection in time: no statement ran to record it
+            if self._breaker.state is CircuitState.HALF_OPEN:
+                self._breaker.record_failure()
+        except Exception:  # noqa: BLE001
+            _logger.info("db.circuit.probe_failed", exc_info=True)
+        finally:
+            expiry.cancel()
+
+
+def create_database_probe(
+    breaker: CircuitBreaker | None, engine: AsyncEngine, config: CircuitBreakerConfig
+) -> DatabaseProbe | None:
+    """Create the probe for the breaker; None when there is no breaker."""
+    if breaker is None:
+        return None
+    return DatabaseProbe(breaker, engine, interval=config.open_seconds, timeout=config.probe_timeout_seconds)
+
+
+__all__ = ("DatabaseProbe", "create_database_probe")
@@ -0,0 +1,132 @@
+"""Request deadlines: how long the current request may still run, and stopping its SQL when it may not.
+
+The deadline is kept in a contextvar for the request's task and the tasks it starts. Repositories
+check it before using the session, and every statement checks it before it starts. A statement
+still running in the aiosqlite thread when the deadline passes (or the client disconnects) is
+interrupted with `sqlite3.Connection.interrupt`, which is safe to call from the event loop thread,
+so the connection returns to the pool at once instead of after the query completes.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import math
+import sqlite3
+from collections.abc import Iterator
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, ExceptionContext
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from python_toy.server.infra.error import DeadlineExceededException
+
+_current_deadline: ContextVar[Deadline | None] = ContextVar("current_deadline", default=None)
+
+
+class Deadline:
+    """Point in event loop time by which a request must complete; None for no limit.
+
+    Even without a limit a deadline can expire, when its request is abandoned by the client.
+    """
+
+    __slots__ = ("_running", "abandoned", "expired", "when")
+
+    def __init__(self, when: float | None) -> None:
+        self.when = when
+        self.expired = False
+        self.abandoned = False
+        # Connections executing a statement of this request right now
+        self._running: set[sqlite3.Connection] = set()
+
+    def remaining(self) -> float:
+        """Seconds left; infinite without a limit, 0 once expired."""
+        if self.expired:
+            return 0.0
+        if self.when is None:
+            return math.inf
+        return max(0.0, self.when - asyncio.get_running_loop().time())
+
+    def check(self) -> None:
+        """Raise DeadlineExceededException when no time is left."""
+        if self.remaining() <= 0:
+            msg = "The request's deadline passed before it completed"
+            raise DeadlineExceededException(msg)
+
+    def statement_started(self, connection: sqlite3.Connection) -> None:
+        self._running.add(connection)
+
+    def statement_finished(self, connection: sqlite3.Connection) -> None:
+        self._running.discard(connection)
+
+    def expire(self) -> None:
+        """Mark the deadline as passed and interrupt the statements still running for it."""
+        self.expired = True
+        for connection in self._running:
+            connection.interrupt()
+
+    def abandon(self) -> None:
+        """Expire the deadline because the request's client has gone away."""
+        self.abandoned = True
+        self.expire()
+
+
+def current_deadline() -> Deadline | None:
+    return _current_deadline.get()
+
+
+def check_deadline() -> None:
+    """Raise DeadlineExceededException when the current request has run out of time."""
+    deadline = _current_deadline.get()
+    if deadline is not None:
+        deadline.check()
+
+
+@contextlib.contextmanager
+def deadline_scope(deadline: Deadline) -> Iterator[None]:
+    token = _current_deadline.set(deadline)
+    try:
+        yield
+    finally:
+        _current_deadline.reset(token)
+
+
+def watch_statements(engine: AsyncEngine) -> None:
+    """Check the current deadline before each statement of `engine`, and let it interrupt them."""
+
+    @event.listens_for(engine.sync_engine, "before_cursor_execute")
+    def _before(conn: Connection, *_: object) -> None:
+        deadline = _current_deadline.get()
+        if deadline is None:
+            return
+        deadline.check()
+        raw = _sqlite_connection(conn)
+        if raw is not None:
+            deadline.statement_started(raw)
+
+    @event.listens_for(engine.sync_engine, "after_cursor_execute")
+    def _after(conn: Connection, *_: object) -> None:
+        _statement_done(conn)
+
+    @event.listens_for(engine.sync_engine, "handle_error")
+    def _error(context: ExceptionContext) -> None:
+        if context.connection is not None:
+            _statement_done(context.connection)
+
+
+def _statement_done(conn: Connection) -> None:
+    deadline = _current_deadline.get()
+    raw = _sqlite_connection(conn)
+    if deadline is not None and raw is not None:
+        deadline.statement_finished(raw)
+
+
+def _sqlite_connection(conn: Connection) -> sqlite3.Connection | None:
+    # SQLAlchemy's aiosqlite adapter wraps an aiosqlite connection, which wraps the sqlite3 one
+    adapted = conn.connection.dbapi_connection
+    raw = getattr(getattr(adapted, "_connection", None), "_conn", None)
+    return raw if isinstance(raw, sqlite3.Connection) else None
+
+
+__all__ = ("Deadline", "check_deadline", "current_deadline", "deadline_scope", "watch_statements")
@@ -0,0 +1,66 @@
+"""Notice a client disconnecting while its request is still being handled.
+
+The ASGI server only reports a disconnect to a `receive()` call, which handlers make while they
+read the request body, but rarely afterwards. Once the body has been read, a watcher keeps one
+`receive()` call pending for them and calls back as soon as the disconnect arrives. Messages it
+receives meanwhile are passed on to the application's own `receive()` calls.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections.abc import Callable
+
+from starlette.types import Message, Receive, Scope
+
+_DISCONNECT: Message = {"type": "http.disconnect"}
+
+
+class DisconnectWatch:
+    def __init__(self, scope: Scope, receive: Receive, on_disconnect: Callable[[], None]) -> None:
+        self._receive = receive
+        self._on_disconnect = on_disconnect
+        self._messages: asyncio.Queue[Message] = asyncio.Queue()
+        self._disconnected = False
+        self._watcher: asyncio.Task[None] | None = None
+        if not _has_body(scope):
+            # Nothing to wait for: the watcher receives the empty body message for the application
+            self._start()
+
+    async def receive(self) -> Message:
+        """`receive()` for the application: passed through until the body is complete, then from the watcher."""
+        if self._watcher is None:
+            message = await self._receive()
+            if message["type"] == "http.request" and not message.get("more_body", False):
+                self._start()
+            return message
+        if self._disconnected and self._messages.empty():
+            return _DISCONNECT
+        return await self._messages.get()
+
+    def close(self) -> None:
+        if self._watcher is not None:
+            self._watcher.cancel()
+
+    def _start(self) -> None:
+        self._watcher = asyncio.create_task(self._watch())
+
+    async def _watch(self) -> None:
+        while True:
+            message = await self._receive()
+            if message["type"] == "http.disconnect":
+                self._disconnected = True
+                self._messages.put_nowait(message)
+                self._on_disconnect()
+                return
+            self._messages.put_nowait(message)
+
+
+def _has_body(scope: Scope) -> bool:
+    for name, value in scope["headers"]:
+        if name == b"transfer-encoding" or (name == b"content-length" and value.strip() != b"0"):
+            return True
+    return False
+
+
+__all__ = ("DisconnectWatch",)
@@ -0,0 +1,110 @@
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Callable
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.config import CacheConfig
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    negative_hits: int = 0
+    misses: int = 0
+    evictions: int = 0
+    expirations: int = 0
+    invalidations: int = 0
+
+
+class EntityCache[V]:
+    """Bounded in-process cache of immutable values by entity ID, with LRU and TTL eviction.
+
+    A cached None records that the entity does not exist (negative caching); it uses its own,
+    usually shorter, TTL. Fills race with invalidations: `generation` changes on every
+    invalidation, and `put` drops values read before the latest one.
+    Not thread-safe: use from the event loop only.
+    """
+
+    def __init__(
+        self,
+        *,
+        max_size: int,
+        ttl_seconds: float,
+        negative_ttl_seconds: float,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._entries: OrderedDict[str, tuple[float, V | None]] = OrderedDict()
+        self._max_size = max_size
+        self._ttl = ttl_seconds
+        self._negative_ttl = negative_ttl_seconds
+        self._clock = clock
+        self._generation = 0
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def lookup(self, key: str) -> tuple[bool, V | None]:
+        """Return (found, value). A found None value is a cached "does not exist"."""
+        entry = self._entries.get(key)
+        if entry is None:
+            self.stats.misses += 1
+            return False, None
+        expires_at, value = entry
+        if expires_at <= self._clock():
+            del self._entries[key]
+            self.stats.expirations += 1
+            self.stats.misses += 1
+            return False, None
+        self._entries.move_to_end(key)
+        if value is None:
+            self.stats.negative_hits += 1
+        else:
+            self.stats.hits += 1
+        return True, value
+
+    def put(self, key: str, value: V | None, *, generation: int) -> None:
+        """Cache a value (or None for "does not exist") read while `generation` was current."""
+        if generation != self._generation:
+            return
+        ttl = self._ttl if value is not None else self._negative_ttl
+        self._entries[key] = (self._clock() + ttl, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self._max_size:
+            self._entries.popitem(last=False)
+            self.stats.evictions += 1
+
+    def invalidate(self, key: str) -> None:
+        self._generation += 1
+        if self._entries.pop(key, None) is not None:
+            self.stats.invalidations += 1
+
+    def clear(self) -> None:
+        self._generation += 1
+        self._entries.clear()
+
+    def snapshot(self) -> dict[str, int]:
+        return {"size": len(self._entries), **asdict(self.stats)}
+
+
+def create_entity_cache[V](name: str, config: CacheConfig) -> EntityCache[V] | None:
+    """Create a cache from settings and publish its counters as `cache.<name>`; None when caching is disabled."""
+    if not config.enabled:
+        return None
+    cache: EntityCache[V] = EntityCache(
+        max_size=config.max_size,
+        ttl_seconds=config.ttl_seconds,
+        negative_ttl_seconds=config.negative_ttl_seconds,
+    )
+    metrics.register(f"cache.{name}", cache.snapshot)
+    return cache
+
+
+__all__ = ("CacheStats", "EntityCache", "create_entity_cache")
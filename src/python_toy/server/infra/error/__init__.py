@@ -2,9 +2,12 @@
     BadRequestException,
     ConcurrentModificationException,
     ConflictException,
+    DatabaseUnavailableException,
+    DeadlineExceededException,
     DuplicateEntityException,
     EntityNotFoundException,
     ForeignKeyViolationException,
+    GoneException,
     ResourceNotFoundException,
 )
 
@@ -13,8 +16,11 @@
     "BadRequestException",
     "ConcurrentModificationException",
     "ConflictException",
+    "DatabaseUnavailableException",
+    "DeadlineExceededException",
     "DuplicateEntityException",
     "EntityNotFoundException",
     "ForeignKeyViolationException",
+    "GoneException",
     "ResourceNotFoundException",
 )
@@ -33,6 +33,37 @@ def __init__(self, detail: str) -> None:
         self.detail = detail
 
 
+class GoneException(Exception):
+    """Exception raised when a requested resource is no longer available (HTTP 410)."""
+
+    __slots__ = ("detail",)
+
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail)
+        self.detail = detail
+
+
+class DatabaseUnavailableException(Exception):
+    """Exception raised when the database is not used because it keeps failing (HTTP 503)."""
+
+    __slots__ = ("detail", "retry_after")
+
+    def __init__(self, detail: str, retry_after: int) -> None:
+        super().__init__(detail)
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class DeadlineExceededException(Exception):
+    """Exception raised when a request's deadline passes before it completes (HTTP 504)."""
+
+    __slots__ = ("detail",)
+
+    def __init__(self, detail: str) -> None:
+        super().__init__(detail)
+        self.detail = detail
+
+
 class DuplicateEntityException(ConflictException):
     """Exception raised when trying to create an entity that already exists."""
 
@@ -9,8 +9,11 @@
     BadRequestException,
     ConcurrentModificationException,
     ConflictException,
+    DatabaseUnavailableException,
+    DeadlineExceededException,
     DuplicateEntityException,
     ForeignKeyViolationException,
+    GoneException,
     ResourceNotFoundException,
 )
 from starlette.exceptions import HTTPException as StarletteHTTPException
@@ -106,6 +109,38 @@ async def handle_conflict_exception(request: Request, exc: ConflictException) ->
     )
 
 
+async def handle_gone_exception(request: Request, exc: GoneException) -> JSONResponse:
+    return problem_response(
+        type="//localhost/error/gone",
+        title="Gone",
+        status=410,
+        detail=str(exc),
+        instance=str(request.url.path),
+    )
+
+
+async def handle_deadline_exceeded(request: Request, exc: DeadlineExceededException) -> JSONResponse:
+    return problem_response(
+        type="//localhost/error/deadline-exceeded",
+        title="Deadline Exceeded",
+        status=504,
+        detail=str(exc),
+        instance=str(request.url.path),
+    )
+
+
+async def handle_database_unavailable(request: Request, exc: DatabaseUnavailableException) -> JSONResponse:
+    response = problem_response(
+        type="//localhost/error/database-unavailable",
+        title="Database Unavailable",
+        status=503,
+        detail=str(exc),
+        instance=str(request.url.path),
+    )
+    response.headers["Retry-After"] = str(exc.retry_after)
+    return response
+
+
 def setup(app: FastAPI) -> None:
     # More specific exception handlers first
     app.add_exception_handler(DuplicateEntityException, cast(HTTPExceptionHandler, handle_duplicate_entity))
@@ -117,6 +152,9 @@ def setup(app: FastAPI) -> None:
 
     # More general exception handlers
     app.add_exception_handler(ResourceNotFoundException, cast(HTTPExceptionHandler, handle_resource_not_found))
+    app.add_exception_handler(GoneException, cast(HTTPExceptionHandler, handle_gone_exception))
+    app.add_exception_handler(DeadlineExceededException, cast(HTTPExceptionHandler, handle_deadline_exceeded))
+    app.add_exception_handler(DatabaseUnavailableException, cast(HTTPExceptionHandler, handle_database_unavailable))
     app.add_exception_handler(
         BadRequestException,
         cast(
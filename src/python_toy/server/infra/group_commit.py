@@ -0,0 +1,172 @@
+"""Group commit: write units of work from concurrent requests share one transaction and one commit.
+
+SQLite pays an fsync per commit (two under synchronous=FULL), which bounds single-row POST
+throughput far below what the CPU could do. The committer collects the units queued within a
+short window, runs each in its own savepoint of one transaction and commits them together.
+"""
+
+from __future__ import annotations
+
+import asyncio
+from collections import deque
+from typing import TYPE_CHECKING, Any, Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.config import GroupCommitConfig
+from python_toy.server.infra.invalidation_bus import pop_committed_changes
+from python_toy.server.infra.session_context import in_transaction, session_scope
+from python_toy.server.infra.tasks import spawn_detached
+from python_toy.server.infra.transaction import begin_write
+
+if TYPE_CHECKING:
+    from python_toy.server.infra.invalidation_bus import InvalidationBus
+    from python_toy.server.infra.versions import VersionRegistry
+
+_Unit = tuple[Callable[[], Awaitable[Any]], "asyncio.Future[Any]"]
+# A unit's future with the exception it raised or the result it returned
+_Outcome = tuple["asyncio.Future[Any]", Exception | None, Any]
+
+
+class GroupCommitter:
+    """Runs write units of work in shared transactions, committing once per group.
+
+    Each unit runs in its own savepoint, so a failing unit is rolled back alone and raises to its
+    caller while the rest of its group commits. A group closes after `max_delay` seconds or
+    `max_batch` units, whichever comes first; units queued while a group commits form the next
+    one. Callers get their result only once their group has committed. If the commit itself
+    fails, every unit of the group raises.
+    """
+
+    def __init__(
+        self,
+        session_factory: async_sessionmaker[AsyncSession],
+        *,
+        max_delay: float,
+        max_batch: int,
+        versions: VersionRegistry | None = None,
+        invalidation_bus: InvalidationBus | None = None,
+    ) -> None:
+        self._session_factory = session_factory
+        self._max_delay = max_delay
+        self._max_batch = max_batch
+        # Group transactions commit outside request sessions, so they announce their changes themselves
+        self._versions = versions
+        self._invalidation_bus = invalidation_bus
+        self._queue: deque[_Unit] = deque()
+        self._arrived = asyncio.Event()
+        self._task: asyncio.Task[None] | None = None
+        self.stats = {"groups": 0, "units": 0, "failed_units": 0, "failed_groups": 0, "largest_group": 0}
+
+    async def run[T](self, work: Callable[[], Awaitable[T]]) -> T:
+        """Run `work` in the next group transaction and return its result once the group has committed."""
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        self._queue.append((work, future))
+        self._arrived.set()
+        if self._task is None:
+            self._task = spawn_detached(self._commit_loop())
+        return await future
+
+    async def _commit_loop(self) -> None:
+        loop = asyncio.get_running_loop()
+        try:
+            while self._queue:
+                deadline = loop.time() + self._max_delay
+                while len(self._queue) < self._max_batch and (remaining := deadline - loop.time()) > 0:
+                    self._arrived.clear()
+                    try:
+                        async with asyncio.timeout(remaining):
+                            await self._arrived.wait()
+                    except TimeoutError:
+                        break
+                group = [self._queue.popleft() for _ in range(min(len(self._queue), self._max_batch))]
+                await self._commit_group(group)
+        finally:
+            self._task = None
+
+    async def _commit_group(self, group: list[_Unit]) -> None:
+        try:
+            async with session_scope(self._session_factory) as session:
+                await begin_write(session)
+                outcomes = await self._run_units(session, group)
+        except BaseException as e:
+            # The group did not commit: every caller gets the error
+            self.stats["failed_groups"] += 1
+            for _, future in group:
+                if future.done():
+                    continue
+                if isinstance(e, Exception):
+                    future.set_exception(e)
+                else:
+                    future.cancel()
+            if not isinstance(e, Exception):
+                raise
+            return
+
+        self.stats["groups"] += 1
+        self.stats["units"] += len(outcomes)
+        self.stats["largest_group"] = max(self.stats["largest_group"], len(outcomes))
+        changes = pop_committed_changes(session)
+        if self._versions is not None:
+            self._versions.bump_all(changes)
+        if self._invalidation_bus is not None:
+            self._invalidation_bus.publish(changes)
+        for future, error, result in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                self.stats["failed_units"] += 1
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    async def _run_units(self, session: AsyncSession, group: list[_Unit]) -> list[_Outcome]:
+        outcomes: list[_Outcome] = []
+        for work, future in group:
+            if future.done():  # the caller was cancelled before its unit ran
+                continue
+            savepoint = await session.begin_nested()
+            try:
+                result = await work()
+            except Exception as e:  # noqa: BLE001 - raised to the unit's caller
+                await savepoint.rollback()
+                outcomes.append((future, e, None))
+            else:
+                await savepoint.commit()
+                outcomes.append((future, None, result))
+        return outcomes
+
+
+async def group_commit[T](committer: GroupCommitter | None, work: Callable[[], Awaitable[T]]) -> T:
+    """Run a write unit of work through the group committer if there is one, else directly.
+
+    A caller already inside a transaction (an Idempotency-Key request, a batch) runs `work` in it,
+    because its writes must commit or roll back with that transaction.
+    """
+    if committer is None or in_transaction():
+        return await work()
+    return await committer.run(work)
+
+
+def create_group_committer(
+    session_factory: async_sessionmaker[AsyncSession],
+    config: GroupCommitConfig,
+    versions: VersionRegistry | None = None,
+    invalidation_bus: InvalidationBus | None = None,
+) -> GroupCommitter | None:
+    """Create the committer from settings and publish its counters; None when group commit is disabled."""
+    if not config.enabled:
+        return None
+    committer = GroupCommitter(
+        session_factory,
+        max_delay=config.max_delay_ms / 1000,
+        max_batch=config.max_batch,
+        versions=versions,
+        invalidation_bus=invalidation_bus,
+    )
+    metrics.register("group_commit", lambda: dict(committer.stats))
+    return committer
+
+
+__all__ = ("GroupCommitter", "create_group_committer", "group_commit")
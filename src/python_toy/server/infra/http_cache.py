@@ -0,0 +1,190 @@
+"""Conditional GET and response body caching for routes that declare a cache policy.
+
+A route opts in with @cache_policy, naming the tables its response is read from. Cached bodies
+are keyed by VersionRegistry counters, so they are served, and If-None-Match is answered with 304,
+before the request reaches the session middleware, the database or any mapper. The ETag is derived
+from the same counters unless the handler sets one itself (such as a row version).
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable
+
+from starlette.status import HTTP_200_OK, HTTP_304_NOT_MODIFIED
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.config import HttpCacheConfig
+from python_toy.server.infra.route_match import matched_route
+from python_toy.server.infra.versions import VersionRegistry
+
+_POLICY_ATTR = "__cache_policy__"
+
+
+@dataclass(frozen=True)
+class CachePolicy:
+    tables: tuple[str, ...]
+    # Path parameter holding the entity ID; the ETag then follows that entity of tables[0] only
+    entity_param: str | None
+    cache_control: str
+
+
+def cache_policy[F: Callable[..., object]](
+    *tables: str, entity_param: str | None = None, cache_control: str = "no-cache"
+) -> Callable[[F], F]:
+    """Mark a GET endpoint as cacheable.
+
+    :param tables: Tables the response is read from; a committed write to any of them changes the ETag
+    :param entity_param: Path parameter with the entity ID, for single-entity routes
+    :param cache_control: Default Cache-Control header; settings can override it per route path
+    """
+
+    def decorate(endpoint: F) -> F:
+        setattr(endpoint, _POLICY_ATTR, CachePolicy(tables, entity_param, cache_control))
+        return endpoint
+
+    return decorate
+
+
+class HttpCacheMiddleware:
+    def __init__(
+        self,
+        app: ASGIApp,
+        *,
+        versions: VersionRegistry,
+        config: HttpCacheConfig,
+    ) -> None:
+        self.app = app
+        self._versions = versions
+        self._config = config
+        self._bodies: OrderedDict[tuple[str, bytes, str], tuple[list[tuple[bytes, bytes]], bytes]] = OrderedDict()
+        self.stats = {"not_modified": 0, "hits": 0, "misses": 0, "evictions": 0}
+        metrics.register("http_cache", lambda: {"size": len(self._bodies), **self.stats})
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["method"] != "GET":
+            await self.app(scope, receive, send)
+            return
+        resolved = self._resolve(scope)
+        if resolved is None:
+            await self.app(scope, receive, send)
+            return
+        path, policy, path_params = resolved
+
+        # Read the version before the handler runs: a body is never stored under a newer ETag than its data
+        etag = self._etag(policy, path_params)
+        cache_control = (b"cache-control", self._config.cache_control.get(path, policy.cache_control).encode())
+        if_none_match = _header(scope, b"if-none-match")
+
+        if _matches(if_none_match, etag):
+            await self._send_not_modified(send, [(b"etag", etag.encode()), cache_control])
+            return
+
+        key = (scope["path"], scope["query_string"], etag)
+        # A request with Cache-Control: no-cache asks for a fresh response; it still refreshes the stored body
+        no_cache = "no-cache" in (_header(scope, b"cache-control") or "")
+        if not no_cache and (cached := self._bodies.get(key)) is not None:
+            self._bodies.move_to_end(key)
+            headers, body = cached
+            stored_etag = _etag_header(headers)
+            if stored_etag is not None and _matches(if_none_match, stored_etag):
+                await self._send_not_modified(send, [(b"etag", stored_etag.encode()), cache_control])
+                return
+            self.stats["hits"] += 1
+            await send({"type": "http.response.start", "status": HTTP_200_OK, "headers": headers})
+            await send({"type": "http.response.body", "body": body})
+            return
+
+        self.stats["misses"] += 1
+        await self.app(scope, receive, self._capture(send, key, etag, cache_control, if_none_match))
+
+    async def _send_not_modified(self, send: Send, validators: list[tuple[bytes, bytes]]) -> None:
+        self.stats["not_modified"] += 1
+        await send({"type": "http.response.start", "status": HTTP_304_NOT_MODIFIED, "headers": validators})
+        await send({"type": "http.response.body", "body": b""})
+
+    def _capture(
+        self,
+        send: Send,
+        key: tuple[str, bytes, str],
+        etag: str,
+        cache_control: tuple[bytes, bytes],
+        if_none_match: str | None,
+    ) -> Send:
+        start: Message | None = None
+        chunks: list[bytes] = []
+
+        async def capture(message: Message) -> None:
+            nonlocal start
+            if message["type"] == "http.response.start" and message["status"] == HTTP_200_OK:
+                headers = [*message.get("headers", []), cache_control]
+                if _etag_header(headers) is None:
+                    headers.append((b"etag", etag.encode()))
+                start = {**message, "headers": headers}
+                return
+            if start is None:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+            if message.get("more_body", False):
+                return
+            body = b"".join(chunks)
+            self._store(key, start["headers"], body)
+            # A handler-set ETag is only known now; it can still turn the response into a 304
+            response_etag = _etag_header(start["headers"])
+            if response_etag != etag and response_etag is not None and _matches(if_none_match, response_etag):
+                await self._send_not_modified(send, [(b"etag", response_etag.encode()), cache_control])
+                return
+            await send(start)
+            await send({"type": "http.response.body", "body": body})
+
+        return capture
+
+    def _store(self, key: tuple[str, bytes, str], headers: list[tuple[bytes, bytes]], body: bytes) -> None:
+        if self._config.max_entries <= 0 or len(body) > self._config.max_body_bytes:
+            return
+        self._bodies[key] = (headers, body)
+        while len(self._bodies) > self._config.max_entries:
+            self._bodies.popitem(last=False)
+            self.stats["evictions"] += 1
+
+    def _resolve(self, scope: Scope) -> tuple[str, CachePolicy, dict[str, str]] | None:
+        match = matched_route(scope)
+        policy = None if match is None else getattr(match.endpoint, _POLICY_ATTR, None)
+        if match is None or policy is None:
+            return None
+        return getattr(match.route, "path", ""), policy, match.path_params
+
+    def _etag(self, policy: CachePolicy, path_params: dict[str, str]) -> str:
+        if policy.entity_param is not None:
+            version = str(self._versions.entity_version(policy.tables[0], str(path_params[policy.entity_param])))
+        else:
+            version = ".".join(str(self._versions.table_version(table)) for table in policy.tables)
+        return f'"{self._versions.epoch}-{version}"'
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return bytes(value).decode("latin-1")
+    return None
+
+
+def _etag_header(headers: list[tuple[bytes, bytes]]) -> str | None:
+    for key, value in headers:
+        if key.lower() == b"etag":
+            return bytes(value).decode("latin-1")
+    return None
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if if_none_match is None:
+        return False
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    # Weak comparison, as RFC 9110 requires for If-None-Match
+    return "*" in candidates or etag in (candidate.removeprefix("W/") for candidate in candidates)
+
+
+__all__ = ("CachePolicy", "HttpCacheMiddleware", "cache_policy")
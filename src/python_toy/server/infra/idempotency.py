@@ -0,0 +1,181 @@
+"""Idempotency-Key support for POST requests.
+
+The first request with a key runs normally, and its 2xx response is stored in the request's
+transaction, next to the rows it created. Retries with the same key and the same request get
+the stored status, headers and body without reaching a route. Reusing a key for a different
+request is rejected with 422. Routes that stream or commit on their own, such as imports, have
+no single response to store with their writes: a key sent to them is rejected with 400.
+"""
+
+from __future__ import annotations
+
+import hashlib
+
+from sqlalchemy.exc import IntegrityError
+from starlette.status import (
+    HTTP_200_OK,
+    HTTP_300_MULTIPLE_CHOICES,
+    HTTP_400_BAD_REQUEST,
+    HTTP_409_CONFLICT,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+)
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.config import IdempotencyConfig
+from python_toy.server.infra.error.problem import problem_response
+from python_toy.server.infra.idempotency_store import IdempotencyStore, StoredResponse
+from python_toy.server.infra.session_context import DETACHED_PATHS, get_current_session
+
+_MAX_KEY_LENGTH = 255
+
+
+class IdempotencyMiddleware:
+    """Store and replay responses of POST requests that carry an Idempotency-Key header.
+
+    Must run inside SessionMiddleware: the key lookup opens the request's transaction, so services
+    join it instead of committing on their own, and the stored response commits with their writes.
+    """
+
+    def __init__(self, app: ASGIApp, *, store: IdempotencyStore, config: IdempotencyConfig) -> None:
+        self.app = app
+        self._store = store
+        self._config = config
+        self.stats = {"stored": 0, "replayed": 0, "mismatched": 0, "conflicts": 0}
+        metrics.register("idempotency", lambda: dict(self.stats))
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        key = _header(scope, b"idempotency-key") if scope["type"] == "http" and scope["method"] == "POST" else None
+        if key is None:
+            await self.app(scope, receive, send)
+            return
+        if not 0 < len(key) <= _MAX_KEY_LENGTH:
+            detail = f"Idempotency-Key must be 1 to {_MAX_KEY_LENGTH} characters long"
+            await problem_response(status=HTTP_400_BAD_REQUEST, detail=detail, instance=scope["path"])(
+                scope, receive, send
+            )
+            return
+        if scope["path"] in DETACHED_PATHS:
+            # Buffering a streamed body and response is not an option; imports resume with `offset` instead
+            detail = f"Idempotency-Key is not supported by {scope['path']}"
+            await problem_response(status=HTTP_400_BAD_REQUEST, detail=detail, instance=scope["path"])(
+                scope, receive, send
+            )
+            return
+
+        body = await _read_body(receive)
+        request_hash = _request_hash(scope, body)
+        session = get_current_session()
+
+        stored = await self._store.get(session, key)
+        if stored is not None:
+            await self._replay(stored, request_hash, scope, receive, send)
+            return
+
+        response = _ResponseRecorder(request_hash)
+        await self.app(scope, _replay_body(body, receive), response.record)
+        if not HTTP_200_OK <= response.status_code < HTTP_300_MULTIPLE_CHOICES:
+            # The lookup began the request's transaction, so the service did not roll back its own writes
+            await session.rollback()
+        elif len(response.body) <= self._config.max_body_bytes:
+            try:
+                await self._store.put(session, key, response.stored())
+                self.stats["stored"] += 1
+            except IntegrityError:
+                # A concurrent request with this key committed first: drop this request's writes, answer like it
+                await session.rollback()
+                self.stats["conflicts"] += 1
+                stored = await self._store.get(session, key)
+                if stored is None:
+                    detail = "A concurrent request with this Idempotency-Key did not complete; retry"
+                    await problem_response(status=HTTP_409_CONFLICT, detail=detail, instance=scope["path"])(
+                        scope, receive, send
+                    )
+                    return
+                await self._replay(stored, request_hash, scope, receive, send)
+                return
+        await response.send_to(send)
+
+    async def _replay(
+        self, stored: StoredResponse, request_hash: str, scope: Scope, receive: Receive, send: Send
+    ) -> None:
+        if stored.request_hash != request_hash:
+            self.stats["mismatched"] += 1
+            detail = "Idempotency-Key was already used for a different request"
+            await problem_response(status=HTTP_422_UNPROCESSABLE_ENTITY, detail=detail, instance=scope["path"])(
+                scope, receive, send
+            )
+            return
+        self.stats["replayed"] += 1
+        headers = [*stored.headers, (b"idempotent-replayed", b"true")]
+        await send({"type": "http.response.start", "status": stored.status_code, "headers": headers})
+        await send({"type": "http.response.body", "body": stored.body})
+
+
+class _ResponseRecorder:
+    def __init__(self, request_hash: str) -> None:
+        self.request_hash = request_hash
+        self.status_code = 0
+        self.headers: list[tuple[bytes, bytes]] = []
+        self._chunks: list[bytes] = []
+
+    async def record(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            self.status_code = message["status"]
+            self.headers = list(message.get("headers", []))
+        elif message["type"] == "http.response.body":
+            self._chunks.append(message.get("body", b""))
+
+    @property
+    def body(self) -> bytes:
+        return b"".join(self._chunks)
+
+    def stored(self) -> StoredResponse:
+        return StoredResponse(self.request_hash, self.status_code, self.headers, self.body)
+
+    async def send_to(self, send: Send) -> None:
+        await send({"type": "http.response.start", "status": self.status_code, "headers": self.headers})
+        await send({"type": "http.response.body", "body": self.body})
+
+
+async def _read_body(receive: Receive) -> bytes:
+    chunks: list[bytes] = []
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            break
+        chunks.append(message.get("body", b""))
+        if not message.get("more_body", False):
+            break
+    return b"".join(chunks)
+
+
+def _replay_body(body: bytes, receive: Receive) -> Receive:
+    sent = False
+
+    async def replay() -> Message:
+        nonlocal sent
+        if sent:
+            return await receive()
+        sent = True
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    return replay
+
+
+def _request_hash(scope: Scope, body: bytes) -> str:
+    digest = hashlib.sha256()
+    for part in (scope["method"].encode(), scope["path"].encode(), scope["query_string"], body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _header(scope: Scope, name: bytes) -> str | None:
+    for key, value in scope["headers"]:
+        if key == name:
+            return bytes(value).decode("latin-1")
+    return None
+
+
+__all__ = ("IdempotencyMiddleware",)
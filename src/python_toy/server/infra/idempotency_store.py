@@ -0,0 +1,69 @@
+from __future__ import annotations
+
+import json
+import time
+from dataclasses import dataclass
+from typing import Any, cast
+
+from sqlalchemy import delete, insert, select
+from sqlalchemy.engine import CursorResult
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from python_toy.server.petstore.db_models import IdempotencyKeyEntity
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    request_hash: str
+    status_code: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class IdempotencyStore:
+    """Responses by Idempotency-Key in the `idempotency_keys` table.
+
+    Every method works in the given session, so a response is stored in the same transaction
+    as the writes that produced it. Records older than the TTL are treated as absent.
+    """
+
+    def __init__(self, ttl_seconds: float) -> None:
+        self._ttl = ttl_seconds
+
+    async def get(self, session: AsyncSession, key: str) -> StoredResponse | None:
+        """Return the stored response of a key; an expired record is deleted so the key can be reused."""
+        stmt = select(IdempotencyKeyEntity.__table__).where(IdempotencyKeyEntity.key == key)
+        row = (await session.execute(stmt)).one_or_none()
+        if row is None:
+            return None
+        if row.created_at < time.time() - self._ttl:
+            await session.execute(delete(IdempotencyKeyEntity).where(IdempotencyKeyEntity.key == key))
+            return None
+        headers = [(name.encode("latin-1"), value.encode("latin-1")) for name, value in json.loads(row.headers)]
+        return StoredResponse(row.request_hash, row.status_code, headers, row.body)
+
+    async def put(self, session: AsyncSession, key: str, response: StoredResponse) -> None:
+        """Insert a key's response.
+
+        :raises sqlalchemy.exc.IntegrityError: When another transaction stored the key first
+        """
+        headers = [(name.decode("latin-1"), value.decode("latin-1")) for name, value in response.headers]
+        await session.execute(
+            insert(IdempotencyKeyEntity).values(
+                key=key,
+                request_hash=response.request_hash,
+                status_code=response.status_code,
+                headers=json.dumps(headers),
+                body=response.body,
+                created_at=time.time(),
+            )
+        )
+
+    async def delete_expired(self, session: AsyncSession) -> int:
+        """Delete records older than the TTL. Returns the number of deleted records."""
+        stmt = delete(IdempotencyKeyEntity).where(IdempotencyKeyEntity.created_at < time.time() - self._ttl)
+        result = cast(CursorResult[Any], await session.execute(stmt))
+        return result.rowcount
+
+
+__all__ = ("IdempotencyStore", "StoredResponse")
@@ -0,0 +1,179 @@
+"""Cache invalidation between worker processes on one host.
+
+Each worker binds a Unix datagram socket in a shared directory. After a request's transaction
+commits, SessionMiddleware sends the (table, id) pairs written by repositories to every other
+socket in the directory; receivers dispatch them to the handlers subscribed for the table.
+Delivery is best effort: a datagram that does not fit a full receive buffer is dropped and
+counted, so local caches must still bound staleness with a TTL.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+import json
+import os
+import socket
+import uuid
+from collections import defaultdict
+from functools import partial
+from pathlib import Path
+from typing import Awaitable, Callable
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from python_toy.server.infra import logging as logging_module
+from python_toy.server.infra import metrics
+from python_toy.server.infra.config import InvalidationConfig
+from python_toy.server.infra.transaction import after_commit
+
+logger = logging_module.get_logger(__name__)
+
+Change = tuple[str, str]  # (table, entity ID)
+ChangeHandler = Callable[[list[str]], Awaitable[None]]
+
+# Session.info key of the changes whose transaction has committed, for SessionMiddleware to publish
+_COMMITTED_CHANGES = "committed_changes"
+
+_SOCKET_SUFFIX = ".sock"
+# Unix datagrams must fit the socket send buffer; stay well below the Linux default
+_MAX_CHANGES_PER_DATAGRAM = 500
+
+
+def record_change(session: AsyncSession, table: str, entity_id: str) -> None:
+    """Record that the session's transaction wrote an entity; published once it commits."""
+    info = session.sync_session.info
+    after_commit(session, partial(_mark_committed, info, (table, entity_id)))
+
+
+def _mark_committed(info: dict[str, list[Change]], change: Change) -> None:
+    info.setdefault(_COMMITTED_CHANGES, []).append(change)
+
+
+def pop_committed_changes(session: AsyncSession) -> list[Change]:
+    changes: list[Change] = session.sync_session.info.pop(_COMMITTED_CHANGES, [])
+    return changes
+
+
+class InvalidationBus:
+    def __init__(self, socket_dir: Path) -> None:
+        self._socket_dir = socket_dir
+        self._path = socket_dir / f"{os.getpid()}-{uuid.uuid4().hex[:8]}{_SOCKET_SUFFIX}"
+        self._sock: socket.socket | None = None
+        self._handlers: defaultdict[str, list[ChangeHandler]] = defaultdict(list)
+        self._tasks: set[asyncio.Task[None]] = set()
+        self.stats = {"published": 0, "received": 0, "dropped": 0, "handler_errors": 0}
+
+    def subscribe(self, table: str, handler: ChangeHandler) -> None:
+        """Call `handler` with the IDs of each batch of `table` changes committed by other workers."""
+        self._handlers[table].append(handler)
+
+    def start(self) -> None:
+        """Bind this worker's socket and start receiving on the running event loop."""
+        self._socket_dir.mkdir(parents=True, exist_ok=True)
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        sock.setblocking(False)
+        sock.bind(str(self._path))
+        self._sock = sock
+        asyncio.get_running_loop().add_reader(sock.fileno(), self._receive)
+        logger.info("invalidation_bus.started", path=str(self._path))
+
+    def close(self) -> None:
+        if self._sock is None:
+            return
+        with contextlib.suppress(Exception):
+            asyncio.get_running_loop().remove_reader(self._sock.fileno())
+        self._sock.close()
+        self._sock = None
+        with contextlib.suppress(FileNotFoundError):
+            self._path.unlink()
+
+    def peers(self) -> list[Path]:
+        return [
+            path for path in self._socket_dir.iterdir() if path.name.endswith(_SOCKET_SUFFIX) and path != self._path
+        ]
+
+    def publish(self, changes: list[Change]) -> None:
+        """Send changes to every other worker. Never blocks; undeliverable datagrams are counted as dropped."""
+        if self._sock is None or not changes:
+            return
+        unique = list(dict.fromkeys(changes))
+        datagrams = [
+            json.dumps(unique[i : i + _MAX_CHANGES_PER_DATAGRAM]).encode()
+            for i in range(0, len(unique), _MAX_CHANGES_PER_DATAGRAM)
+        ]
+        for peer in self.peers():
+            for datagram in datagrams:
+                try:
+                    self._sock.sendto(datagram, str(peer))
+                except (ConnectionRefusedError, FileNotFoundError):
+                    # The worker behind this socket is gone
+                    with contextlib.suppress(FileNotFoundError):
+                        peer.unlink()
+                    break
+                except BlockingIOError:
+                    self.stats["dropped"] += 1
+                else:
+                    self.stats["published"] += 1
+
+    def _receive(self) -> None:
+        assert self._sock is not None
+        while True:
+            try:
+                datagram = self._sock.recv(65536 * 4)
+            except BlockingIOError:
+                return
+            try:
+                ids_by_table = _parse(datagram)
+            except (ValueError, TypeError):
+                # Malformed or truncated; the datagrams after it are still read
+                self.stats["dropped"] += 1
+                logger.warning("invalidation_bus.malformed_datagram", size=len(datagram))
+                continue
+            self.stats["received"] += 1
+            for table, ids in ids_by_table.items():
+                for handler in self._handlers.get(table, ()):
+                    task = asyncio.create_task(self._run_handler(handler, table, ids))
+                    self._tasks.add(task)
+                    task.add_done_callback(self._tasks.discard)
+
+    async def _run_handler(self, handler: ChangeHandler, table: str, ids: list[str]) -> None:
+        try:
+            await handler(ids)
+        except Exception:
+            self.stats["handler_errors"] += 1
+            logger.exception("invalidation_bus.handler_failed", table=table)
+
+
+def _parse(datagram: bytes) -> dict[str, list[str]]:
+    """Entity IDs by table from a published datagram.
+
+    :raises ValueError: When the datagram is not JSON
+    :raises TypeError: When it is not a list of [table, entity ID] pairs
+    """
+    ids_by_table: defaultdict[str, list[str]] = defaultdict(list)
+    for change in json.loads(datagram):
+        table, entity_id = change
+        if not (isinstance(table, str) and isinstance(entity_id, str)):
+            msg = f"not a [table, entity ID] pair: {change!r}"
+            raise TypeError(msg)
+        ids_by_table[table].append(entity_id)
+    return ids_by_table
+
+
+def create_invalidation_bus(config: InvalidationConfig) -> InvalidationBus | None:
+    """Create the bus from settings and publish its counters; None when no socket directory is configured."""
+    if config.socket_dir is None:
+        return None
+    bus = InvalidationBus(Path(config.socket_dir))
+    metrics.register("invalidation_bus", lambda: dict(bus.stats))
+    return bus
+
+
+__all__ = (
+    "Change",
+    "InvalidationBus",
+    "create_invalidation_bus",
+    "pop_committed_changes",
+    "record_change",
+)
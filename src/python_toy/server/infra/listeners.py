@@ -0,0 +1,87 @@
+"""Listening sockets opened before the server starts, for uvicorn and for pre-forked workers."""
+
+from __future__ import annotations
+
+import contextlib
+import errno
+import os
+import socket
+import stat
+from pathlib import Path
+
+
+def reuseport_socket(host: str, port: int) -> socket.socket:
+    """Bind a TCP socket to (host, port) with SO_REUSEPORT, so that several can listen on it.
+
+    The kernel spreads incoming connections across all listening sockets of the port, instead of
+    every worker waking up on one shared accept queue.
+    """
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        sock.bind((host, port))
+    except BaseException:
+        sock.close()
+        raise
+    return sock
+
+
+def unix_socket(path: Path, mode: int) -> socket.socket:
+    """Bind a Unix stream socket at `path`, readable and writable as `mode` allows.
+
+    A socket file left behind by an earlier run is replaced; a socket another server still listens
+    on, or any other file at `path`, is an error. The file is created with `mode` already applied,
+    so there is no moment in which a process the mode excludes could connect.
+    """
+    with contextlib.suppress(FileNotFoundError):
+        if not stat.S_ISSOCK(path.lstat().st_mode):
+            msg = f"{path} exists and is not a socket"
+            raise FileExistsError(msg)
+        if _accepts_connections(path):
+            msg = f"{path} is in use by another server"
+            raise OSError(errno.EADDRINUSE, msg)
+        path.unlink()
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    previous_umask = os.umask(0o777 & ~mode)
+    try:
+        sock.bind(str(path))
+    except OSError as e:
+        sock.close()
+        # Name the path, which bind errors leave out
+        raise OSError(e.errno, e.strerror, str(path)) from e
+    except BaseException:
+        sock.close()
+        raise
+    finally:
+        os.umask(previous_umask)
+    # The umask can only take permissions away
+    path.chmod(mode)
+    return sock
+
+
+def _accepts_connections(path: Path) -> bool:
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as probe:
+        try:
+            probe.connect(str(path))
+        except OSError:
+            return False
+    return True
+
+
+def inherited_socket(fd: int) -> socket.socket:
+    """Adopt a listening socket passed in by the parent process, e.g. by systemd socket activation."""
+    try:
+        sock = socket.socket(fileno=fd)
+    except OSError as e:
+        msg = f"file descriptor {fd} is not a socket: {e.strerror}"
+        raise ValueError(msg) from e
+    if sock.type != socket.SOCK_STREAM or not sock.getsockopt(socket.SOL_SOCKET, socket.SO_ACCEPTCONN):
+        sock.detach()
+        msg = f"file descriptor {fd} is not a listening stream socket"
+        raise ValueError(msg)
+    return sock
+
+
+__all__ = ("inherited_socket", "reuseport_socket", "unix_socket")
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from typing import Callable, Mapping
+
+from fastapi import APIRouter
+
+router = APIRouter(tags=["metrics"])
+
+MetricsProvider = Callable[[], Mapping[str, int | float]]
+
+_providers: dict[str, MetricsProvider] = {}
+
+
+def register(name: str, provider: MetricsProvider) -> None:
+    """Publish a group of counters under `name`; a later registration replaces an earlier one."""
+    _providers[name] = provider
+
+
+def unregister(name: str) -> None:
+    _providers.pop(name, None)
+
+
+def snapshot() -> dict[str, dict[str, int | float]]:
+    return {name: dict(provider()) for name, provider in sorted(_providers.items())}
+
+
+@router.get("/.internal/metrics", include_in_schema=False)
+async def metrics_endpoint() -> dict[str, dict[str, int | float]]:
+    return snapshot()
+
+
+__all__ = ("router", "register", "unregister", "snapshot")
@@ -1,24 +1,42 @@
 from __future__ import annotations
 
-from collections.abc import Awaitable, Callable
+from collections.abc import Awaitable, Callable, Mapping
 from typing import TYPE_CHECKING
 
 from fastapi import Request, Response
 from starlette.middleware.base import BaseHTTPMiddleware
 from starlette.types import ASGIApp
 
+from python_toy.server.infra.invalidation_bus import pop_committed_changes
 from python_toy.server.infra.session_context import set_session, clear_session
+from python_toy.server.infra.traffic_class import current_traffic_class
 
 if TYPE_CHECKING:
     from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
+    from python_toy.server.infra.invalidation_bus import InvalidationBus
+    from python_toy.server.infra.versions import VersionRegistry
+
 
 class SessionMiddleware(BaseHTTPMiddleware):
-    """Middleware to manage database sessions in contextvars."""
+    """Middleware to manage database sessions in contextvars.
+
+    A request of a traffic class with a connection pool of its own gets its session from that pool.
+    """
 
-    def __init__(self, app: ASGIApp, session_factory: async_sessionmaker[AsyncSession]) -> None:
+    def __init__(
+        self,
+        app: ASGIApp,
+        session_factory: async_sessionmaker[AsyncSession],
+        invalidation_bus: InvalidationBus | None = None,
+        versions: VersionRegistry | None = None,
+        traffic_class_session_factories: Mapping[str, async_sessionmaker[AsyncSession]] | None = None,
+    ) -> None:
         super().__init__(app)
         self.session_factory = session_factory
+        self.traffic_class_session_factories = traffic_class_session_factories or {}
+        self.invalidation_bus = invalidation_bus
+        self.versions = versions
 
     async def dispatch(
         self,
@@ -27,7 +45,11 @@ async def dispatch(
     ) -> Response:
         """Handle the request with a database session in context."""
         # Create a new session for this request
-        session: AsyncSession = self.session_factory()
+        traffic_class = current_traffic_class()
+        session_factory = self.session_factory
+        if traffic_class is not None:
+            session_factory = self.traffic_class_session_factories.get(traffic_class, session_factory)
+        session: AsyncSession = session_factory()
         try:
             # Set the session in context
             set_session(session)
@@ -38,6 +60,13 @@ async def dispatch(
             # Commit the transaction if successful
             await session.commit()
 
+            # Expire ETags of what this request committed, here and in the other workers
+            changes = pop_committed_changes(session)
+            if self.versions is not None:
+                self.versions.bump_all(changes)
+            if self.invalidation_bus is not None:
+                self.invalidation_bus.publish(changes)
+
             return response
 
         except Exception:
@@ -0,0 +1,72 @@
+from __future__ import annotations
+
+import unicodedata
+from bisect import bisect_left, bisect_right
+from typing import Iterable
+
+
+def normalize_name(name: str) -> str:
+    """Normalize a name for case- and width-insensitive prefix matching."""
+    return unicodedata.normalize("NFKC", name).casefold()
+
+
+class NameIndex:
+    """In-memory prefix index over (id, name) pairs.
+
+    Entries are kept in parallel lists sorted by normalized name, so a prefix lookup is one
+    bisect plus a slice. Lists of strings keep the footprint small at millions of entries;
+    inserts and removals are O(n) memmoves, which is fine for the write rate of names.
+    Not thread-safe: use from the event loop only.
+    """
+
+    def __init__(self) -> None:
+        self._keys: list[str] = []
+        self._ids: list[str] = []
+        self._names: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def load(self, entries: Iterable[tuple[str, str]]) -> None:
+        """Replace the whole index with (id, name) entries."""
+        keyed = sorted((normalize_name(name), entity_id, name) for entity_id, name in entries)
+        self._keys = [key for key, _, _ in keyed]
+        self._ids = [entity_id for _, entity_id, _ in keyed]
+        self._names = [name for _, _, name in keyed]
+
+    def add(self, entity_id: str, name: str) -> None:
+        key = normalize_name(name)
+        pos = bisect_right(self._keys, key)
+        self._keys.insert(pos, key)
+        self._ids.insert(pos, entity_id)
+        self._names.insert(pos, name)
+
+    def remove(self, entity_id: str, name: str) -> None:
+        """Remove an entry; unknown entries are ignored."""
+        key = normalize_name(name)
+        for pos in range(bisect_left(self._keys, key), bisect_right(self._keys, key)):
+            if self._ids[pos] == entity_id:
+                del self._keys[pos], self._ids[pos], self._names[pos]
+                return
+
+    def replace(self, entity_id: str, name: str | None) -> None:
+        """Set the entry of an ID whose old name is unknown; None removes it. Scans the index: O(n)."""
+        try:
+            pos = self._ids.index(entity_id)
+        except ValueError:
+            pass
+        else:
+            del self._keys[pos], self._ids[pos], self._names[pos]
+        if name is not None:
+            self.add(entity_id, name)
+
+    def suggest(self, prefix: str, limit: int) -> list[tuple[str, str]]:
+        """Return up to `limit` (id, name) entries whose normalized name starts with the prefix, in name order."""
+        key = normalize_name(prefix)
+        start = bisect_left(self._keys, key)
+        # Every key starting with the prefix sorts before prefix + U+10FFFF
+        end = bisect_left(self._keys, key + "\U0010ffff", start, min(start + limit, len(self._keys)))
+        return list(zip(self._ids[start:end], self._names[start:end], strict=True))
+
+
+__all__ = ("NameIndex", "normalize_name")
@@ -0,0 +1,38 @@
+"""Incremental splitting of NDJSON request bodies into lines."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterable, AsyncIterator
+
+
+async def read_lines(chunks: AsyncIterable[bytes], *, max_line_bytes: int) -> AsyncIterator[bytes | None]:
+    """Yield the lines of a byte stream without their line endings, buffering one line at most.
+
+    A line longer than `max_line_bytes` is dropped as it arrives and yielded as None, so line
+    numbers stay aligned with the input. Each line is yielded as its terminating chunk arrives.
+    """
+    buffer = bytearray()
+    overlong = False
+    async for chunk in chunks:
+        start = 0
+        while (end := chunk.find(b"\n", start)) != -1:
+            if overlong or len(buffer) + end - start > max_line_bytes:
+                yield None
+            else:
+                buffer += chunk[start:end]
+                yield bytes(buffer).rstrip(b"\r")
+            buffer.clear()
+            overlong = False
+            start = end + 1
+        if not overlong:
+            buffer += chunk[start:]
+            if len(buffer) > max_line_bytes:
+                buffer.clear()
+                overlong = True
+    if overlong:
+        yield None
+    elif buffer:
+        yield bytes(buffer).rstrip(b"\r")
+
+
+__all__ = ("read_lines",)
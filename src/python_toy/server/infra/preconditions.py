@@ -0,0 +1,31 @@
+"""Entity tags of versioned rows and the If-Match precondition for conditional updates."""
+
+from __future__ import annotations
+
+import re
+
+from python_toy.server.infra.error import BadRequestException
+
+_STRONG_VERSION_TAG = re.compile(r'^"(\d{1,18})"$')
+
+
+def entity_tag(version: int) -> str:
+    """Strong ETag of a row version."""
+    return f'"{version}"'
+
+
+def expected_version(if_match: str | None) -> int | None:
+    """Return the row version an If-Match header requires; None when the header is absent or `*`.
+
+    :raises BadRequestException: When the header is not a single strong ETag issued by entity_tag
+    """
+    if if_match is None or if_match.strip() == "*":
+        return None
+    match = _STRONG_VERSION_TAG.match(if_match.strip())
+    if match is None:
+        detail = f"If-Match must be '*' or one strong entity tag such as '\"3\"', got {if_match!r}"
+        raise BadRequestException(detail)
+    return int(match.group(1))
+
+
+__all__ = ("entity_tag", "expected_version")
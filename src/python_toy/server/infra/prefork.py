@@ -0,0 +1,187 @@
+"""Pre-fork master: supervises worker processes that serve on one shared port.
+
+The master opens the listening sockets, forks the workers and then only watches them. A worker
+slot keeps its socket across worker restarts: the master holds it open, so connections that
+arrive while a slot's worker is being replaced wait in the socket's accept queue for the next
+one instead of being refused. Each worker sends a heartbeat over a pipe from its event loop
+about once a second, once its startup has completed. A worker that stops sending heartbeats (a
+blocked event loop, a hung startup) is killed, and every worker that exits is replaced. A worker
+that exits before its first heartbeat failed to boot, which would only repeat, so the master
+then shuts down instead of respawning it.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import multiprocessing
+import os
+import signal
+import socket
+import threading
+import time
+from dataclasses import dataclass
+from multiprocessing.connection import Connection, wait
+from multiprocessing.process import BaseProcess
+from typing import Callable
+
+from python_toy.server.infra import logging as logging_module
+
+logger = logging_module.get_logger(__name__)
+
+# Runs in a forked worker process with the worker's listening socket and its end of the heartbeat pipe
+WorkerTarget = Callable[[socket.socket, Connection], None]
+
+# Upper bound on how long the master sleeps between checks of its workers
+_CHECK_INTERVAL = 1.0
+
+
+@dataclass(slots=True, eq=False)
+class _Worker:
+    slot: int
+    process: BaseProcess
+    heartbeat: Connection
+    last_seen: float  # time.monotonic() of the last heartbeat, or of the fork
+    booted: bool = False
+
+
+class PreforkMaster:
+    """Keeps `workers` forked processes running `target` until stopped.
+
+    Worker slot `i` serves `listeners[i % len(listeners)]`: one SO_REUSEPORT listener per slot
+    lets the kernel spread connections across workers, while a single listener is shared by all.
+    Workers get SIGTERM on stop, and are killed if they have not exited `graceful_timeout` seconds
+    later. While `run` is called from the main thread, SIGTERM and SIGINT stop the master.
+    """
+
+    def __init__(
+        self,
+        target: WorkerTarget,
+        listeners: list[socket.socket],
+        *,
+        workers: int,
+        timeout: float,
+        graceful_timeout: float,
+    ) -> None:
+        self._target = target
+        self._listeners = listeners
+        self._size = workers
+        self._timeout = timeout
+        self._graceful_timeout = graceful_timeout
+        self._workers: list[_Worker] = []
+        self._stopping = False
+        self._boot_failed = False
+        # stop() may come from a signal handler or another thread; this wakes the waiting master
+        self._wakeup_r, self._wakeup_w = socket.socketpair()
+        self._wakeup_w.setblocking(False)
+        self.stats = {"spawned": 0, "exited": 0, "timed_out": 0}
+
+    def run(self) -> int:
+        """Supervise workers until stopped; return the exit status for the master process."""
+        original_handlers = {}
+        if threading.current_thread() is threading.main_thread():
+            for sig in (signal.SIGTERM, signal.SIGINT):
+                original_handlers[sig] = signal.signal(sig, lambda signum, frame: self.stop())
+        logger.info("prefork.started", pid=os.getpid(), workers=self._size)
+        try:
+            while not self._stopping:
+                for slot in sorted(set(range(self._size)) - {worker.slot for worker in self._workers}):
+                    if not self._stopping:
+                        self._spawn(slot)
+                self._wait()
+                self._reap()
+                self._kill_unresponsive()
+        finally:
+            self._shutdown()
+            self._wakeup_r.close()
+            self._wakeup_w.close()
+            for sig, handler in original_handlers.items():
+                signal.signal(sig, handler)
+        return 1 if self._boot_failed else 0
+
+    def stop(self) -> None:
+        self._stopping = True
+        with contextlib.suppress(OSError):
+            self._wakeup_w.send(b"\0")
+
+    def _spawn(self, slot: int) -> None:
+        parent_end, child_end = multiprocessing.Pipe(duplex=False)
+        listener = self._listeners[slot % len(self._listeners)]
+        process = multiprocessing.get_context("fork").Process(
+            target=self._run_worker, args=(listener, child_end), daemon=False
+        )
+        process.start()
+        child_end.close()
+        self._workers.append(_Worker(slot, process, parent_end, time.monotonic()))
+        self.stats["spawned"] += 1
+        logger.info("prefork.worker.spawned", pid=process.pid, slot=slot)
+
+    def _run_worker(self, listener: socket.socket, heartbeat: Connection) -> None:
+        # The master's handlers and wakeup socket are not the worker's
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            signal.signal(sig, signal.SIG_DFL)
+        self._wakeup_r.close()
+        self._wakeup_w.close()
+        for worker in self._workers:
+            worker.heartbeat.close()
+        for sock in self._listeners:
+            if sock is not listener:
+                sock.close()
+        self._target(listener, heartbeat)
+
+    def _wait(self) -> None:
+        waitables: list[object] = [self._wakeup_r]
+        for worker in self._workers:
+            waitables += (worker.heartbeat, worker.process.sentinel)
+        for ready in wait(waitables, timeout=_CHECK_INTERVAL):  # type: ignore[arg-type]
+            if ready is self._wakeup_r:
+                self._wakeup_r.recv(4096)
+        now = time.monotonic()
+        for worker in self._workers:
+            # A dead worker's pipe reports EOF as readable
+            with contextlib.suppress(EOFError, OSError):
+                while worker.heartbeat.poll():
+                    worker.heartbeat.recv_bytes()
+                    worker.last_seen = now
+                    if not worker.booted:
+                        worker.booted = True
+                        logger.info("prefork.worker.booted", pid=worker.process.pid)
+
+    def _reap(self) -> None:
+        for worker in [worker for worker in self._workers if not worker.process.is_alive()]:
+            worker.process.join()
+            worker.heartbeat.close()
+            self._workers.remove(worker)
+            self.stats["exited"] += 1
+            logger.info("prefork.worker.exited", pid=worker.process.pid, exitcode=worker.process.exitcode)
+            if not worker.booted and not self._stopping:
+                logger.error("prefork.worker.boot_failed", pid=worker.process.pid)
+                self._boot_failed = True
+                self._stopping = True
+
+    def _kill_unresponsive(self) -> None:
+        deadline = time.monotonic() - self._timeout
+        for worker in self._workers:
+            if worker.last_seen < deadline and worker.process.is_alive():
+                logger.warning("prefork.worker.timeout", pid=worker.process.pid, booted=worker.booted)
+                self.stats["timed_out"] += 1
+                worker.process.kill()
+                # Reaped, and replaced, on the next round; a worker that never booted ends the master
+                worker.last_seen = float("inf")
+
+    def _shutdown(self) -> None:
+        logger.info("prefork.stopping", workers=len(self._workers))
+        for worker in self._workers:
+            worker.process.terminate()
+        deadline = time.monotonic() + self._graceful_timeout
+        for worker in self._workers:
+            worker.process.join(max(0.0, deadline - time.monotonic()))
+            if worker.process.is_alive():
+                logger.warning("prefork.worker.killed", pid=worker.process.pid)
+                worker.process.kill()
+                worker.process.join()
+            worker.heartbeat.close()
+        self._workers.clear()
+        logger.info("prefork.stopped")
+
+
+__all__ = ("PreforkMaster", "WorkerTarget")
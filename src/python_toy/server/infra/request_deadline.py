@@ -0,0 +1,154 @@
+"""Request deadlines and cancellation of abandoned requests.
+
+A request's deadline is the route's default timeout (@request_timeout, else the configured one),
+shortened by the client's X-Request-Timeout header, in seconds. When it passes, the handler task is
+cancelled, the request's running SQLite statements are interrupted, and the client gets a 504
+problem response. A client that disconnects gets the same treatment, without the response.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Callable
+
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_504_GATEWAY_TIMEOUT
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from python_toy.server.infra.config import DeadlineConfig
+from python_toy.server.infra.deadline import Deadline, deadline_scope
+from python_toy.server.infra.disconnect import DisconnectWatch
+from python_toy.server.infra.error import DeadlineExceededException
+from python_toy.server.infra.error.problem import problem_response
+from python_toy.server.infra.logging import get_logger
+from python_toy.server.infra.route_match import INTERNAL_PREFIX, matched_route
+
+TIMEOUT_HEADER = b"x-request-timeout"
+
+_TIMEOUT_ATTR = "__request_timeout__"
+
+_logger = get_logger(__name__)
+
+
+def request_timeout[F: Callable[..., object]](seconds: float | None) -> Callable[[F], F]:
+    """Set an endpoint's default deadline; None for none, e.g. for long polls and streamed bodies.
+
+    A client's X-Request-Timeout still applies, as long as it is shorter.
+    """
+
+    def decorate(endpoint: F) -> F:
+        setattr(endpoint, _TIMEOUT_ATTR, seconds)
+        return endpoint
+
+    return decorate
+
+
+class DeadlineMiddleware:
+    """Run each request under its deadline, and cancel it once the deadline passes or the client goes away.
+
+    A deadline passing after the response has started cuts the response short, as there is no
+    way to report it any more.
+    """
+
+    def __init__(self, app: ASGIApp, *, config: DeadlineConfig) -> None:
+        self.app = app
+        self._default_timeout = config.default_timeout_seconds
+        self._cancel_on_disconnect = config.cancel_on_disconnect
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or scope["path"].startswith(INTERNAL_PREFIX):
+            await self.app(scope, receive, send)
+            return
+        try:
+            timeout = self._timeout(scope)
+        except ValueError:
+            response = problem_response(
+                status=HTTP_400_BAD_REQUEST,
+                detail="X-Request-Timeout must be a positive number of seconds",
+                instance=scope["path"],
+            )
+            await response(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
+        deadline = Deadline(None if timeout is None else loop.time() + timeout)
+        started = completed = disconnected = False
+
+        async def send_and_track(message: Message) -> None:
+            nonlocal started, completed
+            if message["type"] == "http.response.start":
+                started = True
+            elif message["type"] == "http.response.body" and not message.get("more_body", False):
+                completed = True
+            await send(message)
+
+        with deadline_scope(deadline):
+            try:
+                async with asyncio.timeout_at(deadline.when) as cancel_scope:
+
+                    def abandon() -> None:
+                        nonlocal disconnected
+                        # Work that runs after the response, such as background tasks, is left alone
+                        if not completed:
+                            disconnected = True
+                            deadline.abandon()
+                            cancel_scope.reschedule(loop.time())
+
+                    watch = DisconnectWatch(scope, receive, abandon) if self._cancel_on_disconnect else None
+                    expiry = None if deadline.when is None else loop.call_at(deadline.when, deadline.expire)
+                    try:
+                        await self.app(scope, receive if watch is None else watch.receive, send_and_track)
+                    finally:
+                        if watch is not None:
+                            watch.close()
+                        if expiry is not None:
+                            expiry.cancel()
+            except TimeoutError:
+                if not cancel_scope.expired():
+                    raise
+            except DeadlineExceededException:
+                # Raised outside the handlers, e.g. by the session middleware's commit
+                if started:
+                    raise
+            else:
+                return
+        await self._abandoned(scope, receive, send, seconds=timeout, started=started, disconnected=disconnected)
+
+    @staticmethod
+    async def _abandoned(
+        scope: Scope, receive: Receive, send: Send, *, seconds: float | None, started: bool, disconnected: bool
+    ) -> None:
+        if disconnected:
+            _logger.info("request.cancelled.client_disconnected", path=scope["path"])
+        elif started:
+            _logger.warning("request.deadline_exceeded", path=scope["path"], timeout=seconds, response_started=True)
+        else:
+            _logger.info("request.deadline_exceeded", path=scope["path"], timeout=seconds)
+            response = problem_response(
+                type="//localhost/error/deadline-exceeded",
+                title="Deadline Exceeded",
+                status=HTTP_504_GATEWAY_TIMEOUT,
+                detail="The request's deadline passed before it completed",
+                instance=scope["path"],
+            )
+            await response(scope, receive, send)
+
+    def _timeout(self, scope: Scope) -> float | None:
+        """Seconds the request may take: the route's default, shortened by the client's header.
+
+        :raises ValueError: When the header is not a positive number
+        """
+        route_timeout = self._default_timeout
+        if (route := matched_route(scope)) is not None:
+            route_timeout = getattr(route.endpoint, _TIMEOUT_ATTR, route_timeout)
+        header = next((value for name, value in scope["headers"] if name == TIMEOUT_HEADER), None)
+        if header is None:
+            return route_timeout
+        client_timeout = float(header)
+        if not (client_timeout > 0 and math.isfinite(client_timeout)):
+            msg = f"invalid {TIMEOUT_HEADER.decode()}: {header!r}"
+            raise ValueError(msg)
+        return client_timeout if route_timeout is None else min(client_timeout, route_timeout)
+
+
+__all__ = ("DeadlineMiddleware", "TIMEOUT_HEADER", "request_timeout")
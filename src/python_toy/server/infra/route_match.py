@@ -0,0 +1,54 @@
+"""The route each request matches, resolved once by the outermost middleware.
+
+Middlewares that act on what a route declares, such as @cache_policy, @request_timeout or
+@traffic_class, read the match from the scope instead of matching every route again.
+"""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from starlette.routing import BaseRoute, Match
+from starlette.types import ASGIApp, Receive, Scope, Send
+
+# Health probes and metrics, which must answer whatever state the server is in
+INTERNAL_PREFIX = "/.internal/"
+
+_SCOPE_KEY = "python_toy.route_match"
+
+
+@dataclass(frozen=True, slots=True)
+class RouteMatch:
+    route: BaseRoute
+    path_params: dict[str, Any]
+
+    @property
+    def endpoint(self) -> object:
+        return getattr(self.route, "endpoint", None)
+
+
+class RouteMatchMiddleware:
+    """Find the route that fully matches each HTTP request and store it in the scope."""
+
+    def __init__(self, app: ASGIApp, *, routes: Sequence[BaseRoute]) -> None:
+        self.app = app
+        self._routes = routes
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http":
+            for route in self._routes:
+                match, child_scope = route.matches(scope)
+                if match is Match.FULL:
+                    scope[_SCOPE_KEY] = RouteMatch(route, child_scope.get("path_params", {}))
+                    break
+        await self.app(scope, receive, send)
+
+
+def matched_route(scope: Scope) -> RouteMatch | None:
+    """Return the route the request matches; None when none does, or without RouteMatchMiddleware."""
+    return scope.get(_SCOPE_KEY)
+
+
+__all__ = ("INTERNAL_PREFIX", "RouteMatch", "RouteMatchMiddleware", "matched_route")
@@ -1,14 +1,18 @@
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from contextvars import ContextVar
-from typing import TypeVar
-from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, TypeVar
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 
 # Context variable to store the current database session
 _session_context: ContextVar[AsyncSession | None] = ContextVar("db_session", default=None)
 
 T = TypeVar("T")
 
+# Routes that stream, or commit in sessions of their own, instead of in the request's transaction
+DETACHED_PATHS = frozenset({"/v1/changes", "/v1/pets:export", "/v1/pets:import"})
+
 
 def get_current_session() -> AsyncSession:
     """Get the current database session from context.
@@ -26,6 +30,14 @@ def get_current_session() -> AsyncSession:
     return session
 
 
+def in_transaction() -> bool:
+    """Whether a session is in context and has begun a transaction."""
+    try:
+        return get_current_session().in_transaction()
+    except RuntimeError:
+        return False
+
+
 def set_session(session: AsyncSession) -> None:
     """Set the database session in the current context.
 
@@ -40,4 +52,25 @@ def clear_session() -> None:
     _session_context.set(None)
 
 
-__all__ = ("get_current_session", "set_session", "clear_session")
+@asynccontextmanager
+async def session_scope(session_factory: async_sessionmaker[AsyncSession]) -> AsyncIterator[AsyncSession]:
+    """Provide a session in context outside of a request (startup tasks, CLI commands).
+
+    Commits when the block succeeds, rolls back otherwise, and restores the previous context.
+
+    Args:
+        session_factory: Factory to create the session with
+    """
+    async with session_factory() as session:
+        token = _session_context.set(session)
+        try:
+            yield session
+            await session.commit()
+        except BaseException:
+            await session.rollback()
+            raise
+        finally:
+            _session_context.reset(token)
+
+
+__all__ = ("DETACHED_PATHS", "get_current_session", "in_transaction", "set_session", "clear_session", "session_scope")
@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+from typing import Any, Awaitable, Callable, Hashable
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.session_context import in_transaction, session_scope
+from python_toy.server.infra.tasks import spawn_detached
+from python_toy.server.infra.versions import VersionRegistry
+
+
+class _Flight:
+    __slots__ = ("task", "waiters")
+
+    def __init__(self, task: asyncio.Task[Any]) -> None:
+        self.task = task
+        self.waiters = 0
+
+
+class SingleFlight:
+    """Coalesces identical concurrent reads into one execution whose result every caller shares.
+
+    The shared read runs in its own task with its own session, so it neither depends on nor
+    outlives the callers: a cancelled caller stops waiting, and the read is cancelled once no
+    caller waits for it. Callers inside a transaction bypass coalescing, because they must see
+    their own uncommitted writes. Results are shared objects: callers must not mutate them.
+
+    With `versions`, a caller only joins reads that started after the last committed write, so
+    that a client never reads data older than its own write. Reads span tables (a pet with its
+    category and tags, inventory from pet counters), so any write starts new flights.
+    """
+
+    def __init__(
+        self, session_factory: async_sessionmaker[AsyncSession], versions: VersionRegistry | None = None
+    ) -> None:
+        self._session_factory = session_factory
+        self._versions = versions
+        self._flights: dict[Hashable, _Flight] = {}
+        self.stats = {"executions": 0, "coalesced": 0, "bypassed": 0, "cancelled": 0}
+
+    async def run[T](self, key: Hashable, read: Callable[[], Awaitable[T]]) -> T:
+        if in_transaction():
+            self.stats["bypassed"] += 1
+            return await read()
+
+        if self._versions is not None:
+            key = (key, self._versions.generation)
+        flight = self._flights.get(key)
+        if flight is None:
+            flight = _Flight(spawn_detached(self._execute(read)))
+            self._flights[key] = flight
+            flight.task.add_done_callback(lambda _: self._forget(key, flight))
+            self.stats["executions"] += 1
+        else:
+            self.stats["coalesced"] += 1
+
+        flight.waiters += 1
+        try:
+            result: T = await asyncio.shield(flight.task)
+            return result
+        except asyncio.CancelledError:
+            if flight.waiters == 1 and not flight.task.done():
+                flight.task.cancel()
+                self._forget(key, flight)
+                self.stats["cancelled"] += 1
+            raise
+        finally:
+            flight.waiters -= 1
+
+    async def _execute[T](self, read: Callable[[], Awaitable[T]]) -> T:
+        async with session_scope(self._session_factory):
+            return await read()
+
+    def _forget(self, key: Hashable, flight: _Flight) -> None:
+        # A new flight may already run under the key if this one was cancelled
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+
+
+async def coalesce[T](single_flight: SingleFlight | None, key: Hashable, read: Callable[[], Awaitable[T]]) -> T:
+    """Run `read` through the coalescer if there is one, else directly."""
+    if single_flight is None:
+        return await read()
+    return await single_flight.run(key, read)
+
+
+def create_single_flight(
+    session_factory: async_sessionmaker[AsyncSession], versions: VersionRegistry, enabled: bool
+) -> SingleFlight | None:
+    """Create the read coalescer and publish its counters; None when disabled in settings."""
+    if not enabled:
+        return None
+    single_flight = SingleFlight(session_factory, versions)
+    metrics.register("single_flight", lambda: dict(single_flight.stats))
+    return single_flight
+
+
+__all__ = ("SingleFlight", "coalesce", "create_single_flight")
@@ -0,0 +1,23 @@
+"""Streaming responses whose body is produced while the request body is still being read."""
+
+from __future__ import annotations
+
+from starlette.responses import StreamingResponse
+from starlette.types import Receive, Scope, Send
+
+
+class DuplexStreamingResponse(StreamingResponse):
+    """A StreamingResponse for body iterators that consume the request body themselves.
+
+    StreamingResponse listens on `receive` for a client disconnect while it streams, which would
+    take request body messages away from the iterator. This response leaves `receive` to the
+    iterator: a disconnect surfaces there, as ClientDisconnect from Request.stream().
+    """
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        await self.stream_response(send)
+        if self.background is not None:
+            await self.background()
+
+
+__all__ = ("DuplexStreamingResponse",)
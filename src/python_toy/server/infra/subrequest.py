@@ -0,0 +1,123 @@
+"""API calls made from inside a request, and references between their results.
+
+`dispatch` runs a call through the app's router in the calling request's context, so it shares
+the request's session and transaction. A string such as `"$0.id"` in a later call's path, headers
+or body is replaced by `resolve_references` with that field of an earlier call's response body.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import re
+from dataclasses import dataclass, field
+
+from fastapi import Request
+from starlette.types import Message, Scope
+
+# $<call index>.<field>[.<field>...]; fields of nested objects and list indexes alike
+_REFERENCE = re.compile(r"\$(\d+)((?:\.[\w-]+)+)")
+
+# Stands in for the response body of a call that did not succeed
+FAILED = object()
+
+
+class UnresolvedReferenceError(Exception):
+    pass
+
+
+@dataclass(frozen=True, slots=True)
+class SubrequestResponse:
+    status: int
+    headers: dict[str, str] = field(default_factory=dict)
+    body: object = None  # Parsed JSON, text, or None when empty
+
+
+async def dispatch(
+    request: Request, method: str, path: str, headers: dict[str, str], body: object
+) -> SubrequestResponse:
+    """Run an API call with a JSON `body` through the app's router, within `request`.
+
+    :param path: Path and query string
+    """
+    path, _, query = path.partition("?")
+    content = b"" if body is None else json.dumps(body).encode()
+    raw_headers = [(name.lower().encode(), str(value).encode()) for name, value in headers.items()]
+    raw_headers += [(b"content-type", b"application/json"), (b"content-length", str(len(content)).encode())]
+    # The request's scope carries the app, its exception handlers and its state
+    scope: Scope = {
+        **{key: value for key, value in request.scope.items() if key not in ("route", "endpoint", "path_params")},
+        "method": method,
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "headers": raw_headers,
+    }
+    received = False
+
+    async def receive() -> Message:
+        nonlocal received
+        if received:
+            # Nothing more to read, and the client of the request is still there
+            await asyncio.Event().wait()
+        received = True
+        return {"type": "http.request", "body": content, "more_body": False}
+
+    status = 500
+    response_headers: dict[str, str] = {}
+    chunks: list[bytes] = []
+
+    async def send(message: Message) -> None:
+        nonlocal status
+        if message["type"] == "http.response.start":
+            status = message["status"]
+            response_headers.update((k.decode(), v.decode()) for k, v in message.get("headers", ()))
+        elif message["type"] == "http.response.body":
+            chunks.append(message.get("body", b""))
+
+    await request.app.router(scope, receive, send)
+    response_headers.pop("content-length", None)
+    data = b"".join(chunks)
+    is_json = response_headers.get("content-type", "").split(";")[0].endswith("json")
+    return SubrequestResponse(
+        status=status, headers=response_headers, body=json.loads(data) if data and is_json else data.decode() or None
+    )
+
+
+def resolve_references(value: object, bodies: list[object]) -> object:
+    """Replace $N.field references in a JSON value with fields of earlier response bodies.
+
+    `bodies` holds the response body of each earlier call, FAILED for those that did not succeed.
+
+    :raises UnresolvedReferenceError: When a reference names a failed call or a missing field
+    """
+    if isinstance(value, dict):
+        return {key: resolve_references(item, bodies) for key, item in value.items()}
+    if isinstance(value, list):
+        return [resolve_references(item, bodies) for item in value]
+    if not isinstance(value, str) or "$" not in value:
+        return value
+    if (match := _REFERENCE.fullmatch(value)) is not None:
+        # A whole-string reference keeps the referenced value's JSON type
+        return _lookup(match, bodies)
+    return _REFERENCE.sub(lambda m: str(_lookup(m, bodies)), value)
+
+
+def _lookup(match: re.Match[str], bodies: list[object]) -> object:
+    index = int(match.group(1))
+    if index >= len(bodies) or bodies[index] is FAILED:
+        msg = f"{match.group(0)} refers to operation {index}, which has not succeeded"
+        raise UnresolvedReferenceError(msg)
+    value = bodies[index]
+    for name in match.group(2)[1:].split("."):
+        if isinstance(value, dict) and name in value:
+            value = value[name]
+        elif isinstance(value, list) and name.isdigit() and int(name) < len(value):
+            value = value[int(name)]
+        else:
+            msg = f"{match.group(0)} does not exist in the response of operation {index}"
+            raise UnresolvedReferenceError(msg)
+    return value
+
+
+__all__ = ("FAILED", "SubrequestResponse", "UnresolvedReferenceError", "dispatch", "resolve_references")
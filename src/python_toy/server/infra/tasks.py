@@ -0,0 +1,21 @@
+"""Background tasks that run outside the request that starts them."""
+
+from __future__ import annotations
+
+import asyncio
+import contextvars
+from collections.abc import Coroutine
+from typing import Any
+
+
+def spawn_detached[T](coro: Coroutine[Any, Any, T]) -> asyncio.Task[T]:
+    """Run `coro` in a task with a fresh context, detached from the request that starts it.
+
+    For work shared by several requests, or outliving the one that starts it: a task created the
+    usual way copies the starting request's context, and would run under that request's deadline
+    and with its session and log context.
+    """
+    return asyncio.create_task(coro, context=contextvars.Context())
+
+
+__all__ = ("spawn_detached",)
@@ -0,0 +1,75 @@
+"""Traffic classes: which budget, priority and connection pool a request is served with.
+
+A route is assigned a class with @traffic_class; unmarked routes are "read" for GET and HEAD and
+"write" otherwise. The classes themselves are configured in `Settings.traffic_classes`. The
+admission middleware resolves the class of each request and keeps it in a contextvar for the
+session middleware, which opens the request's session from the class's pool.
+"""
+
+from __future__ import annotations
+
+import contextlib
+from collections.abc import Iterator
+from contextvars import ContextVar
+from typing import Callable
+
+from starlette.routing import BaseRoute
+from starlette.types import Scope
+
+from python_toy.server.infra.route_match import matched_route
+
+READ = "read"
+WRITE = "write"
+BULK = "bulk"
+
+_CLASS_ATTR = "__traffic_class__"
+_READ_METHODS = frozenset({"GET", "HEAD"})
+
+_current_traffic_class: ContextVar[str | None] = ContextVar("current_traffic_class", default=None)
+
+
+def traffic_class[F: Callable[..., object]](name: str) -> Callable[[F], F]:
+    """Serve an endpoint's requests as traffic class `name` instead of the one its HTTP method implies."""
+
+    def decorate(endpoint: F) -> F:
+        setattr(endpoint, _CLASS_ATTR, name)
+        return endpoint
+
+    return decorate
+
+
+def route_traffic_class(route: BaseRoute) -> str | None:
+    """Class a route was assigned with @traffic_class, if any."""
+    return getattr(getattr(route, "endpoint", None), _CLASS_ATTR, None)
+
+
+def resolve_traffic_class(scope: Scope) -> str:
+    if (match := matched_route(scope)) is not None and (name := route_traffic_class(match.route)) is not None:
+        return name
+    return READ if scope["method"] in _READ_METHODS else WRITE
+
+
+def current_traffic_class() -> str | None:
+    """Class of the request being served; None outside the admission middleware."""
+    return _current_traffic_class.get()
+
+
+@contextlib.contextmanager
+def traffic_class_scope(name: str) -> Iterator[None]:
+    token = _current_traffic_class.set(name)
+    try:
+        yield
+    finally:
+        _current_traffic_class.reset(token)
+
+
+__all__ = (
+    "BULK",
+    "READ",
+    "WRITE",
+    "current_traffic_class",
+    "resolve_traffic_class",
+    "route_traffic_class",
+    "traffic_class",
+    "traffic_class_scope",
+)
@@ -1,9 +1,14 @@
 from __future__ import annotations
 
-from typing import AsyncGenerator
+from typing import AsyncGenerator, Callable
 from contextlib import asynccontextmanager
 
+from sqlalchemy import event, text
 from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, SessionTransaction
+
+# Session.info key of the pending (transaction, callback) pairs registered by after_commit()
+_AFTER_COMMIT = "after_commit_callbacks"
 
 
 @asynccontextmanager
@@ -24,3 +29,69 @@ async def transactional(session: AsyncSession) -> AsyncGenerator[AsyncSession, N
             except Exception:
                 # SQLAlchemy automatically rolls back on exception in begin() context
                 raise
+
+
+async def begin_write(session: AsyncSession) -> None:
+    """Open the session's transaction with the write lock taken up front (SQLite BEGIN IMMEDIATE).
+
+    The pysqlite driver only emits BEGIN before DML. A SAVEPOINT issued first would start the
+    SQLite transaction itself, and releasing that savepoint would commit it. Call this before the
+    first savepoint of a transaction that has to commit as one. A no-op once the connection is in
+    a transaction.
+    """
+    if session.get_bind().dialect.name != "sqlite":
+        return
+    raw = await (await session.connection()).get_raw_connection()
+    if not raw.driver_connection.in_transaction:  # type: ignore[union-attr]
+        await session.execute(text("BEGIN IMMEDIATE"))
+
+
+def after_commit(session: AsyncSession, callback: Callable[[], None]) -> None:
+    """Run `callback` once the session's current transaction commits.
+
+    Use it to update in-process state (caches, indexes) only when the database change is durable.
+    The callback is dropped if the transaction, or the savepoint it was registered in, rolls back.
+    """
+    sync_session = session.sync_session
+    transaction = sync_session.get_nested_transaction() or sync_session.get_transaction()
+    sync_session.info.setdefault(_AFTER_COMMIT, []).append((transaction, callback))
+
+
+def has_pending_writes(session: AsyncSession) -> bool:
+    """Whether the session's current transaction holds writes that have not committed yet.
+
+    Repository writes register after-commit callbacks (see record_change), so a session with
+    pending callbacks has made changes that other sessions cannot see.
+    """
+    return bool(session.sync_session.info.get(_AFTER_COMMIT))
+
+
+def _registered_under(transaction: SessionTransaction | None, ancestor: SessionTransaction) -> bool:
+    while transaction is not None:
+        if transaction is ancestor:
+            return True
+        transaction = transaction.parent
+    return False
+
+
+@event.listens_for(Session, "after_commit")
+def _run_after_commit_callbacks(session: Session) -> None:
+    for _, callback in session.info.pop(_AFTER_COMMIT, ()):
+        callback()
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back_callbacks(session: Session, previous_transaction: SessionTransaction) -> None:
+    pending = session.info.get(_AFTER_COMMIT)
+    if pending and previous_transaction.nested:
+        pending[:] = [entry for entry in pending if not _registered_under(entry[0], previous_transaction)]
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_uncommitted_callbacks(session: Session, transaction: SessionTransaction) -> None:
+    # after_commit has already consumed the callbacks if the root transaction committed
+    if transaction.parent is None:
+        session.info.pop(_AFTER_COMMIT, None)
+
+
+__all__ = ("transactional", "begin_write", "after_commit", "has_pending_writes")
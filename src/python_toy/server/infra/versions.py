@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import uuid
+from collections import defaultdict
+from typing import Iterable
+
+# Entities share this many version counters per table; a collision only costs a spurious cache miss
+_ENTITY_BUCKETS = 4096
+
+
+class VersionRegistry:
+    """In-memory version counters per table and per entity, bumped when writes commit.
+
+    Versions start from zero in every process, so they are only meaningful together with
+    `epoch`, a random ID of this registry instance.
+    """
+
+    def __init__(self) -> None:
+        self.epoch = uuid.uuid4().hex[:12]
+        # Bumps of any table: changes whenever a write commits
+        self.generation = 0
+        self._tables: defaultdict[str, int] = defaultdict(int)
+        self._entities: defaultdict[str, list[int]] = defaultdict(lambda: [0] * _ENTITY_BUCKETS)
+
+    def table_version(self, table: str) -> int:
+        return self._tables[table]
+
+    def entity_version(self, table: str, entity_id: str) -> int:
+        return self._entities[table][hash(entity_id) % _ENTITY_BUCKETS]
+
+    def bump(self, table: str, entity_id: str) -> None:
+        self.generation += 1
+        self._tables[table] += 1
+        self._entities[table][hash(entity_id) % _ENTITY_BUCKETS] += 1
+
+    def bump_all(self, changes: Iterable[tuple[str, str]]) -> None:
+        for table, entity_id in changes:
+            self.bump(table, entity_id)
+
+
+__all__ = ("VersionRegistry",)
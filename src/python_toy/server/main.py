@@ -1,25 +1,240 @@
+"""Server entrypoint: one uvicorn process, or a pre-fork master supervising several workers."""
+
+import asyncio
+import os
+import random
+import shutil
+import socket
+import tempfile
+from functools import partial
+from pathlib import Path
+from multiprocessing.connection import Connection
+from typing import Any
+
 import click
 import uvicorn
 
+from python_toy.server.infra import config as config_module
+from python_toy.server.infra import logging as logging_module
+from python_toy.server.infra.listeners import inherited_socket, reuseport_socket, unix_socket
+from python_toy.server.infra.prefork import PreforkMaster
+
+
+def _octal_mode(ctx: click.Context, param: click.Parameter, value: str) -> int:
+    try:
+        return int(value, 8)
+    except ValueError:
+        msg = f"{value!r} is not an octal file mode, such as 660"
+        raise click.BadParameter(msg, ctx=ctx, param=param) from None
+
 
 @click.command()
 @click.option("--host", default="")
 @click.option("--port", default="8080", type=int)
-def start_server(host: str, port: int) -> None:
+@click.option(
+    "--uds",
+    type=click.Path(dir_okay=False, path_type=Path),
+    help="Listen on this Unix domain socket instead of TCP, e.g. for a sidecar proxy on the same host.",
+)
+@click.option(
+    "--uds-mode",
+    default="660",
+    callback=_octal_mode,
+    help="Permissions of the --uds socket file, in octal.",
+)
+@click.option(
+    "--fd",
+    type=click.IntRange(min=0),
+    help="Serve on this inherited listening socket (systemd socket activation style) instead of binding one.",
+)
+@click.option(
+    "--workers",
+    default=1,
+    type=click.IntRange(min=1),
+    help="Worker processes; more than one runs a pre-fork master with a SO_REUSEPORT listener per worker.",
+)
+@click.option("--backlog", default=2048, type=click.IntRange(min=1), help="Listen queue length of each listener.")
+@click.option(
+    "--limit-concurrency",
+    type=click.IntRange(min=1),
+    help="Per worker: respond 503 once this many connections and tasks are active.",
+)
+@click.option("--http", type=click.Choice(["auto", "h11", "httptools"]), default="auto", help="HTTP/1.1 parser.")
+@click.option(
+    "--timeout-keep-alive", default=5, type=click.IntRange(min=0), help="Seconds an idle keep-alive connection stays."
+)
+@click.option(
+    "--max-requests",
+    type=click.IntRange(min=1),
+    help="Replace a worker after this many requests; runs the pre-fork master even with one worker.",
+)
+@click.option(
+    "--max-requests-jitter",
+    default=0,
+    type=click.IntRange(min=0),
+    help="Add up to this many requests to each worker's limit, so workers do not restart together.",
+)
+@click.option(
+    "--worker-timeout",
+    default=30.0,
+    type=click.FloatRange(min=2),
+    help="Kill a worker whose event loop has not sent a heartbeat for this many seconds, startup included.",
+)
+@click.option(
+    "--graceful-timeout",
+    default=30.0,
+    type=click.FloatRange(min=0),
+    help="Seconds in-flight requests get to finish on shutdown.",
+)
+def start_server(
+    host: str,
+    port: int,
+    uds: Path | None,
+    uds_mode: int,
+    fd: int | None,
+    workers: int,
+    backlog: int,
+    limit_concurrency: int | None,
+    http: str,
+    timeout_keep_alive: int,
+    max_requests: int | None,
+    max_requests_jitter: int,
+    worker_timeout: float,
+    graceful_timeout: float,
+) -> None:
+    options: dict[str, Any] = {
+        "loop": "uvloop",
+        "http": http,
+        "backlog": backlog,
+        "limit_concurrency": limit_concurrency,
+        "timeout_keep_alive": timeout_keep_alive,
+        "timeout_graceful_shutdown": graceful_timeout,
+        "log_level": "info",
+        "log_config": None,  # Use our logger.
+    }
+    if uds is not None and fd is not None:
+        msg = "--uds and --fd are mutually exclusive"
+        raise click.UsageError(msg)
+    prefork = workers > 1 or max_requests is not None
+    # Workers share one Unix or inherited listener; on TCP each worker slot gets its own
+    listeners = []
+    if uds is not None:
+        try:
+            listeners.append(unix_socket(uds, uds_mode))
+        except OSError as e:
+            raise click.BadParameter(str(e), param_hint="--uds") from e
+    elif prefork and fd is None:
+        listeners.extend(reuseport_socket(host, port) for _ in range(workers))
+    for sock in listeners:
+        sock.listen(backlog)
+    if fd is not None:
+        # Already listening, with the backlog chosen by whoever opened it
+        try:
+            listeners.append(inherited_socket(fd))
+        except (OSError, ValueError) as e:
+            raise click.BadParameter(str(e), param_hint="--fd") from e
+
+    try:
+        if prefork:
+            _run_prefork(listeners, workers, max_requests, max_requests_jitter, worker_timeout, options)
+        else:
+            from python_toy.server.app import create_app  # noqa: PLC0415
+
+            server = uvicorn.Server(uvicorn.Config(app=create_app(), host=host, port=port, **options))
+            server.run(sockets=listeners or None)
+    finally:
+        for sock in listeners:
+            sock.close()
+        if uds is not None:
+            uds.unlink(missing_ok=True)
+
+
+def _run_prefork(
+    listeners: list[socket.socket],
+    workers: int,
+    max_requests: int | None,
+    max_requests_jitter: int,
+    worker_timeout: float,
+    options: dict[str, Any],
+) -> None:
+    socket_dir = _prepare_master()
+    master = PreforkMaster(
+        partial(_serve_worker, max_requests=max_requests, max_requests_jitter=max_requests_jitter, options=options),
+        listeners,
+        workers=workers,
+        timeout=worker_timeout,
+        # Past uvicorn's own graceful shutdown, plus the lifespan shutdown
+        graceful_timeout=options["timeout_graceful_shutdown"] + 5,
+    )
+    try:
+        status = master.run()
+    finally:
+        if socket_dir is not None:
+            shutil.rmtree(socket_dir, ignore_errors=True)
+    if status:
+        raise SystemExit(status)
+
+
+def _prepare_master() -> str | None:
+    """Set up what the workers share, before forking them; returns a socket directory to remove on exit.
+
+    Tables are created once, here: workers skip it, so that they do not race on DDL. Without a
+    configured invalidation socket directory, the workers' caches would drift apart, so the master
+    provides a private one.
+    """
+    settings = config_module.get_settings()
+    logging_module.setup(settings.logging)
+    socket_dir = None
+    if settings.invalidation.socket_dir is None:
+        socket_dir = tempfile.mkdtemp(prefix="python-toy-bus-")
+        os.environ["APP_INVALIDATION.SOCKET_DIR"] = socket_dir
+        config_module.get_settings.cache_clear()
+    asyncio.run(_create_schema())
+    return socket_dir
+
+
+async def _create_schema() -> None:
+    from python_toy.server.infra import container as container_module  # noqa: PLC0415
+    from python_toy.server.infra.database import create_tables  # noqa: PLC0415
+
+    container = container_module.Container()
+    engine = container.db_engine()
+    try:
+        await create_tables(engine)
+    finally:
+        await engine.dispose()
+
+
+def _serve_worker(
+    sock: socket.socket,
+    heartbeat: Connection,
+    *,
+    max_requests: int | None,
+    max_requests_jitter: int,
+    options: dict[str, Any],
+) -> None:
+    """Run one uvicorn server on a listener opened by the master, in a process forked by it."""
     from python_toy.server.app import create_app  # noqa: PLC0415
 
-    app = create_app()
+    master_pid = os.getppid()
+
+    async def notify_master() -> None:
+        if os.getppid() != master_pid:
+            # The master is gone and nobody would replace or stop this worker
+            server.should_exit = True
+            return
+        heartbeat.send_bytes(b"")
 
     config = uvicorn.Config(
-        app=app,
-        host=host,
-        port=port,
-        loop="uvloop",
-        log_level="info",
-        log_config=None,  # Use our logger.
+        app=create_app(create_schema=False),
+        limit_max_requests=None if max_requests is None else max_requests + random.randint(0, max_requests_jitter),  # noqa: S311
+        # uvicorn checks once a second, after startup, whether to call back
+        callback_notify=notify_master,
+        timeout_notify=0,
+        **options,
     )
     server = uvicorn.Server(config)
-    server.run()
+    server.run(sockets=[sock])
 
 
 def main() -> None:
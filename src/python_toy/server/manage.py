@@ -0,0 +1,95 @@
+"""Maintenance commands run against the configured database, outside the HTTP server."""
+
+import asyncio
+from functools import partial
+from typing import Awaitable, Callable
+
+import click
+
+from python_toy.server.infra import container as container_module
+from python_toy.server.infra.database import create_tables
+from python_toy.server.infra.session_context import session_scope
+from python_toy.server.petstore.pet_counters import CounterDrift
+
+
+@click.group()
+def cli() -> None:
+    pass
+
+
+async def _with_database[T](work: Callable[[container_module.Container], Awaitable[T]]) -> T:
+    """Run `work` against the configured database, with the schema created or upgraded first."""
+    container = container_module.Container()
+    engine = container.db_engine()
+    try:
+        await create_tables(engine)
+        return await work(container)
+    finally:
+        await engine.dispose()
+
+
+@cli.command("rebuild-search-index")
+def rebuild_search_index() -> None:
+    """Re-index every pet in the full-text search table."""
+    count = asyncio.run(_with_database(_rebuild_search_index))
+    click.echo(f"indexed {count} pets")
+
+
+async def _rebuild_search_index(container: container_module.Container) -> int:
+    async with session_scope(container.db_session_factory()):
+        return await container.pet_repository().rebuild_search_index()
+
+
+@cli.command("compact-idempotency-keys")
+def compact_idempotency_keys() -> None:
+    """Delete stored Idempotency-Key responses older than the configured TTL."""
+    count = asyncio.run(_with_database(_compact_idempotency_keys))
+    click.echo(f"deleted {count} idempotency keys")
+
+
+async def _compact_idempotency_keys(container: container_module.Container) -> int:
+    async with session_scope(container.db_session_factory()) as session:
+        return await container.idempotency_store().delete_expired(session)
+
+
+@cli.command("compact-change-log")
+def compact_change_log() -> None:
+    """Delete change log entries older than the configured retention period."""
+    count = asyncio.run(_with_database(_compact_change_log))
+    click.echo(f"deleted {count} change log entries")
+
+
+async def _compact_change_log(container: container_module.Container) -> int:
+    return await container.change_service().compact()
+
+
+@cli.command("reconcile-pet-counters")
+@click.option("--dry-run", is_flag=True, help="Report drift without correcting the counters.")
+def reconcile_pet_counters(dry_run: bool) -> None:
+    """Recount pets per status, category and tag and report (and correct) drifted inventory counters."""
+    drift = asyncio.run(_with_database(partial(_reconcile_pet_counters, fix=not dry_run)))
+    for counter in drift:
+        click.echo(f"{counter.dimension} {counter.key}: stored {counter.stored}, actual {counter.actual}")
+    click.echo(f"{len(drift)} counters drifted" + ("" if dry_run or not drift else ", corrected"))
+
+
+async def _reconcile_pet_counters(container: container_module.Container, *, fix: bool) -> list[CounterDrift]:
+    async with session_scope(container.db_session_factory()):
+        drift = await container.pet_repository().reconcile_counters(fix=fix)
+    invalidation_bus = container.invalidation_bus()
+    if fix and drift and invalidation_bus is not None:
+        # Running servers cache inventory under the pets table version; any pets change bumps it
+        invalidation_bus.start()
+        try:
+            invalidation_bus.publish([("pets", "")])
+        finally:
+            invalidation_bus.close()
+    return drift
+
+
+def main() -> None:
+    cli()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import re
-from typing import Callable, Any, Protocol
+import time
+from functools import partial
+from typing import Callable, Any, ClassVar, Iterable, Protocol, Sequence
 
-from sqlalchemy import delete, select, ForeignKey
+from sqlalchemy import ColumnElement, Row, Select, delete, func, select, ForeignKey
 from sqlalchemy.orm import QueryableAttribute
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
-from python_toy.server.petstore.db_models import Base as ORMBase
+from python_toy.server.petstore.db_models import Base as ORMBase, ChangeLogEntity, ChangeOp
 
+from python_toy.server.infra.change_feed import notify_committed
+from python_toy.server.infra.deadline import check_deadline
+from python_toy.server.infra.entity_cache import EntityCache
+from python_toy.server.infra.invalidation_bus import record_change
+from python_toy.server.infra.transaction import after_commit
 from python_toy.server.infra.error import (
     BadRequestException,
     DuplicateEntityException,
@@ -19,18 +26,31 @@
 # Session supplier type (like Java's Supplier<AsyncSession>)
 SessionSupplier = Callable[[], AsyncSession]
 
+# Session.info key of the entity caches the session has written through; it reads past them
+_WRITTEN_CACHES = "written_entity_caches"
+
 
 class BaseRepository[EntityT]:
     """Base repository with common CRUD operations."""
 
-    def __init__(self, db_model: type[EntityT], session_supplier: SessionSupplier) -> None:
+    # Columns of the row-based read path (list_rows, get_rows); set by subclasses that use it
+    ROW_COLUMNS: ClassVar[tuple[QueryableAttribute[Any], ...]] = ()
+
+    def __init__(
+        self,
+        db_model: type[EntityT],
+        session_supplier: SessionSupplier,
+        cache: EntityCache[Row[Any]] | None = None,
+    ) -> None:
         self.db_model = db_model
         self.entity_type = db_model.__name__
         self._session_supplier = session_supplier
+        self._cache = cache
 
     @property
     def _session(self) -> AsyncSession:
-        """Get the current database session from supplier."""
+        """Get the current database session from supplier, if the request still has time left."""
+        check_deadline()
         return self._session_supplier()
 
     async def ensure_foreign_key_exists(self, column: QueryableAttribute[Any], fk_value: object) -> None:
@@ -106,6 +126,101 @@ def _analyze_integrity_error(self, error: IntegrityError, entity_type: str) -> E
         # Fallback to generic BadRequestException
         return BadRequestException(f"Database constraint violation: {error_msg}")
 
+    async def fetch_rows(self, stmt: Select[Any]) -> list[Row[Any]]:
+        """Execute a Core select on the session's connection and return plain rows.
+
+        Bypasses ORM entity construction and the identity map. Use for read-only projections only.
+        """
+        connection = await self._session.connection()
+        result = await connection.execute(stmt)
+        return list(result.all())
+
+    async def count(self, *where: ColumnElement[bool]) -> int:
+        stmt = select(func.count()).select_from(self.db_model).where(*where)
+        return int((await self._session.execute(stmt)).scalar_one())
+
+    async def existing_ids(self, ids: Iterable[str]) -> set[str]:
+        """Return the given IDs that exist, with one IN query."""
+        id_column = self.db_model.id  # type: ignore[attr-defined]
+        return set((await self._session.execute(select(id_column).where(id_column.in_(list(ids))))).scalars())
+
+    async def list_rows(
+        self,
+        columns: Sequence[QueryableAttribute[Any]],
+        *,
+        where: Sequence[ColumnElement[bool]] = (),
+        order_by: Sequence[QueryableAttribute[Any]],
+        page: int,
+        size: int,
+    ) -> tuple[list[Row[Any]], int]:
+        """List a page of rows projected to the given columns, with the total count matching `where`."""
+        total = await self.count(*where)
+        stmt = select(*columns).where(*where).order_by(*order_by).offset((page - 1) * size).limit(size)
+        return await self.fetch_rows(stmt), total
+
+    async def get_rows(self, entity_ids: Iterable[str]) -> dict[str, Row[Any]]:
+        """Get ROW_COLUMNS rows by ID, through the entity cache when one is configured.
+
+        IDs that do not exist are absent from the result. Cache misses are read with one IN query.
+        """
+        pending = set(entity_ids)
+        found: dict[str, Row[Any]] = {}
+        cache = self._readable_cache()
+        if cache is not None:
+            for entity_id in list(pending):
+                hit, cached = cache.lookup(entity_id)
+                if hit:
+                    pending.discard(entity_id)
+                    if cached is not None:
+                        found[entity_id] = cached
+        if not pending:
+            return found
+
+        generation = cache.generation if cache is not None else 0
+        stmt = select(*self.ROW_COLUMNS).where(self.db_model.id.in_(pending))  # type: ignore
+        for row in await self.fetch_rows(stmt):
+            found[row.id] = row
+        if cache is not None:
+            for entity_id in pending:
+                cache.put(entity_id, found.get(entity_id), generation=generation)
+        return found
+
+    async def get_row_optional(self, entity_id: str) -> Row[Any] | None:
+        """Get the ROW_COLUMNS row by ID, through the entity cache. Returns None if not found."""
+        return (await self.get_rows((entity_id,))).get(entity_id)
+
+    async def get_row_required(self, entity_id: str) -> Row[Any]:
+        """Get the ROW_COLUMNS row by ID, through the entity cache. Raises EntityNotFoundException if not found."""
+        if (row := await self.get_row_optional(entity_id)) is None:
+            raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        return row
+
+    def _readable_cache(self) -> EntityCache[Row[Any]] | None:
+        # A session that wrote through the cache must see its own uncommitted changes,
+        # and must not fill the cache with them
+        if self._cache is None or self._cache in self._session.info.get(_WRITTEN_CACHES, ()):
+            return None
+        return self._cache
+
+    async def apply_external_changes(self, entity_ids: list[str]) -> None:
+        """Forget entities that another worker process has written."""
+        if self._cache is not None:
+            for entity_id in entity_ids:
+                self._cache.invalidate(entity_id)
+
+    def _record_write(self, entity_id: str, op: ChangeOp) -> None:
+        """Record a written entity: log the change, drop it from the cache now and again on commit, publish it."""
+        table: str = self.db_model.__tablename__  # type: ignore[attr-defined]
+        # Flushed with the transaction's other writes, so the entry commits or rolls back with them
+        self._session.add(ChangeLogEntity(table_name=table, entity_id=entity_id, op=op, created_at=time.time()))
+        after_commit(self._session, notify_committed)
+        record_change(self._session, table, entity_id)
+        if self._cache is None:
+            return
+        self._cache.invalidate(entity_id)
+        self._session.info.setdefault(_WRITTEN_CACHES, set()).add(self._cache)
+        after_commit(self._session, partial(self._cache.invalidate, entity_id))
+
     async def create(self, entity: EntityT) -> EntityT:
         """Create a new entity and return DB entity."""
         self._session.add(entity)
@@ -116,6 +231,7 @@ async def create(self, entity: EntityT) -> EntityT:
             # Let Service level handle rollback
             domain_exception = self._analyze_integrity_error(e, self.entity_type)
             raise domain_exception from e
+        self._record_write(entity.id, "create")  # type: ignore
         return entity
 
     async def get_optional(self, entity_id: str) -> EntityT | None:
@@ -135,6 +251,7 @@ async def delete(self, entity_id: str) -> None:
         result = await self._session.execute(stmt)
         if result.rowcount == 0:
             raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        self._record_write(entity_id, "delete")
         # Note: Transaction commit is handled at Service level
 
 
@@ -0,0 +1,86 @@
+"""POST /v1/batch: several API calls in one round trip and one transaction.
+
+Operations are dispatched to the app's router in order, inside the batch request's session, so
+every repository write joins one transaction that commits once. With `atomic`, the first failed
+operation rolls back the whole batch; otherwise each operation runs in a savepoint and only failed
+operations are rolled back.
+"""
+
+from __future__ import annotations
+
+import json
+from typing import Annotated
+
+from fastapi import APIRouter, Body, Request
+from starlette.status import HTTP_400_BAD_REQUEST, HTTP_424_FAILED_DEPENDENCY
+
+from python_toy.server.infra.error.problem import problem_response
+from python_toy.server.infra.session_context import DETACHED_PATHS, get_current_session
+from python_toy.server.infra.subrequest import FAILED, UnresolvedReferenceError, dispatch, resolve_references
+from python_toy.server.infra.transaction import begin_write
+from .models import BatchOperation, BatchRequest, BatchResponse, BatchResult
+
+router = APIRouter(tags=["batch"])
+
+# Routes that cannot join the batch transaction
+_EXCLUDED_PATHS = DETACHED_PATHS | {"/v1/batch"}
+
+
+@router.post("/v1/batch")
+async def run_batch(request: Request, batch: Annotated[BatchRequest, Body()]) -> BatchResponse:
+    """Run API operations in order in one transaction and return all their responses.
+
+    A string such as `"$0.id"` in a later operation's path, headers or body is replaced by that
+    field of an earlier operation's response body. Operations after a failed one in an atomic
+    batch are not run and report 424 Failed Dependency.
+    """
+    session = get_current_session()
+    results: list[BatchResult] = []
+    bodies: list[object] = []  # response body of each operation; FAILED when it did not succeed
+    # An Idempotency-Key lookup has already begun the request's transaction
+    transaction = session.get_transaction() or await session.begin()
+    try:
+        await begin_write(session)
+        for index, operation in enumerate(batch.operations):
+            savepoint = None if batch.atomic else await session.begin_nested()
+            result = await _run_operation(request, operation, bodies, index)
+            results.append(result)
+            succeeded = result.status < HTTP_400_BAD_REQUEST
+            bodies.append(result.body if succeeded else FAILED)
+            if savepoint is not None:
+                await (savepoint.commit() if succeeded else savepoint.rollback())
+            elif not succeeded:
+                await transaction.rollback()
+                skipped = BatchResult(status=HTTP_424_FAILED_DEPENDENCY)
+                results.extend(skipped for _ in batch.operations[index + 1 :])
+                return BatchResponse(results=results, committed=False)
+        await transaction.commit()
+    except BaseException:
+        await transaction.rollback()
+        raise
+    return BatchResponse(results=results, committed=any(body is not FAILED for body in bodies))
+
+
+async def _run_operation(request: Request, operation: BatchOperation, bodies: list[object], index: int) -> BatchResult:
+    try:
+        path = str(resolve_references(operation.path, bodies))
+        headers = {name: str(resolve_references(value, bodies)) for name, value in operation.headers.items()}
+        body = resolve_references(operation.body, bodies)
+    except UnresolvedReferenceError as e:
+        return _problem_result(HTTP_400_BAD_REQUEST, f"Operation {index}: {e}", operation.path)
+    if (route_path := path.partition("?")[0]) in _EXCLUDED_PATHS:
+        return _problem_result(
+            HTTP_400_BAD_REQUEST, f"Operation {index}: {route_path} cannot run in a batch", route_path
+        )
+    response = await dispatch(request, operation.method, path, headers, body)
+    return BatchResult(status=response.status, headers=response.headers, body=response.body)
+
+
+def _problem_result(status: int, detail: str, instance: str) -> BatchResult:
+    response = problem_response(status=status, detail=detail, instance=instance)
+    return BatchResult(
+        status=status, headers={"content-type": response.media_type or ""}, body=json.loads(bytes(response.body))
+    )
+
+
+__all__ = ("router",)
@@ -6,7 +6,8 @@
 from fastapi_utils.cbv import cbv
 from starlette.status import HTTP_201_CREATED
 
-from python_toy.server.model.common import EmptyResponse, PageResponse
+from python_toy.server.infra.http_cache import cache_policy
+from python_toy.server.model.common import EmptyResponse, ListResponse, PageResponse
 from .category_service import CategoryService
 from .models import Category, CategoryCreate
 from python_toy.server.petstore.id_type import CategoryId
@@ -31,6 +32,7 @@ async def create(self, payload: CategoryCreate) -> Category:
         return await self._service.create(payload)
 
     @router.get("/v1/categories")
+    @cache_policy("categories")
     async def list(
         self,
         page: Annotated[int, Query(ge=1)] = 1,
@@ -38,7 +40,16 @@ async def list(
     ) -> PageResponse[Category]:
         return await self._service.list(page, size)
 
+    @router.get("/v1/categories:suggest")
+    async def suggest(
+        self,
+        prefix: Annotated[str, Query(min_length=1, max_length=100)],
+        limit: Annotated[int, Query(ge=1, le=50)] = 10,
+    ) -> ListResponse[Category]:
+        return self._service.suggest(prefix, limit)
+
     @router.get("/v1/categories/{entity_id}")
+    @cache_policy("categories", entity_param="entity_id")
     async def get(self, entity_id: CategoryId) -> Category:
         return await self._service.get(entity_id)
 
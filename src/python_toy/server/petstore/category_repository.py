@@ -1,30 +1,64 @@
 from __future__ import annotations
 
-from sqlalchemy import delete, func, select
+from functools import partial
+from typing import Any
 
+from sqlalchemy import Row, delete, select
+
+from python_toy.server.infra.entity_cache import EntityCache
 from python_toy.server.infra.error import EntityNotFoundException
+from python_toy.server.infra.name_index import NameIndex
+from python_toy.server.infra.transaction import after_commit
 from python_toy.server.petstore.db_models import CategoryEntity
 from .base_repository import BaseRepository, SessionSupplier
 
 
 class CategoryRepository(BaseRepository[CategoryEntity]):
-    def __init__(self, session_supplier: SessionSupplier) -> None:
-        super().__init__(CategoryEntity, session_supplier)
+    # Columns read by the row-based list path; mapped by CategoryMapper.row_to_domain
+    ROW_COLUMNS = (CategoryEntity.id, CategoryEntity.name)
+
+    def __init__(
+        self,
+        session_supplier: SessionSupplier,
+        name_index: NameIndex | None = None,
+        cache: EntityCache[Row[Any]] | None = None,
+    ) -> None:
+        super().__init__(CategoryEntity, session_supplier, cache)
+        # Prefix index over names, kept in step with committed writes made through this repository
+        self.name_index = name_index if name_index is not None else NameIndex()
+
+    async def load_name_index(self) -> int:
+        """Load every category name into the name index. Returns the number of entries."""
+        rows = await self.fetch_rows(select(*self.ROW_COLUMNS))
+        self.name_index.load((row.id, row.name) for row in rows)
+        return len(rows)
+
+    async def apply_external_changes(self, entity_ids: list[str]) -> None:
+        await super().apply_external_changes(entity_ids)
+        rows = await self.get_rows(entity_ids)
+        for entity_id in entity_ids:
+            row = rows.get(entity_id)
+            self.name_index.replace(entity_id, row.name if row is not None else None)
 
-    async def list(self, *, page: int = 1, size: int = 10) -> tuple[list[CategoryEntity], int]:
-        total = int((await self._session.execute(select(func.count()).select_from(CategoryEntity))).scalar_one())
+    async def create(self, entity: CategoryEntity) -> CategoryEntity:
+        entity = await super().create(entity)
+        after_commit(self._session, partial(self.name_index.add, entity.id, entity.name))
+        return entity
 
-        q = select(CategoryEntity).order_by(CategoryEntity.name).offset((page - 1) * size).limit(size)
-        items = (await self._session.execute(q)).scalars().all()
-        return list(items), total
+    async def list(self, *, page: int = 1, size: int = 10) -> tuple[list[Row[Any]], int]:
+        """List a page of category rows (Core projection, no ORM instances) with the total count."""
+        return await self.list_rows(self.ROW_COLUMNS, order_by=(CategoryEntity.name,), page=page, size=size)
 
     async def get(self, entity_id: str) -> CategoryEntity:
         return await self.get_required(entity_id)
 
     async def delete(self, entity_id: str) -> None:
-        res = await self._session.execute(delete(CategoryEntity).where(CategoryEntity.id == entity_id))
-        if res.rowcount == 0:
+        stmt = delete(CategoryEntity).where(CategoryEntity.id == entity_id).returning(CategoryEntity.name)
+        name = (await self._session.execute(stmt)).scalar_one_or_none()
+        if name is None:
             raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        self._record_write(entity_id, "delete")
+        after_commit(self._session, partial(self.name_index.remove, entity_id, name))
 
 
 __all__ = ("CategoryRepository",)
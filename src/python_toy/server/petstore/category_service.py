@@ -2,7 +2,9 @@
 
 from typing import TYPE_CHECKING
 
-from python_toy.server.model.common import PageResponse
+from python_toy.server.model.common import ListResponse, PageResponse
+from python_toy.server.infra.group_commit import GroupCommitter, group_commit
+from python_toy.server.infra.single_flight import SingleFlight, coalesce
 from python_toy.server.infra.transaction import transactional
 from .models import Category, CategoryCreate
 from .mappers import CategoryMapper
@@ -12,25 +14,50 @@
 
 
 class CategoryService:
-    def __init__(self, repo: CategoryRepository) -> None:
+    def __init__(
+        self,
+        repo: CategoryRepository,
+        single_flight: SingleFlight | None = None,
+        group_committer: GroupCommitter | None = None,
+    ) -> None:
         self._repo = repo
+        self._single_flight = single_flight
+        self._group_committer = group_committer
 
     async def create(self, payload: CategoryCreate) -> Category:
-        async with transactional(self._repo._session):
-            entity = CategoryMapper.to_entity(payload)
-            entity = await self._repo.create(entity)
-            return CategoryMapper.to_domain(entity)
+        async def create() -> Category:
+            async with transactional(self._repo._session):
+                entity = CategoryMapper.to_entity(payload)
+                entity = await self._repo.create(entity)
+                return CategoryMapper.to_domain(entity)
+
+        return await group_commit(self._group_committer, create)
 
     async def list(self, page: int, size: int) -> PageResponse[Category]:
+        async def read() -> PageResponse[Category]:
+            async with transactional(self._repo._session):
+                rows, total = await self._repo.list(page=page, size=size)
+                items = [CategoryMapper.row_to_domain(row) for row in rows]
+                return PageResponse.create(items, total, page, size)
+
+        return await coalesce(self._single_flight, ("categories.list", page, size), read)
+
+    def suggest(self, prefix: str, limit: int) -> ListResponse[Category]:
+        """Return categories whose name starts with the prefix (case-insensitive), served from the in-memory name index."""
+        items = [Category(id=entity_id, name=name) for entity_id, name in self._repo.name_index.suggest(prefix, limit)]
+        return ListResponse.of(items)
+
+    async def load_name_index(self) -> int:
         async with transactional(self._repo._session):
-            entities, total = await self._repo.list(page=page, size=size)
-            items = [CategoryMapper.to_domain(item) for item in entities]
-            return PageResponse.create(items, total, page, size)
+            return await self._repo.load_name_index()
 
     async def get(self, entity_id: str) -> Category:
-        async with transactional(self._repo._session):
-            entity = await self._repo.get_required(entity_id)
-            return CategoryMapper.to_domain(entity)
+        async def read() -> Category:
+            async with transactional(self._repo._session):
+                row = await self._repo.get_row_required(entity_id)
+                return CategoryMapper.row_to_domain(row)
+
+        return await coalesce(self._single_flight, ("categories.get", entity_id), read)
 
     async def delete(self, entity_id: str) -> None:
         async with transactional(self._repo._session):
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, Query, Request
+from fastapi.responses import StreamingResponse
+from fastapi_utils.cbv import cbv
+
+from python_toy.server.infra.change_feed import ChangeEntry
+from python_toy.server.infra.error import BadRequestException
+from python_toy.server.infra.request_deadline import request_timeout
+from .change_service import ChangeService
+from .mappers import ChangeMapper
+from .models import ChangePage
+
+# Tables whose writes are recorded in the change log
+CHANGE_TABLES = ("categories", "orders", "pets", "tags", "users")
+
+
+def _service_dep(request: Request) -> ChangeService:
+    from python_toy.server.infra.container import Container
+
+    container: Container = request.app.state.container
+    return container.change_service()
+
+
+router = APIRouter(tags=["changes"])
+
+
+def _parse_tables(tables: str | None) -> frozenset[str]:
+    if not tables:
+        return frozenset()
+    names = frozenset(name.strip() for name in tables.split(",") if name.strip())
+    if unknown := names.difference(CHANGE_TABLES):
+        msg = f"Unknown tables: {', '.join(sorted(unknown))}. Valid tables: {', '.join(CHANGE_TABLES)}"
+        raise BadRequestException(msg)
+    return names
+
+
+async def _sse_events(entries: AsyncIterator[ChangeEntry | None]) -> AsyncIterator[bytes]:
+    async for entry in entries:
+        if entry is None:
+            yield b": keep-alive\n\n"
+        else:
+            yield f"id: {entry.seq}\ndata: {ChangeMapper.to_domain(entry).model_dump_json()}\n\n".encode()
+
+
+@cbv(router)
+class ChangeRoutes:
+    _service: ChangeService = Depends(_service_dep)
+
+    @router.get("/v1/changes", response_model=ChangePage)
+    @request_timeout(None)
+    async def list_changes(
+        self,
+        since: Annotated[
+            int | None, Query(ge=0, description="Return changes after this seq. Default: the oldest retained.")
+        ] = None,
+        limit: Annotated[int, Query(ge=1, le=1000)] = 100,
+        tables: Annotated[str | None, Query(description=f"Comma-separated: {', '.join(CHANGE_TABLES)}")] = None,
+        wait: Annotated[float, Query(ge=0, le=60, description="Seconds to wait for a change when none is pending")] = 0,
+        accept: Annotated[str | None, Header()] = None,
+        last_event_id: Annotated[str | None, Header()] = None,
+    ) -> ChangePage | StreamingResponse:
+        """Read the change log after `since`: as one batch, as a long-poll (`wait`), or as an SSE stream.
+
+        Send `Accept: text/event-stream` for a stream of events whose `id` is the change seq; a
+        reconnecting client's `Last-Event-ID` takes precedence over `since`. A cursor older than
+        the retained log gets 410 Gone: resynchronize, then read on from the oldest retained change.
+        """
+        table_names = _parse_tables(tables)
+        if accept is not None and "text/event-stream" in accept:
+            if last_event_id is not None and last_event_id.isdigit():
+                since = int(last_event_id)
+            entries = await self._service.stream(since, tables=table_names)
+            return StreamingResponse(
+                _sse_events(entries),
+                media_type="text/event-stream",
+                headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+            )
+        batch = await self._service.read(since, limit=limit, tables=table_names, wait=wait)
+        return ChangePage(items=[ChangeMapper.to_domain(entry) for entry in batch.entries], next_since=batch.cursor)
+
+
+__all__ = ("router",)
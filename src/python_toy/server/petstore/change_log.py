@@ -0,0 +1,64 @@
+"""Reads and compaction of the change log that repository writes append to."""
+
+from __future__ import annotations
+
+from collections.abc import Collection, Sequence
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, Row, delete, func, select
+
+from python_toy.server.infra.change_feed import ChangeEntry
+from python_toy.server.petstore.db_models import ChangeLogEntity
+from .base_repository import SessionSupplier
+
+_COLUMNS = (
+    ChangeLogEntity.seq,
+    ChangeLogEntity.table_name,
+    ChangeLogEntity.entity_id,
+    ChangeLogEntity.op,
+    ChangeLogEntity.created_at,
+)
+
+
+def _entries(rows: Sequence[Row[Any]]) -> list[ChangeEntry]:
+    return [ChangeEntry(*row) for row in rows]
+
+
+class ChangeLog:
+    """Change log access through the current session. Entries are appended by BaseRepository._record_write."""
+
+    def __init__(self, session_supplier: SessionSupplier) -> None:
+        self._session_supplier = session_supplier
+
+    async def after(self, seq: int, limit: int, tables: Collection[str] = ()) -> list[ChangeEntry]:
+        """Up to `limit` entries with a sequence number above `seq`, oldest first."""
+        stmt = select(*_COLUMNS).where(ChangeLogEntity.seq > seq).order_by(ChangeLogEntity.seq).limit(limit)
+        if tables:
+            stmt = stmt.where(ChangeLogEntity.table_name.in_(tables))
+        return _entries((await self._session_supplier().execute(stmt)).all())
+
+    async def latest(self, limit: int) -> list[ChangeEntry]:
+        """Return the newest `limit` entries, oldest first."""
+        stmt = select(*_COLUMNS).order_by(ChangeLogEntity.seq.desc()).limit(limit)
+        return _entries((await self._session_supplier().execute(stmt)).all())[::-1]
+
+    async def first_seq(self) -> int | None:
+        """Sequence number of the oldest retained entry; None while the log is empty."""
+        return await self._session_supplier().scalar(select(func.min(ChangeLogEntity.seq)))
+
+    async def last_seq(self) -> int | None:
+        """Sequence number of the newest entry; None while the log is empty."""
+        return await self._session_supplier().scalar(select(func.max(ChangeLogEntity.seq)))
+
+    async def compact(self, before: float) -> int:
+        """Delete entries written before `before` (Unix time). Returns the number of deleted entries.
+
+        The newest entry is always kept: the log never looks empty to a reader that has seen entries.
+        """
+        newest = select(func.max(ChangeLogEntity.seq)).scalar_subquery()
+        stmt = delete(ChangeLogEntity).where(ChangeLogEntity.created_at < before, ChangeLogEntity.seq < newest)
+        result = cast(CursorResult[Any], await self._session_supplier().execute(stmt))
+        return result.rowcount
+
+
+__all__ = ("ChangeLog",)
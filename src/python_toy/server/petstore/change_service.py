@@ -0,0 +1,100 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncGenerator, Collection
+
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from python_toy.server.infra.change_feed import ChangeBatch, ChangeEntry, ChangeFeed
+from python_toy.server.infra.config import ChangeFeedConfig
+from python_toy.server.infra.error import GoneException
+from python_toy.server.infra.session_context import session_scope
+from .change_log import ChangeLog
+
+# Entries per batch of an SSE stream
+_STREAM_BATCH = 500
+
+
+class ChangeService:
+    """Application service for the change feed.
+
+    Reads are served from the in-process ChangeFeed buffer when it reaches back far enough, and
+    from the change log otherwise. Every read runs in its own short session, so long-polls and
+    streams hold no database connection while they wait.
+    """
+
+    def __init__(
+        self,
+        change_log: ChangeLog,
+        feed: ChangeFeed,
+        session_factory: async_sessionmaker[AsyncSession],
+        config: ChangeFeedConfig,
+    ) -> None:
+        self._change_log = change_log
+        self._feed = feed
+        self._session_factory = session_factory
+        self._config = config
+
+    async def read(
+        self, since: int | None, *, limit: int, tables: Collection[str] = (), wait: float = 0
+    ) -> ChangeBatch:
+        """Entries after `since` (from the oldest retained entry when None), waiting up to `wait` seconds for one.
+
+        :raises GoneException: When entries after `since` have been compacted away
+        """
+        batch = await self._read(since, limit=limit, tables=tables)
+        if batch.entries or wait <= 0:
+            return batch
+        deadline = asyncio.get_running_loop().time() + wait
+        while not batch.entries:
+            remaining = deadline - asyncio.get_running_loop().time()
+            if remaining <= 0 or not await self._feed.wait(batch.cursor, remaining):
+                break
+            batch = await self._read(batch.cursor, limit=limit, tables=tables)
+        return batch
+
+    async def stream(
+        self, since: int | None, *, tables: Collection[str] = ()
+    ) -> AsyncGenerator[ChangeEntry | None, None]:
+        """Entries after `since` as they commit, with None after each heartbeat interval without any.
+
+        :raises GoneException: When entries after `since` have been compacted away; raised here,
+            before the stream starts
+        """
+        batch = await self._read(since, limit=_STREAM_BATCH, tables=tables)
+        return self._follow(batch, tables)
+
+    async def _follow(self, batch: ChangeBatch, tables: Collection[str]) -> AsyncGenerator[ChangeEntry | None, None]:
+        while True:
+            for entry in batch.entries:
+                yield entry
+            if len(batch.entries) < _STREAM_BATCH and not await self._feed.wait(
+                batch.cursor, self._config.heartbeat_seconds
+            ):
+                yield None
+            batch = await self._read(batch.cursor, limit=_STREAM_BATCH, tables=tables)
+
+    async def compact(self) -> int:
+        """Delete entries older than the retention period. Returns the number of deleted entries."""
+        async with session_scope(self._session_factory):
+            return await self._change_log.compact(time.time() - self._config.retention_seconds)
+
+    async def _read(self, since: int | None, *, limit: int, tables: Collection[str]) -> ChangeBatch:
+        if since is not None and (batch := await self._feed.read(since, limit=limit, tables=tables)) is not None:
+            return batch
+        async with session_scope(self._session_factory):
+            first = await self._change_log.first_seq()
+            if since is None:
+                since = first - 1 if first is not None else 0
+            elif first is not None and since < first - 1:
+                msg = f"Changes after {since} have been compacted; the oldest retained change is {first}"
+                raise GoneException(msg)
+            entries = await self._change_log.after(since, limit, tables)
+            if len(entries) == limit:
+                return ChangeBatch(entries, entries[-1].seq)
+            # Every entry up to the newest was returned or filtered out
+            return ChangeBatch(entries, max(since, await self._change_log.last_seq() or 0))
+
+
+__all__ = ("ChangeService",)
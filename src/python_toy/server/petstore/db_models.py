@@ -1,9 +1,12 @@
 from __future__ import annotations
 
-from sqlalchemy import Integer, String, ForeignKey, DateTime, Enum, Text
+from sqlalchemy import Integer, String, ForeignKey, DateTime, Enum, Float, Index, LargeBinary, Text
 from sqlalchemy.ext.asyncio import AsyncAttrs
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 import enum
+import time
+from datetime import datetime
+from typing import Literal
 
 from python_toy.server.petstore.id_type import PetId, CategoryId, TagId, UserId, OrderId
 
@@ -12,14 +15,27 @@ class Base(AsyncAttrs, DeclarativeBase):
     pass
 
 
+class VersionMixin:
+    """Row version for optimistic concurrency: updates compare-and-set it and increment it."""
+
+    version: Mapped[int] = mapped_column(Integer, nullable=False, default=1, server_default="1")
+
+
 class StatusEnum(enum.Enum):
     available = "available"
     pending = "pending"
     sold = "sold"
 
 
-class PetEntity(Base):
+class PetEntity(VersionMixin, Base):
     __tablename__ = "pets"
+    # Filter indexes end with `id` so filtered pages come out in list order without a sort.
+    __table_args__ = (
+        Index("ix_pets_status_id", "status", "id"),
+        Index("ix_pets_category_id_id", "category_id", "id"),
+        Index("ix_pets_owner_id_id", "owner_id", "id"),
+        Index("ix_pets_updated_at_id", "updated_at", "id"),
+    )
 
     id: Mapped[PetId] = mapped_column(String(64), primary_key=True)
     name: Mapped[str] = mapped_column(String(100), nullable=False)
@@ -28,13 +44,15 @@ class PetEntity(Base):
     # Store as TEXT for compatibility; we'll encode/decode in the repository/mapper.
     photo_urls: Mapped[str] = mapped_column(Text, default="")
     owner_id: Mapped[UserId] = mapped_column(String(64), ForeignKey("users.id"), nullable=True)
+    # Unix time of the last write, set by inserts and by every UPDATE statement; serves `since` exports
+    updated_at: Mapped[float] = mapped_column(Float, nullable=False, default=time.time, onupdate=time.time)
 
     category: Mapped[CategoryEntity] = relationship("CategoryEntity", back_populates="pets")
     owner: Mapped[UserEntity] = relationship("UserEntity", back_populates="pets")
     tags: Mapped[list[TagEntity]] = relationship("TagEntity", secondary="pet_tags", back_populates="pets")
 
 
-class CategoryEntity(Base):
+class CategoryEntity(VersionMixin, Base):
     __tablename__ = "categories"
 
     id: Mapped[CategoryId] = mapped_column(String(64), primary_key=True)
@@ -43,7 +61,7 @@ class CategoryEntity(Base):
     pets: Mapped[list[PetEntity]] = relationship("PetEntity", back_populates="category")
 
 
-class TagEntity(Base):
+class TagEntity(VersionMixin, Base):
     __tablename__ = "tags"
 
     id: Mapped[TagId] = mapped_column(String(64), primary_key=True)
@@ -52,7 +70,7 @@ class TagEntity(Base):
     pets: Mapped[list[PetEntity]] = relationship("PetEntity", secondary="pet_tags", back_populates="tags")
 
 
-class UserEntity(Base):
+class UserEntity(VersionMixin, Base):
     __tablename__ = "users"
 
     id: Mapped[UserId] = mapped_column(String(64), primary_key=True)
@@ -67,14 +85,16 @@ class UserEntity(Base):
     orders: Mapped[list[OrderEntity]] = relationship("OrderEntity", back_populates="user")
 
 
-class OrderEntity(Base):
+class OrderEntity(VersionMixin, Base):
     __tablename__ = "orders"
+    # Serves listing a user's orders in ID order
+    __table_args__ = (Index("ix_orders_user_id_id", "user_id", "id"),)
 
     id: Mapped[OrderId] = mapped_column(String(64), primary_key=True)
     pet_id: Mapped[PetId] = mapped_column(String(64), ForeignKey("pets.id"), nullable=False)
     user_id: Mapped[UserId] = mapped_column(String(64), ForeignKey("users.id"), nullable=False)
     quantity: Mapped[int] = mapped_column(Integer, default=1)
-    ship_date: Mapped[DateTime] = mapped_column(DateTime, nullable=True)
+    ship_date: Mapped[datetime | None] = mapped_column(DateTime, nullable=True)
     status: Mapped[str] = mapped_column(String(20), default="placed")  # placed, approved, delivered
     complete: Mapped[bool] = mapped_column(default=False)
 
@@ -85,6 +105,54 @@ class OrderEntity(Base):
 # Association table for many-to-many relationship between Pet and Tag
 class PetTagAssociation(Base):
     __tablename__ = "pet_tags"
+    # The primary key serves pet -> tags; this index serves tag -> pets (tag filter).
+    __table_args__ = (Index("ix_pet_tags_tag_id_pet_id", "tag_id", "pet_id"),)
 
     pet_id: Mapped[PetId] = mapped_column(String(64), ForeignKey("pets.id"), primary_key=True)
     tag_id: Mapped[TagId] = mapped_column(String(64), ForeignKey("tags.id"), primary_key=True)
+
+
+class PetCounterEntity(Base):
+    """Number of pets with a status, in a category or with a tag; maintained by PetRepository writes."""
+
+    __tablename__ = "pet_counters"
+
+    dimension: Mapped[str] = mapped_column(String(16), primary_key=True)  # "status", "category" or "tag"
+    key: Mapped[str] = mapped_column(String(64), primary_key=True)  # Status value, category ID or tag ID
+    count: Mapped[int] = mapped_column(Integer, nullable=False, default=0)
+
+
+ChangeOp = Literal["create", "update", "delete"]
+
+
+class ChangeLogEntity(Base):
+    """Append-only log of entity writes, inserted in the transaction of the write it records.
+
+    SQLite serializes write transactions, so sequence numbers become visible in commit order:
+    a reader that has seen `seq` never later finds a smaller one committed.
+    """
+
+    __tablename__ = "change_log"
+    # Serves compaction; AUTOINCREMENT keeps sequence numbers from being reused after it
+    __table_args__ = (Index("ix_change_log_created_at", "created_at"), {"sqlite_autoincrement": True})
+
+    seq: Mapped[int] = mapped_column(Integer, primary_key=True)
+    table_name: Mapped[str] = mapped_column(String(32), nullable=False)
+    entity_id: Mapped[str] = mapped_column(String(64), nullable=False)
+    op: Mapped[str] = mapped_column(String(8), nullable=False)  # a ChangeOp
+    created_at: Mapped[float] = mapped_column(Float, nullable=False)  # Unix time
+
+
+class IdempotencyKeyEntity(Base):
+    """Response to a POST sent with an Idempotency-Key, replayed to retries of that request."""
+
+    __tablename__ = "idempotency_keys"
+    # Serves TTL compaction
+    __table_args__ = (Index("ix_idempotency_keys_created_at", "created_at"),)
+
+    key: Mapped[str] = mapped_column(String(255), primary_key=True)
+    request_hash: Mapped[str] = mapped_column(String(64), nullable=False)
+    status_code: Mapped[int] = mapped_column(Integer, nullable=False)
+    headers: Mapped[str] = mapped_column(Text, nullable=False)  # JSON list of [name, value] pairs
+    body: Mapped[bytes] = mapped_column(LargeBinary, nullable=False)
+    created_at: Mapped[float] = mapped_column(Float, nullable=False)  # Unix time
@@ -8,9 +8,31 @@
 
 import json
 import uuid
+from datetime import datetime
+from collections.abc import Callable, Mapping
+from typing import TYPE_CHECKING, Any
 
-from .models import Pet, Category, User, Tag, PetCreate, CategoryCreate, UserCreate, TagCreate
-from .db_models import PetEntity, CategoryEntity, UserEntity, TagEntity
+from sqlalchemy import Row
+
+from python_toy.server.infra.change_feed import ChangeEntry
+from python_toy.server.infra.error import BadRequestException
+from .models import (
+    Pet,
+    Category,
+    User,
+    Tag,
+    Order,
+    PetCreate,
+    CategoryCreate,
+    UserCreate,
+    TagCreate,
+    OrderCreate,
+    Change,
+)
+from .db_models import PetEntity, CategoryEntity, UserEntity, TagEntity, OrderEntity
+
+if TYPE_CHECKING:
+    from .pet_repository import PetRows
 
 
 class PetMapper:
@@ -55,30 +77,70 @@ def to_domain(pet_db: PetEntity) -> Pet:
             # If tags are not loaded (lazy loading), return empty list
             tag_names = []
 
-        # photo_urls stored as TEXT; support JSON array string, comma-delimited, or empty
-        photo_urls_raw = getattr(pet_db, "photo_urls", "") or ""
-        photo_urls: list[str]
-        if isinstance(photo_urls_raw, list):
-            photo_urls = list(photo_urls_raw)
-        else:
-            try:
-                import json
-
-                parsed = json.loads(photo_urls_raw) if photo_urls_raw else []
-                photo_urls = list(parsed) if isinstance(parsed, list) else []
-            except Exception:
-                photo_urls = [p for p in (photo_urls_raw.split(",") if photo_urls_raw else []) if p]
-
         return Pet(
             id=pet_db.id,
             name=pet_db.name,
             category=category,
             status=pet_db.status.value if hasattr(pet_db.status, "value") else str(pet_db.status),
-            photo_urls=photo_urls,
+            photo_urls=_decode_photo_urls(pet_db.photo_urls),
             tags=tag_names,
             owner=owner,
+            version=pet_db.version,
         )
 
+    @staticmethod
+    def row_to_domain(
+        row: Row[Any],
+        *,
+        category: Row[Any] | None = None,
+        owner: Row[Any] | None = None,
+        tags: list[str] | None = None,
+        fields: frozenset[str] | None = None,
+    ) -> Pet:
+        """Convert a Core pet row plus its relation rows to Pet domain model.
+
+        Args:
+            row: Row with the columns of PetRepository.ROW_COLUMNS, or the projected subset for `fields`
+            category: Category row, if loaded
+            owner: User row, if loaded
+            tags: Tag names, if loaded
+            fields: Pet fields to populate; None populates every field
+
+        Returns:
+            Pet domain model. With `fields`, only the requested fields are set (see `exclude_unset`).
+        """
+        converters: dict[str, Callable[[], Any]] = {
+            "id": lambda: row.id,
+            "name": lambda: row.name,
+            "category": lambda: CategoryMapper.row_to_domain(category) if category is not None else None,
+            "status": lambda: row.status.value if hasattr(row.status, "value") else str(row.status),
+            "photo_urls": lambda: _decode_photo_urls(row.photo_urls),
+            "tags": lambda: sorted(tags) if tags else [],
+            "owner": lambda: UserMapper.row_to_domain(owner) if owner is not None else None,
+            "version": lambda: row.version,
+        }
+        if fields is None:
+            return Pet(**{name: convert() for name, convert in converters.items()})
+
+        values = {name: convert() for name, convert in converters.items() if name in fields}
+        # Projected rows were read from the DB without the other columns; skip validation of absent fields.
+        # The version is always read, for the ETag.
+        return Pet.model_construct(_fields_set=set(values), **{"version": row.version, **values})
+
+    @staticmethod
+    def rows_to_domain(pet_rows: PetRows, fields: frozenset[str] | None = None) -> list[Pet]:
+        """Convert PetRepository row results to Pet domain models."""
+        return [
+            PetMapper.row_to_domain(
+                row,
+                category=_lookup(pet_rows.categories, row._mapping.get("category_id")),
+                owner=_lookup(pet_rows.owners, row._mapping.get("owner_id")),
+                tags=pet_rows.tags.get(row.id),
+                fields=fields,
+            )
+            for row in pet_rows.rows
+        ]
+
 
 class CategoryMapper:
     """Mapper for Category domain model conversions."""
@@ -99,6 +161,11 @@ def to_domain(category_db: CategoryEntity) -> Category:
             name=category_db.name,
         )
 
+    @staticmethod
+    def row_to_domain(row: Row[Any]) -> Category:
+        """Convert a Core category row to Category domain model."""
+        return Category(id=row.id, name=row.name)
+
 
 class UserMapper:
     """Mapper for User domain model conversions."""
@@ -128,6 +195,18 @@ def to_domain(user_db: UserEntity) -> User:
             phone=user_db.phone,
         )
 
+    @staticmethod
+    def row_to_domain(row: Row[Any]) -> User:
+        """Convert a Core user row to User domain model."""
+        return User(
+            id=row.id,
+            username=row.username,
+            first_name=row.first_name,
+            last_name=row.last_name,
+            email=row.email,
+            phone=row.phone,
+        )
+
 
 class TagMapper:
     """Mapper for Tag domain model conversions."""
@@ -148,10 +227,96 @@ def to_domain(tag_db: TagEntity) -> Tag:
             name=tag_db.name,
         )
 
+    @staticmethod
+    def row_to_domain(row: Row[Any]) -> Tag:
+        """Convert a Core tag row to Tag domain model."""
+        return Tag(id=row.id, name=row.name)
+
+
+class OrderMapper:
+    """Mapper for Order domain model conversions."""
+
+    @staticmethod
+    def to_entity(create_model: OrderCreate) -> OrderEntity:
+        """Convert OrderCreate to a placed OrderEntity for database storage."""
+        return OrderEntity(
+            id=str(uuid.uuid4()),
+            pet_id=create_model.pet_id,
+            user_id=create_model.user_id,
+            quantity=create_model.quantity,
+            ship_date=_parse_ship_date(create_model.ship_date),
+            status="placed",
+            complete=False,
+        )
+
+    @staticmethod
+    def to_domain(order_db: OrderEntity) -> Order:
+        """Convert OrderEntity to Order domain model."""
+        return Order(
+            id=order_db.id,
+            pet_id=order_db.pet_id,
+            user_id=order_db.user_id,
+            quantity=order_db.quantity,
+            ship_date=order_db.ship_date.isoformat() if order_db.ship_date is not None else None,
+            status=order_db.status,
+            complete=order_db.complete,
+            version=order_db.version,
+        )
+
+    @staticmethod
+    def row_to_domain(row: Row[Any]) -> Order:
+        """Convert a Core order row to Order domain model."""
+        return Order(
+            id=row.id,
+            pet_id=row.pet_id,
+            user_id=row.user_id,
+            quantity=row.quantity,
+            ship_date=row.ship_date.isoformat() if row.ship_date is not None else None,
+            status=row.status,
+            complete=row.complete,
+            version=row.version,
+        )
+
+
+class ChangeMapper:
+    """Mapper for change log entries."""
+
+    @staticmethod
+    def to_domain(entry: ChangeEntry) -> Change:
+        return Change(seq=entry.seq, table=entry.table, id=entry.entity_id, op=entry.op, at=entry.at)  # type: ignore[arg-type]
+
+
+def _parse_ship_date(raw: str | None) -> datetime | None:
+    if raw is None:
+        return None
+    try:
+        return datetime.fromisoformat(raw)
+    except ValueError:
+        msg = f"ship_date must be an ISO 8601 date-time, got {raw!r}"
+        raise BadRequestException(msg) from None
+
+
+def _decode_photo_urls(raw: object) -> list[str]:
+    """Decode photo_urls stored as TEXT; support JSON array string, comma-delimited, or empty."""
+    if isinstance(raw, list):
+        return list(raw)
+    photo_urls_raw = str(raw or "")
+    try:
+        parsed = json.loads(photo_urls_raw) if photo_urls_raw else []
+        return list(parsed) if isinstance(parsed, list) else []
+    except Exception:
+        return [p for p in (photo_urls_raw.split(",") if photo_urls_raw else []) if p]
+
+
+def _lookup[V](values_by_id: Mapping[str, V], key: str | None) -> V | None:
+    return values_by_id.get(key) if key is not None else None
+
 
 __all__ = (
     "PetMapper",
     "CategoryMapper",
     "UserMapper",
     "TagMapper",
+    "OrderMapper",
+    "ChangeMapper",
 )
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 
+from typing import Any, Literal
+
 from pydantic import BaseModel, Field
 from pydantic.experimental.missing_sentinel import MISSING
 
@@ -17,6 +19,8 @@ class Pet(BaseModel):
     photo_urls: list[str] = Field(default_factory=list)
     tags: list[str] = Field(default_factory=list)  # Tag names for API compatibility
     owner: User | None = None
+    # Row version, incremented by every update. Sent as the ETag header rather than in the body
+    version: int = Field(default=1, exclude=True)
 
 
 class Category(BaseModel):
@@ -54,6 +58,8 @@ class Order(BaseModel):
     ship_date: str | None = None  # ISO format
     status: str = Field(default="placed", pattern=r"^(placed|approved|delivered)$")
     complete: bool = False
+    # Row version, incremented by every update. Sent as the ETag header rather than in the body
+    version: int = Field(default=1, exclude=True)
 
 
 class PetCreate(BaseModel):
@@ -110,6 +116,74 @@ class OrderCreate(BaseModel):
     ship_date: str | None = None
 
 
+class OrderUpdate(BaseModel):
+    """Order status transition payload: placed -> approved -> delivered."""
+
+    status: str = Field(pattern=r"^(approved|delivered)$")
+
+
+class Inventory(BaseModel):
+    """Pet counts by status, by category ID and by tag name."""
+
+    status: dict[str, int]
+    categories: dict[str, int]
+    tags: dict[str, int]
+
+
+class Change(BaseModel):
+    """A committed entity write, from the change log."""
+
+    seq: int
+    table: str
+    id: str
+    op: Literal["create", "update", "delete"]
+    at: float  # Unix time of the write
+
+
+class ChangePage(BaseModel):
+    """A batch of changes; pass `next_since` as `since` to read on."""
+
+    items: list[Change]
+    next_since: int
+
+
+# Operations a batch may hold
+MAX_BATCH_OPERATIONS = 50
+
+
+class BatchOperation(BaseModel):
+    """An API call of a batch."""
+
+    method: Literal["GET", "POST", "PUT", "PATCH", "DELETE"]
+    path: str = Field(pattern=r"^/v1/", description="Path and query string; may contain $N.field references")
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Any = None
+
+
+class BatchRequest(BaseModel):
+    """API calls to run in order in one transaction."""
+
+    operations: list[BatchOperation] = Field(min_length=1, max_length=MAX_BATCH_OPERATIONS)
+    # All operations or none; otherwise keep the operations that succeeded
+    atomic: bool = True
+
+
+class BatchResult(BaseModel):
+    """Response to an API call of a batch."""
+
+    status: int
+    headers: dict[str, str] = Field(default_factory=dict)
+    body: Any = None
+
+
+class BatchResponse(BaseModel):
+    """Responses to a batch's API calls, in order."""
+
+    results: list[BatchResult]
+    # Whether any operation's writes were committed
+    committed: bool
+
+
 __all__ = (
     "Pet",
     "Category",
@@ -122,4 +196,13 @@ class OrderCreate(BaseModel):
     "TagCreate",
     "UserCreate",
     "OrderCreate",
+    "OrderUpdate",
+    "Inventory",
+    "Change",
+    "ChangePage",
+    "MAX_BATCH_OPERATIONS",
+    "BatchOperation",
+    "BatchRequest",
+    "BatchResult",
+    "BatchResponse",
 )
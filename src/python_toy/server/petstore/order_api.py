@@ -0,0 +1,70 @@
+from __future__ import annotations
+
+from typing import Annotated
+
+from fastapi import APIRouter, Depends, Header, Query, Request, Response
+from fastapi_utils.cbv import cbv
+from starlette.status import HTTP_201_CREATED
+
+from python_toy.server.infra.http_cache import cache_policy
+from python_toy.server.infra.preconditions import entity_tag, expected_version
+from python_toy.server.model.common import PageResponse
+from .order_service import OrderService
+from .models import Order, OrderCreate, OrderUpdate
+from python_toy.server.petstore.id_type import OrderId, UserId
+
+
+router = APIRouter(tags=["orders"])
+
+
+def _service_dep(request: Request) -> OrderService:
+    from python_toy.server.infra.container import Container
+
+    container: Container = request.app.state.container
+    return container.order_service()
+
+
+@cbv(router)
+class OrderRoutes:
+    _service: OrderService = Depends(_service_dep)
+
+    @router.post("/v1/orders", status_code=HTTP_201_CREATED)
+    async def place(self, payload: OrderCreate, response: Response) -> Order:
+        """Place an order on an available pet; 409 when the pet is no longer available."""
+        order = await self._service.place(payload)
+        response.headers["ETag"] = entity_tag(order.version)
+        return order
+
+    @router.get("/v1/orders")
+    @cache_policy("orders")
+    async def list(
+        self,
+        user_id: UserId,
+        page: Annotated[int, Query(ge=1)] = 1,
+        size: Annotated[int, Query(ge=1, le=100)] = 10,
+    ) -> PageResponse[Order]:
+        return await self._service.list_by_user(user_id, page, size)
+
+    @router.get("/v1/orders/{order_id}")
+    @cache_policy("orders", entity_param="order_id")
+    async def get(self, order_id: OrderId, response: Response) -> Order:
+        order = await self._service.get(order_id)
+        response.headers["ETag"] = entity_tag(order.version)
+        return order
+
+    @router.patch("/v1/orders/{order_id}")
+    async def transition(
+        self,
+        order_id: OrderId,
+        payload: OrderUpdate,
+        response: Response,
+        if_match: Annotated[
+            str | None, Header(description="ETag of the order as last read; the update fails with 409 if it changed.")
+        ] = None,
+    ) -> Order:
+        order = await self._service.transition(order_id, payload, expected_version=expected_version(if_match))
+        response.headers["ETag"] = entity_tag(order.version)
+        return order
+
+
+__all__ = ("router",)
@@ -0,0 +1,66 @@
+from __future__ import annotations
+
+from typing import Any, cast
+
+from sqlalchemy import CursorResult, Row, update
+
+from python_toy.server.infra.error import ConcurrentModificationException, ConflictException, EntityNotFoundException
+from python_toy.server.petstore.db_models import OrderEntity
+from python_toy.server.petstore.id_type import OrderId, UserId
+from .base_repository import BaseRepository, SessionSupplier
+
+
+class OrderRepository(BaseRepository[OrderEntity]):
+    # Columns read by the row-based read path; mapped by OrderMapper.row_to_domain
+    ROW_COLUMNS = (
+        OrderEntity.id,
+        OrderEntity.pet_id,
+        OrderEntity.user_id,
+        OrderEntity.quantity,
+        OrderEntity.ship_date,
+        OrderEntity.status,
+        OrderEntity.complete,
+        OrderEntity.version,
+    )
+
+    def __init__(self, session_supplier: SessionSupplier) -> None:
+        super().__init__(OrderEntity, session_supplier)
+
+    async def list_by_user(self, user_id: UserId, *, page: int = 1, size: int = 10) -> tuple[list[Row[Any]], int]:
+        """List a page of a user's order rows with the total count."""
+        return await self.list_rows(
+            self.ROW_COLUMNS, where=(OrderEntity.user_id == user_id,), order_by=(OrderEntity.id,), page=page, size=size
+        )
+
+    async def transition(
+        self, entity_id: OrderId, from_status: str, to_status: str, *, expected_version: int | None = None
+    ) -> None:
+        """Move an order from `from_status` to `to_status` with a compare-and-set UPDATE.
+
+        :raises EntityNotFoundException: When the order does not exist
+        :raises ConcurrentModificationException: When the order's version is not `expected_version`
+        :raises ConflictException: When the order is not in `from_status`
+        """
+        stmt = (
+            update(OrderEntity)
+            .where(OrderEntity.id == entity_id, OrderEntity.status == from_status)
+            .values(status=to_status, complete=to_status == "delivered", version=OrderEntity.version + 1)
+        )
+        if expected_version is not None:
+            stmt = stmt.where(OrderEntity.version == expected_version)
+        result = cast(CursorResult[Any], await self._session.execute(stmt))
+        if result.rowcount == 1:
+            self._record_write(entity_id, "update")
+            return
+
+        # Only the failure path reads the row, to report why the transition did not apply
+        row = await self.get_row_optional(entity_id)
+        if row is None:
+            raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        if expected_version is not None and row.version != expected_version:
+            raise ConcurrentModificationException(entity_type=self.entity_type, entity_id=entity_id)
+        msg = f"Order '{entity_id}' is {row.status}; only {from_status} orders can become {to_status}"
+        raise ConflictException(msg)
+
+
+__all__ = ("OrderRepository",)
@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+from python_toy.server.infra.error import ConcurrentModificationException
+from python_toy.server.infra.single_flight import SingleFlight, coalesce
+from python_toy.server.infra.transaction import transactional
+from python_toy.server.model.common import PageResponse
+from .db_models import OrderEntity, PetEntity, StatusEnum
+from .id_type import OrderId, UserId
+from .mappers import OrderMapper
+from .models import Order, OrderCreate, OrderUpdate
+from .order_repository import OrderRepository
+from .pet_repository import PetRepository
+
+# Status an order must be in to move to each target status
+_PREVIOUS_STATUS = {"approved": "placed", "delivered": "approved"}
+
+
+class OrderService:
+    def __init__(
+        self, repo: OrderRepository, pet_repo: PetRepository, single_flight: SingleFlight | None = None
+    ) -> None:
+        self._repo = repo
+        self._pet_repo = pet_repo
+        self._single_flight = single_flight
+
+    async def place(self, payload: OrderCreate) -> Order:
+        """Reserve an available pet and place an order for it in one transaction.
+
+        :raises ConcurrentModificationException: When the pet is not available (another order won it)
+        """
+        session = self._repo._session
+        if not session.in_transaction():
+            # Once an order has won the pet, later buyers learn it from a read, without queueing
+            # for SQLite's write lock. The read is its own transaction, so it never upgrades to a write
+            async with transactional(session):
+                pet = await self._pet_repo.get_row_optional(payload.pet_id)
+            if pet is not None and pet.status != StatusEnum.available:
+                raise ConcurrentModificationException(entity_type=PetEntity.__name__, entity_id=payload.pet_id)
+
+        async with transactional(session):
+            # The conditional UPDATE comes first: it takes SQLite's write lock before any read, so
+            # concurrent buyers queue on that lock instead of deadlocking on a read lock upgrade
+            reserved = await self._pet_repo.update_status(
+                payload.pet_id, StatusEnum.pending, expected=StatusEnum.available
+            )
+            if not reserved:
+                await self._repo.ensure_foreign_key_exists(OrderEntity.pet_id, payload.pet_id)
+                raise ConcurrentModificationException(entity_type=PetEntity.__name__, entity_id=payload.pet_id)
+            await self._repo.ensure_foreign_key_exists(OrderEntity.user_id, payload.user_id)
+            entity = await self._repo.create(OrderMapper.to_entity(payload))
+            return OrderMapper.to_domain(entity)
+
+    async def list_by_user(self, user_id: UserId, page: int, size: int) -> PageResponse[Order]:
+        async def read() -> PageResponse[Order]:
+            async with transactional(self._repo._session):
+                rows, total = await self._repo.list_by_user(user_id, page=page, size=size)
+                items = [OrderMapper.row_to_domain(row) for row in rows]
+                return PageResponse.create(items, total, page, size)
+
+        return await coalesce(self._single_flight, ("orders.list", user_id, page, size), read)
+
+    async def get(self, entity_id: OrderId) -> Order:
+        async def read() -> Order:
+            async with transactional(self._repo._session):
+                row = await self._repo.get_row_required(entity_id)
+                return OrderMapper.row_to_domain(row)
+
+        return await coalesce(self._single_flight, ("orders.get", entity_id), read)
+
+    async def transition(
+        self, entity_id: OrderId, payload: OrderUpdate, *, expected_version: int | None = None
+    ) -> Order:
+        """Approve or deliver an order. Delivering it marks the pet as sold."""
+        async with transactional(self._repo._session):
+            await self._repo.transition(
+                entity_id, _PREVIOUS_STATUS[payload.status], payload.status, expected_version=expected_version
+            )
+            row = await self._repo.get_row_required(entity_id)
+            if payload.status == "delivered":
+                await self._pet_repo.update_status(row.pet_id, StatusEnum.sold)
+            return OrderMapper.row_to_domain(row)
+
+
+__all__ = ("OrderService",)
@@ -1,14 +1,29 @@
 from __future__ import annotations
 
+import json
+import time
 from typing import Annotated
 
-from fastapi import APIRouter, Depends, Request, Query
+from fastapi import APIRouter, Depends, Header, Request, Query, Response
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel
 from starlette.status import HTTP_201_CREATED
+from python_toy.server.infra.http_cache import cache_policy
+from python_toy.server.infra.preconditions import entity_tag, expected_version
+from python_toy.server.infra.request_deadline import request_timeout
+from python_toy.server.infra.streaming import DuplexStreamingResponse
+from python_toy.server.infra.traffic_class import BULK, traffic_class
 from python_toy.server.model.common import PageResponse, EmptyResponse
 from .models import Pet, PetCreate, PetUpdate
 from fastapi_utils.cbv import cbv
+from .pet_import_service import PetImportService
 from .pet_service import PetService
-from python_toy.server.petstore.id_type import PetId
+from .query_options import PET_FIELDS, PET_RELATIONS, PetFilter, PetQueryOptions
+from python_toy.server.petstore.id_type import CategoryId, PetId, UserId
+
+# Export watermarks lag the export start by this much, so the next `since` export also picks up
+# writes that were stamped before this export started but committed after it read past them
+_WATERMARK_SKEW_SECONDS = 5.0
 
 
 def _pet_service_dep(request: Request) -> PetService:
@@ -18,8 +33,31 @@ def _pet_service_dep(request: Request) -> PetService:
     return container.pet_service()
 
 
+def _pet_import_service_dep(request: Request) -> PetImportService:
+    from python_toy.server.infra.container import Container
+
+    container: Container = request.app.state.container
+    return container.pet_import_service()
+
+
 router = APIRouter(tags=["pets"])
 
+IncludeQuery = Annotated[
+    str | None,
+    Query(description=f"Comma-separated relations to load: {', '.join(PET_RELATIONS)}. Default: all."),
+]
+FieldsQuery = Annotated[
+    str | None,
+    Query(description=f"Comma-separated fields to return: {', '.join(PET_FIELDS)}. Default: all."),
+]
+
+
+def _sparse_response[M: BaseModel](model: M, options: PetQueryOptions) -> M | JSONResponse:
+    """Serialize only the selected fields when field selection is active."""
+    if options.fields is None:
+        return model
+    return JSONResponse(content=model.model_dump(mode="json", exclude_unset=True))
+
 
 @cbv(router)
 class PetRoutes:
@@ -29,22 +67,111 @@ class PetRoutes:
     async def create_pet(self, payload: PetCreate) -> Pet:
         return await self._service.create(payload)
 
-    @router.get("/v1/pets")
+    # Pet ETags follow pet writes only: categories, owners and tags referenced by a pet cannot be
+    # changed or deleted (no update routes, FK-restricted deletes)
+    @router.get("/v1/pets", response_model=PageResponse[Pet])
+    @cache_policy("pets")
     async def list_pets(
         self,
         page: Annotated[int, Query(ge=1)] = 1,
         size: Annotated[int, Query(ge=1, le=100)] = 10,
-    ) -> PageResponse[Pet]:
-        items, total = await self._service.list(page=page, size=size)
-        return PageResponse.create(items, total, page, size)
-
-    @router.get("/v1/pets/{pet_id}")
-    async def get_pet(self, pet_id: PetId) -> Pet:
-        return await self._service.get(pet_id)
+        include: IncludeQuery = None,
+        fields: FieldsQuery = None,
+        status: Annotated[str | None, Query(pattern=r"^(available|pending|sold)$")] = None,
+        category_id: Annotated[CategoryId | None, Query()] = None,
+        owner_id: Annotated[UserId | None, Query()] = None,
+        tag: Annotated[str | None, Query(min_length=1, max_length=100, description="Tag name")] = None,
+    ) -> PageResponse[Pet] | JSONResponse:
+        options = PetQueryOptions.from_request(include, fields)
+        pet_filter = PetFilter(status=status, category_id=category_id, owner_id=owner_id, tag=tag)
+        items, total = await self._service.list(page=page, size=size, options=options, pet_filter=pet_filter)
+        return _sparse_response(PageResponse.create(items, total, page, size), options)
+
+    @router.get("/v1/pets:export", response_class=StreamingResponse)
+    @traffic_class(BULK)
+    @request_timeout(None)
+    async def export_pets(
+        self,
+        include: IncludeQuery = None,
+        fields: FieldsQuery = None,
+        status: Annotated[str | None, Query(pattern=r"^(available|pending|sold)$")] = None,
+        category_id: Annotated[CategoryId | None, Query()] = None,
+        owner_id: Annotated[UserId | None, Query()] = None,
+        tag: Annotated[str | None, Query(min_length=1, max_length=100, description="Tag name")] = None,
+        since: Annotated[float | None, Query(ge=0, description="Only pets written at or after this Unix time")] = None,
+    ) -> StreamingResponse:
+        """Stream every matching pet as NDJSON, one pet per line, in ID order.
+
+        Pass the `X-Export-Watermark` response header as `since` to the next export to fetch only the
+        pets written in between. Deleted pets are not reported.
+        """
+        options = PetQueryOptions.from_request(include, fields)
+        pet_filter = PetFilter(status=status, category_id=category_id, owner_id=owner_id, tag=tag, updated_since=since)
+        watermark = time.time() - _WATERMARK_SKEW_SECONDS
+        return StreamingResponse(
+            self._service.export(options=options, pet_filter=pet_filter),
+            media_type="application/x-ndjson",
+            headers={"X-Export-Watermark": f"{watermark:.6f}"},
+        )
+
+    @router.post("/v1/pets:import", response_class=DuplexStreamingResponse)
+    @traffic_class(BULK)
+    @request_timeout(None)
+    async def import_pets(
+        self,
+        request: Request,
+        importer: Annotated[PetImportService, Depends(_pet_import_service_dep)],
+        offset: Annotated[int, Query(ge=0, description="Number of leading lines to skip, to resume an import")] = 0,
+    ) -> DuplexStreamingResponse:
+        """Import pets from an NDJSON body of PetCreate lines, streaming back NDJSON progress and per-line errors.
+
+        The body is read as it arrives and committed in chunks. After an interruption, resend the
+        body with the last `committed_through` as `offset`.
+        """
+        records = importer.run(request.stream(), offset=offset)
+        return DuplexStreamingResponse(
+            (json.dumps(record).encode() + b"\n" async for record in records), media_type="application/x-ndjson"
+        )
+
+    # Declared before /v1/pets/{pet_id} so that "search" is not taken as a pet ID
+    @router.get("/v1/pets/search", response_model=PageResponse[Pet])
+    async def search_pets(
+        self,
+        q: Annotated[str, Query(min_length=1, max_length=200, description="Words in pet, category or tag names")],
+        page: Annotated[int, Query(ge=1)] = 1,
+        size: Annotated[int, Query(ge=1, le=100)] = 10,
+        include: IncludeQuery = None,
+        fields: FieldsQuery = None,
+    ) -> PageResponse[Pet] | JSONResponse:
+        options = PetQueryOptions.from_request(include, fields)
+        items, total = await self._service.search(q, page=page, size=size, options=options)
+        return _sparse_response(PageResponse.create(items, total, page, size), options)
+
+    @router.get("/v1/pets/{pet_id}", response_model=Pet)
+    @cache_policy("pets", entity_param="pet_id")
+    async def get_pet(
+        self, pet_id: PetId, response: Response, include: IncludeQuery = None, fields: FieldsQuery = None
+    ) -> Pet | JSONResponse:
+        options = PetQueryOptions.from_request(include, fields)
+        pet = await self._service.get(pet_id, options=options)
+        result = _sparse_response(pet, options)
+        # The row version is the ETag, so it can be sent back in If-Match when patching
+        (result if isinstance(result, JSONResponse) else response).headers["ETag"] = entity_tag(pet.version)
+        return result
 
     @router.patch("/v1/pets/{pet_id}")
-    async def patch_pet(self, pet_id: PetId, payload: PetUpdate) -> Pet:
-        return await self._service.patch(pet_id, payload)
+    async def patch_pet(
+        self,
+        pet_id: PetId,
+        payload: PetUpdate,
+        response: Response,
+        if_match: Annotated[
+            str | None, Header(description="ETag of the pet as last read; the patch fails with 409 if it changed.")
+        ] = None,
+    ) -> Pet:
+        pet = await self._service.patch(pet_id, payload, expected_version=expected_version(if_match))
+        response.headers["ETag"] = entity_tag(pet.version)
+        return pet
 
     @router.delete("/v1/pets/{pet_id}")
     async def delete_pet(self, pet_id: PetId) -> EmptyResponse:
@@ -0,0 +1,143 @@
+"""Pet counts by status, category and tag, maintained by every pet write."""
+
+from __future__ import annotations
+
+from collections import Counter
+from collections.abc import Iterable
+from dataclasses import dataclass
+from typing import cast
+
+from sqlalchemy import ColumnElement, and_, delete, func, select, update
+from sqlalchemy.dialects.sqlite import insert
+
+from python_toy.server.petstore.db_models import PetCounterEntity, PetEntity, PetTagAssociation, StatusEnum, TagEntity
+from python_toy.server.petstore.id_type import PetId
+from .base_repository import SessionSupplier
+
+STATUS = "status"
+CATEGORY = "category"
+TAG = "tag"
+
+# (dimension, key) -> change of the counter
+CounterDeltas = Counter[tuple[str, str]]
+
+# Pet column holding the key of each single-valued dimension
+_PET_COLUMNS: dict[str, ColumnElement[object]] = {
+    STATUS: PetEntity.status,  # type: ignore[dict-item]
+    CATEGORY: PetEntity.category_id,  # type: ignore[dict-item]
+}
+
+
+def status_key(status: StatusEnum | str) -> str:
+    return status.value if isinstance(status, StatusEnum) else str(status)
+
+
+def pet_deltas(
+    status: StatusEnum | str | None, category_id: str | None, tag_ids: Iterable[str] = (), *, sign: int = 1
+) -> CounterDeltas:
+    """Counter changes for adding (sign 1) or removing (sign -1) a pet with these values."""
+    deltas: CounterDeltas = Counter()
+    if status is not None:
+        deltas[STATUS, status_key(status)] += sign
+    if category_id is not None:
+        deltas[CATEGORY, category_id] += sign
+    for tag_id in tag_ids:
+        deltas[TAG, tag_id] += sign
+    return deltas
+
+
+@dataclass(frozen=True, slots=True)
+class CounterDrift:
+    """A counter whose stored value differs from the count of pets it stands for."""
+
+    dimension: str
+    key: str
+    stored: int
+    actual: int
+
+
+class PetCounters:
+    """Keeps the pet_counters table in step with pet writes, so inventory reads never scan pets.
+
+    Writes go through the current session, so counter updates commit or roll back with the pet write.
+    """
+
+    def __init__(self, session_supplier: SessionSupplier) -> None:
+        self._session_supplier = session_supplier
+
+    async def apply(self, deltas: CounterDeltas) -> None:
+        """Add each delta to its counter, creating missing counters."""
+        values = [{"dimension": dim, "key": key, "count": delta} for (dim, key), delta in deltas.items() if delta]
+        if not values:
+            return
+        stmt = insert(PetCounterEntity)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[PetCounterEntity.dimension, PetCounterEntity.key],
+            set_={"count": PetCounterEntity.count + stmt.excluded.count},
+        )
+        await self._session_supplier().execute(stmt, values)
+
+    async def decrement_current(self, pet_id: PetId, dimensions: Iterable[str], *criteria: ColumnElement[bool]) -> None:
+        """Decrement the counters of a pet's current status and/or category, read in the same statement.
+
+        Run it right before an UPDATE of the pet with the same `criteria`: no other writer can come
+        between the two, so the counters are decremented exactly when the UPDATE matches the pet.
+        """
+        session = self._session_supplier()
+        for dimension in dimensions:
+            current = select(_PET_COLUMNS[dimension]).where(PetEntity.id == pet_id, *criteria).scalar_subquery()
+            await session.execute(
+                update(PetCounterEntity)
+                .where(PetCounterEntity.dimension == dimension, PetCounterEntity.key == current)
+                .values(count=PetCounterEntity.count - 1)
+            )
+
+    async def read(self) -> dict[str, dict[str, int]]:
+        """Non-zero counters by dimension. Tag counters are keyed by tag name, the others by value or ID."""
+        stmt = (
+            select(
+                PetCounterEntity.dimension, func.coalesce(TagEntity.name, PetCounterEntity.key), PetCounterEntity.count
+            )
+            .outerjoin(TagEntity, and_(PetCounterEntity.dimension == TAG, TagEntity.id == PetCounterEntity.key))
+            .where(PetCounterEntity.count > 0)
+            .order_by(PetCounterEntity.dimension, PetCounterEntity.key)
+        )
+        counts: dict[str, dict[str, int]] = {STATUS: {}, CATEGORY: {}, TAG: {}}
+        for dimension, key, count in (await self._session_supplier().execute(stmt)).all():
+            counts[dimension][key] = count
+        return counts
+
+    async def reconcile(self, *, fix: bool = True) -> list[CounterDrift]:
+        """Recount pets per status, category and tag and report the counters that drifted.
+
+        With `fix`, drifted counters are set to the recounted values.
+        """
+        session = self._session_supplier()
+        # Writing first takes SQLite's write lock, so no pet write commits between the recount and the fix
+        await session.execute(delete(PetCounterEntity).where(PetCounterEntity.count == 0))
+
+        counters = select(PetCounterEntity.dimension, PetCounterEntity.key, PetCounterEntity.count)
+        stored = {(dim, key): count for dim, key, count in (await session.execute(counters)).tuples()}
+        actual: dict[tuple[str, str], int] = {}
+        recounts = (
+            (STATUS, PetEntity.status, PetEntity),
+            (CATEGORY, PetEntity.category_id, PetEntity),
+            (TAG, PetTagAssociation.tag_id, PetTagAssociation),
+        )
+        for dimension, column, table in recounts:
+            stmt = select(column, func.count()).select_from(table).where(column.is_not(None)).group_by(column)
+            for key, count in (await session.execute(stmt)).tuples():
+                actual[dimension, status_key(cast(StatusEnum | str, key))] = count
+
+        drift = [
+            CounterDrift(dim, key, stored.get((dim, key), 0), actual.get((dim, key), 0))
+            for dim, key in sorted(stored.keys() | actual.keys())
+            if stored.get((dim, key), 0) != actual.get((dim, key), 0)
+        ]
+        if fix and drift:
+            await self.apply(Counter({(d.dimension, d.key): d.actual - d.stored for d in drift}))
+            await session.execute(delete(PetCounterEntity).where(PetCounterEntity.count == 0))
+        return drift
+
+
+__all__ = ("CATEGORY", "STATUS", "TAG", "CounterDeltas", "CounterDrift", "PetCounters", "pet_deltas", "status_key")
@@ -0,0 +1,162 @@
+from __future__ import annotations
+
+import asyncio
+import json
+from collections.abc import AsyncIterable, AsyncIterator
+from typing import TYPE_CHECKING, Any
+
+from pydantic import ValidationError
+
+from python_toy.server.infra.config import PetImportConfig
+from python_toy.server.infra.invalidation_bus import pop_committed_changes
+from python_toy.server.infra.ndjson import read_lines
+from python_toy.server.infra.session_context import session_scope
+from python_toy.server.petstore.id_type import PetId, TagId
+from .category_repository import CategoryRepository
+from .mappers import PetMapper
+from .models import PetCreate
+from .pet_repository import PetRepository
+from .tag_repository import TagRepository
+from .user_repository import UserRepository
+
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+    from python_toy.server.infra.invalidation_bus import InvalidationBus
+    from python_toy.server.infra.versions import VersionRegistry
+
+# A result record streamed back to the client
+ImportRecord = dict[str, Any]
+
+
+class PetImportService:
+    """Imports pets from NDJSON lines, committing one chunk of lines per transaction.
+
+    Results stream back as records: `{"line", "error"}` for each rejected line,
+    `{"committed_through", "imported", "failed"}` after each committed chunk, and a final record
+    with `"done"`. Lines up to `committed_through` never need to be sent again: pass it as
+    `offset` to resume an interrupted import.
+    """
+
+    def __init__(
+        self,
+        repo: PetRepository,
+        tag_repo: TagRepository,
+        category_repo: CategoryRepository,
+        user_repo: UserRepository,
+        session_factory: async_sessionmaker[AsyncSession],
+        config: PetImportConfig,
+        versions: VersionRegistry | None = None,
+        invalidation_bus: InvalidationBus | None = None,
+    ) -> None:
+        self._repo = repo
+        self._tag_repo = tag_repo
+        self._category_repo = category_repo
+        self._user_repo = user_repo
+        self._session_factory = session_factory
+        self._config = config
+        # Chunks commit outside the request session, so they announce their changes themselves
+        self._versions = versions
+        self._invalidation_bus = invalidation_bus
+
+    async def run(self, body: AsyncIterable[bytes], *, offset: int = 0) -> AsyncIterator[ImportRecord]:
+        """Import the NDJSON lines of a streamed body, skipping its first `offset` lines."""
+        lines = read_lines(body, max_line_bytes=self._config.max_line_bytes)
+        tag_ids: dict[str, TagId] = {}  # every tag seen by this import, across chunks
+        chunk: list[tuple[int, PetCreate]] = []
+        line_no = committed_through = offset
+        imported = failed = 0
+
+        async for numbered in self._numbered(lines, offset):
+            if numbered is not None:
+                line_no, line = numbered
+                if line is None:
+                    failed += 1
+                    yield {"line": line_no, "error": f"Line is longer than {self._config.max_line_bytes} bytes"}
+                elif line.strip():
+                    try:
+                        chunk.append((line_no, PetCreate.model_validate_json(line)))
+                    except ValidationError as e:
+                        failed += 1
+                        yield {"line": line_no, "error": json.loads(e.json(include_url=False, include_context=False))}
+                if len(chunk) < self._config.chunk_lines:
+                    continue
+            elif not chunk:
+                break
+            try:
+                rejected = await self._import_chunk(chunk, tag_ids)
+            except Exception as e:  # noqa: BLE001 - reported to the client, which resumes from committed_through
+                yield {
+                    "done": False,
+                    "committed_through": committed_through,
+                    "imported": imported,
+                    "failed": failed,
+                    "error": str(e),
+                }
+                return
+            for record in rejected:
+                yield record
+            imported += len(chunk) - len(rejected)
+            failed += len(rejected)
+            committed_through = line_no
+            chunk = []
+            if numbered is not None:
+                yield {"committed_through": committed_through, "imported": imported, "failed": failed}
+                # Let requests queued behind this chunk's write lock and parsing run before the next chunk
+                await asyncio.sleep(0)
+
+        yield {"done": True, "committed_through": line_no, "imported": imported, "failed": failed}
+
+    @staticmethod
+    async def _numbered(
+        lines: AsyncIterable[bytes | None], offset: int
+    ) -> AsyncIterator[tuple[int, bytes | None] | None]:
+        """Yield (line number, line) for the lines after `offset`, then None once the input ends."""
+        line_no = 0
+        async for line in lines:
+            line_no += 1
+            if line_no > offset:
+                yield line_no, line
+        yield None
+
+    async def _import_chunk(self, chunk: list[tuple[int, PetCreate]], tag_ids: dict[str, TagId]) -> list[ImportRecord]:
+        """Insert a chunk of pets in one transaction; return the records of lines rejected for unknown references."""
+        new_tag_ids: dict[str, TagId] = {}
+        async with session_scope(self._session_factory) as session:
+            missing_names = {name for _, pet in chunk for name in pet.tags} - tag_ids.keys()
+            if missing_names:
+                tags = await self._tag_repo.ensure_exist_by_names(sorted(missing_names))
+                new_tag_ids = {tag.name: tag.id for tag in tags}
+            known_categories = await self._category_repo.existing_ids(
+                {pet.category_id for _, pet in chunk if pet.category_id is not None}
+            )
+            known_owners = await self._user_repo.existing_ids({pet.owner_id for _, pet in chunk if pet.owner_id})
+
+            rejected: list[ImportRecord] = []
+            entities = []
+            links: dict[PetId, list[TagId]] = {}
+            for line_no, pet in chunk:
+                if pet.category_id is not None and pet.category_id not in known_categories:
+                    rejected.append({"line": line_no, "error": f"Unknown category_id {pet.category_id!r}"})
+                elif pet.owner_id is not None and pet.owner_id not in known_owners:
+                    rejected.append({"line": line_no, "error": f"Unknown owner_id {pet.owner_id!r}"})
+                else:
+                    entity = PetMapper.to_entity(pet)
+                    entities.append(entity)
+                    names = dict.fromkeys(pet.tags)  # deduplicated, in order
+                    links[entity.id] = [tag_ids.get(name) or new_tag_ids[name] for name in names]
+            await self._repo.insert_many(entities, links)
+        # Only tags of committed chunks are reused: a failed chunk's tags were rolled back
+        tag_ids.update(new_tag_ids)
+        self._announce(session)
+        return rejected
+
+    def _announce(self, session: AsyncSession) -> None:
+        changes = pop_committed_changes(session)
+        if self._versions is not None:
+            self._versions.bump_all(changes)
+        if self._invalidation_bus is not None:
+            self._invalidation_bus.publish(changes)
+
+
+__all__ = ("ImportRecord", "PetImportService")
@@ -1,24 +1,85 @@
 from __future__ import annotations
 
-from typing import cast, List
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Any, cast, List
 import json
 
-from sqlalchemy import select, update, delete, func
-from sqlalchemy.orm import selectinload
+from sqlalchemy import ColumnElement, CursorResult, Row, insert, select, update, delete, func
+from sqlalchemy.orm import QueryableAttribute, selectinload
 
-from python_toy.server.infra.error import EntityNotFoundException
+from python_toy.server.infra.error import ConcurrentModificationException, EntityNotFoundException
+from python_toy.server.infra.transaction import has_pending_writes
 from .models import PetUpdate
 from pydantic.experimental.missing_sentinel import MISSING
-from python_toy.server.petstore.db_models import PetEntity, PetTagAssociation
+from python_toy.server.petstore.db_models import (
+    PetEntity,
+    PetTagAssociation,
+    StatusEnum,
+    TagEntity,
+)
 from .base_repository import BaseRepository, SessionSupplier
-from .query_options import PetQueryOptions
+from .category_repository import CategoryRepository
+from .pet_counters import CATEGORY, STATUS, CounterDeltas, CounterDrift, PetCounters, pet_deltas, status_key
+from .pet_search_index import PetSearchIndex
+from .query_options import PetFilter, PetQueryOptions
+from .tag_repository import TagRepository
+from .user_repository import UserRepository
 
-from python_toy.server.petstore.id_type import PetId, CategoryId, UserId
+if TYPE_CHECKING:
+    from .relation_loaders import RelationLoaders
+
+from python_toy.server.petstore.id_type import PetId, CategoryId, TagId, UserId
+
+
+@dataclass(frozen=True, slots=True)
+class PetRows:
+    """A page of pet rows with their relation rows, keyed for PetMapper.row_to_domain."""
+
+    rows: list[Row[Any]]
+    total: int
+    categories: dict[str, Row[Any]] = field(default_factory=dict)
+    owners: dict[str, Row[Any]] = field(default_factory=dict)
+    tags: dict[str, list[str]] = field(default_factory=dict)
+
+
+# Scalar Pet fields selectable with `?fields=`, and the column each one reads
+_FIELD_COLUMNS: dict[str, QueryableAttribute[Any]] = {
+    "name": PetEntity.name,
+    "status": PetEntity.status,
+    "photo_urls": PetEntity.photo_urls,
+}
 
 
 class PetRepository(BaseRepository[PetEntity]):
-    def __init__(self, session_supplier: SessionSupplier) -> None:
+    # Columns read by the row-based list path; mapped by PetMapper.row_to_domain
+    ROW_COLUMNS = (
+        PetEntity.id,
+        PetEntity.name,
+        PetEntity.category_id,
+        PetEntity.status,
+        PetEntity.photo_urls,
+        PetEntity.owner_id,
+        PetEntity.version,
+    )
+
+    def __init__(
+        self,
+        session_supplier: SessionSupplier,
+        category_repo: CategoryRepository | None = None,
+        user_repo: UserRepository | None = None,
+        tag_repo: TagRepository | None = None,
+        relation_loaders: RelationLoaders | None = None,
+    ) -> None:
         super().__init__(PetEntity, session_supplier)
+        self._search_index = PetSearchIndex(session_supplier)
+        self._counters = PetCounters(session_supplier)
+        # Relation rows are read through these repositories, and so through their entity caches
+        self._category_repo = category_repo or CategoryRepository(session_supplier)
+        self._user_repo = user_repo or UserRepository(session_supplier)
+        self._tag_repo = tag_repo or TagRepository(session_supplier)
+        # Batch relation lookups across concurrent requests; None loads them per request
+        self._relation_loaders = relation_loaders
 
     async def create(self, entity: PetEntity, tag_ids: list[str] | None = None) -> PetEntity:
         if entity.category_id is not None:
@@ -32,9 +93,44 @@ async def create(self, entity: PetEntity, tag_ids: list[str] | None = None) -> P
             for tag_id in tag_ids:
                 assoc = PetTagAssociation(pet_id=entity.id, tag_id=tag_id)
                 self._session.add(assoc)
+            await self._session.flush()
 
+        await self._counters.apply(pet_deltas(entity.status, entity.category_id, tag_ids or ()))
+        await self._search_index.refresh(entity.id)
         return entity
 
+    async def insert_many(self, entities: list[PetEntity], tag_ids: dict[PetId, list[TagId]]) -> None:
+        """Insert new pets and their tag links with one multi-row INSERT per table.
+
+        Counters and the search index are maintained as by create(). Category and owner IDs must
+        exist: unlike create(), they are not checked one by one.
+        """
+        if not entities:
+            return
+        rows = [
+            {
+                "id": entity.id,
+                "name": entity.name,
+                "category_id": entity.category_id,
+                "status": StatusEnum(status_key(entity.status)),
+                "photo_urls": entity.photo_urls,
+                "owner_id": entity.owner_id,
+            }
+            for entity in entities
+        ]
+        await self._session.execute(insert(PetEntity), rows)
+        links = [{"pet_id": pet_id, "tag_id": tag_id} for pet_id, ids in tag_ids.items() for tag_id in ids]
+        if links:
+            await self._session.execute(insert(PetTagAssociation), links)
+
+        deltas: CounterDeltas = Counter()
+        for entity in entities:
+            deltas.update(pet_deltas(entity.status, entity.category_id, tag_ids.get(entity.id, ())))
+        await self._counters.apply(deltas)
+        await self._search_index.refresh_many([entity.id for entity in entities])
+        for entity in entities:
+            self._record_write(entity.id, "create")
+
     async def list_db_entities(
         self, *, page: int | None = None, size: int | None = None
     ) -> tuple[list[PetEntity], int]:
@@ -88,11 +184,12 @@ async def list_with_options(
         page: int | None = None,
         size: int | None = None,
         options: PetQueryOptions,
+        pet_filter: PetFilter | None = None,
     ) -> tuple[list[PetEntity], int]:
-        total_stmt = select(func.count()).select_from(PetEntity)
-        total = (await self._session.execute(total_stmt)).scalar_one()
+        where = self.filter_clauses(pet_filter)
+        total = await self.count(*where)
 
-        stmt = select(PetEntity).order_by(PetEntity.id)
+        stmt = select(PetEntity).where(*where).order_by(PetEntity.id)
 
         load_options = []
         if options.include_category:
@@ -112,7 +209,150 @@ async def list_with_options(
         entities = list(result.scalars().all())
         return entities, total
 
-    async def patch(self, entity_id: PetId, payload: PetUpdate, tag_ids: List[str] | None = None) -> PetEntity:  # noqa: UP006
+    async def list_rows_with_options(
+        self,
+        *,
+        page: int,
+        size: int,
+        options: PetQueryOptions,
+        pet_filter: PetFilter | None = None,
+    ) -> PetRows:
+        """List a page of pet rows via Core, loading selected relations with one IN query each."""
+        columns = self._row_columns(options)
+        where = self.filter_clauses(pet_filter)
+        rows, total = await self.list_rows(columns, where=where, order_by=(PetEntity.id,), page=page, size=size)
+        return await self._load_relation_rows(rows, total, options)
+
+    async def list_rows_after(
+        self,
+        after: PetId | None,
+        *,
+        limit: int,
+        options: PetQueryOptions,
+        pet_filter: PetFilter | None = None,
+    ) -> PetRows:
+        """List up to `limit` pet rows with IDs greater than `after`, in ID order.
+
+        Keyset pagination: every batch is an index range scan, however deep the walk is, and no total is counted.
+        """
+        where = self.filter_clauses(pet_filter)
+        if after is not None:
+            where.append(PetEntity.id > after)
+        stmt = select(*self._row_columns(options)).where(*where).order_by(PetEntity.id).limit(limit)
+        rows = await self.fetch_rows(stmt)
+        return await self._load_relation_rows(rows, len(rows), options)
+
+    async def get_rows_with_options(self, entity_id: PetId, options: PetQueryOptions) -> PetRows:
+        """Get a single pet row via Core with its selected relations."""
+        rows = await self.fetch_rows(select(*self._row_columns(options)).where(PetEntity.id == entity_id))
+        if not rows:
+            raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        return await self._load_relation_rows(rows, len(rows), options)
+
+    async def search_rows_with_options(self, query: str, *, page: int, size: int, options: PetQueryOptions) -> PetRows:
+        """Full-text search pets, returning a page of rows in relevance order."""
+        pet_ids, total = await self._search_index.search(query, page=page, size=size)
+        if not pet_ids:
+            return PetRows(rows=[], total=total)
+        rows = await self.fetch_rows(select(*self._row_columns(options)).where(PetEntity.id.in_(pet_ids)))
+        position = {pet_id: i for i, pet_id in enumerate(pet_ids)}
+        rows.sort(key=lambda row: position[row.id])
+        return await self._load_relation_rows(rows, total, options)
+
+    async def rebuild_search_index(self) -> int:
+        """Re-index every pet. Returns the number of indexed pets."""
+        return await self._search_index.rebuild()
+
+    async def inventory(self) -> dict[str, dict[str, int]]:
+        """Pet counts by status, category ID and tag name, read from the maintained counters."""
+        return await self._counters.read()
+
+    async def reconcile_counters(self, *, fix: bool = True) -> list[CounterDrift]:
+        """Recount pets and report (and with `fix`, correct) the counters that drifted."""
+        return await self._counters.reconcile(fix=fix)
+
+    @staticmethod
+    def filter_clauses(pet_filter: PetFilter | None) -> list[ColumnElement[bool]]:
+        """Translate a PetFilter to WHERE clauses; each one is served by a secondary index."""
+        if pet_filter is None:
+            return []
+        clauses: list[ColumnElement[bool]] = []
+        if pet_filter.status is not None:
+            clauses.append(PetEntity.status == StatusEnum(pet_filter.status))
+        if pet_filter.category_id is not None:
+            clauses.append(PetEntity.category_id == pet_filter.category_id)
+        if pet_filter.owner_id is not None:
+            clauses.append(PetEntity.owner_id == pet_filter.owner_id)
+        if pet_filter.tag is not None:
+            tagged = (
+                select(PetTagAssociation.pet_id)
+                .join(TagEntity, TagEntity.id == PetTagAssociation.tag_id)
+                .where(TagEntity.name == pet_filter.tag)
+            )
+            clauses.append(PetEntity.id.in_(tagged))
+        if pet_filter.updated_since is not None:
+            clauses.append(PetEntity.updated_at >= pet_filter.updated_since)
+        return clauses
+
+    def _row_columns(self, options: PetQueryOptions) -> tuple[QueryableAttribute[Any], ...]:
+        """Project only the columns needed for the requested fields and relations."""
+        if options.fields is None:
+            return self.ROW_COLUMNS
+        columns: list[QueryableAttribute[Any]] = [PetEntity.id, PetEntity.version]
+        columns.extend(column for name, column in _FIELD_COLUMNS.items() if name in options.fields)
+        if options.include_category:
+            columns.append(PetEntity.category_id)
+        if options.include_owner:
+            columns.append(PetEntity.owner_id)
+        return tuple(columns)
+
+    async def _load_relation_rows(self, rows: list[Row[Any]], total: int, options: PetQueryOptions) -> PetRows:
+        categories: dict[str, Row[Any]] = {}
+        owners: dict[str, Row[Any]] = {}
+        tags: dict[str, list[str]] = {}
+
+        # Loaders read in their own session, which cannot see this session's uncommitted writes
+        loaders = self._relation_loaders
+        if loaders is not None and has_pending_writes(self._session):
+            loaders = None
+
+        category_ids = {row.category_id for row in rows if row._mapping.get("category_id") is not None}
+        if options.include_category and category_ids:
+            if loaders is not None:
+                categories = await loaders.categories.load_many(category_ids)
+            else:
+                categories = await self._category_repo.get_rows(category_ids)
+
+        owner_ids = {row.owner_id for row in rows if row._mapping.get("owner_id") is not None}
+        if options.include_owner and owner_ids:
+            if loaders is not None:
+                owners = await loaders.owners.load_many(owner_ids)
+            else:
+                owners = await self._user_repo.get_rows(owner_ids)
+
+        if options.include_tags and rows:
+            pet_ids = [row.id for row in rows]
+            if loaders is not None:
+                tags = await loaders.tags.load_many(pet_ids)
+            else:
+                tags = await self._tag_repo.names_by_pet(pet_ids)
+
+        return PetRows(rows=rows, total=total, categories=categories, owners=owners, tags=tags)
+
+    async def patch(
+        self,
+        entity_id: PetId,
+        payload: PetUpdate,
+        tag_ids: List[str] | None = None,  # noqa: UP006
+        *,
+        expected_version: int | None = None,
+    ) -> PetEntity:
+        """Update the given fields and increment the pet's version.
+
+        With `expected_version`, the update is a compare-and-set on the version column.
+
+        :raises ConcurrentModificationException: When the pet's version is not `expected_version`
+        """
         update_data: dict[str, object] = {}
         if payload.name is not MISSING:  # type: ignore[comparison-overlap]
             update_data["name"] = payload.name
@@ -129,31 +369,87 @@ async def patch(self, entity_id: PetId, payload: PetUpdate, tag_ids: List[str] |
                 await self.ensure_foreign_key_exists(PetEntity.owner_id, payload.owner_id)
             update_data["owner_id"] = cast(UserId, payload.owner_id)
 
-        if update_data:
-            stmt = update(PetEntity).where(PetEntity.id == entity_id).values(**update_data)
-            await self._session.execute(stmt)
+        # Counters of the replaced status and category are decremented under the same version check
+        counted = [dim for dim, column in ((STATUS, "status"), (CATEGORY, "category_id")) if column in update_data]
+        criteria = [PetEntity.version == expected_version] if expected_version is not None else []
+        await self._counters.decrement_current(entity_id, counted, *criteria)
+        await self._update_versioned(entity_id, update_data, expected_version)
+        deltas = pet_deltas(
+            cast(str | None, update_data.get("status")), cast(CategoryId | None, update_data.get("category_id"))
+        )
 
         if payload.tags is not MISSING:  # type: ignore[comparison-overlap]
             # Delete existing associations
-            delete_stmt = delete(PetTagAssociation).where(PetTagAssociation.pet_id == entity_id)
-            await self._session.execute(delete_stmt)
+            delete_stmt = (
+                delete(PetTagAssociation)
+                .where(PetTagAssociation.pet_id == entity_id)
+                .returning(PetTagAssociation.tag_id)
+            )
+            old_tag_ids = (await self._session.execute(delete_stmt)).scalars().all()
+            deltas.update(pet_deltas(None, None, tag_ids or ()))
+            deltas.subtract(pet_deltas(None, None, old_tag_ids))
             # Re-create associations
             if tag_ids:
                 for tag_id in tag_ids:
                     assoc = PetTagAssociation(pet_id=entity_id, tag_id=tag_id)
                     self._session.add(assoc)
 
+        await self._counters.apply(deltas)
         await self._session.flush()  # Ensure changes are persisted within transaction
-        return await self.get_required(entity_id)
+        entity = await self.get_required(entity_id)
+        await self._search_index.refresh(entity_id)
+        self._record_write(entity_id, "update")
+        return entity
+
+    async def update_status(self, entity_id: PetId, status: StatusEnum, *, expected: StatusEnum | None = None) -> bool:
+        """Set a pet's status in one UPDATE, only if its current status is `expected` when given.
+
+        Returns whether the pet was updated. No row is read, so concurrent callers race on the
+        UPDATE alone and exactly one of them wins a given `expected` -> `status` transition.
+        """
+        stmt = update(PetEntity).where(PetEntity.id == entity_id).values(status=status, version=PetEntity.version + 1)
+        if expected is not None:
+            stmt = stmt.where(PetEntity.status == expected)
+        else:
+            await self._counters.decrement_current(entity_id, [STATUS])
+        result = cast(CursorResult[Any], await self._session.execute(stmt))
+        if result.rowcount == 0:
+            return False
+        deltas = pet_deltas(status, None)
+        if expected is not None:
+            deltas.subtract(pet_deltas(expected, None))
+        await self._counters.apply(deltas)
+        self._record_write(entity_id, "update")
+        return True
+
+    async def _update_versioned(
+        self, entity_id: PetId, values: dict[str, object], expected_version: int | None
+    ) -> None:
+        # Tag-only patches change the pet too, so the version is incremented on every patch
+        stmt = update(PetEntity).where(PetEntity.id == entity_id).values(**values, version=PetEntity.version + 1)
+        if expected_version is not None:
+            stmt = stmt.where(PetEntity.version == expected_version)
+        result = cast(CursorResult[Any], await self._session.execute(stmt))
+        if result.rowcount == 0:
+            # Only the failure path reads the row, to tell a stale version from a missing pet
+            if expected_version is not None and await self.get_optional(entity_id) is not None:
+                raise ConcurrentModificationException(entity_type=self.entity_type, entity_id=entity_id)
+            raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
 
     async def delete(self, entity_id: PetId) -> None:
-        stmt = delete(PetTagAssociation).where(PetTagAssociation.pet_id == entity_id)
-        await self._session.execute(stmt)
+        await self._search_index.remove(entity_id)
 
-        stmt = delete(PetEntity).where(PetEntity.id == entity_id)
-        result = await self._session.execute(stmt)
-        if result.rowcount == 0:
+        tags_stmt = (
+            delete(PetTagAssociation).where(PetTagAssociation.pet_id == entity_id).returning(PetTagAssociation.tag_id)
+        )
+        tag_ids = (await self._session.execute(tags_stmt)).scalars().all()
+
+        pet_stmt = delete(PetEntity).where(PetEntity.id == entity_id).returning(PetEntity.status, PetEntity.category_id)
+        row = (await self._session.execute(pet_stmt)).one_or_none()
+        if row is None:
             raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        await self._counters.apply(pet_deltas(row.status, row.category_id, tag_ids, sign=-1))
+        self._record_write(entity_id, "delete")
 
     async def get_db_entity(self, entity_id: PetId) -> PetEntity:
         """Get DB entity without relations - for Service layer processing."""
@@ -0,0 +1,126 @@
+"""Full-text search index over pets, backed by an SQLite FTS5 virtual table."""
+
+from __future__ import annotations
+
+import re
+
+from sqlalchemy import DDL, bindparam, event, text
+
+from python_toy.server.petstore.db_models import Base
+from python_toy.server.petstore.id_type import PetId
+from .base_repository import SessionSupplier
+
+FTS_TABLE = "pets_fts"
+
+# One document per pet. The FTS rowid is the pet's rowid, so a pet's document can be replaced
+# without scanning the index. VACUUM may renumber pets' rowids: run `manage rebuild-search-index` after it.
+_CREATE_FTS_TABLE = DDL(  # type: ignore[no-untyped-call]
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "pet_id UNINDEXED, name, category, tags, tokenize = 'unicode61 remove_diacritics 2')"
+)
+event.listen(Base.metadata, "after_create", _CREATE_FTS_TABLE.execute_if(dialect="sqlite"))
+
+# Relative BM25 weights of the pet_id, name, category and tags columns
+_BM25_WEIGHTS = "0.0, 4.0, 1.0, 2.0"
+
+_DOCUMENT_SELECT = """
+SELECT p.rowid, p.id, p.name, coalesce(c.name, ''),
+       coalesce((SELECT group_concat(t.name, ' ')
+                 FROM pet_tags pt JOIN tags t ON t.id = pt.tag_id
+                 WHERE pt.pet_id = p.id), '')
+FROM pets p LEFT JOIN categories c ON c.id = p.category_id
+"""
+
+_WORD = re.compile(r"\w+")
+
+
+def to_match_query(query: str) -> str | None:
+    """Convert free text to an FTS5 query: all words must match, the last one as a prefix.
+
+    Words are quoted, so FTS5 operators in user input are treated as text. Returns None if
+    the input has no words.
+    """
+    words = _WORD.findall(query)
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+class PetSearchIndex:
+    """Keeps the pets FTS5 table in sync and runs BM25-ranked searches against it.
+
+    Writes go through the current session, so index updates commit or roll back with the pet write.
+    """
+
+    def __init__(self, session_supplier: SessionSupplier) -> None:
+        self._session_supplier = session_supplier
+
+    async def refresh(self, pet_id: PetId) -> None:
+        """(Re)index a pet from its current name, category name and tag names."""
+        session = self._session_supplier()
+        await session.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid = (SELECT rowid FROM pets WHERE id = :pet_id)"),
+            {"pet_id": pet_id},
+        )
+        await session.execute(
+            text(
+                f"INSERT INTO {FTS_TABLE} (rowid, pet_id, name, category, tags) {_DOCUMENT_SELECT} WHERE p.id = :pet_id"
+            ),
+            {"pet_id": pet_id},
+        )
+
+    async def refresh_many(self, pet_ids: list[PetId]) -> None:
+        """(Re)index several pets with one DELETE and one INSERT."""
+        session = self._session_supplier()
+        params = {"pet_ids": pet_ids}
+        await session.execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid IN (SELECT rowid FROM pets WHERE id IN :pet_ids)").bindparams(
+                bindparam("pet_ids", expanding=True)
+            ),
+            params,
+        )
+        await session.execute(
+            text(
+                f"INSERT INTO {FTS_TABLE} (rowid, pet_id, name, category, tags) {_DOCUMENT_SELECT} WHERE p.id IN :pet_ids"
+            ).bindparams(bindparam("pet_ids", expanding=True)),
+            params,
+        )
+
+    async def remove(self, pet_id: PetId) -> None:
+        """Remove a pet's document. Must run before the pet row is deleted."""
+        await self._session_supplier().execute(
+            text(f"DELETE FROM {FTS_TABLE} WHERE rowid = (SELECT rowid FROM pets WHERE id = :pet_id)"),
+            {"pet_id": pet_id},
+        )
+
+    async def search(self, query: str, *, page: int, size: int) -> tuple[list[PetId], int]:
+        """Return a page of matching pet IDs in BM25 rank order, with the total match count."""
+        match = to_match_query(query)
+        if match is None:
+            return [], 0
+
+        session = self._session_supplier()
+        # Join on pets.id rather than rowid so documents of deleted pets never surface
+        matched = f"FROM {FTS_TABLE} JOIN pets ON pets.id = {FTS_TABLE}.pet_id WHERE {FTS_TABLE} MATCH :match"
+        total = (await session.execute(text(f"SELECT count(*) {matched}"), {"match": match})).scalar_one()
+        result = await session.execute(
+            text(
+                f"SELECT {FTS_TABLE}.pet_id {matched} ORDER BY bm25({FTS_TABLE}, {_BM25_WEIGHTS}), {FTS_TABLE}.pet_id "
+                "LIMIT :limit OFFSET :offset"
+            ),
+            {"match": match, "limit": size, "offset": (page - 1) * size},
+        )
+        return list(result.scalars().all()), int(total)
+
+    async def rebuild(self) -> int:
+        """Re-create every document from the pets table. Returns the number of indexed pets."""
+        session = self._session_supplier()
+        await session.execute(text(f"DELETE FROM {FTS_TABLE}"))
+        await session.execute(text(f"INSERT INTO {FTS_TABLE} (rowid, pet_id, name, category, tags) {_DOCUMENT_SELECT}"))
+        await session.execute(text(f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('optimize')"))
+        return int((await session.execute(text(f"SELECT count(*) FROM {FTS_TABLE}"))).scalar_one())
+
+
+__all__ = ("PetSearchIndex", "to_match_query")
@@ -1,18 +1,28 @@
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
+from dataclasses import astuple
+from typing import TYPE_CHECKING
+
 from .models import Pet, PetCreate, PetUpdate
 from .pet_repository import PetRepository
 from .tag_repository import TagRepository
 from .category_repository import CategoryRepository
 from .user_repository import UserRepository
-from .query_options import PetQueryOptions
+from .query_options import PetFilter, PetQueryOptions
 from pydantic.experimental.missing_sentinel import MISSING
 from python_toy.server.petstore.id_type import PetId
+from python_toy.server.infra.group_commit import GroupCommitter, group_commit
+from python_toy.server.infra.session_context import session_scope
+from python_toy.server.infra.single_flight import SingleFlight, coalesce
 from python_toy.server.infra.transaction import transactional
 
 # Import mappers for domain conversion
 from python_toy.server.petstore.mappers import PetMapper
 
+if TYPE_CHECKING:
+    from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
 
 class PetService:
     """Application service for Pet domain.
@@ -27,53 +37,124 @@ def __init__(
         tag_repo: TagRepository,
         category_repo: CategoryRepository,
         user_repo: UserRepository,
+        single_flight: SingleFlight | None = None,
+        session_factory: async_sessionmaker[AsyncSession] | None = None,
+        group_committer: GroupCommitter | None = None,
     ) -> None:
         self._repo = repo
         self._tag_repo = tag_repo
         self._category_repo = category_repo
         self._user_repo = user_repo
+        self._single_flight = single_flight
+        # Sessions for work that outlives the request session, such as streamed exports
+        self._session_factory = session_factory
+        self._group_committer = group_committer
 
     async def create(self, payload: PetCreate) -> Pet:
-        async with transactional(self._repo._session):
-            tag_ids: list[str] | None = None
-            if payload.tags:
-                # Ensure tags exist and preserve order by mapping names -> ids
-                tag_rows = await self._tag_repo.ensure_exist_by_names(payload.tags)
-                by_name = {t.name: t.id for t in tag_rows}
-                tag_ids = [by_name[name] for name in payload.tags]
-
-            pet_entity = PetMapper.to_entity(payload)
-            pet_entity = await self._repo.create(pet_entity, tag_ids=tag_ids)
-
-            # Get with selective relations - only load what we need for the response
-            # For creation, we typically need all relations for the response
-            pet_db_with_relations = await self._repo.get_with_options(pet_entity.id, PetQueryOptions.all())
-            return PetMapper.to_domain(pet_db_with_relations)
-
-    async def list(self, *, page: int = 1, size: int = 10, include_relations: bool = True) -> tuple[list[Pet], int]:
+        async def create() -> Pet:
+            async with transactional(self._repo._session):
+                tag_ids: list[str] | None = None
+                if payload.tags:
+                    # Ensure tags exist and preserve order by mapping names -> ids
+                    tag_rows = await self._tag_repo.ensure_exist_by_names(payload.tags)
+                    by_name = {t.name: t.id for t in tag_rows}
+                    tag_ids = [by_name[name] for name in payload.tags]
+
+                pet_entity = PetMapper.to_entity(payload)
+                pet_entity = await self._repo.create(pet_entity, tag_ids=tag_ids)
+
+                # Get with selective relations - only load what we need for the response
+                # For creation, we typically need all relations for the response
+                pet_db_with_relations = await self._repo.get_with_options(pet_entity.id, PetQueryOptions.all())
+                return PetMapper.to_domain(pet_db_with_relations)
+
+        return await group_commit(self._group_committer, create)
+
+    async def search(
+        self, query: str, *, page: int = 1, size: int = 10, options: PetQueryOptions | None = None
+    ) -> tuple[list[Pet], int]:
+        """Full-text search over pet name, category name and tag names, best matches first."""
+        query_options = options or PetQueryOptions.all()
+
+        async def read() -> tuple[list[Pet], int]:
+            async with transactional(self._repo._session):
+                page_rows = await self._repo.search_rows_with_options(
+                    query, page=page, size=size, options=query_options
+                )
+                return PetMapper.rows_to_domain(page_rows, query_options.fields), page_rows.total
+
+        key = ("pets.search", query, page, size, astuple(query_options))
+        return await coalesce(self._single_flight, key, read)
+
+    async def list(
+        self,
+        *,
+        page: int = 1,
+        size: int = 10,
+        include_relations: bool = True,
+        options: PetQueryOptions | None = None,
+        pet_filter: PetFilter | None = None,
+    ) -> tuple[list[Pet], int]:
         """List pets with pagination and selective relation loading.
 
         :param page: Page number (1-based)
         :param size: Page size
         :param include_relations: If True, includes all relations. If False, minimal loading.
+        :param options: Relations and fields to load; overrides include_relations when given.
+        :param pet_filter: Filters combined with AND
         """
-        async with transactional(self._repo._session):
-            query_options = PetQueryOptions.all() if include_relations else PetQueryOptions.minimal()
-
-            entities, total = await self._repo.list_with_options(page=page, size=size, options=query_options)
-
-            items = [PetMapper.to_domain(it) for it in entities]
-            return items, total
-
-    async def get(self, entity_id: PetId, *, include_relations: bool = True) -> Pet:
-        async with transactional(self._repo._session):
-            query_options = PetQueryOptions.all() if include_relations else PetQueryOptions.minimal()
-
-            entity = await self._repo.get_with_options(entity_id, query_options)
-
-            return PetMapper.to_domain(entity)
-
-    async def patch(self, entity_id: PetId, payload: PetUpdate) -> Pet:
+        query_options = options or (PetQueryOptions.all() if include_relations else PetQueryOptions.minimal())
+
+        async def read() -> tuple[list[Pet], int]:
+            async with transactional(self._repo._session):
+                page_rows = await self._repo.list_rows_with_options(
+                    page=page, size=size, options=query_options, pet_filter=pet_filter
+                )
+                return PetMapper.rows_to_domain(page_rows, query_options.fields), page_rows.total
+
+        key = ("pets.list", page, size, astuple(query_options), pet_filter)
+        return await coalesce(self._single_flight, key, read)
+
+    async def export(
+        self, *, options: PetQueryOptions, pet_filter: PetFilter | None = None, batch_size: int = 500
+    ) -> AsyncIterator[bytes]:
+        """Yield every matching pet as NDJSON, one chunk of encoded lines per keyset batch.
+
+        Each batch is read in its own short session and transaction, so a long export holds no
+        SQLite read lock between batches and memory stays bounded by the batch size. The consumer
+        pulls the next batch only after sending the previous chunk, so a slow client slows the reads.
+        """
+        if self._session_factory is None:
+            msg = "PetService needs a session_factory to export"
+            raise RuntimeError(msg)
+        after: PetId | None = None
+        while True:
+            async with session_scope(self._session_factory):
+                batch = await self._repo.list_rows_after(
+                    after, limit=batch_size, options=options, pet_filter=pet_filter
+                )
+            if not batch.rows:
+                return
+            pets = PetMapper.rows_to_domain(batch, options.fields)
+            sparse = options.fields is not None
+            yield b"".join(pet.model_dump_json(exclude_unset=sparse).encode() + b"\n" for pet in pets)
+            if len(batch.rows) < batch_size:
+                return
+            after = batch.rows[-1].id
+
+    async def get(
+        self, entity_id: PetId, *, include_relations: bool = True, options: PetQueryOptions | None = None
+    ) -> Pet:
+        query_options = options or (PetQueryOptions.all() if include_relations else PetQueryOptions.minimal())
+
+        async def read() -> Pet:
+            async with transactional(self._repo._session):
+                pet_rows = await self._repo.get_rows_with_options(entity_id, query_options)
+                return PetMapper.rows_to_domain(pet_rows, query_options.fields)[0]
+
+        return await coalesce(self._single_flight, ("pets.get", entity_id, astuple(query_options)), read)
+
+    async def patch(self, entity_id: PetId, payload: PetUpdate, *, expected_version: int | None = None) -> Pet:
         async with transactional(self._repo._session):
             tag_ids: list[str] | None = None
             if payload.tags is not MISSING:  # type: ignore[comparison-overlap]
@@ -83,7 +164,7 @@ async def patch(self, entity_id: PetId, payload: PetUpdate) -> Pet:
                 by_name = {t.name: t.id for t in tag_rows}
                 tag_ids = [by_name[name] for name in deduped]
 
-            entity = await self._repo.patch(entity_id, payload, tag_ids=tag_ids)
+            entity = await self._repo.patch(entity_id, payload, tag_ids=tag_ids, expected_version=expected_version)
 
             entity_with_relations = await self._repo.get_with_options(entity.id, PetQueryOptions.all())
             return PetMapper.to_domain(entity_with_relations)
@@ -4,6 +4,13 @@
 
 from dataclasses import dataclass
 
+from python_toy.server.infra.error import BadRequestException
+
+# Pet relations that can be requested with `?include=`
+PET_RELATIONS = ("category", "owner", "tags")
+# Pet fields that can be requested with `?fields=`
+PET_FIELDS = ("id", "name", "category", "status", "photo_urls", "tags", "owner")
+
 
 @dataclass
 class PetQueryOptions:
@@ -13,6 +20,8 @@ class PetQueryOptions:
     include_owner: bool = False
     include_tags: bool = False
     include_all: bool = False
+    # Pet fields to read and return. None means every field.
+    fields: frozenset[str] | None = None
 
     def __post_init__(self) -> None:
         """If include_all is True, set all other options to True."""
@@ -21,6 +30,33 @@ def __post_init__(self) -> None:
             self.include_owner = True
             self.include_tags = True
 
+    @classmethod
+    def from_request(cls, include: str | None = None, fields: str | None = None) -> PetQueryOptions:
+        """Create options from comma-separated `include` and `fields` query parameters.
+
+        The relations named in `fields` are loaded, as are the included ones; without either, every
+        relation is. Included relations are always part of the returned fields, and so is `id`.
+
+        :raises BadRequestException: When an unknown relation or field is requested
+        """
+        included = _parse_names("include", include, PET_RELATIONS)
+        selected = _parse_names("fields", fields, PET_FIELDS)
+
+        if included is None:
+            included = set(PET_RELATIONS) if selected is None else selected & set(PET_RELATIONS)
+        elif selected is None:
+            selected = set(PET_FIELDS) - set(PET_RELATIONS)
+        else:
+            # A relation returned as a field must be loaded, or it would come out empty
+            included |= selected & set(PET_RELATIONS)
+
+        return cls(
+            include_category="category" in included,
+            include_owner="owner" in included,
+            include_tags="tags" in included,
+            fields=None if selected is None else frozenset(selected | included | {"id"}),
+        )
+
     @classmethod
     def all(cls) -> PetQueryOptions:
         """Create options with all relations included."""
@@ -47,6 +83,17 @@ def with_tags(cls) -> PetQueryOptions:
         return cls(include_tags=True)
 
 
+@dataclass(frozen=True)
+class PetFilter:
+    """Filters for listing pets. Given filters are combined with AND; None means not filtered."""
+
+    status: str | None = None
+    category_id: str | None = None
+    owner_id: str | None = None
+    tag: str | None = None  # Tag name
+    updated_since: float | None = None  # Unix time
+
+
 @dataclass
 class CategoryQueryOptions:
     """Options for controlling Category query behavior."""
@@ -92,4 +139,14 @@ def with_all_relations(cls) -> UserQueryOptions:
         return cls(include_pets=True, include_orders=True)
 
 
-__all__ = ("PetQueryOptions", "CategoryQueryOptions", "UserQueryOptions")
+def _parse_names(param: str, value: str | None, allowed: tuple[str, ...]) -> set[str] | None:
+    if value is None:
+        return None
+    names = {name.strip() for name in value.split(",") if name.strip()}
+    if unknown := names - set(allowed):
+        msg = f"Unknown {param} value(s): {', '.join(sorted(unknown))}. Allowed: {', '.join(allowed)}"
+        raise BadRequestException(msg)
+    return names
+
+
+__all__ = ("PetQueryOptions", "PetFilter", "CategoryQueryOptions", "UserQueryOptions")
@@ -0,0 +1,61 @@
+"""Cross-request batch loaders for the relations of pet rows."""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Iterable, Mapping
+
+from sqlalchemy import Row
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from python_toy.server.infra.batch_loader import BatchLoader, create_batch_loader
+from python_toy.server.infra.config import BatchLoaderConfig
+from python_toy.server.infra.session_context import session_scope
+from python_toy.server.infra.versions import VersionRegistry
+from .category_repository import CategoryRepository
+from .tag_repository import TagRepository
+from .user_repository import UserRepository
+
+
+@dataclass(frozen=True, slots=True)
+class RelationLoaders:
+    """Loaders of category rows, owner rows and tag names (by pet ID) for PetRepository."""
+
+    categories: BatchLoader[Row[Any]]
+    owners: BatchLoader[Row[Any]]
+    tags: BatchLoader[list[str]]
+
+
+def create_relation_loaders(
+    session_factory: async_sessionmaker[AsyncSession],
+    category_repo: CategoryRepository,
+    user_repo: UserRepository,
+    tag_repo: TagRepository,
+    config: BatchLoaderConfig,
+    versions: VersionRegistry | None = None,
+) -> RelationLoaders | None:
+    """Create the loaders from settings; None when relation batching is disabled.
+
+    A batch merges the lookups of many requests, so it runs in a session of its own. Category
+    and owner batches still go through the repositories' entity caches. With `versions`, lookups
+    never share a batch queued before the last committed write.
+    """
+
+    def in_own_session[V](
+        load: Callable[[Iterable[str]], Awaitable[Mapping[str, V]]],
+    ) -> Callable[[list[str]], Awaitable[Mapping[str, V]]]:
+        async def run(keys: list[str]) -> Mapping[str, V]:
+            async with session_scope(session_factory):
+                return await load(keys)
+
+        return run
+
+    categories = create_batch_loader("categories", in_own_session(category_repo.get_rows), config, versions)
+    owners = create_batch_loader("owners", in_own_session(user_repo.get_rows), config, versions)
+    tags = create_batch_loader("tags", in_own_session(tag_repo.names_by_pet), config, versions)
+    if categories is None or owners is None or tags is None:
+        return None
+    return RelationLoaders(categories=categories, owners=owners, tags=tags)
+
+
+__all__ = ("RelationLoaders", "create_relation_loaders")
@@ -0,0 +1,32 @@
+from __future__ import annotations
+
+from fastapi import APIRouter, Depends, Request
+from fastapi_utils.cbv import cbv
+
+from python_toy.server.infra.http_cache import cache_policy
+from .models import Inventory
+from .store_service import StoreService
+
+
+router = APIRouter(tags=["store"])
+
+
+def _service_dep(request: Request) -> StoreService:
+    from python_toy.server.infra.container import Container
+
+    container: Container = request.app.state.container
+    return container.store_service()
+
+
+@cbv(router)
+class StoreRoutes:
+    _service: StoreService = Depends(_service_dep)
+
+    @router.get("/v1/store/inventory")
+    @cache_policy("pets")
+    async def inventory(self) -> Inventory:
+        """Pet counts by status, category and tag."""
+        return await self._service.inventory()
+
+
+__all__ = ("router",)
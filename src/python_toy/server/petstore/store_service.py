@@ -0,0 +1,28 @@
+from __future__ import annotations
+
+from python_toy.server.infra.single_flight import SingleFlight, coalesce
+from python_toy.server.infra.transaction import transactional
+from .models import Inventory
+from .pet_counters import CATEGORY, STATUS, TAG
+from .pet_repository import PetRepository
+
+
+class StoreService:
+    """Application service for store-wide aggregates."""
+
+    def __init__(self, pet_repo: PetRepository, single_flight: SingleFlight | None = None) -> None:
+        self._pet_repo = pet_repo
+        self._single_flight = single_flight
+
+    async def inventory(self) -> Inventory:
+        """Read pet counts from the counters table; the cost does not grow with the number of pets."""
+
+        async def read() -> Inventory:
+            async with transactional(self._pet_repo._session):
+                counts = await self._pet_repo.inventory()
+                return Inventory(status=counts[STATUS], categories=counts[CATEGORY], tags=counts[TAG])
+
+        return await coalesce(self._single_flight, ("store.inventory",), read)
+
+
+__all__ = ("StoreService",)
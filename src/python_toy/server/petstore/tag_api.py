@@ -6,7 +6,8 @@
 from fastapi_utils.cbv import cbv
 from starlette.status import HTTP_201_CREATED
 
-from python_toy.server.model.common import EmptyResponse, PageResponse
+from python_toy.server.infra.http_cache import cache_policy
+from python_toy.server.model.common import EmptyResponse, ListResponse, PageResponse
 from .tag_service import TagService
 from .models import Tag, TagCreate
 from python_toy.server.petstore.id_type import TagId
@@ -31,6 +32,7 @@ async def create(self, payload: TagCreate) -> Tag:
         return await self._service.create(payload)
 
     @router.get("/v1/tags")
+    @cache_policy("tags")
     async def list(
         self,
         page: Annotated[int, Query(ge=1)] = 1,
@@ -38,7 +40,16 @@ async def list(
     ) -> PageResponse[Tag]:
         return await self._service.list(page, size)
 
+    @router.get("/v1/tags:suggest")
+    async def suggest(
+        self,
+        prefix: Annotated[str, Query(min_length=1, max_length=100)],
+        limit: Annotated[int, Query(ge=1, le=50)] = 10,
+    ) -> ListResponse[Tag]:
+        return self._service.suggest(prefix, limit)
+
     @router.get("/v1/tags/{entity_id}")
+    @cache_policy("tags", entity_param="entity_id")
     async def get(self, entity_id: TagId) -> Tag:
         return await self._service.get(entity_id)
 
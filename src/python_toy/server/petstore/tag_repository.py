@@ -1,33 +1,77 @@
 from __future__ import annotations
 
 import uuid
-from typing import Iterable, List
+from functools import partial
+from typing import Any, Iterable, List
 
-from sqlalchemy import func, select, delete
+from sqlalchemy import Row, select, delete
 
+from python_toy.server.infra.entity_cache import EntityCache
 from python_toy.server.infra.error import EntityNotFoundException
-from python_toy.server.petstore.db_models import TagEntity
+from python_toy.server.infra.name_index import NameIndex
+from python_toy.server.infra.transaction import after_commit
+from python_toy.server.petstore.db_models import PetTagAssociation, TagEntity
 from .base_repository import BaseRepository, SessionSupplier
 
 
 class TagRepository(BaseRepository[TagEntity]):
-    def __init__(self, session_supplier: SessionSupplier) -> None:
-        super().__init__(TagEntity, session_supplier)
+    # Columns read by the row-based list path; mapped by TagMapper.row_to_domain
+    ROW_COLUMNS = (TagEntity.id, TagEntity.name)
 
-    async def list(self, *, page: int = 1, size: int = 10) -> tuple[list[TagEntity], int]:
-        total = int((await self._session.execute(select(func.count()).select_from(TagEntity))).scalar_one())
+    def __init__(
+        self,
+        session_supplier: SessionSupplier,
+        name_index: NameIndex | None = None,
+        cache: EntityCache[Row[Any]] | None = None,
+    ) -> None:
+        super().__init__(TagEntity, session_supplier, cache)
+        # Prefix index over names, kept in step with committed writes made through this repository
+        self.name_index = name_index if name_index is not None else NameIndex()
 
-        q = select(TagEntity).order_by(TagEntity.name).offset((page - 1) * size).limit(size)
-        items = (await self._session.execute(q)).scalars().all()
-        return list(items), total
+    async def load_name_index(self) -> int:
+        """Load every tag name into the name index. Returns the number of entries."""
+        rows = await self.fetch_rows(select(*self.ROW_COLUMNS))
+        self.name_index.load((row.id, row.name) for row in rows)
+        return len(rows)
+
+    async def apply_external_changes(self, entity_ids: list[str]) -> None:
+        await super().apply_external_changes(entity_ids)
+        rows = await self.get_rows(entity_ids)
+        for entity_id in entity_ids:
+            row = rows.get(entity_id)
+            self.name_index.replace(entity_id, row.name if row is not None else None)
+
+    async def create(self, entity: TagEntity) -> TagEntity:
+        entity = await super().create(entity)
+        after_commit(self._session, partial(self.name_index.add, entity.id, entity.name))
+        return entity
+
+    async def names_by_pet(self, pet_ids: Iterable[str]) -> dict[str, list[str]]:
+        """Return the tag names of each pet that has tags, with one IN query."""
+        stmt = (
+            select(PetTagAssociation.pet_id, TagEntity.name)
+            .join(TagEntity, TagEntity.id == PetTagAssociation.tag_id)
+            .where(PetTagAssociation.pet_id.in_(list(pet_ids)))
+        )
+        names: dict[str, list[str]] = {}
+        for pet_id, tag_name in await self.fetch_rows(stmt):
+            names.setdefault(pet_id, []).append(tag_name)
+        return names
+
+    async def list(self, *, page: int = 1, size: int = 10) -> tuple[list[Row[Any]], int]:
+        """List a page of tag rows (Core projection, no ORM instances) with the total count."""
+        return await self.list_rows(self.ROW_COLUMNS, order_by=(TagEntity.name,), page=page, size=size)
 
     async def get(self, entity_id: str) -> TagEntity:
         return await self.get_required(entity_id)
 
     async def delete(self, entity_id: str) -> None:
-        res = await self._session.execute(delete(TagEntity).where(TagEntity.id == entity_id))
-        if res.rowcount == 0:
+        stmt = delete(TagEntity).where(TagEntity.id == entity_id).returning(TagEntity.name)
+        name = (await self._session.execute(stmt)).scalar_one_or_none()
+        if name is None:
             raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        self._record_write(entity_id, "delete")
+        after_commit(self._session, partial(self.name_index.remove, entity_id, name))
 
     async def ensure_exist_by_names(self, names: Iterable[str]) -> List[TagEntity]:  # noqa: UP006
         existing_stmt = select(TagEntity).where(TagEntity.name.in_(list(names)))
@@ -42,6 +86,9 @@ async def ensure_exist_by_names(self, names: Iterable[str]) -> List[TagEntity]:
             created.append(tag)
         if created:
             await self._session.flush()
+            for tag in created:
+                self._record_write(tag.id, "create")
+                after_commit(self._session, partial(self.name_index.add, tag.id, tag.name))
         return list(existing_map.values()) + created
 
 
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
-from python_toy.server.model.common import PageResponse
+from python_toy.server.model.common import ListResponse, PageResponse
+from python_toy.server.infra.group_commit import GroupCommitter, group_commit
+from python_toy.server.infra.single_flight import SingleFlight, coalesce
 from python_toy.server.infra.transaction import transactional
 from .models import Tag, TagCreate
 from .tag_repository import TagRepository
@@ -10,25 +12,50 @@
 class TagService:
     """Application service for Tag domain."""
 
-    def __init__(self, repo: TagRepository) -> None:
+    def __init__(
+        self,
+        repo: TagRepository,
+        single_flight: SingleFlight | None = None,
+        group_committer: GroupCommitter | None = None,
+    ) -> None:
         self._repo = repo
+        self._single_flight = single_flight
+        self._group_committer = group_committer
 
     async def create(self, payload: TagCreate) -> Tag:
-        async with transactional(self._repo._session):
-            entity = TagMapper.to_entity(payload)
-            entity = await self._repo.create(entity)
-            return TagMapper.to_domain(entity)
+        async def create() -> Tag:
+            async with transactional(self._repo._session):
+                entity = TagMapper.to_entity(payload)
+                entity = await self._repo.create(entity)
+                return TagMapper.to_domain(entity)
+
+        return await group_commit(self._group_committer, create)
 
     async def list(self, page: int, size: int) -> PageResponse[Tag]:
+        async def read() -> PageResponse[Tag]:
+            async with transactional(self._repo._session):
+                rows, total = await self._repo.list(page=page, size=size)
+                items = [TagMapper.row_to_domain(row) for row in rows]
+                return PageResponse.create(items, total, page, size)
+
+        return await coalesce(self._single_flight, ("tags.list", page, size), read)
+
+    def suggest(self, prefix: str, limit: int) -> ListResponse[Tag]:
+        """Return tags whose name starts with the prefix (case-insensitive), served from the in-memory name index."""
+        items = [Tag(id=entity_id, name=name) for entity_id, name in self._repo.name_index.suggest(prefix, limit)]
+        return ListResponse.of(items)
+
+    async def load_name_index(self) -> int:
         async with transactional(self._repo._session):
-            entities, total = await self._repo.list(page=page, size=size)
-            items = [TagMapper.to_domain(item) for item in entities]
-            return PageResponse.create(items, total, page, size)
+            return await self._repo.load_name_index()
 
     async def get(self, entity_id: str) -> Tag:
-        async with transactional(self._repo._session):
-            entity = await self._repo.get_required(entity_id)
-            return TagMapper.to_domain(entity)
+        async def read() -> Tag:
+            async with transactional(self._repo._session):
+                row = await self._repo.get_row_required(entity_id)
+                return TagMapper.row_to_domain(row)
+
+        return await coalesce(self._single_flight, ("tags.get", entity_id), read)
 
     async def delete(self, entity_id: str) -> None:
         async with transactional(self._repo._session):
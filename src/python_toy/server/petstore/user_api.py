@@ -6,6 +6,7 @@
 from fastapi_utils.cbv import cbv
 from starlette.status import HTTP_201_CREATED
 
+from python_toy.server.infra.http_cache import cache_policy
 from python_toy.server.model.common import EmptyResponse, PageResponse
 from .user_service import UserService
 from .models import User, UserCreate
@@ -31,6 +32,7 @@ async def create(self, payload: UserCreate) -> User:
         return await self._service.create(payload)
 
     @router.get("/v1/users")
+    @cache_policy("users")
     async def list(
         self,
         page: Annotated[int, Query(ge=1)] = 1,
@@ -39,6 +41,7 @@ async def list(
         return await self._service.list(page, size)
 
     @router.get("/v1/users/{user_id}")
+    @cache_policy("users", entity_param="user_id")
     async def get(self, user_id: UserId) -> User:
         return await self._service.get(user_id)
 
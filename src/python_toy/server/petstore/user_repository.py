@@ -1,22 +1,32 @@
 from __future__ import annotations
 
-from sqlalchemy import delete, func, select
+from typing import Any
 
+from sqlalchemy import Row, delete
+
+from python_toy.server.infra.entity_cache import EntityCache
 from python_toy.server.infra.error import EntityNotFoundException
 from python_toy.server.petstore.db_models import UserEntity
 from .base_repository import BaseRepository, SessionSupplier
 
 
 class UserRepository(BaseRepository[UserEntity]):
-    def __init__(self, session_supplier: SessionSupplier) -> None:
-        super().__init__(UserEntity, session_supplier)
-
-    async def list(self, *, page: int = 1, size: int = 10) -> tuple[list[UserEntity], int]:
-        total = int((await self._session.execute(select(func.count()).select_from(UserEntity))).scalar_one())
-
-        q = select(UserEntity).order_by(UserEntity.username).offset((page - 1) * size).limit(size)
-        items = (await self._session.execute(q)).scalars().all()
-        return list(items), total
+    # Columns read by the row-based list path; mapped by UserMapper.row_to_domain
+    ROW_COLUMNS = (
+        UserEntity.id,
+        UserEntity.username,
+        UserEntity.first_name,
+        UserEntity.last_name,
+        UserEntity.email,
+        UserEntity.phone,
+    )
+
+    def __init__(self, session_supplier: SessionSupplier, cache: EntityCache[Row[Any]] | None = None) -> None:
+        super().__init__(UserEntity, session_supplier, cache)
+
+    async def list(self, *, page: int = 1, size: int = 10) -> tuple[list[Row[Any]], int]:
+        """List a page of user rows (Core projection, no ORM instances) with the total count."""
+        return await self.list_rows(self.ROW_COLUMNS, order_by=(UserEntity.username,), page=page, size=size)
 
     async def get(self, entity_id: str) -> UserEntity:
         return await self.get_required(entity_id)
@@ -25,6 +35,7 @@ async def delete(self, entity_id: str) -> None:
         res = await self._session.execute(delete(UserEntity).where(UserEntity.id == entity_id))
         if res.rowcount == 0:
             raise EntityNotFoundException(entity_type=self.entity_type, entity_id=entity_id)
+        self._record_write(entity_id, "delete")
 
 
 __all__ = ("UserRepository",)
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 from python_toy.server.model.common import PageResponse
+from python_toy.server.infra.group_commit import GroupCommitter, group_commit
+from python_toy.server.infra.single_flight import SingleFlight, coalesce
 from python_toy.server.infra.transaction import transactional
 from .models import User, UserCreate
 from .user_repository import UserRepository
@@ -8,25 +10,41 @@
 
 
 class UserService:
-    def __init__(self, repo: UserRepository) -> None:
+    def __init__(
+        self,
+        repo: UserRepository,
+        single_flight: SingleFlight | None = None,
+        group_committer: GroupCommitter | None = None,
+    ) -> None:
         self._repo = repo
+        self._single_flight = single_flight
+        self._group_committer = group_committer
 
     async def create(self, payload: UserCreate) -> User:
-        async with transactional(self._repo._session):
-            entity = UserMapper.to_entity(payload)
-            entity = await self._repo.create(entity)
-            return UserMapper.to_domain(entity)
+        async def create() -> User:
+            async with transactional(self._repo._session):
+                entity = UserMapper.to_entity(payload)
+                entity = await self._repo.create(entity)
+                return UserMapper.to_domain(entity)
+
+        return await group_commit(self._group_committer, create)
 
     async def list(self, page: int, size: int) -> PageResponse[User]:
-        async with transactional(self._repo._session):
-            entities, total = await self._repo.list(page=page, size=size)
-            items = [UserMapper.to_domain(item) for item in entities]
-            return PageResponse.create(items, total, page, size)
+        async def read() -> PageResponse[User]:
+            async with transactional(self._repo._session):
+                rows, total = await self._repo.list(page=page, size=size)
+                items = [UserMapper.row_to_domain(row) for row in rows]
+                return PageResponse.create(items, total, page, size)
+
+        return await coalesce(self._single_flight, ("users.list", page, size), read)
 
     async def get(self, entity_id: str) -> User:
-        async with transactional(self._repo._session):
-            entity = await self._repo.get_required(entity_id)
-            return UserMapper.to_domain(entity)
+        async def read() -> User:
+            async with transactional(self._repo._session):
+                row = await self._repo.get_row_required(entity_id)
+                return UserMapper.row_to_domain(row)
+
+        return await coalesce(self._single_flight, ("users.get", entity_id), read)
 
     async def delete(self, entity_id: str) -> None:
         async with transactional(self._repo._session):
@@ -3,6 +3,8 @@
 from __future__ import annotations
 
 import asyncio
+from pathlib import Path
+
 import pytest
 from typing import AsyncGenerator, Iterator
 from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, create_async_engine, async_sessionmaker
@@ -10,6 +12,7 @@
 
 from python_toy.server.petstore.db_models import Base
 from python_toy.server.app import create_app
+from python_toy.server.infra import config as config_module
 from python_toy.server.infra import health
 
 
@@ -58,16 +61,21 @@ def session_supplier(db_session: AsyncSession):
 
 
 @pytest.fixture
-def client(monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
-    """Create FastAPI test client with isolated in-memory DB."""
-    # Ensure app uses an in-memory sqlite for full isolation
-    monkeypatch.setenv("APP_DATABASE_URL", "sqlite+aiosqlite:///:memory:")
+def client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> Iterator[TestClient]:
+    """Create FastAPI test client with an isolated SQLite DB."""
+    # A file DB rather than :memory:, so that relation batches and coalesced reads, which use
+    # their own connections, see the same database as the request
+    monkeypatch.setenv("APP_DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    config_module.get_settings.cache_clear()
     app = create_app()
     health.reset_state()
 
-    with TestClient(app, raise_server_exceptions=False) as c:
-        health.set_started()
-        yield c
+    try:
+        with TestClient(app, raise_server_exceptions=False) as c:
+            health.set_started()
+            yield c
+    finally:
+        config_module.get_settings.cache_clear()
 
 
 __all__ = ("event_loop", "test_engine", "db_session", "session_supplier", "client")
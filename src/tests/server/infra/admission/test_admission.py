@@ -0,0 +1,204 @@
+"""Tests for the adaptive concurrency limit, the admission middleware and traffic class bulkheads."""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from python_toy.server.infra import metrics
+from python_toy.server.infra.admission import AdmissionMiddleware, create_bulkheads
+from python_toy.server.infra.concurrency_limit import AdaptiveLimiter
+from python_toy.server.infra.config import DEFAULT_TRAFFIC_CLASSES, AdmissionConfig, TrafficClassConfig
+from python_toy.server.infra.route_match import RouteMatchMiddleware
+from python_toy.server.infra.traffic_class import BULK, current_traffic_class, traffic_class
+
+
+def _limiter(limit: int = 2, queue_size: int = 1) -> AdaptiveLimiter:
+    return AdaptiveLimiter(
+        initial_limit=limit, min_limit=1, max_limit=10, target_latency=0.1, backoff_ratio=0.5, queue_size=queue_size
+    )
+
+
+class TestAdaptiveLimiter:
+    async def test_queues_then_rejects_beyond_the_limit(self) -> None:
+        limiter = _limiter()
+        assert await limiter.acquire(1)
+        assert await limiter.acquire(1)
+        queued = asyncio.create_task(limiter.acquire(1))
+        await asyncio.sleep(0)
+        assert not await limiter.acquire(1)  # the queue is full
+        limiter.release(0.01, dropped=False)
+        assert await queued
+        assert not await limiter.acquire(0.01)  # waited too long
+        assert limiter.stats() == {
+            "limit": 2,
+            "in_flight": 2,
+            "waiting": 0,
+            "admitted": 3,
+            "queued": 2,
+            "rejected": 1,
+            "timed_out": 1,
+            "decreases": 0,
+        }
+
+    async def test_limit_grows_while_used_and_backs_off_when_slow(self) -> None:
+        limiter = _limiter(limit=4, queue_size=0)
+        for _ in range(20):
+            for _ in range(4):
+                assert await limiter.acquire(0)
+            for _ in range(4):
+                limiter.release(0.01, dropped=False)
+        assert limiter.limit > 4
+
+        grown = limiter.limit
+        for _ in range(3):  # one slow burst: a single decrease
+            await limiter.acquire(0)
+        for _ in range(3):
+            limiter.release(0.5, dropped=False)
+        assert limiter.limit == grown // 2
+        assert limiter.stats()["decreases"] == 1
+
+    async def test_admits_waiters_by_priority_then_arrival(self) -> None:
+        limiter = _limiter(limit=1, queue_size=10)
+        assert await limiter.acquire(1)
+        admitted: list[str] = []
+
+        async def wait(name: str, priority: int) -> None:
+            assert await limiter.acquire(1, priority=priority)
+            admitted.append(name)
+
+        waiting = [
+            asyncio.create_task(wait(name, priority))
+            for name, priority in [("bulk", 2), ("write", 1), ("read-1", 0), ("read-2", 0)]
+        ]
+        abandoned = asyncio.create_task(limiter.acquire(1, priority=0))
+        await asyncio.sleep(0)
+        abandoned.cancel()
+        await asyncio.sleep(0)
+        for _ in waiting:
+            limiter.release(0.01, dropped=False)
+            await asyncio.sleep(0)
+        await asyncio.gather(*waiting)
+        assert admitted == ["read-1", "read-2", "write", "bulk"]
+        assert limiter.stats()["waiting"] == 0
+
+
+class TestAdmissionMiddleware:
+    async def test_sheds_load_with_retry_after_but_not_health_probes(self) -> None:
+        gate = asyncio.Event()
+        app = FastAPI()
+
+        @app.get("/v1/slow")
+        async def slow() -> dict[str, bool]:
+            await gate.wait()
+            return {"ok": True}
+
+        @app.get("/.internal/healthz/liveness")
+        async def liveness() -> str:
+            return "UP"
+
+        limiter = _limiter(limit=1, queue_size=1)
+        app.add_middleware(
+            AdmissionMiddleware,
+            routes=app.router.routes,
+            limiter=limiter,
+            bulkheads={},
+            classes=DEFAULT_TRAFFIC_CLASSES,
+            config=AdmissionConfig(queue_timeout_ms=5_000),
+        )
+        app.add_middleware(RouteMatchMiddleware, routes=app.router.routes)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            running = asyncio.create_task(client.get("/v1/slow"))
+            queued = asyncio.create_task(client.get("/v1/slow"))
+            await asyncio.sleep(0.05)
+
+            rejected = await client.get("/v1/slow")
+            assert rejected.status_code == 503
+            assert rejected.headers["retry-after"] == "1"
+            assert rejected.headers["content-type"] == "application/problem+json"
+            assert (await client.get("/.internal/healthz/liveness")).status_code == 200
+
+            gate.set()
+            assert [(await running).status_code, (await queued).status_code] == [200, 200]
+        assert limiter.in_flight == 0
+
+
+class TestTrafficClasses:
+    async def test_bulk_requests_wait_in_their_bulkhead_not_for_the_shared_limit(self) -> None:
+        gate = asyncio.Event()
+        app = FastAPI()
+        seen: list[str | None] = []
+
+        @app.get("/v1/things:export")
+        @traffic_class(BULK)
+        async def export() -> dict[str, bool]:
+            seen.append(current_traffic_class())
+            await gate.wait()
+            return {"ok": True}
+
+        @app.get("/v1/things/{thing_id}")
+        async def get_thing(thing_id: str) -> dict[str, str]:
+            seen.append(current_traffic_class())
+            return {"id": thing_id}
+
+        classes = {**DEFAULT_TRAFFIC_CLASSES, BULK: TrafficClassConfig(max_concurrent=1, queue_size=0)}
+        limiter = _limiter(limit=1, queue_size=0)
+        bulkheads = create_bulkheads(classes)
+        app.add_middleware(
+            AdmissionMiddleware,
+            routes=app.router.routes,
+            limiter=limiter,
+            bulkheads=bulkheads,
+            classes=classes,
+            config=AdmissionConfig(),
+        )
+        app.add_middleware(RouteMatchMiddleware, routes=app.router.routes)
+
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            export_running = asyncio.create_task(client.get("/v1/things:export"))
+            await asyncio.sleep(0.05)
+            # The bulkhead is full, but the shared limit it does not use is free for interactive reads
+            assert (await client.get("/v1/things:export")).status_code == 503
+            assert (await client.get("/v1/things/1")).status_code == 200
+            gate.set()
+            assert (await export_running).status_code == 200
+        assert seen == [BULK, "read"]
+        assert bulkheads[BULK].stats()["rejected"] == 1
+        assert limiter.stats()["admitted"] == 1
+        metrics.unregister(f"bulkhead.{BULK}")
+
+    def test_rejects_routes_of_unconfigured_classes(self) -> None:
+        app = FastAPI()
+
+        @app.get("/v1/reports")
+        @traffic_class("reporting")
+        async def reports() -> list[str]:
+            return []
+
+        app.add_middleware(
+            AdmissionMiddleware,
+            routes=app.router.routes,
+            limiter=None,
+            bulkheads={},
+            classes=DEFAULT_TRAFFIC_CLASSES,
+            config=AdmissionConfig(),
+        )
+        app.add_middleware(RouteMatchMiddleware, routes=app.router.routes)
+        with pytest.raises(ValueError, match="reporting"), TestClient(app) as client:
+            client.get("/v1/reports")
+
+    def test_export_runs_in_the_bulk_bulkhead(self, client: TestClient) -> None:
+        assert client.post("/v1/pets", json={"name": "Rex", "status": "available"}).status_code == 201
+        response = client.get("/v1/pets:export")
+        assert response.status_code == 200
+        assert len(response.text.splitlines()) == 1
+        bulkhead = client.get("/.internal/metrics").json()[f"bulkhead.{BULK}"]
+        assert bulkhead["admitted"] == 1
+        assert bulkhead["in_flight"] == 0
+        # Its batches were read through the bulk class's own connection pool
+        assert client.app.state.container.db_traffic_class_engines()[BULK].pool.checkedin() > 0  # type: ignore[attr-defined]
@@ -0,0 +1,105 @@
+"""Tests for batching lookups by key across concurrent callers."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+
+from python_toy.server.infra.batch_loader import BatchLoader
+from python_toy.server.infra.versions import VersionRegistry
+
+
+class _Source:
+    def __init__(self, *, delay: float = 0.0) -> None:
+        self.calls: list[list[str]] = []
+        self.delay = delay
+
+    async def load(self, keys: list[str]) -> dict[str, str]:
+        self.calls.append(sorted(keys))
+        await asyncio.sleep(self.delay)
+        return {key: key.upper() for key in keys if key != "missing"}
+
+
+class TestBatchLoader:
+    async def test_lookups_of_one_tick_are_batched(self) -> None:
+        source = _Source()
+        loader = BatchLoader(source.load)
+
+        results = await asyncio.gather(
+            loader.load_many(["a", "b"]),
+            loader.load_many(["b", "c", "missing"]),
+            loader.load_many([]),
+        )
+
+        assert results == [{"a": "A", "b": "B"}, {"b": "B", "c": "C"}, {}]
+        assert source.calls == [["a", "b", "c", "missing"]]
+        assert loader.stats["shared"] == 1
+
+    async def test_in_flight_keys_are_shared(self) -> None:
+        source = _Source(delay=0.01)
+        loader = BatchLoader(source.load)
+
+        first = asyncio.create_task(loader.load_many(["a"]))
+        await asyncio.sleep(0.001)  # the first batch is now loading
+        second = await loader.load_many(["a", "b"])
+
+        assert await first == {"a": "A"}
+        assert second == {"a": "A", "b": "B"}
+        assert source.calls == [["a"], ["b"]]
+
+    async def test_loads_started_before_a_commit_are_not_shared(self) -> None:
+        source = _Source(delay=0.01)
+        versions = VersionRegistry()
+        loader = BatchLoader(source.load, versions=versions)
+
+        before = asyncio.create_task(loader.load_many(["a"]))
+        await asyncio.sleep(0.001)  # the first batch is now loading
+        versions.bump("pets", "p1")
+        after, joined = await asyncio.gather(loader.load_many(["a"]), loader.load_many(["a"]))
+
+        assert await before == after == joined == {"a": "A"}
+        assert source.calls == [["a"], ["a"]]
+        assert loader.stats["shared"] == 1
+
+    async def test_batches_are_split_at_max_batch(self) -> None:
+        source = _Source()
+        loader = BatchLoader(source.load, max_batch=2)
+
+        assert len(await loader.load_many(["a", "b", "c", "d", "e"])) == 5
+        assert [len(call) for call in source.calls] == [2, 2, 1]
+
+    async def test_window_collects_later_lookups(self) -> None:
+        source = _Source()
+        loader = BatchLoader(source.load, window_seconds=0.01)
+
+        async def later(key: str) -> dict[str, str]:
+            await asyncio.sleep(0.001)
+            return await loader.load_many([key])
+
+        await asyncio.gather(loader.load_many(["a"]), later("b"))
+        assert source.calls == [["a", "b"]]
+
+    async def test_errors_reach_every_caller(self) -> None:
+        async def fail(keys: list[str]) -> dict[str, str]:
+            raise LookupError
+
+        loader = BatchLoader(fail)
+        results = await asyncio.gather(loader.load_many(["a"]), loader.load_many(["a", "b"]), return_exceptions=True)
+        assert [type(result) for result in results] == [LookupError, LookupError]
+
+        # Failed keys are not remembered
+        with pytest.raises(LookupError):
+            await loader.load_many(["a"])
+
+    async def test_cancelled_caller_does_not_cancel_shared_load(self) -> None:
+        source = _Source(delay=0.01)
+        loader = BatchLoader(source.load)
+
+        cancelled = asyncio.create_task(loader.load_many(["a"]))
+        other = asyncio.create_task(loader.load_many(["a"]))
+        await asyncio.sleep(0.001)
+        cancelled.cancel()
+
+        assert await other == {"a": "A"}
+        assert cancelled.cancelled()
@@ -0,0 +1,133 @@
+"""Tests for the database circuit breaker and its middleware."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import text
+
+from python_toy.server.infra.circuit_breaker import CircuitBreaker, CircuitState
+from python_toy.server.infra.config import Settings
+from python_toy.server.infra.database import create_database_engine
+from python_toy.server.infra.db_probe import DatabaseProbe
+from python_toy.server.infra.error import DatabaseUnavailableException
+
+
+@pytest.fixture(autouse=True)
+def _quick_breaker(monkeypatch: pytest.MonkeyPatch) -> None:
+    # Set before the client fixture builds the app
+    monkeypatch.setenv("APP_CIRCUIT_BREAKER.FAILURE_THRESHOLD", "2")
+    monkeypatch.setenv("APP_CIRCUIT_BREAKER.OPEN_SECONDS", "0.2")
+
+
+class TestCircuitBreaker:
+    async def test_opens_on_database_errors_and_closes_after_a_trial(self, tmp_path: Path) -> None:
+        breaker = CircuitBreaker(failure_threshold=2, open_seconds=0.1, half_open_requests=1)
+        usable: list[bool] = []
+        breaker.set_listener(usable.append)
+        engine = create_database_engine(
+            Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'breaker.db'}"), circuit_breaker=breaker
+        )
+        try:
+            async with engine.connect() as conn:
+                for _ in range(2):
+                    with pytest.raises(Exception, match="no such table"):
+                        await conn.execute(text("SELECT * FROM missing"))
+                assert breaker.state is CircuitState.OPEN
+                # Refused before reaching SQLite
+                with pytest.raises(DatabaseUnavailableException):
+                    await conn.execute(text("SELECT 1"))
+                assert not breaker.admit()
+
+                await asyncio.sleep(0.1)
+                assert breaker.admit()  # the trial request
+                assert not breaker.admit()
+                assert breaker.state is CircuitState.HALF_OPEN
+                assert (await conn.execute(text("SELECT 1"))).scalar_one() == 1
+                assert breaker.state is CircuitState.CLOSED
+        finally:
+            await engine.dispose()
+        assert usable == [False, True]
+        assert breaker.snapshot() == {
+            "open": 0,
+            "consecutive_failures": 0,
+            "opened": 1,
+            "failures": 2,
+            "trials": 1,
+            "rejected": 2,
+        }
+
+    def test_failed_trial_opens_it_again(self) -> None:
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.05, half_open_requests=2)
+        breaker.record_failure()
+        time.sleep(0.05)
+        assert breaker.admit()
+        breaker.record_failure()
+        assert breaker.state is CircuitState.OPEN
+        assert not breaker.admit()
+        # Failures do not add up across successes
+        breaker = CircuitBreaker(failure_threshold=2, open_seconds=1, half_open_requests=1)
+        for _ in range(3):
+            breaker.record_failure()
+            breaker.record_success()
+        assert breaker.state is CircuitState.CLOSED
+
+    async def test_probe_runs_the_trial_without_requests(self, tmp_path: Path) -> None:
+        path = tmp_path / "breaker.db"
+        path.write_bytes(b"not a database" * 512)
+        breaker = CircuitBreaker(failure_threshold=1, open_seconds=0.05, half_open_requests=1)
+        engine = create_database_engine(Settings(database_url=f"sqlite+aiosqlite:///{path}"), circuit_breaker=breaker)
+        probe = DatabaseProbe(breaker, engine, interval=0.05, timeout=1)
+        probe.start()
+        try:
+            breaker.record_failure()
+            await asyncio.sleep(0.3)
+            # Each probe failed and opened it again
+            assert breaker.state is CircuitState.OPEN
+            assert breaker.stats["trials"] >= 2
+            assert breaker.stats["failures"] >= breaker.stats["trials"]
+
+            path.write_bytes(b"")  # An empty file is an empty database
+            await asyncio.sleep(0.3)
+            assert breaker.state is CircuitState.CLOSED
+        finally:
+            probe.close()
+            await engine.dispose()
+
+
+class TestCircuitBreakerMiddleware:
+    def test_fails_fast_and_reports_not_ready_while_open(self, client: TestClient) -> None:
+        assert client.post("/v1/pets", json={"name": "Rex", "status": "available"}).status_code == 201
+        breaker = client.app.state.container.db_circuit_breaker()  # type: ignore[attr-defined]
+        breaker.record_failure()
+        breaker.record_failure()
+
+        response = client.get("/v1/pets")
+        assert response.status_code == 503
+        assert response.headers["content-type"] == "application/problem+json"
+        assert response.headers["retry-after"] == "1"
+        assert client.get("/.internal/healthz/readiness").text == "DOWN"
+        assert client.get("/.internal/metrics").json()["db_circuit"]["open"] == 1
+
+        time.sleep(0.2)
+        assert client.get("/v1/pets").status_code == 200  # the trial succeeds
+        assert client.get("/.internal/healthz/readiness").text == "UP"
+        assert breaker.state is CircuitState.CLOSED
+
+    def test_recovers_without_traffic(self, client: TestClient) -> None:
+        breaker = client.app.state.container.db_circuit_breaker()  # type: ignore[attr-defined]
+        breaker.record_failure()
+        breaker.record_failure()
+        assert client.get("/.internal/healthz/readiness").text == "DOWN"
+
+        # Drained by the load balancer: only probes arrive
+        for _ in range(20):
+            time.sleep(0.1)
+            if client.get("/.internal/healthz/readiness").text == "UP":
+                break
+        assert breaker.state is CircuitState.CLOSED
+        assert breaker.stats["trials"] == 1
@@ -0,0 +1,88 @@
+"""Tests for upgrading databases created by earlier releases."""
+
+from __future__ import annotations
+
+import json
+import sqlite3
+import time
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+
+# The schema as the first release created it
+_BASELINE_SCHEMA = """
+CREATE TABLE categories (
+    id VARCHAR(64) NOT NULL, name VARCHAR(100) NOT NULL, PRIMARY KEY (id), UNIQUE (name)
+);
+CREATE TABLE tags (
+    id VARCHAR(64) NOT NULL, name VARCHAR(100) NOT NULL, PRIMARY KEY (id), UNIQUE (name)
+);
+CREATE TABLE users (
+    id VARCHAR(64) NOT NULL, username VARCHAR(100) NOT NULL, first_name VARCHAR(100) NOT NULL,
+    last_name VARCHAR(100) NOT NULL, email VARCHAR(100) NOT NULL, password VARCHAR(255) NOT NULL,
+    phone VARCHAR(20), PRIMARY KEY (id), UNIQUE (username), UNIQUE (email)
+);
+CREATE TABLE pets (
+    id VARCHAR(64) NOT NULL, name VARCHAR(100) NOT NULL, category_id VARCHAR(64), status VARCHAR(9) NOT NULL,
+    photo_urls TEXT NOT NULL, owner_id VARCHAR(64), PRIMARY KEY (id),
+    FOREIGN KEY(category_id) REFERENCES categories (id), FOREIGN KEY(owner_id) REFERENCES users (id)
+);
+CREATE TABLE orders (
+    id VARCHAR(64) NOT NULL, pet_id VARCHAR(64) NOT NULL, user_id VARCHAR(64) NOT NULL, quantity INTEGER NOT NULL,
+    ship_date DATETIME, status VARCHAR(20) NOT NULL, complete BOOLEAN NOT NULL, PRIMARY KEY (id),
+    FOREIGN KEY(pet_id) REFERENCES pets (id), FOREIGN KEY(user_id) REFERENCES users (id)
+);
+CREATE TABLE pet_tags (
+    pet_id VARCHAR(64) NOT NULL, tag_id VARCHAR(64) NOT NULL, PRIMARY KEY (pet_id, tag_id),
+    FOREIGN KEY(pet_id) REFERENCES pets (id), FOREIGN KEY(tag_id) REFERENCES tags (id)
+);
+INSERT INTO categories (id, name) VALUES ('c1', 'dogs');
+INSERT INTO pets (id, name, category_id, status, photo_urls) VALUES ('p1', 'Rex', 'c1', 'available', '');
+"""
+
+
+@pytest.fixture(autouse=True)
+def _baseline_database(tmp_path: Path) -> None:
+    # Where the client fixture points the app, created before it starts
+    with sqlite3.connect(tmp_path / "test.db") as conn:
+        conn.executescript(_BASELINE_SCHEMA)
+    conn.close()
+
+
+def _columns(path: Path, table: str) -> set[str]:
+    with sqlite3.connect(path) as conn:
+        columns = {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}
+    conn.close()
+    return columns
+
+
+def _indexes(path: Path, table: str) -> set[str]:
+    with sqlite3.connect(path) as conn:
+        indexes = {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+    conn.close()
+    return indexes
+
+
+class TestSchemaUpgrade:
+    def test_starts_on_a_baseline_database(self, client: TestClient, tmp_path: Path) -> None:
+        assert "ix_pets_updated_at_id" in _indexes(tmp_path / "test.db", "pets")
+        for table in ("pets", "categories", "tags", "users", "orders"):
+            assert "version" in _columns(tmp_path / "test.db", table)
+
+        response = client.get("/v1/categories/c1")
+        assert response.status_code == 200
+        assert response.json()["name"] == "dogs"
+        assert client.post("/v1/categories", json={"name": "cats"}).status_code == 201
+
+        pet = client.get("/v1/pets/p1")
+        assert pet.status_code == 200
+        assert pet.headers["etag"] == '"1"'
+        assert client.post("/v1/pets", json={"name": "Tom", "status": "available"}).status_code == 201
+        assert client.patch("/v1/pets/p1", json={"name": "Max"}, headers={"If-Match": '"1"'}).status_code == 200
+
+    def test_backfills_updated_at_for_since_exports(self, client: TestClient) -> None:
+        # The upgrade ran when the client started, just before this
+        since = time.time() - 60
+        response = client.get("/v1/pets:export", params={"since": str(since)})
+        assert [json.loads(line)["id"] for line in response.text.splitlines()] == ["p1"]
@@ -0,0 +1,128 @@
+"""Tests for request deadlines, SQLite statement interruption and cancellation on client disconnect."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import httpx
+import pytest
+from fastapi import FastAPI
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.types import Message
+
+from python_toy.server.infra.config import DeadlineConfig, Settings
+from python_toy.server.infra.database import create_database_engine
+from python_toy.server.infra.route_match import RouteMatchMiddleware
+from python_toy.server.infra.request_deadline import DeadlineMiddleware, request_timeout
+
+# Counts to a billion: runs for minutes unless interrupted
+_SLOW_QUERY = text(
+    "WITH RECURSIVE c(x) AS (SELECT 1 UNION ALL SELECT x + 1 FROM c WHERE x < 1000000000) SELECT count(*) FROM c"
+)
+
+
+@pytest.fixture
+async def engine(tmp_path: Path) -> AsyncIterator[AsyncEngine]:
+    # One connection, so that a statement left running would block the next request
+    engine = create_database_engine(
+        Settings(database_url=f"sqlite+aiosqlite:///{tmp_path / 'deadline.db'}"), pool_size=1, max_overflow=0
+    )
+    yield engine
+    await engine.dispose()
+
+
+def _app(engine: AsyncEngine, cancelled: list[str]) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/v1/slow")
+    async def slow() -> int:
+        try:
+            async with engine.connect() as conn:
+                return (await conn.execute(_SLOW_QUERY)).scalar_one()
+        except asyncio.CancelledError:
+            cancelled.append("slow")
+            raise
+
+    @app.get("/v1/quick")
+    async def quick() -> int:
+        async with engine.connect() as conn:
+            return (await conn.execute(text("SELECT 1"))).scalar_one()
+
+    @app.get("/v1/sleepy")
+    @request_timeout(0.1)
+    async def sleepy() -> str:
+        await asyncio.sleep(1)
+        return "awake"
+
+    app.add_middleware(DeadlineMiddleware, config=DeadlineConfig())
+    app.add_middleware(RouteMatchMiddleware, routes=app.router.routes)
+    return app
+
+
+class TestDeadlineMiddleware:
+    async def test_deadline_interrupts_the_running_statement(self, engine: AsyncEngine) -> None:
+        cancelled: list[str] = []
+        app = _app(engine, cancelled)
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            started = time.monotonic()
+            response = await client.get("/v1/slow", headers={"X-Request-Timeout": "0.2"})
+            assert response.status_code == 504
+            assert response.json()["title"] == "Deadline Exceeded"
+            assert cancelled == ["slow"]
+            # The only connection is free again
+            assert (await client.get("/v1/quick")).json() == 1
+            assert time.monotonic() - started < 5
+
+    async def test_route_default_and_header_take_the_shorter(self, engine: AsyncEngine) -> None:
+        app = _app(engine, [])
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://test") as client:
+            assert (await client.get("/v1/sleepy", headers={"X-Request-Timeout": "30"})).status_code == 504
+            assert (await client.get("/v1/quick", headers={"X-Request-Timeout": "2.5"})).status_code == 200
+            invalid = await client.get("/v1/quick", headers={"X-Request-Timeout": "soon"})
+            assert invalid.status_code == 400
+            assert invalid.headers["content-type"] == "application/problem+json"
+
+    async def test_client_disconnect_cancels_the_handler(self, engine: AsyncEngine) -> None:
+        cancelled: list[str] = []
+        app = _app(engine, cancelled)
+        disconnect = asyncio.Event()
+        sent: list[Message] = []
+
+        async def receive() -> Message:
+            if not sent and not disconnect.is_set():
+                sent.append({"type": "http.request", "body": b"", "more_body": False})
+                return sent[-1]
+            await disconnect.wait()
+            return {"type": "http.disconnect"}
+
+        async def send(message: Message) -> None:
+            sent.append(message)
+
+        scope = {
+            "type": "http",
+            "asgi": {"version": "3.0"},
+            "http_version": "1.1",
+            "method": "GET",
+            "scheme": "http",
+            "path": "/v1/slow",
+            "raw_path": b"/v1/slow",
+            "query_string": b"",
+            "root_path": "",
+            "headers": [(b"host", b"test")],
+            "server": ("test", 80),
+            "client": ("test", 1234),
+        }
+        request = asyncio.create_task(app(scope, receive, send))
+        await asyncio.sleep(0.2)
+        disconnect.set()
+        async with asyncio.timeout(5):
+            await request
+        assert cancelled == ["slow"]
+        # Nothing is sent to a client that is gone
+        assert [message["type"] for message in sent] == ["http.request"]
+        async with engine.connect() as conn:
+            assert (await conn.execute(text("SELECT 1"))).scalar_one() == 1
@@ -0,0 +1,54 @@
+"""Tests for the in-process entity cache."""
+
+from __future__ import annotations
+
+from python_toy.server.infra.entity_cache import EntityCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestEntityCache:
+    def test_lru_ttl_and_negative_entries(self) -> None:
+        clock = FakeClock()
+        cache: EntityCache[str] = EntityCache(max_size=2, ttl_seconds=10, negative_ttl_seconds=1, clock=clock)
+
+        cache.put("a", "A", generation=cache.generation)
+        cache.put("missing", None, generation=cache.generation)
+        assert cache.lookup("a") == (True, "A")
+        assert cache.lookup("missing") == (True, None)
+        assert cache.lookup("b") == (False, None)
+
+        # "a" was used more recently than "missing", so "missing" is evicted
+        cache.lookup("a")
+        cache.put("b", "B", generation=cache.generation)
+        assert cache.lookup("missing") == (False, None)
+
+        clock.now = 10
+        assert cache.lookup("a") == (False, None)
+
+        assert cache.snapshot() == {
+            "size": 1,
+            "hits": 2,
+            "negative_hits": 1,
+            "misses": 3,
+            "evictions": 1,
+            "expirations": 1,
+            "invalidations": 0,
+        }
+
+    def test_invalidation_drops_stale_fills(self) -> None:
+        cache: EntityCache[str] = EntityCache(max_size=10, ttl_seconds=10, negative_ttl_seconds=1)
+        cache.put("a", "old", generation=cache.generation)
+
+        generation = cache.generation  # a reader misses and starts a database read...
+        cache.invalidate("a")  # ...while a writer commits
+        cache.put("a", "stale", generation=generation)
+
+        assert cache.lookup("a") == (False, None)
+        assert cache.stats.invalidations == 1
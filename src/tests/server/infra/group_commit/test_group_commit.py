@@ -0,0 +1,73 @@
+"""Tests for group commit of concurrent create requests."""
+
+from __future__ import annotations
+
+import asyncio
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from python_toy.server.infra import config as config_module
+from python_toy.server.infra.error import ConflictException
+from python_toy.server.infra.group_commit import GroupCommitter
+from python_toy.server.infra.session_context import get_current_session, session_scope
+from python_toy.server.petstore.category_repository import CategoryRepository
+from python_toy.server.petstore.category_service import CategoryService
+from python_toy.server.petstore.db_models import Base, CategoryEntity
+from python_toy.server.petstore.models import CategoryCreate
+from python_toy.server.app import create_app
+
+
+class TestGroupCommitter:
+    async def test_concurrent_creates_share_a_commit_and_fail_alone(self, tmp_path: Path) -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'group.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        committer = GroupCommitter(factory, max_delay=0.05, max_batch=64)
+        service = CategoryService(CategoryRepository(get_current_session), group_committer=committer)
+
+        names = [f"c{i}" for i in range(20)] + ["c0"]  # the last one is a duplicate
+        results = await asyncio.gather(
+            *(service.create(CategoryCreate(name=name)) for name in names), return_exceptions=True
+        )
+        assert all(not isinstance(result, BaseException) for result in results[:-1])
+        assert isinstance(results[-1], ConflictException)
+        assert committer.stats == {"groups": 1, "units": 21, "failed_units": 1, "failed_groups": 0, "largest_group": 21}
+
+        async with session_scope(factory) as session:
+            assert await session.scalar(select(func.count()).select_from(CategoryEntity)) == 20
+
+        # A caller already in a transaction writes in it rather than in a group
+        async with session_scope(factory) as session:
+            await session.begin()
+            await service.create(CategoryCreate(name="inline"))
+            await session.rollback()
+        assert committer.stats["units"] == 21
+        await engine.dispose()
+
+
+class TestGroupCommitApi:
+    @pytest.fixture
+    def group_client(self, tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> TestClient:
+        monkeypatch.setenv("APP_DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+        monkeypatch.setenv("APP_GROUP_COMMIT.ENABLED", "true")
+        config_module.get_settings.cache_clear()
+        return TestClient(create_app(), raise_server_exceptions=False)
+
+    def test_writes_are_visible_and_announced_after_the_group_commits(self, group_client: TestClient) -> None:
+        with group_client as client:
+            category = client.post("/v1/categories", json={"name": "Dogs"})
+            assert category.status_code == 201
+            pet = client.post("/v1/pets", json={"name": "Rex", "category_id": category.json()["id"]})
+            assert pet.status_code == 201
+            assert client.post("/v1/categories", json={"name": "Dogs"}).status_code == 409
+            assert client.get(f"/v1/pets/{pet.json()['id']}").json()["category"]["name"] == "Dogs"
+            assert [c["op"] for c in client.get("/v1/changes").json()["items"]] == ["create", "create"]
+            stats = client.get("/.internal/metrics").json()["group_commit"]
+            assert stats["units"] == 3
+            assert stats["failed_units"] == 1
+        config_module.get_settings.cache_clear()
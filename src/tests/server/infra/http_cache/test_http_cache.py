@@ -0,0 +1,55 @@
+"""Tests for ETag/304 handling and response body caching."""
+
+from __future__ import annotations
+
+from fastapi.testclient import TestClient
+
+
+def _http_cache_stats(client: TestClient) -> dict[str, int]:
+    return client.get("/.internal/metrics").json()["http_cache"]
+
+
+class TestHttpCache:
+    def test_pet_etag_follows_writes(self, client: TestClient) -> None:
+        pet_id = client.post("/v1/pets", json={"name": "Rex"}).json()["id"]
+
+        first = client.get(f"/v1/pets/{pet_id}")
+        etag = first.headers["ETag"]
+        assert first.headers["Cache-Control"] == "no-cache"
+
+        not_modified = client.get(f"/v1/pets/{pet_id}", headers={"If-None-Match": etag})
+        assert not_modified.status_code == 304
+        assert not_modified.headers["ETag"] == etag
+        assert not_modified.content == b""
+
+        cached = client.get(f"/v1/pets/{pet_id}")
+        assert cached.json() == first.json()
+        assert _http_cache_stats(client)["hits"] == 1
+
+        client.patch(f"/v1/pets/{pet_id}", json={"name": "Max"})
+        changed = client.get(f"/v1/pets/{pet_id}", headers={"If-None-Match": etag})
+        assert changed.status_code == 200
+        assert changed.json()["name"] == "Max"
+        assert changed.headers["ETag"] != etag
+
+        client.delete(f"/v1/pets/{pet_id}")
+        assert client.get(f"/v1/pets/{pet_id}").status_code == 404
+
+    def test_list_etag_changes_on_table_writes(self, client: TestClient) -> None:
+        etag = client.get("/v1/tags").headers["ETag"]
+        assert client.get("/v1/tags", headers={"If-None-Match": f'W/{etag}, "other"'}).status_code == 304
+        assert client.get("/v1/tags?page=2", headers={"If-None-Match": etag}).status_code == 304
+
+        tag = client.post("/v1/tags", json={"name": "etag"}).json()
+        response = client.get("/v1/tags", headers={"If-None-Match": etag})
+        assert response.status_code == 200
+        assert response.json()["items"] == [tag]
+
+        # Writes to other tables leave the ETag alone
+        etag = response.headers["ETag"]
+        client.post("/v1/categories", json={"name": "etag"})
+        assert client.get("/v1/tags", headers={"If-None-Match": etag}).status_code == 304
+
+    def test_uncached_routes_and_errors_have_no_etag(self, client: TestClient) -> None:
+        assert "ETag" not in client.get("/v1/tags:suggest", params={"prefix": "a"}).headers
+        assert "ETag" not in client.get("/v1/tags/missing").headers
@@ -0,0 +1,82 @@
+"""Tests for storing and replaying responses of POST requests with an Idempotency-Key."""
+
+from __future__ import annotations
+
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.status import (
+    HTTP_201_CREATED,
+    HTTP_400_BAD_REQUEST,
+    HTTP_422_UNPROCESSABLE_ENTITY,
+)
+
+from python_toy.server.infra.idempotency_store import IdempotencyStore, StoredResponse
+
+
+def _key() -> dict[str, str]:
+    return {"Idempotency-Key": str(uuid.uuid4())}
+
+
+class TestIdempotencyKeys:
+    def test_retries_are_replayed(self, client: TestClient) -> None:
+        headers = _key()
+        user = {
+            "username": "retry",
+            "first_name": "Re",
+            "last_name": "Try",
+            "email": "retry@example.com",
+            "password": "password123",
+        }
+        first = client.post("/v1/users", json=user, headers=headers)
+        assert first.status_code == HTTP_201_CREATED
+
+        # Without the key, the retry would hit the unique constraint
+        retry = client.post("/v1/users", json=user, headers=headers)
+        assert retry.status_code == HTTP_201_CREATED
+        assert retry.content == first.content
+        assert retry.headers["idempotent-replayed"] == "true"
+        assert client.get("/v1/users").json()["total"] == 1
+
+        reused = client.post("/v1/users", json={**user, "username": "other"}, headers=headers)
+        assert reused.status_code == HTTP_422_UNPROCESSABLE_ENTITY
+
+        stats = client.get("/.internal/metrics").json()["idempotency"]
+        assert stats == {"stored": 1, "replayed": 1, "mismatched": 1, "conflicts": 0}
+
+    def test_failed_requests_are_not_stored(self, client: TestClient) -> None:
+        headers = _key()
+        pet = {"name": "Rex", "category_id": "missing", "tags": ["orphan"]}
+        assert client.post("/v1/pets", json=pet, headers=headers).status_code == HTTP_400_BAD_REQUEST
+        # The failed request's writes were rolled back with it
+        assert client.get("/v1/tags").json()["total"] == 0
+
+        fixed = client.post("/v1/pets", json={"name": "Rex"}, headers=headers)
+        assert fixed.status_code == HTTP_201_CREATED
+
+    def test_invalid_key(self, client: TestClient) -> None:
+        response = client.post("/v1/pets", json={"name": "Rex"}, headers={"Idempotency-Key": "k" * 256})
+        assert response.status_code == HTTP_400_BAD_REQUEST
+        assert client.get("/v1/pets").json()["total"] == 0
+
+    def test_streamed_imports_reject_keys(self, client: TestClient) -> None:
+        body = b'{"name": "Rex"}\n'
+        response = client.post(
+            "/v1/pets:import", content=body, headers={**_key(), "Content-Type": "application/x-ndjson"}
+        )
+        assert response.status_code == HTTP_400_BAD_REQUEST
+        assert "Idempotency-Key" in response.json()["detail"]
+        assert client.get("/v1/pets").json()["total"] == 0
+
+
+class TestIdempotencyStore:
+    async def test_expired_records_are_compacted(self, db_session: AsyncSession) -> None:
+        response = StoredResponse("hash", HTTP_201_CREATED, [(b"content-type", b"application/json")], b"{}")
+        await IdempotencyStore(ttl_seconds=60).put(db_session, "live", response)
+        await IdempotencyStore(ttl_seconds=60).put(db_session, "old", response)
+
+        assert await IdempotencyStore(ttl_seconds=60).get(db_session, "live") == response
+        assert await IdempotencyStore(ttl_seconds=-1).get(db_session, "old") is None
+        assert await IdempotencyStore(ttl_seconds=-1).delete_expired(db_session) == 1
+        assert await IdempotencyStore(ttl_seconds=60).get(db_session, "live") is None
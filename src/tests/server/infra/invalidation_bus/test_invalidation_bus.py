@@ -0,0 +1,145 @@
+"""Tests for cross-worker cache invalidation over Unix datagram sockets."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import socket
+import sys
+import time
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+from fastapi.testclient import TestClient
+
+from python_toy.server.app import create_app
+from python_toy.server.infra import config as config_module
+from python_toy.server.infra import health
+from python_toy.server.infra.invalidation_bus import InvalidationBus
+
+# A worker that prints the first batch of tag IDs it receives, then exits
+_WORKER = """
+import asyncio, sys
+from pathlib import Path
+from python_toy.server.infra.invalidation_bus import InvalidationBus
+
+async def main() -> None:
+    bus = InvalidationBus(Path(sys.argv[1]))
+    received: asyncio.Future[list[str]] = asyncio.get_running_loop().create_future()
+
+    async def on_tags(ids: list[str]) -> None:
+        received.set_result(ids)
+
+    bus.subscribe("tags", on_tags)
+    bus.start()
+    print("READY", flush=True)
+    print("IDS", ",".join(await asyncio.wait_for(received, 10)), flush=True)
+    bus.close()
+
+asyncio.run(main())
+"""
+
+
+class TestInvalidationBus:
+    async def test_changes_reach_every_other_process(self, tmp_path: Path) -> None:
+        workers = [
+            await asyncio.create_subprocess_exec(
+                sys.executable, "-c", _WORKER, str(tmp_path), stdout=asyncio.subprocess.PIPE
+            )
+            for _ in range(3)
+        ]
+        try:
+            for worker in workers:
+                assert worker.stdout is not None
+                while (line := await asyncio.wait_for(worker.stdout.readline(), 10)) != b"READY\n":
+                    assert line, "worker exited before binding its socket"
+
+            bus = InvalidationBus(tmp_path)
+            bus.start()
+            assert len(bus.peers()) == 3
+            bus.publish([("users", "u1"), ("tags", "t1"), ("tags", "t2"), ("tags", "t1")])
+            bus.close()
+
+            for worker in workers:
+                stdout, _ = await asyncio.wait_for(worker.communicate(), 10)
+                assert b"IDS t1,t2\n" in stdout
+            assert bus.stats["published"] == 3
+        finally:
+            for worker in workers:
+                if worker.returncode is None:
+                    worker.kill()
+
+    async def test_sockets_of_dead_workers_are_removed(self, tmp_path: Path) -> None:
+        stale = tmp_path / "12345-dead.sock"
+        dead = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        dead.bind(str(stale))
+        dead.close()
+
+        bus = InvalidationBus(tmp_path)
+        bus.start()
+        bus.publish([("tags", "t1")])
+        bus.close()
+
+        assert list(tmp_path.iterdir()) == []
+
+    async def test_malformed_datagrams_are_dropped(self, tmp_path: Path) -> None:
+        bus = InvalidationBus(tmp_path)
+        received: list[list[str]] = []
+
+        async def on_tags(ids: list[str]) -> None:
+            received.append(ids)
+
+        bus.subscribe("tags", on_tags)
+        bus.start()
+        sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        try:
+            path = str(next(tmp_path.iterdir()))  # the bus's own socket
+            for datagram in (b'[["tags", "t1"', b'[["tags"]]', b"[42]", b'[["tags", "t2"]]'):
+                sender.sendto(datagram, path)
+            # All four are read in one drain
+            await asyncio.sleep(0.05)
+        finally:
+            sender.close()
+            bus.close()
+        assert received == [["t2"]]
+        assert bus.stats["dropped"] == 3
+        assert bus.stats["received"] == 1
+
+
+@pytest.fixture
+def bus_client(
+    tmp_path: Path, tmp_path_factory: pytest.TempPathFactory, monkeypatch: pytest.MonkeyPatch
+) -> Iterator[TestClient]:
+    # The database lives outside tmp_path, which holds only sockets
+    monkeypatch.setenv("APP_DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path_factory.mktemp('db') / 'test.db'}")
+    monkeypatch.setenv("APP_INVALIDATION.SOCKET_DIR", str(tmp_path))
+    config_module.get_settings.cache_clear()
+    app = create_app()
+    health.reset_state()
+    try:
+        with TestClient(app, raise_server_exceptions=False) as client:
+            yield client
+    finally:
+        config_module.get_settings.cache_clear()
+
+
+class TestRequestInvalidation:
+    def test_committed_writes_are_published_and_received(self, bus_client: TestClient, tmp_path: Path) -> None:
+        (app_socket,) = tmp_path.iterdir()
+        peer = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        peer.bind(str(tmp_path / "peer.sock"))
+        peer.settimeout(5)
+        try:
+            category = bus_client.post("/v1/categories", json={"name": "Bus"}).json()
+            assert json.loads(peer.recv(65536)) == [["categories", category["id"]]]
+
+            # A change committed by another worker drops the cached row
+            assert bus_client.get(f"/v1/categories/{category['id']}").status_code == 200
+            peer.sendto(json.dumps([["categories", category["id"]]]).encode(), str(app_socket))
+            deadline = time.monotonic() + 5
+            while bus_client.get("/.internal/metrics").json()["cache.categories"]["invalidations"] < 1:
+                assert time.monotonic() < deadline
+                time.sleep(0.01)
+        finally:
+            peer.close()
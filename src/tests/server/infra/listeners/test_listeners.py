@@ -0,0 +1,53 @@
+"""Tests for the listening sockets opened by the server entrypoint."""
+
+from __future__ import annotations
+
+import socket
+import stat
+from pathlib import Path
+
+import pytest
+
+from python_toy.server.infra.listeners import inherited_socket, unix_socket
+
+
+class TestUnixSocket:
+    def test_binds_with_mode_and_replaces_stale_socket(self, tmp_path: Path) -> None:
+        path = tmp_path / "server.sock"
+        stale = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        stale.bind(str(path))
+        stale.close()  # the file stays behind, as after a crash
+
+        with unix_socket(path, 0o660) as sock:
+            assert stat.S_IMODE(path.stat().st_mode) == 0o660
+            sock.listen()
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.connect(str(path))
+
+            # A server still listening on the path is not displaced
+            with pytest.raises(OSError, match="in use"):
+                unix_socket(path, 0o660)
+
+    def test_refuses_to_replace_other_files(self, tmp_path: Path) -> None:
+        path = tmp_path / "data.txt"
+        path.write_text("keep me")
+        with pytest.raises(FileExistsError):
+            unix_socket(path, 0o600)
+        assert path.read_text() == "keep me"
+
+
+class TestInheritedSocket:
+    def test_adopts_only_listening_sockets(self) -> None:
+        with socket.socket() as listening, socket.socket() as idle:
+            listening.bind(("127.0.0.1", 0))
+            listening.listen()
+            sock = inherited_socket(listening.fileno())
+            assert sock.getsockname() == listening.getsockname()
+            sock.detach()
+
+            with pytest.raises(ValueError, match="not a listening"):
+                inherited_socket(idle.fileno())
+
+    def test_rejects_descriptors_that_are_not_sockets(self, tmp_path: Path) -> None:
+        with (tmp_path / "file").open("w") as file, pytest.raises(ValueError, match="not a socket"):
+            inherited_socket(file.fileno())
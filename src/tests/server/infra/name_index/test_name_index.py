@@ -0,0 +1,55 @@
+"""Tests for the in-memory name index and the after-commit hook that keeps it in step."""
+
+from __future__ import annotations
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from python_toy.server.infra.name_index import NameIndex
+from python_toy.server.infra.transaction import after_commit
+
+
+DONKEY_FULLWIDTH = "\uff24\uff2f\uff2e\uff2b\uff25\uff39"  # NFKC-normalizes to "DONKEY"
+
+
+class TestNameIndex:
+    def test_suggest_by_normalized_prefix(self) -> None:
+        index = NameIndex()
+        index.load([("1", "Dog"), ("2", "dolphin"), ("3", "Cat"), ("4", DONKEY_FULLWIDTH)])
+        index.add("5", "Dodo")
+
+        assert index.suggest("do", 10) == [("5", "Dodo"), ("1", "Dog"), ("2", "dolphin"), ("4", DONKEY_FULLWIDTH)]
+        assert index.suggest("DO", 2) == [("5", "Dodo"), ("1", "Dog")]
+        assert index.suggest("don", 10) == [("4", DONKEY_FULLWIDTH)]
+        assert index.suggest("x", 10) == []
+
+        index.remove("1", "Dog")
+        index.remove("1", "Dog")  # unknown entries are ignored
+        assert index.suggest("dog", 10) == []
+        assert len(index) == 4
+
+        index.replace("5", "Cobra")  # renamed elsewhere; old name unknown
+        index.replace("2", None)
+        assert index.suggest("co", 10) == [("5", "Cobra")]
+        assert index.suggest("do", 10) == [("4", DONKEY_FULLWIDTH)]
+
+
+class TestAfterCommit:
+    @pytest.mark.asyncio
+    async def test_callbacks_run_only_on_commit(self, db_session: AsyncSession) -> None:
+        calls: list[str] = []
+
+        async with db_session.begin():
+            after_commit(db_session, lambda: calls.append("committed"))
+            savepoint = await db_session.begin_nested()
+            after_commit(db_session, lambda: calls.append("savepoint"))
+            await savepoint.rollback()
+            assert calls == []
+        assert calls == ["committed"]
+
+        await db_session.begin()
+        after_commit(db_session, lambda: calls.append("rolled back"))
+        await db_session.rollback()
+        await db_session.begin()
+        await db_session.commit()
+        assert calls == ["committed"]
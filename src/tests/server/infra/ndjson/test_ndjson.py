@@ -0,0 +1,25 @@
+"""Tests for splitting streamed NDJSON bodies into lines."""
+
+from __future__ import annotations
+
+from collections.abc import AsyncIterator
+
+from python_toy.server.infra.ndjson import read_lines
+
+
+async def _chunks(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+async def _lines(*chunks: bytes, max_line_bytes: int = 10) -> list[bytes | None]:
+    return [line async for line in read_lines(_chunks(*chunks), max_line_bytes=max_line_bytes)]
+
+
+class TestReadLines:
+    async def test_lines_span_chunks(self) -> None:
+        assert await _lines(b'{"a"', b': 1}\n{"b": 2}\r\n', b"\n", b"tail") == [b'{"a": 1}', b'{"b": 2}', b"", b"tail"]
+
+    async def test_overlong_lines_are_dropped_in_place(self) -> None:
+        assert await _lines(b"short\n" + b"x" * 8, b"x" * 8, b"x\nok\n") == [b"short", None, b"ok"]
+        assert await _lines(b"y" * 11) == [None]
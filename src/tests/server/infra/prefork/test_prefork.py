@@ -0,0 +1,63 @@
+"""Tests for the pre-fork master's supervision of worker processes."""
+
+from __future__ import annotations
+
+import signal
+import socket
+import time
+from collections.abc import Iterator
+from multiprocessing.connection import Connection
+
+import pytest
+
+from python_toy.server.infra.prefork import PreforkMaster
+
+# Earlier tests leave threads behind; the forked test workers only sleep and write to a pipe
+pytestmark = pytest.mark.filterwarnings("ignore:This process .* is multi-threaded:DeprecationWarning")
+
+
+@pytest.fixture
+def listener() -> Iterator[socket.socket]:
+    with socket.socket() as sock:
+        yield sock
+
+
+def _run_for(master: PreforkMaster, seconds: float) -> int:
+    """Run the master in this (main) thread and stop it from a timer signal."""
+    previous = signal.signal(signal.SIGALRM, lambda signum, frame: master.stop())
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        return master.run()
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+class TestPreforkMaster:
+    def test_replaces_workers_that_exit(self, listener: socket.socket) -> None:
+        def recycling_worker(sock: socket.socket, heartbeat: Connection) -> None:
+            heartbeat.send_bytes(b"")
+            time.sleep(0.2)
+
+        master = PreforkMaster(recycling_worker, [listener], workers=2, timeout=5, graceful_timeout=1)
+        assert _run_for(master, 1.5) == 0
+        assert master.stats["spawned"] > 2
+        assert master.stats["timed_out"] == 0
+
+    def test_kills_workers_without_heartbeats(self, listener: socket.socket) -> None:
+        def hanging_worker(sock: socket.socket, heartbeat: Connection) -> None:
+            heartbeat.send_bytes(b"")
+            time.sleep(60)
+
+        master = PreforkMaster(hanging_worker, [listener], workers=1, timeout=0.5, graceful_timeout=0.5)
+        assert _run_for(master, 2.5) == 0
+        assert master.stats["timed_out"] >= 1
+        assert master.stats["spawned"] == master.stats["timed_out"] + 1
+
+    def test_stops_when_a_worker_fails_to_boot(self, listener: socket.socket) -> None:
+        def failing_worker(sock: socket.socket, heartbeat: Connection) -> None:
+            raise SystemExit(3)
+
+        master = PreforkMaster(failing_worker, [listener], workers=2, timeout=5, graceful_timeout=1)
+        assert _run_for(master, 10) == 1
+        assert master.stats["spawned"] == 2
@@ -0,0 +1,114 @@
+"""Tests for coalescing identical concurrent reads."""
+
+from __future__ import annotations
+
+import asyncio
+
+import pytest
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+
+from python_toy.server.infra.session_context import get_current_session, session_scope
+from python_toy.server.infra.single_flight import SingleFlight
+from python_toy.server.infra.versions import VersionRegistry
+
+
+@pytest.fixture
+def single_flight(test_engine: AsyncEngine) -> SingleFlight:
+    return SingleFlight(async_sessionmaker(test_engine, expire_on_commit=False))
+
+
+class TestSingleFlight:
+    async def test_concurrent_reads_share_one_execution(self, single_flight: SingleFlight) -> None:
+        sessions: list[AsyncSession] = []
+        release = asyncio.Event()
+
+        async def read() -> list[int]:
+            sessions.append(get_current_session())
+            await release.wait()
+            return [1, 2, 3]
+
+        callers = [asyncio.create_task(single_flight.run(("pets.list", 1), read)) for _ in range(5)]
+        other = asyncio.create_task(single_flight.run(("pets.list", 2), read))
+        await asyncio.sleep(0)
+        release.set()
+
+        results = await asyncio.gather(*callers)
+        assert all(result is results[0] for result in results)
+        assert await other == [1, 2, 3]
+        assert len(sessions) == 2  # one per key, each in its own session
+        assert single_flight.stats["executions"] == 2
+        assert single_flight.stats["coalesced"] == 4
+
+    async def test_errors_are_shared(self, single_flight: SingleFlight) -> None:
+        async def read() -> None:
+            await asyncio.sleep(0.01)
+            raise LookupError
+
+        results = await asyncio.gather(*(single_flight.run("key", read) for _ in range(3)), return_exceptions=True)
+        assert [type(result) for result in results] == [LookupError] * 3
+        assert single_flight.stats["executions"] == 1
+
+    async def test_cancelled_callers(self, single_flight: SingleFlight) -> None:
+        started = asyncio.Event()
+        cancelled = asyncio.Event()
+
+        async def read() -> str:
+            started.set()
+            try:
+                await asyncio.sleep(0.05)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+            return "done"
+
+        # One caller giving up does not affect the others
+        first = asyncio.create_task(single_flight.run("key", read))
+        second = asyncio.create_task(single_flight.run("key", read))
+        await started.wait()
+        first.cancel()
+        assert await second == "done"
+        assert first.cancelled()
+
+        # The read is cancelled once nobody waits for it, and the next caller starts afresh
+        started.clear()
+        only = asyncio.create_task(single_flight.run("key", read))
+        await started.wait()
+        only.cancel()
+        await asyncio.wait_for(cancelled.wait(), 1)
+        assert await single_flight.run("key", read) == "done"
+        assert single_flight.stats["cancelled"] == 1
+
+    async def test_callers_in_a_transaction_bypass(self, single_flight: SingleFlight, test_engine: AsyncEngine) -> None:
+        async def read() -> AsyncSession:
+            return get_current_session()
+
+        async with session_scope(async_sessionmaker(test_engine)) as session:
+            await session.begin()
+            assert await single_flight.run("key", read) is session
+        assert single_flight.stats["bypassed"] == 1
+
+    async def test_reads_started_before_a_commit_are_not_joined(self, test_engine: AsyncEngine) -> None:
+        versions = VersionRegistry()
+        single_flight = SingleFlight(async_sessionmaker(test_engine, expire_on_commit=False), versions)
+        release = asyncio.Event()
+        reads: list[str] = []
+
+        async def read(name: str) -> str:
+            reads.append(name)
+            await release.wait()
+            return name
+
+        before = asyncio.create_task(single_flight.run(("pets.get", "p1"), lambda: read("before")))
+        await asyncio.sleep(0)
+        # A PATCH commits; its client then reads the pet
+        versions.bump("pets", "p1")
+        after = asyncio.create_task(single_flight.run(("pets.get", "p1"), lambda: read("after")))
+        joined = asyncio.create_task(single_flight.run(("pets.get", "p1"), lambda: read("joined")))
+        await asyncio.sleep(0)
+        release.set()
+
+        assert await before == "before"
+        assert await after == "after"
+        assert await joined == "after"
+        assert reads == ["before", "after"]
+        assert single_flight.stats["coalesced"] == 1
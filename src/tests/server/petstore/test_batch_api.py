@@ -0,0 +1,57 @@
+"""Tests for POST /v1/batch."""
+
+from __future__ import annotations
+
+from typing import Any
+
+from fastapi.testclient import TestClient
+
+
+def _category_names(client: TestClient) -> set[str]:
+    return {category["name"] for category in client.get("/v1/categories", params={"size": 100}).json()["items"]}
+
+
+class TestBatch:
+    def test_operations_share_one_transaction_and_reference_earlier_results(self, client: TestClient) -> None:
+        operations: list[dict[str, Any]] = [
+            {"method": "POST", "path": "/v1/categories", "body": {"name": "Dogs"}},
+            {"method": "POST", "path": "/v1/pets", "body": {"name": "Rex", "category_id": "$0.id", "tags": ["good"]}},
+            {"method": "PATCH", "path": "/v1/pets/$1.id", "headers": {"If-Match": '"1"'}, "body": {"status": "sold"}},
+            {"method": "GET", "path": "/v1/pets?category_id=$0.id&fields=id,status"},
+        ]
+        response = client.post("/v1/batch", json={"operations": operations})
+        assert response.status_code == 200
+        body = response.json()
+        assert body["committed"] is True
+        assert [result["status"] for result in body["results"]] == [201, 201, 200, 200]
+        pet = body["results"][1]["body"]
+        assert pet["category"]["name"] == "Dogs"
+        # Later operations read the batch's own uncommitted writes
+        assert body["results"][3]["body"]["items"] == [{"id": pet["id"], "status": "sold"}]
+        assert client.get(f"/v1/pets/{pet['id']}").json()["status"] == "sold"
+
+    def test_atomic_batch_rolls_back_on_first_failure(self, client: TestClient) -> None:
+        operations: list[dict[str, Any]] = [
+            {"method": "POST", "path": "/v1/categories", "body": {"name": "Cats"}},
+            {"method": "POST", "path": "/v1/pets", "body": {"name": "Tom", "category_id": "missing"}},
+            {"method": "POST", "path": "/v1/categories", "body": {"name": "Birds"}},
+        ]
+        body = client.post("/v1/batch", json={"operations": operations}).json()
+        assert body["committed"] is False
+        assert [result["status"] for result in body["results"]] == [201, 400, 424]
+        assert body["results"][1]["body"]["status"] == 400
+        assert _category_names(client) == set()
+
+    def test_best_effort_batch_keeps_successful_operations(self, client: TestClient) -> None:
+        operations: list[dict[str, Any]] = [
+            {"method": "POST", "path": "/v1/categories", "body": {"name": "Cats"}},
+            {"method": "POST", "path": "/v1/categories", "body": {"name": "Cats"}},  # duplicate name
+            {"method": "DELETE", "path": "/v1/categories/$1.id"},  # refers to the failed operation
+            {"method": "GET", "path": "/v1/changes"},  # cannot join the batch transaction
+            {"method": "POST", "path": "/v1/categories", "body": {"name": "Birds"}},
+        ]
+        body = client.post("/v1/batch", json={"operations": operations, "atomic": False}).json()
+        assert body["committed"] is True
+        assert [result["status"] for result in body["results"]] == [201, 409, 400, 400, 201]
+        assert "$1.id refers to operation 1" in body["results"][2]["body"]["detail"]
+        assert _category_names(client) == {"Cats", "Birds"}
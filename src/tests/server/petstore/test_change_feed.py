@@ -0,0 +1,97 @@
+"""Tests for the change log and the /v1/changes feed."""
+
+from __future__ import annotations
+
+import asyncio
+import contextlib
+from pathlib import Path
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from python_toy.server.infra.change_feed import ChangeFeed
+from python_toy.server.infra.config import ChangeFeedConfig
+from python_toy.server.infra.error import GoneException
+from python_toy.server.infra.session_context import get_current_session, session_scope
+from python_toy.server.petstore.category_repository import CategoryRepository
+from python_toy.server.petstore.change_log import ChangeLog
+from python_toy.server.petstore.change_service import ChangeService
+from python_toy.server.petstore.db_models import Base
+from python_toy.server.petstore.mappers import CategoryMapper
+from python_toy.server.petstore.models import CategoryCreate
+
+
+class TestChangeService:
+    async def test_waiters_share_one_refresh_and_wake_on_commit(self, tmp_path: Path) -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'changes.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        change_log = ChangeLog(get_current_session)
+        feed = ChangeFeed(change_log, factory, buffer_size=100, poll_interval=60)
+        service = ChangeService(change_log, feed, factory, ChangeFeedConfig(retention_seconds=0))
+        repo = CategoryRepository(get_current_session)
+
+        async with session_scope(factory):
+            first = await repo.create(CategoryMapper.to_entity(CategoryCreate(name="Dogs")))
+        # A rolled back write leaves no entry
+        with contextlib.suppress(RuntimeError):
+            async with session_scope(factory):
+                await repo.create(CategoryMapper.to_entity(CategoryCreate(name="Cats")))
+                raise RuntimeError
+
+        batch = await service.read(None, limit=10)
+        assert [(e.table, e.entity_id, e.op) for e in batch.entries] == [("categories", first.id, "create")]
+
+        waiters = [asyncio.create_task(service.read(batch.cursor, limit=10, wait=5)) for _ in range(50)]
+        await asyncio.sleep(0.05)
+        refreshes = feed.stats["refreshes"]
+        async with session_scope(factory):
+            await repo.delete(first.id)
+        results = await asyncio.wait_for(asyncio.gather(*waiters), 2)
+        assert {(r.entries[0].op, r.cursor) for r in results} == {("delete", batch.cursor + 1)}
+        # The commit woke all 50 long-polls through a single change log query
+        assert feed.stats["refreshes"] == refreshes + 1
+
+        stream = await service.stream(0, tables=["categories"])
+        streamed = [await anext(stream), await anext(stream)]
+        assert [entry.op for entry in streamed if entry is not None] == ["create", "delete"]
+        await stream.aclose()
+
+        # Compaction keeps the newest entry; cursors before it are gone unless still buffered
+        assert await service.compact() == 1
+        feed.close()
+        restarted_feed = ChangeFeed(change_log, factory, buffer_size=100, poll_interval=60)
+        restarted = ChangeService(change_log, restarted_feed, factory, ChangeFeedConfig())
+        with pytest.raises(GoneException):
+            await restarted.read(0, limit=10)
+        assert [e.op for e in (await restarted.read(None, limit=10)).entries] == ["delete"]
+        restarted_feed.close()
+        await engine.dispose()
+
+
+class TestChangesApi:
+    def test_changes_follow_writes(self, client: TestClient) -> None:
+        category = client.post("/v1/categories", json={"name": "Dogs"}).json()
+        pet = client.post("/v1/pets", json={"name": "Rex", "category_id": category["id"]}).json()
+        client.patch(f"/v1/pets/{pet['id']}", json={"status": "sold"})
+        client.delete(f"/v1/pets/{pet['id']}")
+
+        page = client.get("/v1/changes").json()
+        assert [(c["table"], c["op"]) for c in page["items"]] == [
+            ("categories", "create"),
+            ("pets", "create"),
+            ("pets", "update"),
+            ("pets", "delete"),
+        ]
+        assert page["next_since"] == page["items"][-1]["seq"]
+
+        pets_only = client.get("/v1/changes", params={"since": page["items"][0]["seq"], "tables": "pets"}).json()
+        assert [c["op"] for c in pets_only["items"]] == ["create", "update", "delete"]
+        limited = client.get("/v1/changes", params={"limit": 1, "tables": "pets"}).json()
+        assert [c["op"] for c in limited["items"]] == ["create"]
+
+        polled = client.get("/v1/changes", params={"since": page["next_since"], "wait": 0.1}).json()
+        assert polled == {"items": [], "next_since": page["next_since"]}
+        assert client.get("/v1/changes", params={"tables": "pets,nope"}).status_code == 400
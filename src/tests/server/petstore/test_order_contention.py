@@ -0,0 +1,46 @@
+"""Test that concurrent orders on one pet have exactly one winner."""
+
+from __future__ import annotations
+
+import asyncio
+from collections import Counter
+from pathlib import Path
+from typing import AsyncIterator
+
+import httpx
+import pytest
+
+from python_toy.server.app import create_app
+from python_toy.server.infra import config as config_module
+
+_BUYERS = 50
+
+
+@pytest.fixture
+async def async_client(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> AsyncIterator[httpx.AsyncClient]:
+    monkeypatch.setenv("APP_DATABASE_URL", f"sqlite+aiosqlite:///{tmp_path / 'test.db'}")
+    config_module.get_settings.cache_clear()
+    app = create_app()
+    try:
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+                yield client
+    finally:
+        config_module.get_settings.cache_clear()
+
+
+async def test_concurrent_buyers_have_one_winner(async_client: httpx.AsyncClient) -> None:
+    pet_id = (await async_client.post("/v1/pets", json={"name": "Contested"})).json()["id"]
+    user = {"first_name": "Buy", "last_name": "Er", "password": "password123"}
+    user_id = (
+        await async_client.post("/v1/users", json={**user, "username": "buyer", "email": "buyer@example.com"})
+    ).json()["id"]
+
+    responses = await asyncio.gather(
+        *(async_client.post("/v1/orders", json={"pet_id": pet_id, "user_id": user_id}) for _ in range(_BUYERS))
+    )
+
+    assert Counter(response.status_code for response in responses) == {201: 1, 409: _BUYERS - 1}
+    orders = (await async_client.get("/v1/orders", params={"user_id": user_id})).json()
+    assert orders["total"] == 1
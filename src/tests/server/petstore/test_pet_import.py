@@ -0,0 +1,93 @@
+"""Tests for streaming NDJSON pet imports."""
+
+from __future__ import annotations
+
+import json
+from collections.abc import AsyncIterator
+from pathlib import Path
+from typing import Any
+
+from fastapi.testclient import TestClient
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from python_toy.server.infra.config import PetImportConfig
+from python_toy.server.infra.session_context import get_current_session, session_scope
+from python_toy.server.petstore.category_repository import CategoryRepository
+from python_toy.server.petstore.db_models import Base
+from python_toy.server.petstore.mappers import CategoryMapper
+from python_toy.server.petstore.models import CategoryCreate
+from python_toy.server.petstore.pet_import_service import PetImportService
+from python_toy.server.petstore.pet_repository import PetRepository
+from python_toy.server.petstore.tag_repository import TagRepository
+from python_toy.server.petstore.user_repository import UserRepository
+
+
+async def _body(text: str, chunk_size: int = 7) -> AsyncIterator[bytes]:
+    data = text.encode()
+    for start in range(0, len(data), chunk_size):
+        yield data[start : start + chunk_size]
+
+
+class TestPetImportService:
+    async def test_chunked_import_reports_errors_and_resumes(self, tmp_path: Path) -> None:
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pets.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+        category_repo = CategoryRepository(get_current_session)
+        tag_repo = TagRepository(get_current_session)
+        repo = PetRepository(get_current_session, category_repo, tag_repo=tag_repo)
+        importer = PetImportService(
+            repo,
+            tag_repo,
+            category_repo,
+            UserRepository(get_current_session),
+            factory,
+            PetImportConfig(chunk_lines=2, max_line_bytes=200),
+        )
+        async with session_scope(factory):
+            category = await category_repo.create(CategoryMapper.to_entity(CategoryCreate(name="Dogs")))
+
+        lines = [
+            {"name": "Rex", "category_id": category.id, "tags": ["dog", "dog"]},
+            {"name": ""},  # fails validation
+            {"name": "Fido", "tags": ["dog", "small"]},
+            {"name": "Ghost", "category_id": "missing"},
+            {"name": "x" * 300},  # longer than max_line_bytes
+            {"name": "Tom", "status": "sold", "tags": ["cat"]},
+        ]
+        body = "\n".join(json.dumps(line) for line in lines) + "\n\nnot json\n"
+
+        records = [record async for record in importer.run(_body(body))]
+        errors = {record["line"]: record["error"] for record in records if "line" in record}
+        assert sorted(errors) == [2, 4, 5, 8]
+        assert errors[4] == "Unknown category_id 'missing'"
+        assert errors[2][0]["loc"] == ["name"]
+        # Chunks commit every two accepted lines; rejected lines do not count towards a chunk
+        assert [r["committed_through"] for r in records if "committed_through" in r] == [3, 6, 8]
+        assert records[-1] == {"done": True, "committed_through": 8, "imported": 3, "failed": 4}
+
+        async with session_scope(factory):
+            inventory = await repo.inventory()
+        assert inventory["status"] == {"available": 2, "sold": 1}
+        assert inventory["category"] == {category.id: 1}
+        assert inventory["tag"] == {"cat": 1, "dog": 2, "small": 1}
+
+        resumed = [record async for record in importer.run(_body(body), offset=5)]
+        assert resumed[-1] == {"done": True, "committed_through": 8, "imported": 1, "failed": 1}
+        await engine.dispose()
+
+
+class TestPetImportAPI:
+    def test_import_streams_results(self, client: TestClient) -> None:
+        body = "\n".join(json.dumps({"name": name, "tags": ["imported"]}) for name in ("Rex", "Tom")) + "\n{}\n"
+        response = client.post("/v1/pets:import", content=body, headers={"Content-Type": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/x-ndjson"
+        records: list[dict[str, Any]] = [json.loads(line) for line in response.text.splitlines()]
+        assert records[0]["line"] == 3
+        assert records[-1] == {"done": True, "committed_through": 3, "imported": 2, "failed": 1}
+
+        page = client.get("/v1/pets", params={"tag": "imported"}).json()
+        assert sorted(item["name"] for item in page["items"]) == ["Rex", "Tom"]
+        assert client.get("/v1/pets/search", params={"q": "rex"}).json()["total"] == 1
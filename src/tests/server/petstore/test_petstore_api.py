@@ -2,7 +2,9 @@
 
 from __future__ import annotations
 
+import json
 import re
+import time
 import uuid
 from typing import Any
 
@@ -139,10 +141,222 @@ def test_pet_with_relationships(self, client: TestClient) -> None:
             client.delete(f"/v1/users/{user_id}")
             client.delete(f"/v1/categories/{category_id}")
 
+    def test_pet_field_selection_and_includes(self, client: TestClient) -> None:
+        """Test ?fields= and ?include= on pet reads omit unrequested fields."""
+        response = client.post("/v1/categories", json={"name": f"sparse_{uuid.uuid4().hex[:8]}"})
+        category_id = response.json()["id"]
+        response = client.post("/v1/pets", json={"name": "sparse", "category_id": category_id, "tags": ["t1"]})
+        assert response.status_code == 201
+        pet_id = response.json()["id"]
+
+        try:
+            response = client.get(f"/v1/pets/{pet_id}", params={"fields": "name,status"})
+            assert response.status_code == 200
+            assert response.json() == {"id": pet_id, "name": "sparse", "status": "available"}
+
+            response = client.get(f"/v1/pets/{pet_id}", params={"include": "category"})
+            assert response.status_code == 200
+            pet = response.json()
+            assert pet["category"]["id"] == category_id
+            assert "owner" not in pet
+            assert "tags" not in pet
+            assert pet["name"] == "sparse"
+
+            # Relations in `fields` are loaded along with the included ones
+            response = client.get(f"/v1/pets/{pet_id}", params={"fields": "tags", "include": "category"})
+            assert response.status_code == 200
+            pet = response.json()
+            assert pet["tags"] == ["t1"]
+            assert pet["category"]["id"] == category_id
+            assert set(pet) == {"id", "tags", "category"}
+
+            response = client.get("/v1/pets", params={"fields": "id,tags"})
+            assert response.status_code == 200
+            page_data = response.json()
+            assert page_data["total"] == 1
+            assert page_data["items"] == [{"id": pet_id, "tags": ["t1"]}]
+
+            # Without selection the full representation is returned
+            response = client.get(f"/v1/pets/{pet_id}")
+            assert set(response.json()) == {"id", "name", "category", "status", "photo_urls", "tags", "owner"}
+
+            response = client.get(f"/v1/pets/{pet_id}", params={"include": "category,unknown"})
+            assert response.status_code == 400
+            assert "unknown" in response.json()["detail"]
+        finally:
+            client.delete(f"/v1/pets/{pet_id}")
+            client.delete(f"/v1/categories/{category_id}")
+
+    def test_pet_list_filters(self, client: TestClient) -> None:
+        """Test filtering pets by status, category, owner and tag, alone and combined."""
+        category_id = client.post("/v1/categories", json={"name": f"filter_{uuid.uuid4().hex[:8]}"}).json()["id"]
+        pets = [
+            {"name": "a", "status": "available", "category_id": category_id, "tags": ["red"]},
+            {"name": "b", "status": "sold", "category_id": category_id, "tags": ["red", "blue"]},
+            {"name": "c", "status": "sold", "tags": ["blue"]},
+        ]
+        pet_ids = [client.post("/v1/pets", json=pet).json()["id"] for pet in pets]
+
+        def names(**params: str) -> list[str]:
+            response = client.get("/v1/pets", params={"fields": "name", **params})
+            assert response.status_code == 200
+            page_data = response.json()
+            assert page_data["total"] == len(page_data["items"])
+            return sorted(item["name"] for item in page_data["items"])
+
+        try:
+            assert names(status="sold") == ["b", "c"]
+            assert names(category_id=category_id) == ["a", "b"]
+            assert names(tag="blue") == ["b", "c"]
+            assert names(status="sold", tag="red") == ["b"]
+            assert names(status="sold", category_id=category_id, tag="blue") == ["b"]
+            assert names(tag="missing") == []
+            assert names(owner_id="nobody") == []
+
+            response = client.get("/v1/pets", params={"status": "lost"})
+            assert response.status_code == 400
+        finally:
+            for pet_id in pet_ids:
+                client.delete(f"/v1/pets/{pet_id}")
+            client.delete(f"/v1/categories/{category_id}")
+
+    def test_pet_search(self, client: TestClient) -> None:
+        """Test full-text search ranking, pagination and index sync on patch/delete."""
+        word = f"srch{uuid.uuid4().hex[:8]}"
+        category_id = client.post("/v1/categories", json={"name": f"{word} shelter"}).json()["id"]
+        pets = [
+            {"name": f"{word} Rex", "category_id": category_id},
+            {"name": "Fido", "tags": [f"{word}-tag"]},
+            {"name": "Tom", "category_id": category_id},
+        ]
+        pet_ids = [client.post("/v1/pets", json=pet).json()["id"] for pet in pets]
+
+        def search(q: str, **params: str) -> dict[str, Any]:
+            response = client.get("/v1/pets/search", params={"q": q, **params})
+            assert response.status_code == 200
+            return response.json()
+
+        try:
+            # Name matches rank above tag matches, which rank above category matches
+            assert [item["name"] for item in search(word)["items"]] == [f"{word} Rex", "Fido", "Tom"]
+            assert [item["name"] for item in search(f"{word} rex")["items"]] == [f"{word} Rex"]
+            assert search(word[:-2])["total"] == 3  # the last word is a prefix
+
+            page = search(word, size="2", page="2", fields="name")
+            assert page["total"] == 3
+            assert page["items"] == [{"id": pet_ids[2], "name": "Tom"}]
+
+            client.patch(f"/v1/pets/{pet_ids[2]}", json={"name": "Felix"})
+            assert search("felix")["items"][0]["id"] == pet_ids[2]
+
+            client.delete(f"/v1/pets/{pet_ids[0]}")
+            assert search(f"{word} rex")["total"] == 0
+            assert search('"AND (')["total"] == 0  # operators in input are plain text
+
+            assert client.get("/v1/pets/search", params={"q": ""}).status_code == 400
+        finally:
+            for pet_id in pet_ids:
+                client.delete(f"/v1/pets/{pet_id}")
+            client.delete(f"/v1/categories/{category_id}")
+
+    def test_pet_patch_if_match(self, client: TestClient) -> None:
+        """Test row-version ETags and compare-and-set patches with If-Match."""
+        pet_id = client.post("/v1/pets", json={"name": "Versioned"}).json()["id"]
+        try:
+            response = client.get(f"/v1/pets/{pet_id}")
+            assert response.headers["etag"] == '"1"'
+            assert "version" not in response.json()
+
+            response = client.patch(f"/v1/pets/{pet_id}", json={"name": "First"}, headers={"If-Match": '"1"'})
+            assert response.status_code == 200
+            assert response.headers["etag"] == '"2"'
+
+            # A second writer holding the old ETag loses
+            response = client.patch(f"/v1/pets/{pet_id}", json={"name": "Second"}, headers={"If-Match": '"1"'})
+            assert response.status_code == 409
+            assert response.json()["type"] == "//localhost/error/concurrent-modification"
+            assert client.get(f"/v1/pets/{pet_id}").json()["name"] == "First"
+
+            assert (
+                client.patch(f"/v1/pets/{pet_id}", json={"tags": ["t"]}, headers={"If-Match": "*"}).status_code == 200
+            )
+            assert (
+                client.patch(f"/v1/pets/{pet_id}", json={"name": "x"}, headers={"If-Match": 'W/"3"'}).status_code == 400
+            )
+
+            # The row-version ETag also validates cached GETs
+            response = client.get(f"/v1/pets/{pet_id}", headers={"If-None-Match": '"3"'})
+            assert response.status_code == 304
+            assert response.headers["etag"] == '"3"'
+
+            missing = client.patch(f"/v1/pets/{uuid.uuid4()}", json={"name": "x"}, headers={"If-Match": '"1"'})
+            assert missing.status_code == 404
+        finally:
+            client.delete(f"/v1/pets/{pet_id}")
+
+    def test_pet_export(self, client: TestClient) -> None:
+        """Test NDJSON export with filters, sparse fields and a `since` watermark."""
+        pet_ids = [
+            client.post("/v1/pets", json={"name": name, "tags": tags}).json()["id"]
+            for name, tags in (("Rex", ["dog"]), ("Tom", []), ("Fido", ["dog"]))
+        ]
+
+        def export(**params: str) -> list[dict[str, Any]]:
+            response = client.get("/v1/pets:export", params=params)
+            assert response.status_code == 200
+            assert response.headers["content-type"] == "application/x-ndjson"
+            return [json.loads(line) for line in response.text.splitlines()]
+
+        pets = export()
+        assert [pet["id"] for pet in pets] == sorted(pet_ids)
+        assert {pet["name"]: pet["tags"] for pet in pets} == {"Rex": ["dog"], "Tom": [], "Fido": ["dog"]}
+        assert sorted(pet["name"] for pet in export(tag="dog", fields="name")) == ["Fido", "Rex"]
+        assert export(tag="dog", fields="name")[0].keys() == {"id", "name"}
+
+        watermark = client.get("/v1/pets:export").headers["x-export-watermark"]
+        assert len(export(since=watermark)) == 3
+        since = str(time.time())
+        client.patch(f"/v1/pets/{pet_ids[1]}", json={"status": "sold"})
+        assert [pet["name"] for pet in export(since=since)] == ["Tom"]
+        assert export(since=since, status="available") == []
+
 
 class TestCategoryAPI:
     """Test Category API endpoints."""
 
+    def test_category_suggest(self, client: TestClient) -> None:
+        """Test prefix suggestions follow category creates and deletes."""
+        prefix = f"Sug{uuid.uuid4().hex[:6]}"
+        created = [client.post("/v1/categories", json={"name": f"{prefix}-{n}"}).json() for n in ("b", "a")]
+
+        response = client.get("/v1/categories:suggest", params={"prefix": prefix.lower()})
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()["items"]] == [f"{prefix}-a", f"{prefix}-b"]
+
+        client.delete(f"/v1/categories/{created[0]['id']}")
+        response = client.get("/v1/categories:suggest", params={"prefix": prefix, "limit": 5})
+        assert response.json()["items"] == [created[1]]
+
+        client.delete(f"/v1/categories/{created[1]['id']}")
+        assert client.get("/v1/categories:suggest", params={"prefix": ""}).status_code == 400
+
+    def test_category_cache_metrics(self, client: TestClient) -> None:
+        """Test repeated reads hit the category cache and the counters are published."""
+        category = client.post("/v1/categories", json={"name": f"cached_{uuid.uuid4().hex[:8]}"}).json()
+
+        def hits() -> int:
+            return client.get("/.internal/metrics").json()["cache.categories"]["hits"]
+
+        before = hits()
+        for _ in range(3):
+            # no-cache skips the HTTP body cache, so the request reaches the service
+            response = client.get(f"/v1/categories/{category['id']}", headers={"Cache-Control": "no-cache"})
+            assert response.json() == category
+        assert hits() == before + 2
+
+        client.delete(f"/v1/categories/{category['id']}")
+        assert client.get(f"/v1/categories/{category['id']}").status_code == 404
+
     def test_category_crud_lifecycle(self, client: TestClient) -> None:
         """Test complete Category CRUD lifecycle."""
         category_name = f"test_category_{uuid.uuid4().hex[:8]}"
@@ -182,6 +396,22 @@ def test_category_crud_lifecycle(self, client: TestClient) -> None:
 class TestTagAPI:
     """Test Tag API endpoints."""
 
+    def test_tag_suggest(self, client: TestClient) -> None:
+        """Test prefix suggestions include tags created implicitly by pet writes."""
+        prefix = f"sug{uuid.uuid4().hex[:6]}"
+        tag = client.post("/v1/tags", json={"name": f"{prefix}-explicit"}).json()
+        pet_id = client.post("/v1/pets", json={"name": "Rex", "tags": [f"{prefix}-implicit"]}).json()["id"]
+
+        response = client.get("/v1/tags:suggest", params={"prefix": prefix})
+        assert response.status_code == 200
+        assert [item["name"] for item in response.json()["items"]] == [f"{prefix}-explicit", f"{prefix}-implicit"]
+
+        client.delete(f"/v1/tags/{tag['id']}")
+        response = client.get("/v1/tags:suggest", params={"prefix": f"{prefix}-e"})
+        assert response.json()["items"] == []
+
+        client.delete(f"/v1/pets/{pet_id}")
+
     def test_tag_crud_lifecycle(self, client: TestClient) -> None:
         """Test complete Tag CRUD lifecycle."""
         tag_name = f"test_tag_{uuid.uuid4().hex[:8]}"
@@ -290,3 +520,61 @@ def test_nonexistent_resource_404(self, client: TestClient) -> None:
         ]:
             response = client.get(endpoint)
             assert response.status_code == 404
+
+
+class TestOrderAPI:
+    """Test Order API endpoints."""
+
+    def test_order_lifecycle(self, client: TestClient) -> None:
+        """Test placing, listing and transitioning orders, and losing a pet to another order."""
+        pet_id = client.post("/v1/pets", json={"name": "Buddy"}).json()["id"]
+        users = [
+            client.post(
+                "/v1/users",
+                json={
+                    "username": f"buyer{n}",
+                    "first_name": "Buy",
+                    "last_name": "Er",
+                    "email": f"buyer{n}@example.com",
+                    "password": "password123",
+                },
+            ).json()["id"]
+            for n in range(2)
+        ]
+
+        response = client.post("/v1/orders", json={"pet_id": pet_id, "user_id": users[0], "ship_date": "2026-01-02"})
+        assert response.status_code == 201
+        order = response.json()
+        assert order["status"] == "placed"
+        assert order["ship_date"] == "2026-01-02T00:00:00"
+        assert client.get(f"/v1/pets/{pet_id}").json()["status"] == "pending"
+
+        lost = client.post("/v1/orders", json={"pet_id": pet_id, "user_id": users[1]})
+        assert lost.status_code == 409
+        assert lost.json()["type"] == "//localhost/error/concurrent-modification"
+
+        assert client.post("/v1/orders", json={"pet_id": "missing", "user_id": users[1]}).status_code == 400
+        other_pet = client.post("/v1/pets", json={"name": "Spot"}).json()["id"]
+        assert client.post("/v1/orders", json={"pet_id": other_pet, "user_id": "missing"}).status_code == 400
+        # The failed order did not keep the pet reserved
+        assert client.get(f"/v1/pets/{other_pet}").json()["status"] == "available"
+
+        page = client.get("/v1/orders", params={"user_id": users[0]}).json()
+        assert [item["id"] for item in page["items"]] == [order["id"]]
+        assert client.get("/v1/orders", params={"user_id": users[1]}).json()["total"] == 0
+
+        etag = client.get(f"/v1/orders/{order['id']}").headers["etag"]
+        # Delivery must follow approval
+        assert client.patch(f"/v1/orders/{order['id']}", json={"status": "delivered"}).status_code == 409
+        approved = client.patch(f"/v1/orders/{order['id']}", json={"status": "approved"}, headers={"If-Match": etag})
+        assert approved.status_code == 200
+        stale = client.patch(f"/v1/orders/{order['id']}", json={"status": "delivered"}, headers={"If-Match": etag})
+        assert stale.status_code == 409
+
+        delivered = client.patch(f"/v1/orders/{order['id']}", json={"status": "delivered"})
+        assert delivered.json()["complete"] is True
+        assert client.get(f"/v1/pets/{pet_id}").json()["status"] == "sold"
+        assert client.get("/v1/orders/missing").status_code == 404
+
+        inventory = client.get("/v1/store/inventory").json()
+        assert inventory == {"status": {"available": 1, "sold": 1}, "categories": {}, "tags": {}}
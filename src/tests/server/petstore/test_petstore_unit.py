@@ -1,16 +1,24 @@
 """Unit tests for Petstore repositories and services."""
 
+import asyncio
+
 import pytest
+from sqlalchemy import update
 
-from python_toy.server.infra.error import EntityNotFoundException
+from python_toy.server.infra.entity_cache import EntityCache
+from python_toy.server.infra.error import ConcurrentModificationException, EntityNotFoundException
 from python_toy.server.infra.error.exceptions import DuplicateEntityException, ForeignKeyViolationException
+from python_toy.server.petstore.db_models import PetCounterEntity, StatusEnum
 from python_toy.server.petstore.models import (
     PetCreate,
+    PetUpdate,
     CategoryCreate,
     TagCreate,
     UserCreate,
 )
+from python_toy.server.petstore.pet_counters import CounterDrift
 from python_toy.server.petstore.pet_repository import PetRepository
+from python_toy.server.petstore.query_options import PetFilter, PetQueryOptions
 from python_toy.server.petstore.pet_service import PetService
 from python_toy.server.petstore.category_repository import CategoryRepository
 from python_toy.server.petstore.tag_repository import TagRepository
@@ -208,6 +216,70 @@ async def test_pet_crud_operations(self, session_supplier) -> None:
         with pytest.raises(EntityNotFoundException):
             await repo.get_db_entity(pet_id)
 
+    async def test_inventory_counters_follow_writes(self, session_supplier) -> None:
+        """Test counters are maintained by pet writes, and that reconciliation reports and corrects drift."""
+        category = await CategoryRepository(session_supplier).create(
+            CategoryMapper.to_entity(CategoryCreate(name="Dogs"))
+        )
+        tag_repo = TagRepository(session_supplier)
+        cute = await tag_repo.create(TagMapper.to_entity(TagCreate(name="cute")))
+        small = await tag_repo.create(TagMapper.to_entity(TagCreate(name="small")))
+        repo = PetRepository(session_supplier)
+
+        first = await repo.create(
+            PetMapper.to_entity(PetCreate(name="Rex", category_id=category.id)), tag_ids=[cute.id, small.id]
+        )
+        second = await repo.create(PetMapper.to_entity(PetCreate(name="Tom")), tag_ids=[cute.id])
+        assert await repo.inventory() == {
+            "status": {"available": 2},
+            "category": {category.id: 1},
+            "tag": {"cute": 2, "small": 1},
+        }
+
+        await repo.patch(
+            second.id, PetUpdate(status="sold", category_id=category.id, tags=["small"]), tag_ids=[small.id]
+        )
+        # A stale version changes neither the pet nor the counters
+        with pytest.raises(ConcurrentModificationException):
+            await repo.patch(first.id, PetUpdate(status="sold"), expected_version=99)
+        assert await repo.update_status(first.id, StatusEnum.pending, expected=StatusEnum.sold) is False
+        assert await repo.update_status(first.id, StatusEnum.pending) is True
+        assert await repo.inventory() == {
+            "status": {"pending": 1, "sold": 1},
+            "category": {category.id: 2},
+            "tag": {"cute": 1, "small": 2},
+        }
+
+        await repo.delete(first.id)
+        assert await repo.inventory() == {"status": {"sold": 1}, "category": {category.id: 1}, "tag": {"small": 1}}
+        assert await repo.reconcile_counters() == []
+
+        await session_supplier().execute(update(PetCounterEntity).where(PetCounterEntity.key == "sold").values(count=5))
+        drift = [CounterDrift(dimension="status", key="sold", stored=5, actual=1)]
+        assert await repo.reconcile_counters(fix=False) == drift
+        assert await repo.reconcile_counters() == drift
+        assert (await repo.inventory())["status"] == {"sold": 1}
+
+    async def test_list_rows_after_walks_keyset_batches(self, session_supplier) -> None:
+        """Test keyset batches cover every matching pet once, in ID order."""
+        repo = PetRepository(session_supplier)
+        for n in range(5):
+            await repo.create(PetMapper.to_entity(PetCreate(name=f"Pet {n}", status="sold" if n % 2 else "available")))
+
+        seen: list[str] = []
+        after = None
+        while batch := (await repo.list_rows_after(after, limit=2, options=PetQueryOptions.minimal())).rows:
+            assert len(batch) <= 2
+            seen.extend(row.id for row in batch)
+            after = batch[-1].id
+        assert len(seen) == 5
+        assert seen == sorted(seen)
+
+        sold = await repo.list_rows_after(
+            None, limit=10, options=PetQueryOptions.minimal(), pet_filter=PetFilter(status="sold")
+        )
+        assert [row.status for row in sold.rows] == [StatusEnum.sold, StatusEnum.sold]
+
 
 class TestPetService:
     """Test PetService business logic."""
@@ -271,3 +343,85 @@ async def test_foreign_key_violation_in_repository(self, session_supplier) -> No
         assert exception.field == "category_id"
         assert exception.value == "non-existent-category-id"
         assert exception.referenced_entity == "CategoryEntity"
+
+
+class TestEntityCaching:
+    """Test repository reads through the entity cache and invalidation on writes."""
+
+    async def test_get_rows_cached_and_invalidated_after_commit(self, db_session) -> None:
+        from python_toy.server.petstore.category_service import CategoryService
+
+        cache = EntityCache(max_size=100, ttl_seconds=60, negative_ttl_seconds=60)
+        service = CategoryService(CategoryRepository(lambda: db_session, cache=cache))
+        category = await service.create(CategoryCreate(name="Cached"))
+        await db_session.commit()
+        db_session.info.clear()  # as a new request's session would be
+
+        assert (await service.get(category.id)).name == "Cached"
+        assert (await service.get(category.id)).name == "Cached"
+        with pytest.raises(EntityNotFoundException):
+            await service.get("missing")
+        with pytest.raises(EntityNotFoundException):
+            await service.get("missing")
+        assert cache.stats.hits == 1
+        assert cache.stats.negative_hits == 1
+
+        await service.delete(category.id)
+        # The deleting session reads past the cache and does not fill it before commit
+        with pytest.raises(EntityNotFoundException):
+            await service.get(category.id)
+        assert cache.lookup(category.id) == (False, None)
+        await db_session.commit()
+        assert cache.stats.invalidations == 1
+
+
+class TestRelationLoaders:
+    """Test batching of pet relation lookups across concurrent reads."""
+
+    async def test_concurrent_reads_share_relation_queries(self, tmp_path) -> None:
+        from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+        from python_toy.server.infra.config import BatchLoaderConfig
+        from python_toy.server.infra.session_context import get_current_session, session_scope
+        from python_toy.server.petstore.db_models import Base
+        from python_toy.server.petstore.query_options import PetQueryOptions
+        from python_toy.server.petstore.relation_loaders import create_relation_loaders
+
+        # A file database: each batch reads in a connection of its own
+        engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'pets.db'}")
+        async with engine.begin() as conn:
+            await conn.run_sync(Base.metadata.create_all)
+        factory = async_sessionmaker(engine, expire_on_commit=False)
+
+        category_repo = CategoryRepository(get_current_session)
+        user_repo = UserRepository(get_current_session)
+        tag_repo = TagRepository(get_current_session)
+        loaders = create_relation_loaders(factory, category_repo, user_repo, tag_repo, BatchLoaderConfig(window_ms=50))
+        assert loaders is not None
+        repo = PetRepository(get_current_session, category_repo, user_repo, tag_repo, relation_loaders=loaders)
+        service = PetService(repo, tag_repo, category_repo, user_repo)
+
+        pet_ids = []
+        async with session_scope(factory):
+            for i in range(3):
+                category = await category_repo.create(CategoryMapper.to_entity(CategoryCreate(name=f"Category {i}")))
+                pet = await service.create(PetCreate(name=f"Pet {i}", category_id=category.id, tags=[f"tag-{i}"]))
+                pet_ids.append(pet.id)
+
+        async def read(pet_id: str):
+            async with session_scope(factory):
+                return (await repo.get_rows_with_options(pet_id, PetQueryOptions.all())).tags, pet_id
+
+        results = await asyncio.gather(*(read(pet_id) for pet_id in pet_ids))
+        assert [tags for tags, _ in results] == [{pet_id: [f"tag-{i}"]} for i, pet_id in enumerate(pet_ids)]
+        assert loaders.categories.stats["batches"] == 1
+        assert loaders.tags.stats["batches"] == 1
+
+        # A session with uncommitted writes reads its relations itself
+        async with session_scope(factory) as session, session.begin():
+            pet = await service.create(PetCreate(name="Fresh", tags=["fresh"]))
+            rows = await repo.get_rows_with_options(pet.id, PetQueryOptions.all())
+            assert rows.tags == {pet.id: ["fresh"]}
+        assert loaders.tags.stats["batches"] == 1
+
+        await engine.dispose()
@@ -1,5 +1,8 @@
 """Test query optimization patterns for repository and service layers."""
 
+import pytest
+
+from python_toy.server.infra.error import BadRequestException
 from python_toy.server.petstore.models import PetCreate
 from python_toy.server.petstore.pet_repository import PetRepository
 from python_toy.server.petstore.pet_service import PetService
@@ -42,6 +45,28 @@ async def test_query_options_factory_methods(self) -> None:
         assert tags_options.include_owner is False
         assert tags_options.include_tags is True
 
+    async def test_query_options_from_request(self) -> None:
+        """Test include/fields query parameters translate to relation loading and projection."""
+        options = PetQueryOptions.from_request()
+        assert options.include_category
+        assert options.include_owner
+        assert options.include_tags
+        assert options.fields is None
+
+        options = PetQueryOptions.from_request(fields="name,owner")
+        assert not options.include_category
+        assert options.include_owner
+        assert not options.include_tags
+        assert options.fields == {"id", "name", "owner"}
+
+        options = PetQueryOptions.from_request(include="tags")
+        assert options.include_tags
+        assert not options.include_owner
+        assert options.fields == {"id", "name", "status", "photo_urls", "tags"}
+
+        with pytest.raises(BadRequestException):
+            PetQueryOptions.from_request(fields="name,secret")
+
     async def test_pet_repository_query_options(self, session_supplier) -> None:
         """Test repository query options integration."""
         repo = PetRepository(session_supplier)
@@ -96,3 +121,71 @@ async def test_pet_service_optimized_operations(self, session_supplier) -> None:
 
         # Both should return same count, but different relation loading
         assert total_minimal == total_full
+
+
+class TestRowReadPath:
+    """Test the Core row-based list path against the ORM entity path."""
+
+    async def test_pet_rows_match_orm_mapping(self, session_supplier) -> None:
+        """Test that row-mapped pets equal ORM-mapped pets, relations included."""
+        from python_toy.server.petstore.mappers import CategoryMapper, PetMapper, UserMapper
+        from python_toy.server.petstore.models import CategoryCreate, UserCreate
+
+        pet_repo = PetRepository(session_supplier)
+        tag_repo = TagRepository(session_supplier)
+        category_repo = CategoryRepository(session_supplier)
+        user_repo = UserRepository(session_supplier)
+        service = PetService(pet_repo, tag_repo, category_repo, user_repo)
+
+        category = await category_repo.create(CategoryMapper.to_entity(CategoryCreate(name="Row Category")))
+        owner = await user_repo.create(
+            UserMapper.to_entity(
+                UserCreate(
+                    username="rowowner",
+                    first_name="Row",
+                    last_name="Owner",
+                    email="row@example.com",
+                    password="password123",
+                )
+            )
+        )
+        await service.create(
+            PetCreate(name="Row Pet", category_id=category.id, owner_id=owner.id, tags=["b", "a"], photo_urls=["x"])
+        )
+        await service.create(PetCreate(name="Bare Pet"))
+
+        row_pets, row_total = await service.list(page=1, size=10)
+        entities, orm_total = await pet_repo.list_with_relations(page=1, size=10)
+
+        assert row_total == orm_total == 2
+        assert row_pets == [PetMapper.to_domain(entity) for entity in entities]
+
+        with_tags = next(pet for pet in row_pets if pet.name == "Row Pet")
+        assert with_tags.tags == ["a", "b"]
+        assert with_tags.category is not None
+        assert with_tags.category.name == "Row Category"
+        assert with_tags.owner is not None
+        assert with_tags.owner.username == "rowowner"
+
+    async def test_list_returns_projected_rows(self, session_supplier) -> None:
+        """Test that repository list returns rows without sensitive or unrequested columns."""
+        from python_toy.server.petstore.mappers import UserMapper
+        from python_toy.server.petstore.models import UserCreate
+
+        user_repo = UserRepository(session_supplier)
+        await user_repo.create(
+            UserMapper.to_entity(
+                UserCreate(
+                    username="projected",
+                    first_name="P",
+                    last_name="R",
+                    email="projected@example.com",
+                    password="password123",
+                )
+            )
+        )
+
+        rows, total = await user_repo.list(page=1, size=10)
+        assert total == 1
+        assert rows[0].username == "projected"
+        assert "password" not in rows[0]._fields